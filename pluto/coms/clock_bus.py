@@ -0,0 +1,205 @@
+import os
+import mmap
+import select
+import struct
+import tempfile
+
+import pandas as pd
+
+from pluto.control.clock import events
+
+# single producer, single consumer ring buffer of clock events in shared
+# memory, for processes running on the same host.
+# the buffer is a memory mapped file (in /dev/shm when available) and the
+# consumer is woken up through a named pipe (one byte per record). The
+# producer waits on a second pipe when the buffer is full, the consumer
+# writes to it when it releases a record of a full buffer.
+
+# maximum number of signals per event and bytes per exchange name
+MAX_SIGNALS = 32
+EXCHANGE_SIZE = 16
+
+# the sequences are on separate cache lines
+_WRITE_SEQ = 0
+_READ_SEQ = 64
+_HEADER_SIZE = 128
+
+_EVENT = struct.Struct('<qBB6x')
+_SIGNAL = struct.Struct('<qB7x{}s'.format(EXCHANGE_SIZE))
+_SEQ = struct.Struct('<Q')
+
+RECORD_SIZE = _EVENT.size + MAX_SIGNALS * _SIGNAL.size
+
+_DEFAULT_CAPACITY = 1024
+
+
+def _shm_directory():
+    if os.path.isdir('/dev/shm'):
+        return '/dev/shm'
+    return tempfile.gettempdir()
+
+
+class _ClockBus(object):
+    _ack_flags = os.O_RDWR
+
+    def __init__(self, path):
+        self._path = path
+        with open(path, 'r+b') as f:
+            self._buffer = mmap.mmap(f.fileno(), 0)
+        self._capacity = (len(self._buffer) - _HEADER_SIZE) // RECORD_SIZE
+        # both ends open the pipes for reading and writing so that opening
+        # never blocks (linux).
+        self._fifo = os.open(path + '.fifo', os.O_RDWR)
+        self._ack = os.open(path + '.ack', self._ack_flags)
+
+    @property
+    def path(self):
+        return self._path
+
+    def _get_seq(self, offset):
+        return _SEQ.unpack_from(self._buffer, offset)[0]
+
+    def _set_seq(self, offset, value):
+        _SEQ.pack_into(self._buffer, offset, value)
+
+    def _offset(self, seq):
+        return _HEADER_SIZE + (seq % self._capacity) * RECORD_SIZE
+
+    def close(self):
+        self._buffer.close()
+        os.close(self._fifo)
+        os.close(self._ack)
+
+
+class ClockBusWriter(_ClockBus):
+    @classmethod
+    def create(cls, name, capacity=_DEFAULT_CAPACITY):
+        '''Creates the shared memory files of a bus.
+
+        Parameters
+        ----------
+        name: str
+        capacity: int
+            number of records of the ring buffer
+
+        Returns
+        -------
+        ClockBusWriter
+        '''
+        path = os.path.join(_shm_directory(), 'pluto_clock_bus_' + name)
+        with open(path, 'wb') as f:
+            f.truncate(_HEADER_SIZE + capacity * RECORD_SIZE)
+        for fifo in (path + '.fifo', path + '.ack'):
+            if os.path.exists(fifo):
+                os.remove(fifo)
+            os.mkfifo(fifo)
+        return cls(path)
+
+    def put(self, clock_event):
+        '''Writes a clock event to the bus. Blocks while the buffer is full.
+
+        Parameters
+        ----------
+        clock_event: pluto.control.clock.events.ClockEvent
+        '''
+        signals = clock_event.signals
+        if len(signals) > MAX_SIGNALS:
+            raise ValueError(
+                'Clock events can have at most {} signals'.format(MAX_SIGNALS))
+        # struct would silently truncate the longer names
+        exchanges = [signal.exchange.encode('ascii') for signal in signals]
+        for exchange in exchanges:
+            if len(exchange) > EXCHANGE_SIZE:
+                raise ValueError(
+                    'Exchange names can have at most {} bytes, got {!r}'.format(
+                        EXCHANGE_SIZE, exchange.decode('ascii')))
+
+        seq = self._get_seq(_WRITE_SEQ)
+        capacity = self._capacity
+        while seq - self._get_seq(_READ_SEQ) >= capacity:
+            # wait until the reader releases a record. Acknowledgements of
+            # previous full buffers are consumed by the loop.
+            os.read(self._ack, 1)
+
+        buffer = self._buffer
+        offset = self._offset(seq)
+        _EVENT.pack_into(
+            buffer,
+            offset,
+            clock_event.timestamp.value,
+            clock_event.event,
+            len(signals))
+        offset += _EVENT.size
+        for signal, exchange in zip(signals, exchanges):
+            _SIGNAL.pack_into(
+                buffer,
+                offset,
+                signal.nanos,
+                signal.event,
+                exchange)
+            offset += _SIGNAL.size
+
+        # publish the record, then wake up the reader
+        self._set_seq(_WRITE_SEQ, seq + 1)
+        os.write(self._fifo, b'\x00')
+
+    def unlink(self):
+        self.close()
+        for path in (self._path, self._path + '.fifo', self._path + '.ack'):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+class ClockBusReader(_ClockBus):
+    # the reader never blocks on the acknowledgements
+    _ack_flags = os.O_RDWR | os.O_NONBLOCK
+
+    def get(self, timeout=None):
+        '''Reads the next clock event from the bus.
+
+        Parameters
+        ----------
+        timeout: float
+            seconds to wait for an event. Waits indefinitely if None.
+
+        Returns
+        -------
+        pluto.control.clock.events.ClockEvent
+            the next event or None if the timeout has elapsed.
+        '''
+        fifo = self._fifo
+        if timeout is not None:
+            ready, _, _ = select.select([fifo], [], [], timeout)
+            if not ready:
+                return
+        os.read(fifo, 1)
+
+        seq = self._get_seq(_READ_SEQ)
+        buffer = self._buffer
+        offset = self._offset(seq)
+        ts, evt, num_signals = _EVENT.unpack_from(buffer, offset)
+        offset += _EVENT.size
+        signals = []
+        for _ in range(num_signals):
+            s_ts, s_evt, exchange = _SIGNAL.unpack_from(buffer, offset)
+            signals.append(events.Signal(
+                s_ts,
+                s_evt,
+                exchange.rstrip(b'\x00').decode('ascii')))
+            offset += _SIGNAL.size
+
+        # release the record, then wake up the writer if it might be waiting
+        full = self._get_seq(_WRITE_SEQ) - seq >= self._capacity
+        self._set_seq(_READ_SEQ, seq + 1)
+        if full:
+            try:
+                os.write(self._ack, b'\x00')
+            except BlockingIOError:
+                # the pipe is full of acknowledgements, the writer will wake up
+                pass
+        return events.ClockEvent(
+            pd.Timestamp(ts, tz='UTC'),
+            evt,
+            signals)
@@ -37,7 +37,27 @@ def to_proto_timestamp(dt):
     return ts
 
 
+def nanos_to_proto_timestamp(nanos):
+    """
+
+    Parameters
+    ----------
+    nanos: int
+        nanoseconds since the epoch (utc)
+
+    Returns
+    -------
+    google.protobuf.timestamp_pb2.Timestamp
+    """
+    ts = pr_ts.Timestamp()
+    ts.FromNanoseconds(nanos)
+    return ts
+
+
 def to_datetime(proto_ts):
+    if isinstance(proto_ts, Timestamp):
+        # in-process events already hold pandas timestamps
+        return proto_ts
     return Timestamp(proto_ts.ToDatetime(), tz='UTC')
 
 
@@ -405,66 +425,81 @@ def from_proto_performance_packet(proto_perf_packet):
     }
 
 
+_CUM_METRICS_FIELDS = (
+    'returns',
+    'pnl',
+    'capital_used',
+    'starting_exposure',
+    'ending_exposure',
+    'starting_value',
+    'ending_value',
+    'starting_cash',
+    'ending_cash',
+    'portfolio_value',
+    'longs_count',
+    'shorts_count',
+    'long_value',
+    'short_value',
+    'long_exposure',
+    'short_exposure',
+    'gross_leverage',
+    'net_leverage')
+
+_PERIOD_METRICS_FIELDS = (
+    'capital_used',
+    'starting_exposure',
+    'ending_exposure',
+    'starting_value',
+    'starting_cash',
+    'returns',
+    'pnl')
+
+_CUM_RISK_METRICS_FIELDS = (
+    'algo_volatility',
+    'benchmark_period_return',
+    'benchmark_volatility',
+    'algorithm_period_return',
+    'alpha',
+    'beta',
+    'sharpe',
+    'sortino',
+    'max_drawdown',
+    'max_leverage',
+    'trading_days',
+    'period_label',
+    'excess_return',
+    'treasury_period_return')
+
+
+def _present_fields(values, fields):
+    # the packets of a session that computes a selection of metrics only
+    # have the fields of those metrics. The missing fields keep the default
+    # value of the message.
+    return {field: values[field] for field in fields
+            if values.get(field) is not None}
+
+
 def to_proto_cum_metrics(cum_perf):
+    # cash_flow isn't in the message
     return metrics.CumulativeMetrics(
         period_open=to_proto_timestamp(cum_perf['period_open']),
         period_close=to_proto_timestamp(cum_perf['period_close']),
-        returns=cum_perf['returns'],
-        pnl=cum_perf['pnl'],
-        capital_used=cum_perf['capital_used'],
-        # cash_flow=cum_perf['cash_flow'],
-        starting_exposure=cum_perf['starting_exposure'],
-        ending_exposure=cum_perf['ending_exposure'],
-        starting_value=cum_perf['starting_value'],
-        ending_value=cum_perf['ending_value'],
-        starting_cash=cum_perf['starting_cash'],
-        ending_cash=cum_perf['ending_cash'],
-        portfolio_value=cum_perf['portfolio_value'],
-        longs_count=cum_perf['longs_count'],
-        shorts_count=cum_perf['shorts_count'],
-        long_value=cum_perf['long_value'],
-        short_value=cum_perf['short_value'],
-        long_exposure=cum_perf['long_exposure'],
-        short_exposure=cum_perf['short_exposure'],
-        gross_leverage=cum_perf['gross_leverage'],
-        net_leverage=cum_perf['net_leverage']
-    )
+        **_present_fields(cum_perf, _CUM_METRICS_FIELDS))
 
 
 def to_proto_period_perf(period_perf):
     return metrics.PeriodMetrics(
-        orders=[to_proto_order(order) for order in period_perf['orders']],
-        transactions=[to_proto_transaction(trc) for trc in period_perf['transactions']],
-        positions=[to_proto_position(pos) for pos in period_perf['positions']],
+        orders=[to_proto_order(order) for order in period_perf.get('orders', ())],
+        transactions=[to_proto_transaction(trc) for trc in period_perf.get('transactions', ())],
+        positions=[to_proto_position(pos) for pos in period_perf.get('positions', ())],
         period_open=to_proto_timestamp(period_perf['period_open']),
         period_close=to_proto_timestamp(period_perf['period_close']),
-        capital_used=period_perf['capital_used'],
-        starting_exposure=period_perf['starting_exposure'],
-        ending_exposure=period_perf['ending_exposure'],
-        starting_value=period_perf['starting_value'],
-        starting_cash=period_perf['starting_cash'],
-        returns=period_perf['returns'],
-        pnl=period_perf['pnl']
-    )
+        **_present_fields(period_perf, _PERIOD_METRICS_FIELDS))
 
 
 def to_proto_cum_risk_metrics(cum_risk_metrics):
     return metrics.CumulativeRiskMetrics(
-        algo_volatility=cum_risk_metrics['algo_volatility'],
-        benchmark_period_return=cum_risk_metrics['benchmark_period_return'],
-        benchmark_volatility=cum_risk_metrics['benchmark_volatility'],
-        algorithm_period_return=cum_risk_metrics['algorithm_period_return'],
-        alpha=cum_risk_metrics['alpha'],
-        beta=cum_risk_metrics['beta'],
-        sharpe=cum_risk_metrics['sharpe'],
-        sortino=cum_risk_metrics['sortino'],
-        max_drawdown=cum_risk_metrics['max_drawdown'],
-        max_leverage=cum_risk_metrics['max_leverage'],
-        trading_days=cum_risk_metrics['trading_days'],
-        period_label=cum_risk_metrics['period_label'],
-        excess_return=cum_risk_metrics['excess_return'],
-        treasury_period_return=cum_risk_metrics['treasury_period_return']
-    )
+        **_present_fields(cum_risk_metrics, _CUM_RISK_METRICS_FIELDS))
 
 
 def to_proto_performance_packet(perf_packet):
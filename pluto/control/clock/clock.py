@@ -3,7 +3,7 @@ from datetime import time
 import pandas as pd
 
 from pluto.trading_calendars import calendar_utils as cu
-from pluto.control.clock.utils import get_generator
+from pluto.control.clock.utils import get_events
 
 
 class StopExecution(Exception):
@@ -27,6 +27,11 @@ class Clock(object):
         self._calendar = None
         self._minute_emission = minute_emission
 
+        self._events = None
+        self._timestamps = None
+        self._event_types = None
+        self._cursor = 0
+
         self._load_attributes(start_dt, end_dt)
 
         # next evt and dt
@@ -38,17 +43,36 @@ class Clock(object):
     def exchange(self):
         return self._exchange
 
+    def events(self):
+        '''
+
+        Returns
+        -------
+        numpy.ndarray
+            the events emitted by this clock over its range
+            (see pluto.control.clock.utils.EVENT_DTYPE)
+        '''
+        return self._events
+
+    def _pop_event(self):
+        cursor = self._cursor
+        # raises an IndexError once all the events have been emitted
+        ts, evt = self._timestamps[cursor], self._event_types[cursor]
+        self._cursor = cursor + 1
+        return ts, evt
+
     def update(self, dt):
         # todo: we should consider reloading when there is a calendar update...
         # todo: should we catch a stop iteration?
         ts, evt = self._nxt_dt, self._nxt_evt
         exchange = self._exchange
-        if dt >= ts:
+        if dt.value >= ts:
+            # only box the timestamp of emitted events
             try:
                 self._nxt_dt, self._nxt_evt = self._next_(dt)
-                return ts, evt, exchange
+                return pd.Timestamp(ts, tz='UTC'), evt, exchange
             except StopExecution:
-                return ts, evt, exchange
+                return pd.Timestamp(ts, tz='UTC'), evt, exchange
         else:
             # don't call next
             # clock is in advance, so will return nothing until it is in-sync
@@ -56,14 +80,14 @@ class Clock(object):
 
     def _next_(self, dt):
         try:
-            return next(self._generator)
-        except StopIteration:
+            return self._pop_event()
+        except IndexError:
             if dt < self._end_dt:
                 self._load_attributes(
                     pd.Timestamp(
                         pd.Timestamp.combine(dt + pd.Timedelta('1 day'), time.min),
                         tz='UTC'))
-                return next(self._generator)
+                return self._pop_event()
             else:
                 # we've reached the end date, reload only if the clock runs forever
                 if self._reload_flag:
@@ -73,7 +97,7 @@ class Clock(object):
                             tz='UTC'))
                     # self._notify(real_dt, dt, clock_pb2.CALENDAR)
                     # print('Current timestamp {} Last timestamp {}'.format(dt, self._end_dt))
-                    return next(self._generator)
+                    return self._pop_event()
                 else:
                     raise StopExecution
 
@@ -84,4 +108,9 @@ class Clock(object):
 
         self._end_dt = end_dt if end_dt else cal.all_sessions[-1]
 
-        self._generator = iter(get_generator(cal, cal.all_sessions))
+        # the events are consumed through a cursor, no timestamp is created
+        # until an event is emitted.
+        self._events = events = get_events(cal, cal.all_sessions)
+        self._timestamps = events['timestamp'].tolist()
+        self._event_types = events['event'].tolist()
+        self._cursor = 0
@@ -0,0 +1,84 @@
+import pandas as pd
+
+from pluto.coms.utils import conversions
+
+from protos import clock_pb2
+
+# plain python clock events. They are passed as-is to in-process
+# controllables and only converted to protobuf messages when crossing a
+# process boundary.
+
+
+class Signal(object):
+    __slots__ = ['nanos', 'event', 'exchange']
+
+    def __init__(self, nanos, event, exchange):
+        '''
+
+        Parameters
+        ----------
+        nanos: int
+            utc nanoseconds
+        event: int
+        exchange: str
+        '''
+        self.nanos = nanos
+        self.event = event
+        self.exchange = exchange
+
+    @property
+    def timestamp(self):
+        return pd.Timestamp(self.nanos, tz='UTC')
+
+    def to_proto(self):
+        return clock_pb2.Signal(
+            timestamp=conversions.nanos_to_proto_timestamp(self.nanos),
+            event=self.event,
+            exchange=self.exchange)
+
+
+class ClockEvent(object):
+    __slots__ = ['timestamp', 'event', 'signals', '_proto']
+
+    def __init__(self, timestamp, event, signals):
+        '''
+
+        Parameters
+        ----------
+        timestamp: pandas.Timestamp
+        event: int
+        signals: typing.List[Signal]
+        '''
+        self.timestamp = timestamp
+        self.event = event
+        self.signals = signals
+        self._proto = None
+
+    def to_proto(self):
+        proto = self._proto
+        if proto is None:
+            # built once, even if the event is sent to many processes
+            self._proto = proto = clock_pb2.ClockEvent(
+                timestamp=conversions.to_proto_timestamp(self.timestamp),
+                event=self.event,
+                signals=[signal.to_proto() for signal in self.signals])
+        return proto
+
+    def SerializeToString(self):
+        return self.to_proto().SerializeToString()
+
+
+def to_proto(clock_event):
+    '''
+
+    Parameters
+    ----------
+    clock_event: typing.Union[ClockEvent, protos.clock_pb2.ClockEvent]
+
+    Returns
+    -------
+    protos.clock_pb2.ClockEvent
+    '''
+    if isinstance(clock_event, ClockEvent):
+        return clock_event.to_proto()
+    return clock_event
@@ -30,6 +30,23 @@ from protos.clock_pb2 import (
 cdef np.int64_t _nanos_in_minute = 60000000000
 NANOS_IN_MINUTE = _nanos_in_minute
 
+# (timestamp, event) pairs, timestamps are utc nanoseconds
+EVENT_DTYPE = np.dtype([
+    ('timestamp', np.int64),
+    ('event', np.uint8)])
+
+
+cdef inline Py_ssize_t _minute_index(np.int64_t open_nano,
+                                     Py_ssize_t num_minutes,
+                                     np.int64_t nano):
+    # equivalent to searchsorted on the minutes of the session
+    cdef Py_ssize_t idx
+    if nano <= open_nano:
+        return 0
+    idx = (nano - open_nano + _nanos_in_minute - 1) // _nanos_in_minute
+    return idx if idx < num_minutes else num_minutes
+
+
 cdef class MinuteSimulationClock:
     cdef bool minute_emission
     cdef np.int64_t[:] market_opens_nanos, market_closes_nanos, bts_nanos, \
@@ -51,7 +68,8 @@ cdef class MinuteSimulationClock:
         self.bts_nanos = before_trading_start_minutes.values.astype(np.int64)
         self.trade_end_nanos = trade_end_minutes.values.astype(np.int64)
 
-        self.minutes_by_session = self.calc_minutes_by_session()
+        # the minutes are only boxed into timestamps when iterating
+        self.minutes_by_session = None
 
     @cython.boundscheck(False)
     @cython.wraparound(False)
@@ -73,9 +91,112 @@ cdef class MinuteSimulationClock:
             )
         return minutes_by_session
 
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    cpdef np.ndarray session_events(self, Py_ssize_t session_idx):
+        """
+        Returns the events of a session as an array of EVENT_DTYPE. The
+        events are the same as the ones yielded by the iterator, without
+        creating any timestamp.
+        """
+        cdef np.int64_t open_nano = self.market_opens_nanos[session_idx]
+        cdef np.int64_t close_nano = self.market_closes_nanos[session_idx]
+        cdef np.int64_t bts_nano = self.bts_nanos[session_idx]
+        cdef np.int64_t trade_end_nano = self.trade_end_nanos[session_idx]
+        cdef Py_ssize_t num_minutes = \
+            (close_nano - open_nano) // _nanos_in_minute + 1
+        cdef Py_ssize_t per_minute = 2 if self.minute_emission else 1
+        cdef Py_ssize_t trade_end_idx = _minute_index(
+            open_nano, num_minutes, trade_end_nano)
+        cdef Py_ssize_t bts_idx, num_events, i = 0
+        cdef bool emit_bts = bts_nano <= close_nano
+        cdef np.ndarray[np.int64_t, ndim=1] timestamps
+        cdef np.ndarray[np.uint8_t, ndim=1] events
+        cdef np.ndarray result
+
+        if emit_bts:
+            bts_idx = _minute_index(open_nano, num_minutes, bts_nano)
+            # minutes before and after before_trading_start, until trade end
+            num_events = (bts_idx +
+                          max(trade_end_idx - bts_idx, 0)) * per_minute + 4
+        else:
+            # before_trading_start is after the last close, so don't emit
+            # it, all the regular minutes are emitted
+            bts_idx = trade_end_idx
+            num_events = num_minutes * per_minute + 3
+
+        timestamps = np.empty(num_events, dtype=np.int64)
+        events = np.empty(num_events, dtype=np.uint8)
+
+        timestamps[i] = self.sessions_nanos[session_idx]
+        events[i] = SESSION_START
+        i += 1
+
+        i = self._fill_minutes(timestamps, events, i, open_nano, 0, bts_idx)
+
+        if emit_bts:
+            timestamps[i] = bts_nano
+            events[i] = BEFORE_TRADING_START
+            i += 1
+            i = self._fill_minutes(
+                timestamps, events, i, open_nano, bts_idx, trade_end_idx)
+
+        timestamps[i] = trade_end_nano
+        events[i] = TRADE_END
+        i += 1
+
+        if not emit_bts:
+            i = self._fill_minutes(
+                timestamps, events, i, open_nano, trade_end_idx, num_minutes)
+
+        timestamps[i] = close_nano
+        events[i] = SESSION_END
+
+        result = np.empty(num_events, dtype=EVENT_DTYPE)
+        result['timestamp'] = timestamps
+        result['event'] = events
+        return result
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    cdef Py_ssize_t _fill_minutes(self,
+                                  np.ndarray[np.int64_t, ndim=1] timestamps,
+                                  np.ndarray[np.uint8_t, ndim=1] events,
+                                  Py_ssize_t i,
+                                  np.int64_t open_nano,
+                                  Py_ssize_t start,
+                                  Py_ssize_t stop):
+        cdef Py_ssize_t idx
+        cdef np.int64_t minute
+        cdef bool minute_emission = self.minute_emission
+        for idx in range(start, stop):
+            minute = open_nano + idx * _nanos_in_minute
+            timestamps[i] = minute
+            events[i] = BAR
+            i += 1
+            if minute_emission:
+                timestamps[i] = minute
+                events[i] = MINUTE_END
+                i += 1
+        return i
+
+    def events(self):
+        """
+        Returns the events of all the sessions as a single array of
+        EVENT_DTYPE.
+        """
+        num_sessions = len(self.sessions_nanos)
+        if num_sessions == 0:
+            return np.empty(0, dtype=EVENT_DTYPE)
+        return np.concatenate([
+            self.session_events(idx) for idx in range(num_sessions)])
+
     def __iter__(self):
         minute_emission = self.minute_emission
 
+        if self.minutes_by_session is None:
+            self.minutes_by_session = self.calc_minutes_by_session()
+
         for idx, session_nano in enumerate(self.sessions_nanos):
             yield pd.Timestamp(session_nano, tz='UTC'), SESSION_START
 
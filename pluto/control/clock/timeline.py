@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+
+from pluto.control.clock import events as clock_events
+
+SIGNAL_DTYPE = np.dtype([
+    ('tick', np.int64),
+    ('timestamp', np.int64),
+    ('event', np.int64),
+    ('exchange', np.int64)])
+
+# number of loop events that are boxed into timestamps at once
+_DEFAULT_CHUNK_SIZE = 1440
+
+
+def _emission_ticks(reached, timestamps, start):
+    # a clock emits at most one event per loop tick: an event is emitted on
+    # the first tick that is at or after its timestamp, but never before the
+    # tick that follows the emission of the previous event.
+    earliest = np.maximum(
+        np.searchsorted(reached, timestamps, side='left'),
+        start)
+    offsets = np.arange(len(timestamps))
+    return np.maximum.accumulate(earliest - offsets) + offsets
+
+
+class Timeline(object):
+    '''Merges the events of all the registered exchange clocks into a single
+    array of signals, sorted by the loop tick at which they are emitted.'''
+
+    def __init__(self, events, chunk_size=_DEFAULT_CHUNK_SIZE):
+        '''
+
+        Parameters
+        ----------
+        events: numpy.ndarray
+            the events of the loop (see pluto.control.clock.utils.EVENT_DTYPE)
+        chunk_size: int
+        '''
+        self._timestamps = timestamps = events['timestamp']
+        self._events = events['event']
+        # the loop timestamps are not sorted (before trading start and trade
+        # end are stamped before the minutes that precede them), a tick has
+        # reached every timestamp up to the maximum of the previous ticks.
+        self._reached = np.maximum.accumulate(timestamps)
+        self._chunk_size = chunk_size
+
+        self._exchanges = []
+        self._signals = np.empty(0, dtype=SIGNAL_DTYPE)
+        self._bounds = np.zeros(len(events) + 1, dtype=np.int64)
+
+        # index of the next tick to be emitted
+        self._position = 0
+
+    def __len__(self):
+        return len(self._timestamps)
+
+    @property
+    def exchanges(self):
+        return self._exchanges
+
+    @property
+    def signals(self):
+        return self._signals
+
+    def add_exchange(self, exchange, events):
+        '''Compiles the events of an exchange clock into the timeline. The
+        exchange starts emitting at the next tick.
+
+        Parameters
+        ----------
+        exchange: str
+        events: numpy.ndarray
+            the events of the exchange clock
+        '''
+        num_ticks = len(self._timestamps)
+
+        ticks = _emission_ticks(
+            self._reached,
+            events['timestamp'],
+            self._position)
+        # events past the last tick are never emitted
+        emitted = ticks < num_ticks
+
+        signals = np.empty(np.count_nonzero(emitted), dtype=SIGNAL_DTYPE)
+        signals['tick'] = ticks[emitted]
+        signals['timestamp'] = events['timestamp'][emitted]
+        signals['event'] = events['event'][emitted]
+        signals['exchange'] = len(self._exchanges)
+        self._exchanges.append(exchange)
+
+        merged = np.concatenate([self._signals, signals])
+        # stable sort, so that signals of a same tick are ordered by exchange
+        # registration
+        self._signals = merged = merged[
+            np.argsort(merged['tick'], kind='mergesort')]
+        self._bounds = np.searchsorted(
+            merged['tick'],
+            np.arange(num_ticks + 1),
+            side='left')
+
+    def emit(self, tick, event):
+        '''Returns the signals of the given tick and moves the timeline past
+        it.
+
+        Parameters
+        ----------
+        tick: int
+        event: int
+            the loop event of the tick
+
+        Returns
+        -------
+        list
+        '''
+        self._position = tick + 1
+        lo, hi = self._bounds[tick], self._bounds[tick + 1]
+        if lo == hi:
+            return []
+        signals = self._signals[lo:hi]
+        exchanges = self._exchanges
+        # like the clocks, signals are stamped with the loop event
+        return [
+            clock_events.Signal(ts, event, exchanges[exc])
+            for ts, exc in zip(
+                signals['timestamp'].tolist(),
+                signals['exchange'].tolist())]
+
+    def __iter__(self):
+        '''
+
+        Yields
+        ------
+        tuple
+            (tick, pandas.Timestamp, int) triplets
+        '''
+        timestamps = self._timestamps
+        events = self._events
+        num_ticks = len(timestamps)
+        chunk_size = self._chunk_size
+
+        start = self._position
+        while start < num_ticks:
+            stop = min(start + chunk_size, num_ticks)
+            # box the timestamps of a whole slice at once
+            dts = pd.to_datetime(timestamps[start:stop], utc=True)
+            for tick, dt, evt in zip(
+                    range(start, stop),
+                    dts,
+                    events[start:stop].tolist()):
+                self._position = tick
+                yield tick, dt, evt
+            start = stop
@@ -2,6 +2,9 @@ import pandas as pd
 
 from pluto.control.clock import sim_engine as sim
 
+# (timestamp, event) pairs emitted by a clock, timestamps are utc nanoseconds
+EVENT_DTYPE = sim.EVENT_DTYPE
+
 def get_generator(calendar, sessions, minute_emission=False, frequency='day'):
     # loops every x frequency
 
@@ -32,4 +35,18 @@ def get_generator(calendar, sessions, minute_emission=False, frequency='day'):
             pd.DatetimeIndex([ts - pd.Timedelta(minutes=2) for ts in execution_opens]),
             execution_closes,
             minute_emission
-        )
\ No newline at end of file
+        )
+
+def get_events(calendar, sessions, minute_emission=False, frequency='day'):
+    '''
+
+    Returns
+    -------
+    numpy.ndarray
+        the events emitted over the sessions, as an array of EVENT_DTYPE
+    '''
+    return get_generator(
+        calendar,
+        sessions,
+        minute_emission,
+        frequency).events()
@@ -0,0 +1,151 @@
+import collections
+import threading
+import time
+
+from pluto.control.controllable import commands
+
+from protos.clock_pb2 import (
+    BAR,
+    MINUTE_END)
+
+# queue policies when the controllable falls behind
+BLOCK = 'block'
+COALESCE = 'coalesce'
+
+_COALESCED_EVENTS = frozenset((BAR, MINUTE_END))
+
+
+def _coalescable(command):
+    return isinstance(command, commands.ClockUpdate) \
+           and command.event in _COALESCED_EVENTS
+
+
+class CommandQueue(object):
+    '''Bounded queue of commands.
+
+    With the coalesce policy, a BAR or MINUTE_END clock update replaces the
+    pending update of the same event type, as long as no other command
+    (session start/end, account update etc.) was queued in between. So a
+    controllable that falls behind skips the stale bars and runs on the
+    latest one.
+
+    The producer blocks while the queue is full. Once the queue is closed,
+    the commands are no longer queued.'''
+
+    def __init__(self, maxsize=0, policy=BLOCK):
+        '''
+
+        Parameters
+        ----------
+        maxsize: int
+            maximum number of queued commands. If 0, the queue is unbounded.
+        policy: str
+            BLOCK or COALESCE
+        '''
+        if policy not in (BLOCK, COALESCE):
+            raise ValueError('Unknown queue policy {}'.format(policy))
+        self._maxsize = maxsize
+        self._coalesce = policy == COALESCE
+
+        # (enqueue time, command) pairs
+        self._commands = collections.deque()
+        self._condition = threading.Condition()
+        self._closed = False
+
+        self._max_depth = 0
+        self._coalesced = 0
+        self._lag = 0.0
+
+    @property
+    def depth(self):
+        return len(self._commands)
+
+    @property
+    def max_depth(self):
+        return self._max_depth
+
+    @property
+    def coalesced(self):
+        '''number of commands that were dropped by coalescing'''
+        return self._coalesced
+
+    @property
+    def lag(self):
+        '''seconds spent in the queue by the last command that was taken'''
+        return self._lag
+
+    def metrics(self):
+        with self._condition:
+            return {
+                'depth': len(self._commands),
+                'max_depth': self._max_depth,
+                'coalesced': self._coalesced,
+                'lag': self._lag}
+
+    def _replace(self, command):
+        # replaces the pending command of the same event type, in the tail
+        # of coalescable commands.
+        event = command.event
+        cmds = self._commands
+        for i in range(len(cmds) - 1, -1, -1):
+            pending = cmds[i][1]
+            if not _coalescable(pending):
+                return False
+            if pending.event == event:
+                del cmds[i]
+                cmds.append((time.monotonic(), command))
+                self._coalesced += 1
+                return True
+        return False
+
+    def put(self, command):
+        '''
+
+        Returns
+        -------
+        bool
+            False if the queue is closed, and the command wasn't queued.
+        '''
+        with self._condition:
+            if self._closed:
+                return False
+            if self._coalesce and _coalescable(command) and self._replace(command):
+                self._condition.notify_all()
+                return True
+            cmds = self._commands
+            maxsize = self._maxsize
+            while maxsize and len(cmds) >= maxsize:
+                self._condition.wait()
+                if self._closed:
+                    return False
+            cmds.append((time.monotonic(), command))
+            depth = len(cmds)
+            if depth > self._max_depth:
+                self._max_depth = depth
+            self._condition.notify_all()
+            return True
+
+    def get(self):
+        with self._condition:
+            cmds = self._commands
+            while not cmds:
+                self._condition.wait()
+            t, command = cmds.popleft()
+            self._lag = time.monotonic() - t
+            self._condition.notify_all()
+            return command
+
+    def close(self):
+        '''Closes the queue and wakes up the blocked producers.
+
+        Returns
+        -------
+        list
+            the commands that were still queued
+        '''
+        with self._condition:
+            self._closed = True
+            pending = [command for _, command in self._commands]
+            self._commands.clear()
+            self._condition.notify_all()
+            return pending
@@ -58,6 +58,24 @@ class AccountUpdate(Command):
     def _execute(self, controllable, request):
         controllable.update_blotter(request)
 
+class Acknowledge(Command):
+    __slots__ = ['_callback']
+
+    def __init__(self, callback, timestamp):
+        '''Calls back with the timestamp once all the previously queued
+        commands have been executed.
+
+        Parameters
+        ----------
+        callback: callable
+        timestamp: google.protobuf.timestamp_pb2.Timestamp
+        '''
+        super(Acknowledge, self).__init__(None, timestamp)
+        self._callback = callback
+
+    def _execute(self, controllable, request):
+        self._callback(request)
+
 class ClockUpdate(Command):
     __slots__ = [
         '_perf_writer',
@@ -87,6 +105,10 @@ class ClockUpdate(Command):
         self._frequency_filter = frequency_filter
         self._state_store = state_store
 
+    @property
+    def event(self):
+        return self._request.event
+
     def _execute(self, controllable, request):
         # todo: what about capital updates etc? => each request is bound to a function
         # ex:
@@ -111,6 +133,7 @@ class ClockUpdate(Command):
             elif e == SESSION_END:
                 packet, end = controllable.session_end(dt)
                 writer.performance_update(packet, end)
+                self._state_store.session_end()
                 if end:
                     raise StopExecution
             elif e == MINUTE_END:
@@ -126,7 +149,6 @@ class ClockUpdate(Command):
                     # a different exchange)
                     controllable.bar(dt)
 
-                # todo: non-blocking!
                 # todo: PROBLEM: we might have some conflicts in state, since we could have
                 # multiple controllables with the same session_id running in different
                 # modes...
@@ -157,7 +157,8 @@ class Controllable(ABC):
                    data_frequency,
                    arena,
                    look_back,
-                   cancel_policy):
+                   cancel_policy,
+                   metrics=None):
         '''
 
         Parameters
@@ -173,6 +174,8 @@ class Controllable(ABC):
         arena: str
         look_back: int
         cancel_policy: str
+        metrics: typing.Iterable[str]
+            metric fields to compute. If None, all the metrics are computed.
         '''
 
         uni = universes.get_universe(universe)
@@ -255,7 +258,8 @@ class Controllable(ABC):
             capital,
             data_frequency,
             start_dt,
-            look_back)
+            look_back,
+            fields=metrics)
 
         self._blotter = blotter = self._create_blotter(
             session_id,
@@ -565,6 +569,7 @@ class Controllable(ABC):
             state.mode,
             state.look_back)
 
+        self._metrics_tracker.restore_state(state.metrics_tracker_state)
         ss.set_state(state.session_state, self._sync_state_tracker)
         self._current_dt = conversions.to_datetime(state.checkpoint)
 
@@ -0,0 +1,204 @@
+import abc
+import collections
+
+# emission policies of the minute performance packets. Daily packets are
+# always emitted.
+
+MINUTE = 'minute'
+EVERY = 'every'
+CHANGE = 'change'
+SESSION = 'session'
+
+# the minute packets that are not emitted are folded into the next emitted
+# packet. Note: the pnl and capital_used of minute packets are already
+# accumulated since the start of the session, so the last value is kept,
+# like for the other (level) fields. Only the orders and transactions are
+# per minute and need to be merged.
+# the daily packet only contains the orders and transactions that were not
+# emitted in a minute packet of the session. The orders and transactions are
+# records (see pluto.finance.records) that are replaced when they change, so
+# they are compared by identity.
+
+
+class EmissionPolicy(abc.ABC):
+    def start_of_session(self):
+        pass
+
+    @abc.abstractmethod
+    def emit(self, packet):
+        '''
+
+        Parameters
+        ----------
+        packet: dict
+            minute performance packet
+
+        Returns
+        -------
+        bool
+            True if the packet must be emitted.
+        '''
+        raise NotImplementedError
+
+
+class Every(EmissionPolicy):
+    '''Emits every n minutes of a session.'''
+
+    def __init__(self, n):
+        if n < 1:
+            raise ValueError('n must be positive')
+        self._n = n
+        self._count = 0
+
+    def start_of_session(self):
+        self._count = 0
+
+    def emit(self, packet):
+        self._count = count = self._count + 1
+        if count == self._n:
+            self._count = 0
+            return True
+        return False
+
+
+class OnChange(EmissionPolicy):
+    '''Emits when one of the given cumulative fields has changed since the
+    last emitted packet.'''
+
+    def __init__(self, fields=('pnl', 'capital_used', 'portfolio_value')):
+        self._fields = fields
+        self._last = None
+
+    def start_of_session(self):
+        self._last = None
+
+    def emit(self, packet):
+        cumulative = packet['cumulative_perf']
+        values = tuple(cumulative.get(field) for field in self._fields)
+        if values != self._last:
+            self._last = values
+            return True
+        return False
+
+
+class SessionEnd(EmissionPolicy):
+    '''Only emits the daily packets.'''
+
+    def emit(self, packet):
+        return False
+
+
+def from_string(spec):
+    '''
+
+    Parameters
+    ----------
+    spec: str
+        'minute', 'every:<n>', 'change' or 'session'
+
+    Returns
+    -------
+    EmissionPolicy
+        None if every packet must be emitted.
+    '''
+    name, _, arg = spec.partition(':')
+    if name == MINUTE:
+        return
+    elif name == EVERY:
+        return Every(int(arg))
+    elif name == CHANGE:
+        return OnChange(tuple(arg.split(','))) if arg else OnChange()
+    elif name == SESSION:
+        return SessionEnd()
+    raise ValueError('Unknown emission policy {}'.format(spec))
+
+
+def _merge_orders(pending, orders):
+    # an order can be modified in many minutes, we keep its last state.
+    merged = collections.OrderedDict((order['id'], order) for order in pending)
+    for order in orders:
+        merged[order['id']] = order
+    return list(merged.values())
+
+
+def _fold(pending, packet):
+    if pending is None:
+        return packet
+    pending_perf = pending['minute_perf']
+    perf = packet['minute_perf']
+    if 'orders' in perf:
+        perf['orders'] = _merge_orders(pending_perf.get('orders', ()), perf['orders'])
+    if 'transactions' in perf:
+        perf['transactions'] = list(pending_perf.get('transactions', ())) + perf['transactions']
+    return packet
+
+
+def _not_emitted(perf, emitted_orders, emitted_transactions):
+    if 'orders' in perf:
+        perf['orders'] = [
+            order for order in perf['orders']
+            if emitted_orders.get(order['id']) is not order]
+    if 'transactions' in perf:
+        perf['transactions'] = [
+            txn for txn in perf['transactions']
+            if id(txn) not in emitted_transactions]
+
+
+class Emitter(object):
+    '''Filters the performance packets with an emission policy, folding the
+    skipped minute packets into the next emitted one.'''
+
+    def __init__(self, policy=None):
+        '''
+
+        Parameters
+        ----------
+        policy: EmissionPolicy
+            if None, every packet is emitted.
+        '''
+        self._policy = policy
+        self._pending = None
+        self._emitted_orders = {}
+        # id -> transaction, the transactions are kept to keep their ids.
+        self._emitted_transactions = {}
+
+    def _emitted(self, perf):
+        emitted_orders = self._emitted_orders
+        for order in perf.get('orders', ()):
+            emitted_orders[order['id']] = order
+        emitted_transactions = self._emitted_transactions
+        for txn in perf.get('transactions', ()):
+            emitted_transactions[id(txn)] = txn
+
+    def update(self, packet, end):
+        '''
+
+        Parameters
+        ----------
+        packet: dict
+        end: bool
+
+        Returns
+        -------
+        dict
+            the packet to emit or None
+        '''
+        policy = self._policy
+        if 'minute_perf' not in packet:
+            # the daily packet covers the skipped minutes of the session
+            _not_emitted(
+                packet['daily_perf'],
+                self._emitted_orders,
+                self._emitted_transactions)
+            self._emitted_orders.clear()
+            self._emitted_transactions.clear()
+            self._pending = None
+            if policy:
+                policy.start_of_session()
+            return packet
+        packet = _fold(self._pending, packet)
+        if end or not policy or policy.emit(packet):
+            self._pending = None
+            self._emitted(packet['minute_perf'])
+            return packet
+        self._pending = packet
@@ -0,0 +1,197 @@
+import queue
+import threading
+import time
+
+# persistence of the performance packets and states on a dedicated writer
+# thread, so that the command thread never waits on the disk.
+# the tasks are executed in submission order. The queue is bounded: when
+# the writer falls behind, the command thread blocks on submission instead
+# of buffering without limit.
+# the submitted values are never mutated after submission: the states are
+# serialized bytes, and the performance packets are built for each emission
+# (with immutable order and transaction records).
+
+# durability of the written files
+# the files are flushed, but never fsynced
+NONE = 'none'
+# fsynced at most every sync interval, and at the end of each session
+BATCHED = 'batched'
+# fsynced at the end of each session
+SESSION_END = 'session_end'
+
+_DEFAULT_CAPACITY = 256
+_DEFAULT_SYNC_INTERVAL = 1.0
+
+_STOP = object()
+
+
+class Durability(object):
+    __slots__ = ['mode', 'interval']
+
+    def __init__(self, mode=BATCHED, interval=_DEFAULT_SYNC_INTERVAL):
+        '''
+
+        Parameters
+        ----------
+        mode: str
+            NONE, BATCHED or SESSION_END
+        interval: float
+            seconds between two fsync in batched mode
+        '''
+        if mode not in (NONE, BATCHED, SESSION_END):
+            raise ValueError('Unknown durability {}'.format(mode))
+        self.mode = mode
+        self.interval = interval
+
+    def sync_due(self, last_sync, session_end):
+        '''
+
+        Parameters
+        ----------
+        last_sync: float
+            monotonic time of the last fsync
+        session_end: bool
+
+        Returns
+        -------
+        bool
+            True if the files must be fsynced.
+        '''
+        mode = self.mode
+        if mode == NONE:
+            return False
+        elif session_end:
+            return True
+        elif mode == BATCHED:
+            return time.monotonic() - last_sync >= self.interval
+        return False
+
+
+class Pipeline(object):
+    '''Executes the persistence tasks on a dedicated thread.'''
+
+    def __init__(self, capacity=_DEFAULT_CAPACITY, durability=None):
+        '''
+
+        Parameters
+        ----------
+        capacity: int
+            maximum number of pending tasks.
+        durability: Durability
+            If None, the files are fsynced in batches.
+        '''
+        self._queue = queue.Queue(capacity)
+        self._durability = durability if durability else Durability()
+        self._error = None
+        self._thread = thread = threading.Thread(target=self._run, daemon=True)
+        thread.start()
+
+    @property
+    def durability(self):
+        return self._durability
+
+    def submit(self, function, *args):
+        '''Queues a task, blocks while the queue is full.
+
+        Parameters
+        ----------
+        function: typing.Callable
+        args:
+            arguments of the function
+        '''
+        # a failed write can't be skipped
+        self._raise_error()
+        self._queue.put((function, args))
+
+    def _raise_error(self):
+        error = self._error
+        if error:
+            raise RuntimeError('Persistence failed') from error
+
+    def _run(self):
+        q = self._queue
+        while True:
+            item = q.get()
+            try:
+                if item is _STOP:
+                    return
+                function, args = item
+                if self._error is None:
+                    function(*args)
+            except Exception as e:
+                self._error = e
+            finally:
+                q.task_done()
+
+    def join(self):
+        '''Waits until the submitted tasks are executed. Raises if one of
+        them failed.'''
+        self._queue.join()
+        self._raise_error()
+
+    def channel(self):
+        '''
+
+        Returns
+        -------
+        Channel
+            a channel to share the thread of the pipeline with other
+            services.
+        '''
+        return Channel(self)
+
+    def close(self):
+        '''Stops the writer thread. Raises if one of the tasks failed.'''
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._raise_error()
+
+
+class Channel(object):
+    '''Tasks of one service, executed on the thread of a shared pipeline.
+
+    The failures and join of a channel are its own: a failed write of a
+    session doesn't stop the writes of the other sessions.'''
+
+    def __init__(self, pipeline):
+        '''
+
+        Parameters
+        ----------
+        pipeline: Pipeline
+        '''
+        self._pipeline = pipeline
+        self._error = None
+        self._pending = 0
+        self._condition = threading.Condition()
+
+    @property
+    def durability(self):
+        return self._pipeline.durability
+
+    def submit(self, function, *args):
+        self._raise_error()
+        with self._condition:
+            self._pending += 1
+        self._pipeline.submit(self._execute, function, args)
+
+    def _execute(self, function, args):
+        try:
+            if self._error is None:
+                function(*args)
+        except Exception as e:
+            self._error = e
+        finally:
+            with self._condition:
+                self._pending -= 1
+                self._condition.notify_all()
+
+    def _raise_error(self):
+        error = self._error
+        if error:
+            raise RuntimeError('Persistence failed') from error
+
+    def join(self):
+        with self._condition:
+            self._condition.wait_for(lambda: not self._pending)
+        self._raise_error()
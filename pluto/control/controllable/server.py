@@ -1,63 +1,121 @@
 import threading
 import signal
+import time
 from concurrent import futures
 import queue
 import abc
-from functools import partial
 
 import grpc
 import click
+import logbook
 from google.protobuf import empty_pb2 as emp
 
 from pluto.interface.utils import paths, service_access
 from pluto.interface import directory
 from pluto.coms.utils import conversions
+from pluto.coms import clock_bus as bus
 from pluto.control.controllable import commands
+from pluto.control.controllable import command_queue as cq
+from pluto.control.controllable import emission
+from pluto.control.controllable import persistence
 from pluto.control.events_log import events_log
 from pluto.control.controllable.utils import io
+from pluto.control.controllable.utils import columns
+from pluto.control.controllable.utils import checkpoints
+from pluto.finance.metrics import summary
 from pluto.control.controllable.utils import factory
 
 from protos import broker_pb2
+from protos import controller_pb2
 from protos import controllable_pb2
 from protos import controllable_pb2_grpc as cbl_rpc
 from protos import interface_pb2_grpc as itf_rpc
 from protos import interface_pb2 as itf
 from protos.clock_pb2 import (
     BAR,
+    SESSION_END,
     TRADE_END)
 
+log = logbook.Logger('ControllableService')
+
+# seconds between checks of the stop flag while listening to a clock bus
+_LISTEN_TIMEOUT = 0.5
+
 
 class _StateStorage(object):
-    def __init__(self, storage_path, thread_pool):
+    def __init__(self, storage_path, pipeline, session_id, log):
         '''
 
         Parameters
         ----------
         storage_path: str
-        thread_pool: concurrent.futures.ThreadPoolExecutor
+        pipeline: pluto.control.controllable.persistence.Pipeline
+        session_id: str
+        log: pluto.control.events_log.events_log.AbstractEventsLog
+            the checkpoints are recorded in the events log, so that the
+            events it covers can be compacted.
         '''
         self._storage_path = storage_path
-        self._thread_pool = thread_pool
+        self._pipeline = pipeline
+        self._session_id = session_id
+        self._log = log
+        self._writer = checkpoints.CheckpointWriter(storage_path)
+        self._last_sync = time.monotonic()
+        # datetime of the last written state that isn't durable yet
+        self._pending_dt = None
+
+    def _write(self, state, dt):
+        sync = self._pipeline.durability.sync_due(self._last_sync, False)
+        if self._writer.write(state, sync):
+            self._checkpoint(dt)
+        else:
+            # recorded once the state is durable
+            self._pending_dt = dt
+
+    def _sync(self):
+        dt = self._pending_dt
+        if dt is not None and self._pipeline.durability.sync_due(self._last_sync, True):
+            self._writer.sync()
+            self._checkpoint(dt)
 
-    def _write(self, state):
-        # todo: should we append instead of over-writing?
-        with open(self._storage_path, 'wb') as f:
-            f.write(state)
+    def _checkpoint(self, dt):
+        # only the durable states are recorded
+        self._last_sync = time.monotonic()
+        self._pending_dt = None
+        self._log.checkpoint(self._session_id, dt)
 
     def store(self, dt, controllable):
-        self._thread_pool.submit(partial(
+        # the state is serialized on the command thread, and written on
+        # the writer thread
+        self._pipeline.submit(
             self._write,
-            state=controllable.get_state(dt)))
+            controllable.get_state(dt),
+            dt)
+
+    def session_end(self):
+        self._pipeline.submit(self._sync)
 
     def load_state(self):
-        with open(self._storage_path, 'rb') as f:
-            return f.read()
+        return checkpoints.load(self._storage_path)
+
+    def close(self):
+        try:
+            self._pipeline.join()
+        finally:
+            self._writer.close()
+            self._log.close()
 
 
 class _NoStateStorage(object):
     def store(self, dt, controllable):
         pass
 
+    def session_end(self):
+        pass
+
+    def close(self):
+        pass
+
 
 class FrequencyFilter(abc.ABC):
     @abc.abstractmethod
@@ -121,7 +179,7 @@ class _NoneObserver(object):
     def clear(self):
         pass
 
-    def update(self, performance, end):
+    def update(self, performance, end, offset, writer):
         pass
 
     def stream(self):
@@ -132,17 +190,31 @@ class _Observer(object):
     def __init__(self, monitor_stub, file_path, session_id):
         self._stub = monitor_stub
         self._reload = True
-        self._file_path = file_path
+        self._reader = io.PacketReader(file_path)
         self._session_id = session_id
+        # offset of the first packet that wasn't sent to the monitor
+        self._offset = 0
 
     def clear(self):
         self._reload = True
 
-    def update(self, performance, end):
+    def update(self, performance, end, offset, writer):
+        '''
+
+        Parameters
+        ----------
+        performance: bytes
+        end: bool
+        offset: int
+            offset of the performance packet in the file
+        writer: pluto.control.controllable.utils.io.PacketWriter
+        '''
         stub = self._stub
         session_id = self._session_id
         if self._reload == True:
-            self._stream(stub, session_id)
+            # send the packets that were written since the last update
+            writer.flush()
+            self._stream(stub, session_id, offset)
             self._reload = False
         service_access.invoke(
             stub.PerformanceUpdate,
@@ -150,23 +222,25 @@ class _Observer(object):
                 packet=performance,
                 session_id=session_id,
                 end=end))
+        self._offset = writer.offset
 
     def stream(self):
         session_id = self._session_id
         stub = self._stub
 
-        itr = iter(io.read_perf(self._file_path))
+        itr = iter(self._reader.read(self._offset))
         try:
-            n0 = next(itr)
+            o0, n0 = next(itr)
             while True:
                 try:
-                    n1 = next(itr)
+                    o1, n1 = next(itr)
                     service_access.invoke(
                         stub.PerformanceUpdate,
                         itf.Packet(
                             packet=n0,
                             session_id=session_id))
-                    n0 = n1
+                    self._offset = o0
+                    o0, n0 = o1, n1
                 except StopIteration:
                     service_access.invoke(
                         stub.PerformanceUpdate,
@@ -174,19 +248,28 @@ class _Observer(object):
                             packet=n0,
                             session_id=session_id,
                             end=True))
+                    self._offset = o0
                     break
         except StopIteration:
             pass
 
-        # self._stream(self._stub, self._session_id)
-
-    def _stream(self, stub, session_id):
-        for packet in io.read_perf(self._file_path):
+    def _stream(self, stub, session_id, end_offset):
+        for offset, packet in self._reader.read(self._offset):
+            if offset > end_offset:
+                break
             service_access.invoke(
                 stub.PerformanceUpdate,
                 itf.Packet(
                     packet=packet,
                     session_id=session_id))
+            self._offset = offset
+
+
+def _packet_timestamp(packet):
+    # period end of a packet of a performance file in the previous format
+    proto = controller_pb2.PerformancePacket()
+    proto.ParseFromString(packet)
+    return proto.period_perf.period_close.ToNanoseconds()
 
 
 class _PerformanceWriter(object):
@@ -197,16 +280,44 @@ class _PerformanceWriter(object):
     # we also have a reader (which is a writer observer)
     # the reader reads the performance in the file and waits for updates from the writer.
     # the updates are read before getting written in the filesystem.
-    def __init__(self, session_id, monitor_stub, file_path, thread_pool):
+    def __init__(self,
+                 session_id,
+                 monitor_stub,
+                 file_path,
+                 thread_pool,
+                 pipeline,
+                 emitter=None,
+                 truncate=False,
+                 column_writer=None):
         '''
 
         Parameters
         ----------
         file_path: str
         thread_pool: concurrent.futures.ThreadPoolExecutor
+        pipeline: pluto.control.controllable.persistence.Pipeline
+            the packets are written on the thread of the pipeline.
+        emitter: pluto.control.controllable.emission.Emitter
+            filters the minute packets. If None, every packet is written.
+        truncate: bool
+            if True, the previous packets are removed.
+        column_writer: pluto.control.controllable.utils.columns.ColumnWriter
+            also writes the packets in columns, for analysis.
         '''
         self._path = file_path
         self._thread_pool = thread_pool
+        self._emitter = emitter
+        self._session_id = session_id
+        self._monitor_stub = monitor_stub
+        self._pipeline = pipeline
+        # synced according to the durability of the pipeline
+        self._writer = io.PacketWriter(
+            file_path,
+            truncate,
+            fsync_interval=None,
+            legacy_timestamp=_packet_timestamp)
+        self._column_writer = column_writer
+        self._last_sync = time.monotonic()
 
         self._none_observer = none = _NoneObserver()
         self._observer = _Observer(monitor_stub, file_path, session_id)
@@ -215,33 +326,60 @@ class _PerformanceWriter(object):
 
         self._lock = threading.Lock()
 
-    def _write(self, performance, end, path):
+    def _write(self, performance, end):
         packet = conversions.to_proto_performance_packet(
             performance).SerializeToString()
 
-        self._current_observer.update(packet, end)
-        io.write_perf(path, packet)
+        writer = self._writer
+        offset = writer.write(packet, performance['period_end'].value)
+        self._current_observer.update(packet, end, offset, writer)
+
+        session_end = 'daily_perf' in performance
+        column_writer = self._column_writer
+        if column_writer:
+            column_writer.append(performance)
+            # the rows of a session are readable once it has ended
+            if session_end or end:
+                column_writer.flush()
+        if self._pipeline.durability.sync_due(self._last_sync, session_end or end):
+            writer.sync()
+            self._last_sync = time.monotonic()
+        elif end:
+            writer.flush()
+
+        if session_end:
+            # for the aggregation of the sessions
+            service_access.invoke(
+                self._monitor_stub.SessionEnd,
+                itf.Packet(
+                    packet=summary.pack_summary(performance),
+                    session_id=self._session_id))
 
-    def performance_update(self, performance, end):
-        # todo: we need to do a non-blocking write using queues?
-        # self._thread_pool.submit(partial(
-        #     self._write,
-        #     performance=performance,
-        #     end=end,
-        #     path=self._path))
+    def _update(self, performance, end):
         with self._lock:
-            self._write(performance, end, self._path)
+            self._write(performance, end)
             self._ended = end
 
+    def performance_update(self, performance, end):
+        emitter = self._emitter
+        if emitter:
+            performance = emitter.update(performance, end)
+            if performance is None:
+                return
+        # the packet is converted and written on the writer thread
+        self._pipeline.submit(self._update, performance, end)
+
     def observe(self):
         with self._lock:
             observer = self._observer
             if self._ended == True:
+                self._writer.flush()
                 self._thread_pool.submit(
                     observer.stream)
                 # observer.stream()
             else:
-                #clear so that we can stream from the beginning
+                # the packets that weren't sent yet are streamed on the next
+                # update
                 observer.clear()
                 self._current_observer = observer
 
@@ -249,9 +387,26 @@ class _PerformanceWriter(object):
         with self._lock:
             self._current_observer = self._none_observer
 
+    def close(self):
+        try:
+            self._pipeline.join()
+        finally:
+            with self._lock:
+                self._writer.close()
+                if self._column_writer:
+                    self._column_writer.close()
+
 
 class ControllableService(cbl_rpc.ControllableServicer):
-    def __init__(self, monitor_stub, controllable_factory, sessions_interface):
+    def __init__(self,
+                 monitor_stub,
+                 controllable_factory,
+                 sessions_interface,
+                 thread_pool=None,
+                 command_queue=None,
+                 emission_policy=None,
+                 columnar=False,
+                 pipeline=None):
         '''
 
         Parameters
@@ -259,6 +414,18 @@ class ControllableService(cbl_rpc.ControllableServicer):
         monitor_stub
         controllable_factory
         sessions_interface: pluto.interface.directory.StubDirectory
+        thread_pool: concurrent.futures.ThreadPoolExecutor
+            pool used for streaming performance. If
+            None, the service creates its own.
+        command_queue: pluto.control.controllable.command_queue.CommandQueue
+            If None, commands are queued in an unbounded queue.
+        emission_policy: pluto.control.controllable.emission.EmissionPolicy
+            If None, every performance packet is written.
+        columnar: bool
+            if True, the performance packets are also written in columns.
+        pipeline: pluto.control.controllable.persistence.Pipeline
+            writes the performance packets and states. If None, the service
+            creates its own.
         '''
         self._perf_writer = None
         self._stop = False
@@ -266,7 +433,9 @@ class ControllableService(cbl_rpc.ControllableServicer):
         self._frequency_filter = None
 
         # used for queueing commands
-        self._queue = queue.Queue()
+        self._queue = command_queue if command_queue else cq.CommandQueue()
+        # orders the acknowledgements once the queue is closed
+        self._ack_lock = threading.Lock()
         self._thread = None
 
         self._controllable = cbl = None
@@ -282,14 +451,21 @@ class ControllableService(cbl_rpc.ControllableServicer):
         self._root_dir = root = paths.get_dir('controllable')
         self._states_dir = paths.get_dir('states', root)
 
-        self._thread_pool = futures.ThreadPoolExecutor(5)
+        self._thread_pool = thread_pool if thread_pool else futures.ThreadPoolExecutor(5)
         self._monitor_stub = monitor_stub
         self._cbl_fty = controllable_factory
+        self._emission_policy = emission_policy
+        self._columnar = columnar
+        self._pipeline = pipeline if pipeline else persistence.Pipeline()
 
     @property
     def frequency_filter(self):
         return self._frequency_filter
 
+    @property
+    def command_queue(self):
+        return self._queue
+
     @property
     def state(self):
         return self._state
@@ -329,11 +505,8 @@ class ControllableService(cbl_rpc.ControllableServicer):
             # activate state storage if we're in live mode
 
             # todo: it would be cleaner to have an utils file for common paths
-            perf_path = paths.get_file_path(
-                mode,
-                paths.get_dir(
-                    id_,
-                    paths.get_dir('strategies')))
+            session_dir = paths.get_dir(id_, paths.get_dir('strategies'))
+            perf_path = paths.get_file_path(mode, session_dir)
 
             if mode == 'live' or mode == 'paper':
                 self._state_storage = _StateStorage(
@@ -342,19 +515,28 @@ class ControllableService(cbl_rpc.ControllableServicer):
                         paths.get_dir(
                             id_,
                             self._states_dir)),
-                    self._thread_pool)
+                    self._pipeline,
+                    id_,
+                    events_log.get_events_log(mode))
 
-            else:
-                # clear file if we're in simulation mode
-                with open(perf_path, 'wb') as f:
-                    f.truncate(0)
+            # clear file if we're in simulation mode
+            truncate = mode != 'live' and mode != 'paper'
+            column_writer = None
+            if self._columnar:
+                column_writer = columns.ColumnWriter(
+                    paths.get_dir(mode + '_columns', session_dir),
+                    truncate=truncate)
 
             # todo: we need a monitor stub
             self._perf_writer = _PerformanceWriter(
                 id_,
                 self._monitor_stub,
                 paths.get_file_path(perf_path),
-                self._thread_pool
+                self._thread_pool,
+                self._pipeline,
+                emission.Emitter(self._emission_policy),
+                truncate=truncate,
+                column_writer=column_writer
             )
 
             if controllable:
@@ -370,7 +552,8 @@ class ControllableService(cbl_rpc.ControllableServicer):
                     data_frequency,
                     mode,
                     session.look_back,
-                    session.cancel_policy)
+                    session.cancel_policy,
+                    session.metrics)
                 # run the thread
                 self._state = self._ready
 
@@ -384,17 +567,42 @@ class ControllableService(cbl_rpc.ControllableServicer):
     def _run(self):
         q = self._queue
         while not self._stop:
+            command = q.get()
             try:
-                self._state.execute(q.get())
+                self._state.execute(command)
             except commands.StopExecution:
                 break
+            if isinstance(command, commands.ClockUpdate) \
+                    and command.event == SESSION_END:
+                # report the health of the queue once per session
+                log.info('command queue: {}'.format(q.metrics()))
+        self._close_queue()
+        try:
+            self._perf_writer.close()
+        finally:
+            self._state_storage.close()
+
+    def _close_queue(self):
+        # the streams still wait for the acknowledgements of their batches
+        # (and their end markers). The queued ones are executed, and the
+        # next ones are executed as they come (see _acknowledge).
+        with self._ack_lock:
+            for command in self._queue.close():
+                if isinstance(command, commands.Acknowledge):
+                    command()
+
+    def _acknowledge(self, callback, timestamp):
+        acknowledge = commands.Acknowledge(callback, timestamp)
+        if not self._queue.put(acknowledge):
+            # the execution has ended
+            with self._ack_lock:
+                acknowledge()
 
     def _load_state(self, session_id):
-        with open(paths.get_file_path(session_id, self._states_dir), 'rb') as f:
-            params = f.read()
-            state = controllable_pb2.ControllableState()
-            state.ParseFromString(params)
-            return state
+        params = checkpoints.load(paths.get_file_path(session_id, self._states_dir))
+        state = controllable_pb2.ControllableState()
+        state.ParseFromString(params)
+        return state
 
     def restore_state(self, session_id):
         # 1)create controllable, (PROBLEM: need mode (from controllable?))
@@ -413,7 +621,11 @@ class ControllableService(cbl_rpc.ControllableServicer):
         # set run_state to recovering
         controllable.run_state = controllable.recovering
         log = events_log.get_events_log(state.mode)
-        events = log.read(session_id, controllable.current_dt)
+        # the broker events are not replayed yet
+        events = log.read(
+            session_id,
+            controllable.current_dt,
+            ('clock', 'parameter'))
         # play all missed events since last checkpoint (controllable is in recovery mode)
         perf_writer = self._perf_writer
         frequency_filter = self._frequency_filter
@@ -435,6 +647,7 @@ class ControllableService(cbl_rpc.ControllableServicer):
                 pass  # todo
             else:
                 pass
+        log.close()
 
     @service_access.framework_only
     def Stop(self, request, context):
@@ -481,16 +694,89 @@ class ControllableService(cbl_rpc.ControllableServicer):
         '''
         # NOTE: use FixedBasisPointsSlippage for slippage simulation.
 
+        self._clock_update(request)
+        return emp.Empty()
+
+    @service_access.framework_only
+    def StreamClockUpdates(self, request_iterator, context):
+        # each batch is acknowledged with the timestamp of its last event,
+        # once all its events have been processed.
+        watermarks = queue.Queue()
+
+        def consume():
+            for batch in request_iterator:
+                clock_events = batch.clock_events
+                for clock_event in clock_events:
+                    self._clock_update(clock_event)
+                if clock_events:
+                    self._acknowledge(
+                        watermarks.put,
+                        clock_events[-1].timestamp)
+            # the client closed the stream. The end marker is queued behind
+            # the acknowledgements of the last batches.
+            self._acknowledge(watermarks.put, None)
+
+        thread = threading.Thread(target=consume)
+        thread.daemon = True
+        thread.start()
+
+        while True:
+            watermark = watermarks.get()
+            if watermark is None:
+                break
+            yield watermark
+
+    def clock_update(self, clock_event):
+        '''Queues a clock update without going through rpc (in-process).
+
+        Parameters
+        ----------
+        clock_event: pluto.control.clock.events.ClockEvent
+        '''
+        self._clock_update(clock_event)
+
+    def account_update(self, broker_state):
+        '''Queues an account update without going through rpc (in-process).
+
+        Parameters
+        ----------
+        broker_state: protos.broker_pb2.BrokerState
+        '''
+        self._queue.put(
+            commands.AccountUpdate(
+                self._controllable,
+                broker_state))
+
+    def _clock_update(self, clock_event):
         self._queue.put(
             commands.ClockUpdate(
                 self._perf_writer,
                 self._controllable,
                 self._frequency_filter,
-                request,
+                clock_event,
                 self._state_storage
             )
         )
-        return emp.Empty()
+
+    def listen(self, clock_bus):
+        '''Receives clock events from a shared memory bus, on a separate
+        thread.
+
+        Parameters
+        ----------
+        clock_bus: pluto.coms.clock_bus.ClockBusReader
+        '''
+        def consume():
+            # wake up periodically to observe the stop flag
+            while not self._stop:
+                clock_event = clock_bus.get(_LISTEN_TIMEOUT)
+                if clock_event is not None:
+                    self._clock_update(clock_event)
+            clock_bus.close()
+
+        thread = threading.Thread(target=consume)
+        thread.daemon = True
+        thread.start()
 
     # @service_access.framework_only
     def Watch(self, request, context):
@@ -501,13 +787,16 @@ class ControllableService(cbl_rpc.ControllableServicer):
         self._perf_writer.stop_observing()
 
 
+_DEFAULT_MAX_WORKERS = 10
+
+
 class Server(object):
     def __init__(self):
         self._event = threading.Event()
-        self._server = grpc.server(futures.ThreadPoolExecutor(10))
 
-    def start(self, controllable, url=None):
-        server = self._server
+    def start(self, controllable, url=None, max_workers=_DEFAULT_MAX_WORKERS):
+        # the streams hold a thread of the pool while they are open
+        self._server = server = grpc.server(futures.ThreadPoolExecutor(max_workers))
         if not url:
             port = server.add_insecure_port('localhost:0')
         else:
@@ -538,6 +827,11 @@ signal.signal(signal.SIGINT, interruption_handler)
 signal.signal(signal.SIGTERM, termination_handler)
 
 
+def serve(servicer, url=None, max_workers=_DEFAULT_MAX_WORKERS):
+    # blocks until the process is interrupted or terminated
+    _SERVER.start(servicer, url, max_workers)
+
+
 @click.group()
 def cli():
     pass
@@ -550,7 +844,35 @@ def cli():
 @click.argument('root_dir')
 @click.option('-cu', '--controllable-url')
 @click.option('--recovery', is_flag=True)
-def start(framework_id, framework_url, session_id, root_dir, controllable_url, recovery):
+@click.option('--clock-bus')
+@click.option('--queue-size', default=0)
+@click.option(
+    '--queue-policy',
+    type=click.Choice([cq.BLOCK, cq.COALESCE]),
+    default=cq.BLOCK)
+@click.option('--emission', 'emission_policy', default=emission.MINUTE)
+@click.option('--columnar', is_flag=True)
+@click.option(
+    '--durability',
+    type=click.Choice([
+        persistence.NONE,
+        persistence.BATCHED,
+        persistence.SESSION_END]),
+    default=persistence.BATCHED)
+@click.option('--persistence-queue-size', default=256)
+def start(framework_id,
+          framework_url,
+          session_id,
+          root_dir,
+          controllable_url,
+          recovery,
+          clock_bus,
+          queue_size,
+          queue_policy,
+          emission_policy,
+          columnar,
+          durability,
+          persistence_queue_size):
     '''
 
     Parameters
@@ -558,6 +880,23 @@ def start(framework_id, framework_url, session_id, root_dir, controllable_url, r
     framework_url : str
         url for callbacks
     controllable_url: str
+    clock_bus: str
+        path to a shared memory clock bus. If set, clock events are received
+        through the bus instead of ClockUpdate calls.
+    queue_size: int
+        maximum number of queued commands (0 for unbounded)
+    queue_policy: str
+        what to do with clock updates when the controllable falls behind
+    emission_policy: str
+        emission policy of the minute performance packets: 'minute',
+        'every:<n>', 'change' or 'session'
+    columnar: bool
+        also write the performance packets in columns
+    durability: str
+        when the performance and state files are fsynced: 'none',
+        'batched' or 'session_end'
+    persistence_queue_size: int
+        maximum number of pending writes, before the commands wait
     '''
 
     # If the controllable fails, it will be relaunched by the controller.
@@ -576,11 +915,19 @@ def start(framework_id, framework_url, session_id, root_dir, controllable_url, r
         service = ControllableService(
             itf_rpc.MonitorStub(channel),
             factory.ControllableProcessFactory(channel),
-            d)
+            d,
+            command_queue=cq.CommandQueue(queue_size, queue_policy),
+            emission_policy=emission.from_string(emission_policy),
+            columnar=columnar,
+            pipeline=persistence.Pipeline(
+                persistence_queue_size,
+                persistence.Durability(durability)))
         if recovery:
             service.restore_state(session_id)
+        if clock_bus:
+            service.listen(bus.ClockBusReader(clock_bus))
         try:
-            _SERVER.start(
+            serve(
                 service,
                 controllable_url)
         except Exception as e:
@@ -15,6 +15,10 @@ class ControllableStub(object):
     def ClockUpdate(self, request, metadata=()):
         return self._clock_update(request, metadata)
 
+    @service_access.framework_method
+    def StreamClockUpdates(self, request_iterator, metadata=()):
+        return self._stream_clock_updates(request_iterator, metadata)
+
     @service_access.framework_method
     def Stop(self, request, metadata=()):
         return self._clock_update(request, metadata)
@@ -43,6 +47,10 @@ class ControllableStub(object):
     def _clock_update(self, request, metadata):
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def _stream_clock_updates(self, request_iterator, metadata):
+        raise NotImplementedError
+
     @abc.abstractmethod
     def _stop(self, request, metadata):
         raise NotImplementedError
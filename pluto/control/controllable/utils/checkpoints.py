@@ -0,0 +1,308 @@
+import os
+import struct
+import zlib
+
+from protos import controllable_pb2
+from protos import tracker_state_pb2 as trs
+from protos import ledger_state_pb2 as acc
+
+# incremental checkpoints of the controllable state.
+# the checkpoint file starts with a snapshot of the full state, followed by
+# deltas. A delta is a state that only contains the positions and orders
+# that changed since the previous checkpoint (and the returns appended since
+# then, if any), followed by the keys of the removed positions and orders.
+# the scalars (portfolio, account, ...) are small, so they are always
+# written.
+# a new snapshot replaces the file every snapshot interval, or once the
+# deltas are larger than the snapshot. Snapshots are always fsynced before
+# they replace the file, the deltas are fsynced according to the durability.
+# each record is framed by a little-endian uint32 length and a crc32 of its
+# payload, so that a partially written delta is ignored.
+
+_FRAME = struct.Struct('<II')
+# kind, length of the state, number of removed positions and orders
+_HEADER = struct.Struct('<BIII')
+_LENGTH = struct.Struct('<I')
+# size of a serialized return (little-endian float64)
+_RETURN_SIZE = 8
+
+_SNAPSHOT = 0
+_DELTA = 1
+
+_TMP_SUFFIX = '.tmp'
+
+_DEFAULT_SNAPSHOT_INTERVAL = 390
+
+
+class _State(object):
+    '''Decoded controllable state, with the positions and orders by key.'''
+
+    __slots__ = ['controllable', 'tracker', 'ledger', 'positions', 'orders']
+
+    def __init__(self, controllable, tracker, ledger, positions, orders):
+        self.controllable = controllable
+        self.tracker = tracker
+        self.ledger = ledger
+        # serialized asset -> serialized asset position pair
+        self.positions = positions
+        # order id -> serialized order
+        self.orders = orders
+
+    @classmethod
+    def parse(cls, state):
+        controllable = controllable_pb2.ControllableState()
+        controllable.ParseFromString(state)
+        tracker = trs.TrackerState()
+        tracker.ParseFromString(controllable.metrics_tracker_state)
+        ledger = acc.LedgerState()
+        ledger.ParseFromString(tracker.ledger_state)
+        positions = {
+            pair.key.SerializeToString(): pair.SerializeToString()
+            for pair in ledger.portfolio.positions}
+        orders = {order.id: order.SerializeToString() for order in ledger.orders}
+        # the positions and orders are kept in the dicts
+        del ledger.portfolio.positions[:]
+        del ledger.orders[:]
+        return cls(controllable, tracker, ledger, positions, orders)
+
+    def serialize(self, positions, orders):
+        '''
+
+        Parameters
+        ----------
+        positions: typing.Iterable[bytes]
+            serialized asset position pairs
+        orders: typing.Iterable[bytes]
+            serialized orders
+
+        Returns
+        -------
+        bytes
+            the state, with the positions and orders
+        '''
+        ledger = acc.LedgerState()
+        ledger.CopyFrom(self.ledger)
+        for position in positions:
+            ledger.portfolio.positions.add().MergeFromString(position)
+        for order in orders:
+            ledger.orders.add().MergeFromString(order)
+        tracker = trs.TrackerState()
+        tracker.CopyFrom(self.tracker)
+        tracker.ledger_state = ledger.SerializeToString()
+        controllable = controllable_pb2.ControllableState()
+        controllable.CopyFrom(self.controllable)
+        controllable.metrics_tracker_state = tracker.SerializeToString()
+        return controllable.SerializeToString()
+
+
+def _changed(current, previous):
+    return [
+        value for key, value in current.items()
+        if previous.get(key, None) != value]
+
+
+def _pack(kind, state, removed_positions=(), removed_orders=()):
+    items = [
+        _LENGTH.pack(len(item)) + item
+        for item in list(removed_positions) + [
+            order_id.encode('utf-8') for order_id in removed_orders]]
+    payload = b''.join([
+        _HEADER.pack(kind, len(state), len(removed_positions), len(removed_orders)),
+        state] + items)
+    return _FRAME.pack(len(payload), zlib.crc32(payload) & 0xffffffff) + payload
+
+
+def _records(data):
+    offset = 0
+    end = len(data)
+    while offset + _FRAME.size <= end:
+        length, crc = _FRAME.unpack_from(data, offset)
+        start = offset + _FRAME.size
+        payload = data[start:start + length]
+        if len(payload) < length or zlib.crc32(payload) & 0xffffffff != crc:
+            # partially written record
+            break
+        offset = start + length
+
+        kind, size, n_positions, n_orders = _HEADER.unpack_from(payload, 0)
+        position = _HEADER.size
+        state = payload[position:position + size]
+        position += size
+        items = []
+        for _ in range(n_positions + n_orders):
+            length = _LENGTH.unpack_from(payload, position)[0]
+            position += _LENGTH.size
+            items.append(payload[position:position + length])
+            position += length
+        removed_orders = [item.decode('utf-8') for item in items[n_positions:]]
+        yield kind, state, items[:n_positions], removed_orders
+
+
+def _fsync_directory(directory):
+    # makes the rename durable
+    fd = os.open(directory or '.', os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class CheckpointWriter(object):
+    def __init__(self, file_path, snapshot_interval=_DEFAULT_SNAPSHOT_INTERVAL):
+        '''
+
+        Parameters
+        ----------
+        file_path: str
+        snapshot_interval: int
+            number of checkpoints between two snapshots.
+        '''
+        self._path = file_path
+        self._snapshot_interval = snapshot_interval
+        self._file = None
+        self._previous = None
+        self._count = 0
+        self._snapshot_size = 0
+        self._deltas_size = 0
+
+    def write(self, state, sync=True):
+        '''
+
+        Parameters
+        ----------
+        state: bytes
+            serialized controllable state
+        sync: bool
+            if False, a delta is flushed but not fsynced.
+
+        Returns
+        -------
+        bool
+            True if the state is durable (fsynced).
+        '''
+        current = _State.parse(state)
+        previous = self._previous
+        self._previous = current
+        if previous is None or self._count >= self._snapshot_interval:
+            self._write_snapshot(state)
+            return True
+
+        ledger = current.ledger
+        appended = ledger.returns_count - previous.ledger.returns_count
+        if appended < 0:
+            # the returns were reset, they can't be appended
+            self._write_snapshot(state)
+            return True
+
+        delta = acc.LedgerState()
+        delta.CopyFrom(ledger)
+        if appended:
+            # the window is bounded but large in minute mode, so only the
+            # returns appended since the previous checkpoint are written.
+            delta.returns = ledger.returns[-appended * _RETURN_SIZE:]
+        else:
+            delta.ClearField('returns')
+            delta.ClearField('returns_count')
+        current = _State(
+            current.controllable,
+            current.tracker,
+            delta,
+            current.positions,
+            current.orders)
+        record = _pack(
+            _DELTA,
+            current.serialize(
+                _changed(current.positions, previous.positions),
+                _changed(current.orders, previous.orders)),
+            [key for key in previous.positions if key not in current.positions],
+            [key for key in previous.orders if key not in current.orders])
+
+        if self._deltas_size + len(record) > self._snapshot_size:
+            # faster to load a new snapshot
+            self._write_snapshot(state)
+            return True
+
+        f = self._file
+        f.write(record)
+        f.flush()
+        if sync:
+            os.fsync(f.fileno())
+        self._count += 1
+        self._deltas_size += len(record)
+        return sync
+
+    def _write_snapshot(self, state):
+        path = self._path
+        record = _pack(_SNAPSHOT, state)
+        # replaces the file atomically. The snapshot is fsynced whatever the
+        # durability: otherwise a crash could replace the previous
+        # checkpoints with an empty file.
+        with open(path + _TMP_SUFFIX, 'wb') as f:
+            f.write(record)
+            f.flush()
+            os.fsync(f.fileno())
+        if self._file:
+            self._file.close()
+        os.replace(path + _TMP_SUFFIX, path)
+        _fsync_directory(os.path.dirname(path))
+        self._file = open(path, 'ab')
+        self._count = 0
+        self._snapshot_size = len(record)
+        self._deltas_size = 0
+
+    def sync(self):
+        f = self._file
+        if f:
+            os.fsync(f.fileno())
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+def load(file_path):
+    '''Loads the snapshot and applies the deltas that follow it.
+
+    Parameters
+    ----------
+    file_path: str
+
+    Returns
+    -------
+    bytes
+        serialized controllable state
+    '''
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    state = None
+    result = None
+    for kind, payload, removed_positions, removed_orders in _records(data):
+        if kind == _SNAPSHOT:
+            state = _State.parse(payload)
+            result = payload
+            continue
+        delta = _State.parse(payload)
+        positions = state.positions
+        orders = state.orders
+        for key in removed_positions:
+            positions.pop(key, None)
+        for key in removed_orders:
+            orders.pop(key, None)
+        positions.update(delta.positions)
+        orders.update(delta.orders)
+        ledger = delta.ledger
+        if ledger.returns_count:
+            # the delta has the returns appended since the previous
+            # checkpoint. The window is trimmed when the ledger restores it.
+            ledger.returns = state.ledger.returns + ledger.returns
+        else:
+            ledger.returns = state.ledger.returns
+            ledger.returns_count = state.ledger.returns_count
+        state = _State(delta.controllable, delta.tracker, ledger, positions, orders)
+        result = None
+    if state is None:
+        raise ValueError('No snapshot in {}'.format(file_path))
+    if result is None:
+        result = state.serialize(state.positions.values(), state.orders.values())
+    return result
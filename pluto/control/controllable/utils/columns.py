@@ -0,0 +1,211 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# columnar storage of the performance packets, for post-run analysis.
+# each field is appended to its own file of raw little-endian float64 values
+# (int64 nanoseconds for the timestamps), that can be memory mapped. The number of complete rows is stored in a
+# metadata file that is replaced once all the fields of a chunk are written.
+
+_DTYPE = np.dtype('<f8')
+# utc nanoseconds
+_TIMESTAMP_DTYPE = np.dtype('<i8')
+_TIMESTAMP = 'period_end'
+_META = 'meta.json'
+
+_DEFAULT_CHUNK_SIZE = 4096
+
+# (column, section, field)
+# the period section is minute_perf or daily_perf depending on the packet.
+FIELDS = (
+    ('returns', 'period', 'returns'),
+    ('pnl', 'period', 'pnl'),
+    ('capital_used', 'period', 'capital_used'),
+    ('cumulative_returns', 'cumulative_perf', 'returns'),
+    ('cumulative_pnl', 'cumulative_perf', 'pnl'),
+    ('portfolio_value', 'cumulative_perf', 'portfolio_value'),
+    ('ending_cash', 'cumulative_perf', 'ending_cash'),
+    ('gross_leverage', 'cumulative_perf', 'gross_leverage'),
+    ('net_leverage', 'cumulative_perf', 'net_leverage'),
+    ('algorithm_period_return', 'cumulative_risk_metrics', 'algorithm_period_return'),
+    ('benchmark_period_return', 'cumulative_risk_metrics', 'benchmark_period_return'),
+    ('benchmark_volatility', 'cumulative_risk_metrics', 'benchmark_volatility'),
+    ('algo_volatility', 'cumulative_risk_metrics', 'algo_volatility'),
+    ('alpha', 'cumulative_risk_metrics', 'alpha'),
+    ('beta', 'cumulative_risk_metrics', 'beta'),
+    ('sharpe', 'cumulative_risk_metrics', 'sharpe'),
+    ('sortino', 'cumulative_risk_metrics', 'sortino'),
+    ('max_drawdown', 'cumulative_risk_metrics', 'max_drawdown'),
+    ('max_leverage', 'cumulative_risk_metrics', 'max_leverage'),
+)
+
+_PACKET_TYPES = ('minute_perf', 'daily_perf')
+
+
+def _column_path(directory, column):
+    if column == _TIMESTAMP:
+        return os.path.join(directory, column + '.i8')
+    return os.path.join(directory, column + '.f8')
+
+
+def _read_count(directory):
+    try:
+        with open(os.path.join(directory, _META)) as f:
+            return json.load(f)['count']
+    except FileNotFoundError:
+        return 0
+
+
+class _Table(object):
+    '''Columns of a packet type.'''
+
+    def __init__(self, directory, chunk_size, truncate):
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self._directory = directory
+        self._columns = columns = [_TIMESTAMP] + [column for column, _, _ in FIELDS]
+
+        count = 0 if truncate else _read_count(directory)
+        mode = 'wb' if truncate else 'ab'
+        self._files = files = []
+        for column in columns:
+            path = _column_path(directory, column)
+            if not truncate and os.path.exists(path):
+                # drop the values of an incomplete chunk
+                with open(path, 'r+b') as f:
+                    f.truncate(count * _DTYPE.itemsize)
+            files.append(open(path, mode))
+        self._count = count
+
+        self._timestamps = np.empty(chunk_size, dtype=_TIMESTAMP_DTYPE)
+        self._chunk = np.empty((len(columns) - 1, chunk_size), dtype=_DTYPE)
+        self._size = 0
+        if truncate:
+            self._write_count()
+
+    def append(self, timestamp, values):
+        i = self._size
+        self._timestamps[i] = timestamp
+        self._chunk[:, i] = values
+        self._size = i = i + 1
+        if i == len(self._timestamps):
+            self.flush()
+
+    def flush(self):
+        size = self._size
+        if not size:
+            return
+        files = self._files
+        files[0].write(self._timestamps[:size].tobytes())
+        for f, values in zip(files[1:], self._chunk):
+            f.write(values[:size].tobytes())
+        for f in files:
+            f.flush()
+        self._count += size
+        self._size = 0
+        self._write_count()
+
+    def _write_count(self):
+        path = os.path.join(self._directory, _META)
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'count': self._count, 'columns': self._columns}, f)
+        os.replace(tmp, path)
+
+    def close(self):
+        self.flush()
+        for f in self._files:
+            f.close()
+
+
+class ColumnWriter(object):
+    '''Writes the fields of the performance packets in columns. The minute and
+    daily packets are written in separate sub-directories.'''
+
+    def __init__(self, directory, chunk_size=_DEFAULT_CHUNK_SIZE, truncate=False):
+        '''
+
+        Parameters
+        ----------
+        directory: str
+        chunk_size: int
+            number of rows that are buffered before being written.
+        truncate: bool
+            if True, the existing rows are removed.
+        '''
+        self._tables = {
+            packet_type: _Table(
+                os.path.join(directory, packet_type),
+                chunk_size,
+                truncate)
+            for packet_type in _PACKET_TYPES}
+
+    def append(self, packet):
+        '''
+
+        Parameters
+        ----------
+        packet: dict
+            performance packet
+        '''
+        packet_type = 'daily_perf' if 'daily_perf' in packet else 'minute_perf'
+        sections = {
+            'period': packet[packet_type],
+            'cumulative_perf': packet['cumulative_perf'],
+            'cumulative_risk_metrics': packet['cumulative_risk_metrics']}
+        values = []
+        for _, section, field in FIELDS:
+            value = sections[section].get(field)
+            values.append(np.nan if value is None else value)
+        self._tables[packet_type].append(
+            pd.Timestamp(packet['period_end']).value,
+            values)
+
+    def flush(self):
+        for table in self._tables.values():
+            table.flush()
+
+    def close(self):
+        for table in self._tables.values():
+            table.close()
+
+
+def load(directory, packet_type='minute_perf', columns=None):
+    '''Loads the columns written by a ColumnWriter.
+
+    Parameters
+    ----------
+    directory: str
+    packet_type: str
+        minute_perf or daily_perf
+    columns: typing.Iterable[str]
+        the columns to load. Defaults to all.
+
+    Returns
+    -------
+    pandas.DataFrame
+        indexed by period end
+    '''
+    directory = os.path.join(directory, packet_type)
+    count = _read_count(directory)
+    if columns is None:
+        columns = [column for column, _, _ in FIELDS]
+
+    def read(column, dtype=_DTYPE):
+        if not count:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(
+            _column_path(directory, column),
+            dtype=dtype,
+            mode='r',
+            shape=(count,))
+
+    index = pd.DatetimeIndex(
+        read(_TIMESTAMP, _TIMESTAMP_DTYPE).astype('datetime64[ns]'),
+        name=_TIMESTAMP).tz_localize('UTC')
+    return pd.DataFrame(
+        {column: read(column) for column in columns},
+        index=index,
+        columns=list(columns))
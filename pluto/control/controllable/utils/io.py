@@ -1,9 +1,44 @@
-def write_perf(file_path, packet):
-    with open(file_path, 'ab') as f:
-        f.write(packet + b'END')
+import bisect
+import os
+import struct
+import time
 
+# append-only packet files.
+# each record is a little-endian uint32 length followed by the packet bytes.
+# a sidecar index file maps the timestamp of each packet to the offset of
+# its record. The index is written after the data, so it can lag behind it,
+# but never points past it.
+# files of the previous format delimit the packets with b'END' and have no
+# index. They are converted when they are opened for writing.
 
-def read_perf(file_path):
+_LENGTH = struct.Struct('<I')
+_INDEX = struct.Struct('<qQ')
+
+_INDEX_SUFFIX = '.idx'
+_LEGACY_SUFFIX = '.legacy'
+_LEGACY_DELIMITER = b'END'
+
+_DEFAULT_FSYNC_INTERVAL = 1.0
+
+
+def index_path(file_path):
+    return file_path + _INDEX_SUFFIX
+
+
+def _is_legacy(file_path):
+    # the writer always creates the index, so a file without one is either
+    # empty or in the previous format. A new format file without index can't
+    # be told apart from a legacy file, and is not truncated either.
+    if os.path.exists(index_path(file_path)):
+        return False
+    size = os.path.getsize(file_path)
+    end = 0
+    for end, _ in PacketReader(file_path).read():
+        pass
+    return end != size
+
+
+def _read_legacy(file_path):
     with open(file_path, 'rb') as f:
         packets = []
         size = 1024 * 64 #64 KB
@@ -21,10 +56,250 @@ def read_perf(file_path):
                     buffer = packets.pop() + buffer
                 except IndexError:
                     pass
-                packets.extend(buffer.split(b'END'))
+                packets.extend(buffer.split(_LEGACY_DELIMITER))
                 last_packet = packets.pop()
                 for packet in packets:
                     if packet:
                         yield packet
                 packets.clear()
                 packets.append(last_packet)
+
+
+def _convert_legacy(file_path, legacy_timestamp):
+    # the packets are written in a temporary file, so that the legacy file
+    # is left as is if the conversion fails. The legacy file is then kept
+    # next to the converted one.
+    tmp = file_path + '.tmp'
+    writer = PacketWriter(tmp, truncate=True, fsync_interval=None)
+    try:
+        last = None
+        for packet in _read_legacy(file_path):
+            ts = legacy_timestamp(packet) if legacy_timestamp else None
+            if ts is not None and last is not None and ts < last:
+                # the index must stay sorted
+                ts = None
+            writer.write(packet, ts)
+            if ts is not None:
+                last = ts
+    finally:
+        writer.close()
+    os.link(file_path, file_path + _LEGACY_SUFFIX)
+    # the converted file is complete without its index, so a crash between
+    # the two replacements only loses index entries.
+    os.replace(tmp, file_path)
+    os.replace(index_path(tmp), index_path(file_path))
+
+
+def _recover(file_path):
+    # removes a partially written record at the end of the file (after a
+    # crash) and the index entries past the last complete record.
+    reader = PacketReader(file_path)
+    timestamps, offsets = reader._read_index()
+    size = os.path.getsize(file_path)
+    while offsets and offsets[-1] >= size:
+        offsets.pop()
+    end = offsets[-1] if offsets else 0
+    for end, _ in reader.read(end):
+        pass
+    if end < size:
+        with open(file_path, 'r+b') as f:
+            f.truncate(end)
+    i = bisect.bisect_left(offsets, end)
+    idx = index_path(file_path)
+    if os.path.exists(idx):
+        with open(idx, 'r+b') as f:
+            f.truncate(i * _INDEX.size)
+
+
+class PacketWriter(object):
+    '''Buffered writer of a packet file. The file stays open until closed.'''
+
+    def __init__(self,
+                 file_path,
+                 truncate=False,
+                 fsync_interval=_DEFAULT_FSYNC_INTERVAL,
+                 legacy_timestamp=None):
+        '''
+
+        Parameters
+        ----------
+        file_path: str
+        truncate: bool
+            if True, the existing packets are removed.
+        fsync_interval: float
+            seconds between two flushes and fsync of the files. If None,
+            the files are only synced by sync.
+        legacy_timestamp: callable
+            returns the timestamp of a packet of a file in the previous
+            format, for its index. If None, the converted packets are not
+            indexed.
+        '''
+        if not truncate and os.path.exists(file_path):
+            if _is_legacy(file_path):
+                _convert_legacy(file_path, legacy_timestamp)
+            else:
+                _recover(file_path)
+        mode = 'wb' if truncate else 'ab'
+        self._file = open(file_path, mode)
+        self._index = open(index_path(file_path), mode)
+        self._offset = self._file.tell()
+        # index entries are only written once their records are flushed
+        self._entries = []
+        self._fsync_interval = fsync_interval
+        self._last_sync = time.monotonic()
+
+    @property
+    def offset(self):
+        '''offset of the next record'''
+        return self._offset
+
+    def write(self, packet, timestamp):
+        '''
+
+        Parameters
+        ----------
+        packet: bytes
+        timestamp: int
+            utc nanoseconds of the packet. If None, the packet is not
+            indexed.
+
+        Returns
+        -------
+        int
+            offset of the record
+        '''
+        offset = self._offset
+        f = self._file
+        f.write(_LENGTH.pack(len(packet)))
+        f.write(packet)
+        self._offset = offset + _LENGTH.size + len(packet)
+        if timestamp is not None:
+            self._entries.append(_INDEX.pack(timestamp, offset))
+
+        interval = self._fsync_interval
+        if interval is not None:
+            now = time.monotonic()
+            if now - self._last_sync >= interval:
+                self.sync()
+                self._last_sync = now
+        return offset
+
+    def flush(self):
+        # the data is flushed before the index, so that readers never find
+        # an index entry for a record that is not written yet.
+        self._file.flush()
+        entries = self._entries
+        if entries:
+            self._index.write(b''.join(entries))
+            entries.clear()
+        self._index.flush()
+
+    def sync(self):
+        self.flush()
+        os.fsync(self._file.fileno())
+        os.fsync(self._index.fileno())
+
+    def close(self):
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+            self._index.close()
+
+
+class PacketReader(object):
+    def __init__(self, file_path):
+        self._path = file_path
+
+    def _read_index(self):
+        try:
+            with open(index_path(self._path), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return [], []
+        # ignore a partially written entry
+        data = data[:len(data) - len(data) % _INDEX.size]
+        timestamps = []
+        offsets = []
+        for ts, offset in _INDEX.iter_unpack(data):
+            timestamps.append(ts)
+            offsets.append(offset)
+        return timestamps, offsets
+
+    def seek(self, timestamp):
+        '''
+
+        Parameters
+        ----------
+        timestamp: int
+            utc nanoseconds
+
+        Returns
+        -------
+        int
+            offset of the first packet at or after the timestamp. If there is
+            no such packet in the index, the offset of the end of the indexed
+            packets.
+        '''
+        timestamps, offsets = self._read_index()
+        i = bisect.bisect_left(timestamps, timestamp)
+        if i < len(offsets):
+            return offsets[i]
+        elif offsets:
+            # end of the last indexed record
+            with open(self._path, 'rb') as f:
+                f.seek(offsets[-1])
+                length = _LENGTH.unpack(f.read(_LENGTH.size))[0]
+            return offsets[-1] + _LENGTH.size + length
+        return 0
+
+    def read(self, offset=0):
+        '''Reads the complete packets from the offset.
+
+        Yields
+        ------
+        tuple
+            (offset of the next record, packet)
+        '''
+        try:
+            f = open(self._path, 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            f.seek(offset)
+            while True:
+                header = f.read(_LENGTH.size)
+                if len(header) < _LENGTH.size:
+                    break
+                length = _LENGTH.unpack(header)[0]
+                packet = f.read(length)
+                if len(packet) < length:
+                    # partially written record
+                    break
+                offset += _LENGTH.size + length
+                yield offset, packet
+
+    def tail(self, offset=0, interval=0.1, stop=None):
+        '''Reads the packets from the offset, then waits for new packets.
+
+        Parameters
+        ----------
+        offset: int
+        interval: float
+            seconds between two polls of the file
+        stop: threading.Event
+            stops tailing when set
+
+        Yields
+        ------
+        tuple
+            (offset of the next record, packet)
+        '''
+        while not (stop and stop.is_set()):
+            for offset, packet in self.read(offset):
+                yield offset, packet
+            time.sleep(interval)
+
+
+def read_perf(file_path, offset=0):
+    for _, packet in PacketReader(file_path).read(offset):
+        yield packet
@@ -0,0 +1,257 @@
+import threading
+from concurrent import futures
+
+import grpc
+import click
+
+from pluto.interface.utils import service_access
+from pluto.interface import directory
+from pluto.control.controllable import server
+from pluto.control.controllable import command_queue as cq
+from pluto.control.controllable import emission
+from pluto.control.controllable import persistence
+from pluto.control.controllable.utils import factory
+
+from protos import controllable_pb2_grpc as cbl_rpc
+from protos import interface_pb2_grpc as itf_rpc
+
+
+# threads of the rpc server per hosted session (its clock stream and a unary
+# call), plus the threads for the other calls.
+_THREADS_PER_SESSION = 2
+_SPARE_THREADS = 10
+
+_DEFAULT_MAX_SESSIONS = 16
+
+
+def server_threads(max_sessions):
+    '''
+
+    Parameters
+    ----------
+    max_sessions: int
+        maximum number of sessions on a worker
+
+    Returns
+    -------
+    int
+        number of threads of the rpc server of a worker
+    '''
+    return max_sessions * _THREADS_PER_SESSION + _SPARE_THREADS
+
+
+class WorkerService(cbl_rpc.ControllableServicer):
+    '''Hosts the controllable services of many sessions in a single process.
+    Calls are routed to the service of a session using the session_id in
+    the invocation metadata.'''
+
+    def __init__(self,
+                 monitor_stub,
+                 controllable_factory,
+                 sessions_interface,
+                 thread_pool,
+                 queue_size=0,
+                 queue_policy=cq.BLOCK,
+                 emission_policy=emission.MINUTE,
+                 columnar=False,
+                 durability=persistence.BATCHED,
+                 persistence_queue_size=256):
+        '''
+
+        Parameters
+        ----------
+        monitor_stub
+        controllable_factory
+        sessions_interface: pluto.interface.directory.StubDirectory
+        thread_pool: concurrent.futures.ThreadPoolExecutor
+            shared by all the services of the worker
+
+        The other parameters are the options of each session, like the
+        options of the controllable server.
+        '''
+        self._monitor_stub = monitor_stub
+        self._cbl_fty = controllable_factory
+        self._session_interface = sessions_interface
+        self._thread_pool = thread_pool
+
+        self._queue_size = queue_size
+        self._queue_policy = queue_policy
+        self._emission_policy = emission_policy
+        self._columnar = columnar
+        # the writes of all the sessions share a thread
+        self._pipeline = persistence.Pipeline(
+            persistence_queue_size,
+            persistence.Durability(durability))
+
+        # maps session ids to services
+        self._services = {}
+        self._lock = threading.Lock()
+
+    @property
+    def session_ids(self):
+        return self._services.keys()
+
+    def _session_id(self, context):
+        session_id = dict(context.invocation_metadata()).get('session_id', None)
+        if not session_id:
+            context.abort(
+                grpc.StatusCode.INVALID_ARGUMENT,
+                'must specify session_id')
+        return session_id
+
+    def _get_service(self, context):
+        session_id = self._session_id(context)
+        service = self._services.get(session_id, None)
+        if not service:
+            context.abort(
+                grpc.StatusCode.NOT_FOUND,
+                'session {} is not running on this worker'.format(session_id))
+        return service
+
+    def stop(self):
+        with self._lock:
+            for service in self._services.values():
+                service.stop()
+
+    def _create_service(self):
+        # each session has its own queue, and a channel of the pipeline
+        return server.ControllableService(
+            self._monitor_stub,
+            self._cbl_fty,
+            self._session_interface,
+            self._thread_pool,
+            command_queue=cq.CommandQueue(self._queue_size, self._queue_policy),
+            emission_policy=emission.from_string(self._emission_policy),
+            columnar=self._columnar,
+            pipeline=self._pipeline.channel())
+
+    def _add_service(self, session_id):
+        with self._lock:
+            service = self._services.get(session_id, None)
+            if not service:
+                self._services[session_id] = service = self._create_service()
+            return service
+
+    def restore_state(self, session_id):
+        '''Restores a session from its last checkpoint, like a controllable
+        process started in recovery.
+
+        Parameters
+        ----------
+        session_id: str
+        '''
+        self._add_service(session_id).restore_state(session_id)
+
+    def Initialize(self, request, context):
+        return self._add_service(self._session_id(context)).Initialize(request, context)
+
+    def Stop(self, request, context):
+        service = self._get_service(context)
+        response = service.Stop(request, context)
+        with self._lock:
+            self._services.pop(self._session_id(context), None)
+        return response
+
+    def UpdateParameters(self, request, context):
+        return self._get_service(context).UpdateParameters(request, context)
+
+    def StreamClockUpdates(self, request_iterator, context):
+        return self._get_service(context).StreamClockUpdates(request_iterator, context)
+
+    def UpdateAccount(self, request_iterator, context):
+        return self._get_service(context).UpdateAccount(request_iterator, context)
+
+    def ClockUpdate(self, request, context):
+        return self._get_service(context).ClockUpdate(request, context)
+
+    def Watch(self, request, context):
+        return self._get_service(context).Watch(request, context)
+
+    def StopWatching(self, request, context):
+        return self._get_service(context).StopWatching(request, context)
+
+
+@click.group()
+def cli():
+    pass
+
+
+@cli.command()
+@click.argument('framework_id')
+@click.argument('framework_url')
+@click.argument('root_dir')
+@click.option('-wu', '--worker-url')
+@click.option('--max-workers', default=10)
+@click.option('--recovery', multiple=True)
+@click.option('--max-sessions', default=_DEFAULT_MAX_SESSIONS)
+@click.option('--queue-size', default=0)
+@click.option(
+    '--queue-policy',
+    type=click.Choice([cq.BLOCK, cq.COALESCE]),
+    default=cq.BLOCK)
+@click.option('--emission', 'emission_policy', default=emission.MINUTE)
+@click.option('--columnar', is_flag=True)
+@click.option(
+    '--durability',
+    type=click.Choice([
+        persistence.NONE,
+        persistence.BATCHED,
+        persistence.SESSION_END]),
+    default=persistence.BATCHED)
+@click.option('--persistence-queue-size', default=256)
+def start(framework_id,
+          framework_url,
+          root_dir,
+          worker_url,
+          max_workers,
+          recovery,
+          max_sessions,
+          queue_size,
+          queue_policy,
+          emission_policy,
+          columnar,
+          durability,
+          persistence_queue_size):
+    '''
+
+    Parameters
+    ----------
+    framework_url : str
+        url for callbacks
+    worker_url: str
+    recovery: typing.Tuple[str]
+        ids of the sessions to restore
+    max_sessions: int
+        maximum number of sessions hosted by the worker, the rpc server has
+        enough threads for their streams.
+
+    The other options apply to each session, see the controllable server.
+    '''
+    with directory.StubDirectory(root_dir) as d:
+        service_access._framework_id = framework_id
+        channel = grpc.insecure_channel(framework_url)
+        service = WorkerService(
+            itf_rpc.MonitorStub(channel),
+            factory.ControllableProcessFactory(channel),
+            d,
+            futures.ThreadPoolExecutor(max_workers),
+            queue_size=queue_size,
+            queue_policy=queue_policy,
+            emission_policy=emission_policy,
+            columnar=columnar,
+            durability=durability,
+            persistence_queue_size=persistence_queue_size)
+        for session_id in recovery:
+            service.restore_state(session_id)
+        try:
+            # the server prints its port and blocks until it is stopped
+            server.serve(
+                service,
+                worker_url,
+                server_threads(max_sessions))
+        except Exception as e:
+            raise RuntimeError('Unexpected error', e)
+
+
+if __name__ == '__main__':
+    cli()
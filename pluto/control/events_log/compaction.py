@@ -0,0 +1,325 @@
+import glob
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import sql
+
+from pluto.control.events_log import schema
+from pluto.control.events_log import wal
+
+# online compaction of the write-ahead log. Only the sealed segments (the
+# segments before the one the writer appends to) are compacted:
+# - the segments past the retention policy are removed.
+# - the events up to the oldest checkpoint of the sessions are dropped,
+#   since they are never replayed.
+# - consecutive small segments are merged.
+# a merged segment replaces the last segment of its group. A journal is
+# written before the replacement, so that a compaction interrupted by a
+# crash is completed or rolled back by the next compaction.
+
+_JOURNAL = 'compaction.json'
+_TMP_SUFFIX = '.tmp'
+
+_DEFAULT_MERGE_SIZE = 16 * 1024 * 1024
+_DEFAULT_INTERVAL = 60.0
+
+
+class RetentionPolicy(object):
+    def __init__(self, max_age=None, max_size=None):
+        '''
+
+        Parameters
+        ----------
+        max_age: pandas.Timedelta
+            the sealed segments that only contain older events are removed.
+        max_size: int
+            the oldest sealed segments are removed while the log is larger
+            than this size (in bytes).
+        '''
+        self.max_age = None if max_age is None else pd.Timedelta(max_age).value
+        self.max_size = max_size
+
+
+class _SegmentInfo(object):
+    __slots__ = ['inode', 'size', 'end', 'timestamps', 'offsets']
+
+    def __init__(self, inode, size, end, timestamps, offsets):
+        self.inode = inode
+        self.size = size
+        # end of the complete records
+        self.end = end
+        self.timestamps = timestamps
+        self.offsets = offsets
+
+
+def _fsync_dir(directory):
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def recover(directory):
+    '''Completes or rolls back an interrupted compaction.
+
+    Parameters
+    ----------
+    directory: str
+    '''
+    journal = os.path.join(directory, _JOURNAL)
+    try:
+        with open(journal) as f:
+            entry = json.load(f)
+    except FileNotFoundError:
+        entry = None
+    if entry is not None:
+        if not os.path.exists(wal.segment_path(directory, entry['target']) + _TMP_SUFFIX):
+            # the target was replaced by the merged segment
+            for number in entry['merged']:
+                _remove(wal.segment_path(directory, number))
+            _fsync_dir(directory)
+        os.remove(journal)
+    # merged segments that didn't replace their target
+    for path in glob.glob(os.path.join(directory, '*' + _TMP_SUFFIX)):
+        os.remove(path)
+
+
+class Compactor(object):
+    def __init__(self,
+                 directory,
+                 engine,
+                 current_segment,
+                 retention=None,
+                 merge_size=_DEFAULT_MERGE_SIZE,
+                 interval=_DEFAULT_INTERVAL):
+        '''
+
+        Parameters
+        ----------
+        directory: str
+        engine: sqlalchemy.engine.Engine
+            the index of the events log
+        current_segment: typing.Callable[[], int]
+            returns the segment the writer appends to.
+        retention: RetentionPolicy
+        merge_size: int
+            maximum size of a merged segment.
+        interval: float
+            seconds between two compactions.
+        '''
+        self._dir = directory
+        self._engine = engine
+        self._current_segment = current_segment
+        self._retention = retention
+        self._merge_size = merge_size
+        self._interval = interval
+
+        self._infos = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = thread = threading.Thread(target=self._run, daemon=True)
+        thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self._interval):
+            self.compact()
+
+    def close(self):
+        self._stop.set()
+        thread = self._thread
+        if thread:
+            thread.join()
+
+    def _info(self, number):
+        path = wal.segment_path(self._dir, number)
+        stat = os.stat(path)
+        info = self._infos.get(number, None)
+        if info and info.inode == stat.st_ino and info.size == stat.st_size:
+            return info
+        with open(path, 'rb') as f:
+            data = f.read()
+        end = 0
+        timestamps = []
+        offsets = []
+        for offset, length, timestamp, _, _ in wal.headers(data):
+            timestamps.append(timestamp)
+            offsets.append(offset)
+            end = offset + wal.HEADER_SIZE + length
+        self._infos[number] = info = _SegmentInfo(
+            stat.st_ino,
+            stat.st_size,
+            end,
+            np.array(timestamps, dtype='int64'),
+            np.array(offsets, dtype='int64'))
+        return info
+
+    def _watermark(self):
+        checkpoints = schema.checkpoints
+        with self._engine.begin() as connection:
+            return connection.execute(
+                sql.select([sql.func.min(checkpoints.c.timestamp)])).scalar()
+
+    def _expired(self, numbers, sealed, infos):
+        retention = self._retention
+        if retention is None:
+            return []
+        expired = []
+        max_age = retention.max_age
+        if max_age is not None:
+            cutoff = pd.Timestamp.utcnow().value - max_age
+            for number in sealed:
+                timestamps = infos[number].timestamps
+                if len(timestamps) and timestamps[-1] >= cutoff:
+                    break
+                expired.append(number)
+        max_size = retention.max_size
+        if max_size is not None:
+            directory = self._dir
+            total = sum(
+                os.path.getsize(wal.segment_path(directory, number))
+                for number in numbers
+                if number not in expired)
+            for number in sealed:
+                if total <= max_size:
+                    break
+                if number not in expired:
+                    expired.append(number)
+                    total -= infos[number].size
+        return expired
+
+    def compact(self):
+        with self._lock:
+            directory = self._dir
+            recover(directory)
+            current = self._current_segment()
+            numbers = wal.list_segments(directory)
+            sealed = [number for number in numbers if number < current]
+            infos = {number: self._info(number) for number in sealed}
+
+            removed = self._expired(numbers, sealed, infos)
+            watermark = self._watermark()
+
+            # groups of (segment, index of the first kept record)
+            groups = []
+            group = []
+            group_size = 0
+            for number in sealed:
+                if number in removed:
+                    continue
+                info = infos[number]
+                keep = 0
+                if watermark is not None:
+                    keep = int(np.searchsorted(info.timestamps, watermark, 'right'))
+                if keep == len(info.timestamps):
+                    # all the events are covered by the checkpoints
+                    removed.append(number)
+                    continue
+                size = info.end - int(info.offsets[keep])
+                if group and group_size + size > self._merge_size:
+                    groups.append(group)
+                    group = []
+                    group_size = 0
+                group.append((number, keep))
+                group_size += size
+            if group:
+                groups.append(group)
+
+            if removed:
+                for number in removed:
+                    _remove(wal.segment_path(directory, number))
+                    self._infos.pop(number, None)
+                _fsync_dir(directory)
+                self._remove_rows(removed)
+
+            for group in groups:
+                if len(group) > 1 or group[0][1]:
+                    self._merge(group, infos)
+
+    def _remove_rows(self, numbers):
+        with self._engine.begin() as connection:
+            for table in (schema.offsets, schema.sessions):
+                connection.execute(
+                    table.delete().where(table.c.segment.in_(numbers)))
+
+    def _merge(self, group, infos):
+        directory = self._dir
+        target = group[-1][0]
+        path = wal.segment_path(directory, target)
+        tmp = path + _TMP_SUFFIX
+
+        timestamps = []
+        offsets = []
+        position = 0
+        with open(tmp, 'wb') as out:
+            for number, keep in group:
+                info = infos[number]
+                start = int(info.offsets[keep])
+                with open(wal.segment_path(directory, number), 'rb') as f:
+                    f.seek(start)
+                    data = f.read(info.end - start)
+                out.write(data)
+                # the records are copied as is, their checksums don't
+                # depend on their position
+                timestamps.append(info.timestamps[keep:])
+                offsets.append(info.offsets[keep:] - start + position)
+                position += len(data)
+            out.flush()
+            os.fsync(out.fileno())
+
+        merged = [number for number, _ in group[:-1]]
+        journal = os.path.join(directory, _JOURNAL)
+        with open(journal + _TMP_SUFFIX, 'w') as f:
+            json.dump({'target': target, 'merged': merged}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(journal + _TMP_SUFFIX, journal)
+        _fsync_dir(directory)
+
+        os.replace(tmp, path)
+        for number in merged:
+            os.remove(wal.segment_path(directory, number))
+            self._infos.pop(number, None)
+        _fsync_dir(directory)
+        os.remove(journal)
+
+        self._reindex(group, np.concatenate(timestamps), np.concatenate(offsets))
+
+    def _reindex(self, group, timestamps, offsets):
+        numbers = [number for number, _ in group]
+        target = numbers[-1]
+        sessions = schema.sessions
+        with self._engine.begin() as connection:
+            rows = connection.execute(
+                sql.select([sessions.c.session])
+                    .where(sessions.c.segment.in_(numbers))).fetchall()
+            for table in (schema.offsets, sessions):
+                connection.execute(
+                    table.delete().where(table.c.segment.in_(numbers)))
+            connection.execute(
+                schema.offsets.insert().values(
+                    timestamp=int(timestamps[0]),
+                    segment=target,
+                    offset=0))
+            for row in rows:
+                session = row['session']
+                i = int(np.searchsorted(timestamps, session, 'left'))
+                if i < len(offsets):
+                    connection.execute(
+                        sessions.insert().values(
+                            session=session,
+                            segment=target,
+                            offset=int(offsets[i])))
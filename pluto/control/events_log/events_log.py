@@ -1,16 +1,44 @@
 from sqlalchemy import sql
 import abc
+import zlib
 
 from pluto.control.events_log import schema
+from pluto.control.events_log import wal
+from pluto.control.events_log import reader
+from pluto.control.events_log import compaction
 from pluto.interface.utils import paths, db_utils
 from pluto.coms.utils import conversions
 
 from protos import (
-    events_pb2,
     clock_pb2,
     controller_pb2,
     broker_pb2)
 
+# tags of the records of each event type
+_TAGS = {
+    'clock': 1,
+    'parameter': 2,
+    'broker': 3}
+
+_EVENT_TYPES = {tag: event_type for event_type, tag in _TAGS.items()}
+
+
+def session_key(session_id):
+    '''
+
+    Parameters
+    ----------
+    session_id: str
+
+    Returns
+    -------
+    int
+        key of the records of the session. The records with the key 0 are
+        the records of all the sessions.
+    '''
+    return zlib.crc32(session_id.encode('utf-8')) or 1
+
+
 class NoopIterator(object):
     def __next__(self):
         raise StopIteration
@@ -24,60 +52,152 @@ class AbstractEventsLog(object):
         raise NotImplementedError()
 
     @abc.abstractmethod
-    def read(self, session_id, datetime):
+    def read(self, session_id, datetime, event_types=None):
         '''
 
         Parameters
         ----------
         session_id: str
         datetime: pandas.Timestamp
+            the events after this datetime are read.
+        event_types: typing.Iterable[str]
+            if set, only the events of these types are read.
 
         Returns
         -------
-        typing.Iterable[_Event]
+        typing.Iterable[tuple]
+            (event type, event)
         '''
         raise NotImplementedError()
 
+    @abc.abstractmethod
+    def checkpoint(self, session_id, datetime):
+        '''Records that the state of the session was stored at the datetime:
+        the previous events are not replayed anymore.
+
+        Parameters
+        ----------
+        session_id: str
+        datetime: pandas.Timestamp
+        '''
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def remove_checkpoint(self, session_id):
+        raise NotImplementedError()
+
 class EventsLog(AbstractEventsLog):
-    def __init__(self):
+    def __init__(self, retention=None):
+        '''
+
+        Parameters
+        ----------
+        retention: pluto.control.events_log.compaction.RetentionPolicy
+            If None, the events are kept until they are covered by the
+            checkpoints of the sessions.
+        '''
         root = paths.get_dir('control')
         dir_ = paths.get_dir('events', root)
         file_ = paths.get_file_path('metadata', dir_)
 
         self._engine = engine = db_utils.create_engine(file_)
         schema.metadata.create_all(engine)
-        self._writer = _EventsLogWriter(engine, dir_)
+        self._wal_dir = paths.get_dir('wal', dir_)
+        # created on first use, so that reading the log doesn't recover
+        # (and truncate) the segment of a running writer
+        self._writer = None
+        # runs in the process of the writer
+        self._compactor = None
+        self._retention = retention
 
     def writer(self):
-        return self._writer
-
-    def read(self, session_id, datetime):
+        writer = self._writer
+        if writer is None:
+            self._writer = writer = _EventsLogWriter(self._engine, self._wal_dir)
+            self._compactor = compactor = compaction.Compactor(
+                self._wal_dir,
+                self._engine,
+                writer.current_segment,
+                self._retention)
+            compactor.start()
+        return writer
+
+    def checkpoint(self, session_id, datetime):
+        checkpoints = schema.checkpoints
         with self._engine.begin() as connection:
-            statement = sql.select(
-                [schema.datetimes.datetime,
-                 schema.events.file_path]) \
-                .join(schema.datetimes) \
-                .where(schema.datetimes.c.datetime > datetime)
-            result = connection.execute(statement)
-            values = []
-            for row in result:
-                values.append(_Events(
-                    row['datetime'],
-                    row['file_path']))
-            for evt in sorted(values):
-                with open(evt.file_path, 'rb') as f:
-                    for line in f.read():
-                        event = events_pb2.Event()
-                        event.ParseFromString(line)
-                        evt_type = event.event_type
-                        dt, evt = _create_event(evt_type, event.event)
-                        if dt > datetime:
-                            if evt_type == 'parameter':
-                                # filter session id
-                                if evt.session_id == session_id:
-                                    yield evt
-                            else:
-                                yield evt_type, evt
+            connection.execute(
+                checkpoints.delete().where(
+                    checkpoints.c.session_id == session_id))
+            connection.execute(
+                checkpoints.insert().values(
+                    session_id=session_id,
+                    timestamp=datetime.value))
+
+    def remove_checkpoint(self, session_id):
+        checkpoints = schema.checkpoints
+        with self._engine.begin() as connection:
+            connection.execute(
+                checkpoints.delete().where(
+                    checkpoints.c.session_id == session_id))
+
+    def _start(self, datetime):
+        # position of the last commit at or before the datetime. The
+        # records that follow it are in timestamp order.
+        offsets = schema.offsets
+        with self._engine.begin() as connection:
+            row = connection.execute(
+                sql.select([offsets.c.segment, offsets.c.offset])
+                    .where(offsets.c.timestamp <= datetime.value)
+                    .order_by(offsets.c.segment.desc(), offsets.c.offset.desc())
+                    .limit(1)).first()
+        if row is None:
+            return 0, 0
+        return row['segment'], row['offset']
+
+    def reader(self, segment=0):
+        '''
+
+        Parameters
+        ----------
+        segment: int
+            first segment to read.
+
+        Returns
+        -------
+        pluto.control.events_log.reader.LogReader
+        '''
+        return reader.LogReader(self._wal_dir, segment)
+
+    def read(self, session_id, datetime, event_types=None):
+        segment, _ = self._start(datetime)
+        log_reader = self.reader(segment)
+        tags = None
+        if event_types is not None:
+            tags = [_TAGS[event_type] for event_type in event_types]
+        try:
+            records = log_reader.records(
+                start=datetime.value + 1,
+                tags=tags,
+                key=session_key(session_id))
+            for _, tag, payload in records:
+                evt_type = _EVENT_TYPES[tag]
+                _, evt = _create_event(evt_type, payload)
+                if evt_type == 'parameter':
+                    # keys can collide
+                    if evt.run_params[0].session_id != session_id:
+                        continue
+                yield evt_type, evt
+        finally:
+            log_reader.close()
+
+    def close(self):
+        compactor = self._compactor
+        if compactor:
+            compactor.close()
+        writer = self._writer
+        if writer:
+            writer.close()
+
 
 class NoopEventsLog(object):
     def __init__(self):
@@ -87,9 +207,18 @@ class NoopEventsLog(object):
     def writer(self):
         return self._writer
 
-    def read(self, session_id, datetime):
+    def read(self, session_id, datetime, event_types=None):
         return self._itr
 
+    def checkpoint(self, session_id, datetime):
+        pass
+
+    def remove_checkpoint(self, session_id):
+        pass
+
+    def close(self):
+        pass
+
 
 class _NoopEventLogWriter(object):
     def initialize(self, datetime):
@@ -101,6 +230,9 @@ class _NoopEventLogWriter(object):
     def write_event(self, event_type, event):
         pass
 
+    def close(self):
+        pass
+
     def __enter__(self):
         return self
 
@@ -109,12 +241,32 @@ class _NoopEventLogWriter(object):
 
 
 class _EventsLogWriter(object):
-    def __init__(self, engine, root_dir):
-        self._connection = None
-        self._path = None
-        self._session = None
-        self._dir = root_dir
+    def __init__(self, engine, wal_dir):
         self._engine = engine
+        self._datetime = None
+        self._wal = log = wal.WriteAheadLog(wal_dir, on_commit=self._index)
+
+        # remove the positions of the records lost in a crash
+        segment, offset = log.end
+        with engine.begin() as connection:
+            for table in (schema.offsets, schema.sessions):
+                connection.execute(
+                    table.delete().where(sql.or_(
+                        table.c.segment > segment,
+                        sql.and_(
+                            table.c.segment == segment,
+                            table.c.offset >= offset))))
+
+    def current_segment(self):
+        return self._wal.end[0]
+
+    def _index(self, batch):
+        # one row per commit
+        with self._engine.begin() as connection:
+            connection.execute(
+                schema.offsets.insert(),
+                [{'timestamp': timestamp, 'segment': segment, 'offset': offset}
+                 for timestamp, segment, offset in batch])
 
     def initialize(self, datetime):
         '''
@@ -126,28 +278,39 @@ class _EventsLogWriter(object):
         '''
 
         # called once per session
-        self._path = path = paths.get_file_path(
-            str(datetime),
-            self._dir)
-        self._session = datetime
-        self._connection.execute(
-            schema.events.insert().values(
-                session=datetime,
-                file_path=path))
+        self._datetime = datetime.value
+        segment, offset = self._wal.end
+        with self._engine.begin() as connection:
+            connection.execute(
+                schema.sessions.insert().values(
+                    session=datetime.value,
+                    segment=segment,
+                    offset=offset))
 
     def write_datetime(self, datetime):
-        self._connection.execute(
-            schema.datetimes.insert().values(
-                datetime=datetime,
-                session=self._session))
+        # the events are stamped with the last datetime
+        self._datetime = datetime.value
 
     def write_event(self, event_type, event):
-        # store signals in a file if we have signals
-        with open(self._path, 'wb') as f:
-            f.write(events_pb2.Event(
-                event_type=event_type,
-                event=event.SerializeToString())
-                    .SerializeToString())
+        tag = _TAGS[event_type]
+        if event_type == 'parameter':
+            # a record per session, so that the sessions only read their own
+            for params in event.run_params:
+                self._wal.append(
+                    self._datetime,
+                    controller_pb2.RunParamsList(
+                        run_params=[params],
+                        timestamp=event.timestamp).SerializeToString(),
+                    tag,
+                    session_key(params.session_id))
+        else:
+            self._wal.append(
+                self._datetime,
+                event.SerializeToString(),
+                tag)
+
+    def close(self):
+        self._wal.close()
 
     def __enter__(self):
         '''
@@ -156,11 +319,10 @@ class _EventsLogWriter(object):
         -------
         _EventsLogWriter
         '''
-        self._connection = self._engine.connect()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self._connection.close()
+        pass
 
 
 def get_events_log(mode='simulation'):
@@ -169,61 +331,6 @@ def get_events_log(mode='simulation'):
     else:
         return NoopEventsLog()
 
-class _Events(object):
-    __slots__ = ['datetime', 'file_path']
-
-    def __init__(self, datetime, file_path):
-        self.file_path = file_path
-        self.datetime = datetime
-
-    def __gt__(self, other):
-        '''
-
-        Parameters
-        ----------
-        other: _Events
-
-        '''
-        if self.datetime > other.datetime:
-            return True
-        else:
-            return False
-
-    def __lt__(self, other):
-        '''
-
-        Parameters
-        ----------
-        other: _Events
-
-        '''
-        if self.datetime < other.datetime:
-            return True
-        else:
-            return False
-
-    def __eq__(self, other):
-        '''
-
-        Parameters
-        ----------
-        other: _Events
-
-        '''
-
-        if self.datetime == other.datetime:
-            return True
-
-        else:
-            return False
-
-    def __ge__(self, other):
-        return self.__eq__(other) or self.__gt__(other)
-
-    def __le__(self, other):
-        return self.__eq__(other) or self.__lt__(other)
-
-
 class _Event(object):
     __slots__ = ['datetime', 'event']
 
@@ -0,0 +1,183 @@
+import mmap
+import os
+
+import numpy as np
+
+from pluto.control.events_log import wal
+
+# memory-mapped reader of the write-ahead log.
+# only the headers of the records are read to index them, in arrays sorted
+# by timestamp (the records are appended in timestamp order). The reader
+# seeks to a datetime with a binary search and filters the records on their
+# tag and key before reading their payload, so the records it skips are
+# never copied nor decoded.
+
+# (name, dtype)
+_COLUMNS = (
+    ('_timestamps', 'int64'),
+    ('_segments', 'int32'),
+    ('_offsets', 'int64'),
+    ('_lengths', 'uint32'),
+    ('_tags', 'uint16'),
+    ('_keys', 'uint32'),
+)
+
+
+class _Segment(object):
+    __slots__ = ['path', 'map', 'size', 'end', 'inode']
+
+    def __init__(self, path):
+        self.path = path
+        self.map = None
+        self.size = 0
+        # end of the indexed records
+        self.end = 0
+        self.inode = None
+
+    def remap(self):
+        with open(self.path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_size > self.size:
+                # the previous map is closed once the iterators that use it
+                # are done
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self.size = stat.st_size
+                self.inode = stat.st_ino
+        return self.map
+
+    def replaced(self):
+        '''True if the segment was removed or rewritten by the compactor.'''
+        if self.inode is None:
+            return False
+        try:
+            return os.stat(self.path).st_ino != self.inode
+        except FileNotFoundError:
+            return True
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+
+
+class LogReader(object):
+    def __init__(self, directory, segment=0):
+        '''
+
+        Parameters
+        ----------
+        directory: str
+        segment: int
+            first segment to read.
+        '''
+        self._dir = directory
+        self._first = segment
+        self._reset()
+        self.refresh()
+
+    def _reset(self):
+        self._files = {}
+        for name, dtype in _COLUMNS:
+            setattr(self, name, np.empty(0, dtype=dtype))
+
+    def __len__(self):
+        return len(self._timestamps)
+
+    def refresh(self):
+        '''Indexes the records that were appended since the last refresh.'''
+        rows = []
+        directory = self._dir
+        numbers = [
+            number for number in wal.list_segments(directory)
+            if number >= self._first]
+        if any(segment.replaced() for segment in self._files.values()):
+            # the segments were compacted since the last refresh
+            self._reset()
+        files = self._files
+        for number in numbers:
+            segment = files.get(number, None)
+            if segment is None:
+                files[number] = segment = _Segment(wal.segment_path(directory, number))
+            self._index(number, segment, rows)
+        if rows:
+            for (name, dtype), column in zip(_COLUMNS, zip(*rows)):
+                setattr(self, name, np.concatenate(
+                    (getattr(self, name), np.array(column, dtype=dtype))))
+
+    def _index(self, number, segment, rows):
+        data = segment.remap()
+        if data is None:
+            # empty segment
+            return
+        end = segment.end
+        for offset, length, timestamp, tag, key in wal.headers(data, end):
+            rows.append((timestamp, number, offset, length, tag, key))
+            end = offset + wal.HEADER_SIZE + length
+        segment.end = end
+
+    def seek(self, timestamp):
+        '''
+
+        Parameters
+        ----------
+        timestamp: int
+            utc nanoseconds
+
+        Returns
+        -------
+        int
+            position of the first record at or after the timestamp.
+        '''
+        return int(np.searchsorted(self._timestamps, timestamp, 'left'))
+
+    def records(self, start=None, end=None, tags=None, key=None):
+        '''Reads the records with a timestamp in [start, end).
+
+        Parameters
+        ----------
+        start: int
+            utc nanoseconds
+        end: int
+            utc nanoseconds
+        tags: typing.Iterable[int]
+            if set, only the records with one of these tags are read.
+        key: int
+            if set, only the records with this key, or with the key 0 (the
+            records of all the keys), are read.
+
+        Yields
+        ------
+        tuple
+            (timestamp, tag, payload)
+        '''
+        lo = 0 if start is None else self.seek(start)
+        hi = len(self) if end is None else self.seek(end)
+        if lo >= hi:
+            return
+
+        mask = np.ones(hi - lo, dtype='bool')
+        if tags is not None:
+            mask &= np.isin(self._tags[lo:hi], list(tags))
+        if key is not None:
+            keys = self._keys[lo:hi]
+            mask &= (keys == key) | (keys == 0)
+
+        files = self._files
+        segments = self._segments
+        offsets = self._offsets
+        header_size = wal.HEADER_SIZE
+        for i in (np.flatnonzero(mask) + lo).tolist():
+            data = files[int(segments[i])].map
+            offset = int(offsets[i])
+            length, crc, timestamp, tag, key_ = wal.unpack_header(data, offset)
+            start_ = offset + header_size
+            payload = data[start_:start_ + length]
+            if wal.checksum(timestamp, tag, key_, payload) != crc:
+                # the following records can't be trusted
+                return
+            yield timestamp, tag, payload
+
+    def close(self):
+        for segment in self._files.values():
+            segment.close()
+        self._files = {}
@@ -2,31 +2,56 @@ import sqlalchemy as sa
 
 metadata = sa.MetaData()
 
-events = sa.Table(
-    'events',
+# position of the first record of each commit of the write-ahead log.
+offsets = sa.Table(
+    'offsets',
     metadata,
     sa.Column(
-        'file_path',
-        sa.String),
+        'timestamp',
+        sa.BigInteger,
+        nullable=False,
+        index=True),
+    sa.Column(
+        'segment',
+        sa.Integer,
+        nullable=False),
+    sa.Column(
+        'offset',
+        sa.BigInteger,
+        nullable=False)
+)
+
+# position of the first record of each session.
+sessions = sa.Table(
+    'sessions',
+    metadata,
     sa.Column(
         'session',
-        sa.DateTime,
+        sa.BigInteger,
         primary_key=True,
+        nullable=False),
+    sa.Column(
+        'segment',
+        sa.Integer,
+        nullable=False),
+    sa.Column(
+        'offset',
+        sa.BigInteger,
         nullable=False)
 )
 
-datetimes = sa.Table(
-    'datetimes',
+# datetime of the last stored state of each session. The events up to the
+# oldest checkpoint are not replayed, so they can be compacted.
+checkpoints = sa.Table(
+    'checkpoints',
     metadata,
     sa.Column(
-        'datetime',
-        sa.DateTime,
-        nullable=False
-    ),
+        'session_id',
+        sa.String,
+        primary_key=True,
+        nullable=False),
     sa.Column(
-        'session',
-        sa.ForeignKey(events.c.session),
-        nullable=False
-    )
+        'timestamp',
+        sa.BigInteger,
+        nullable=False)
 )
-
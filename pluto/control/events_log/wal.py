@@ -0,0 +1,306 @@
+import os
+import struct
+import threading
+import zlib
+
+# segmented, append-only write-ahead log.
+# each record is a header (little-endian uint32 length of the payload,
+# uint32 crc32 of the rest of the record, int64 utc nanoseconds, uint16 tag
+# and uint32 key, that readers can filter on without reading the payload)
+# followed by the payload. The records are appended to the last segment,
+# which is rolled once it reaches the segment size.
+# appended records are committed in groups: the segment is flushed and
+# fsynced by a background thread, every commit interval, or as soon as the
+# uncommitted bytes reach the commit size. The fsync runs outside the lock of
+# the appends, so that appending doesn't wait for the disk. Records that were not committed
+# before a crash are lost, and a partially written record at the end of the
+# last segment is removed when the log is opened.
+
+_HEADER = struct.Struct('<IIqHI')
+# the part of the header covered by the checksum
+_STAMP = struct.Struct('<qHI')
+
+HEADER_SIZE = _HEADER.size
+
+_SUFFIX = '.wal'
+
+_DEFAULT_SEGMENT_SIZE = 64 * 1024 * 1024
+_DEFAULT_COMMIT_INTERVAL = 0.5
+_DEFAULT_COMMIT_SIZE = 1024 * 1024
+
+def checksum(timestamp, tag, key, payload):
+    return zlib.crc32(payload, zlib.crc32(_STAMP.pack(timestamp, tag, key))) & 0xffffffff
+
+
+def unpack_header(data, offset):
+    '''
+
+    Returns
+    -------
+    tuple
+        (length, checksum, timestamp, tag, key)
+    '''
+    return _HEADER.unpack_from(data, offset)
+
+
+def headers(data, offset=0):
+    '''Reads the headers of the complete records of a segment, without
+    checking them.
+
+    Parameters
+    ----------
+    data: bytes
+        content of the segment
+    offset: int
+
+    Yields
+    ------
+    tuple
+        (offset, length, timestamp, tag, key)
+    '''
+    end = len(data)
+    header_size = _HEADER.size
+    while offset + header_size <= end:
+        length, _, timestamp, tag, key = _HEADER.unpack_from(data, offset)
+        next_ = offset + header_size + length
+        if next_ > end:
+            # partially written record
+            break
+        yield offset, length, timestamp, tag, key
+        offset = next_
+
+
+def segment_path(directory, segment):
+    return os.path.join(directory, '{:010d}{}'.format(segment, _SUFFIX))
+
+
+def list_segments(directory):
+    '''
+
+    Parameters
+    ----------
+    directory: str
+
+    Returns
+    -------
+    typing.List[int]
+        sorted segment numbers
+    '''
+    return sorted(
+        int(name[:-len(_SUFFIX)])
+        for name in os.listdir(directory)
+        if name.endswith(_SUFFIX))
+
+
+def scan(data, offset=0):
+    '''Reads the valid records of a segment from the offset.
+
+    Parameters
+    ----------
+    data: bytes
+        content of the segment
+    offset: int
+
+    Yields
+    ------
+    tuple
+        (offset, timestamp, tag, key, payload)
+    '''
+    end = len(data)
+    header_size = _HEADER.size
+    while offset + header_size <= end:
+        length, crc, timestamp, tag, key = _HEADER.unpack_from(data, offset)
+        start = offset + header_size
+        payload = data[start:start + length]
+        if len(payload) < length or checksum(timestamp, tag, key, payload) != crc:
+            # partially written or corrupted record
+            break
+        yield offset, timestamp, tag, key, payload
+        offset = start + length
+
+
+def _valid_end(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    end = 0
+    for offset, _, _, _, payload in scan(data):
+        end = offset + _HEADER.size + len(payload)
+    return end
+
+
+class WriteAheadLog(object):
+    def __init__(self,
+                 directory,
+                 segment_size=_DEFAULT_SEGMENT_SIZE,
+                 commit_interval=_DEFAULT_COMMIT_INTERVAL,
+                 commit_size=_DEFAULT_COMMIT_SIZE,
+                 on_commit=None):
+        '''
+
+        Parameters
+        ----------
+        directory: str
+        segment_size: int
+            size in bytes after which a new segment is started.
+        commit_interval: float
+            maximum number of seconds between two commits.
+        commit_size: int
+            number of uncommitted bytes that triggers a commit.
+        on_commit: typing.Callable
+            called after each commit, with the list of
+            (timestamp, segment, offset) of the first committed record of
+            each segment.
+        '''
+        self._dir = directory
+        self._segment_size = segment_size
+        self._commit_interval = commit_interval
+        self._commit_size = commit_size
+        self._on_commit = on_commit
+
+        segments = list_segments(directory)
+        if segments:
+            self._segment = segment = segments[-1]
+            path = segment_path(directory, segment)
+            self._offset = end = _valid_end(path)
+            if end < os.path.getsize(path):
+                with open(path, 'r+b') as f:
+                    f.truncate(end)
+        else:
+            self._segment = 0
+            self._offset = 0
+        self._file = open(segment_path(directory, self._segment), 'ab')
+
+        self._uncommitted = 0
+        self._batch = []
+
+        self._condition = threading.Condition()
+        # keeps the commits in order
+        self._commit_lock = threading.Lock()
+        self._closed = False
+        self._thread = thread = threading.Thread(target=self._run, daemon=True)
+        thread.start()
+
+    @property
+    def end(self):
+        '''(segment, offset) of the next record'''
+        return self._segment, self._offset
+
+    def append(self, timestamp, payload, tag=0, key=0):
+        '''
+
+        Parameters
+        ----------
+        timestamp: int
+            utc nanoseconds
+        payload: bytes
+        tag: int
+            uint16 type of the record
+        key: int
+            uint32 key of the record
+
+        Returns
+        -------
+        tuple
+            (segment, offset) of the record
+        '''
+        size = _HEADER.size + len(payload)
+        with self._condition:
+            if self._offset and self._offset + size > self._segment_size:
+                self._roll()
+            segment = self._segment
+            offset = self._offset
+            f = self._file
+            f.write(_HEADER.pack(
+                len(payload),
+                checksum(timestamp, tag, key, payload),
+                timestamp,
+                tag,
+                key))
+            f.write(payload)
+            self._offset = offset + size
+
+            batch = self._batch
+            if not batch or batch[-1][1] != segment:
+                batch.append((timestamp, segment, offset))
+            self._uncommitted += size
+            if self._uncommitted >= self._commit_size:
+                self._condition.notify()
+        return segment, offset
+
+    def _roll(self):
+        self._sync()
+        self._file.close()
+        self._segment += 1
+        self._offset = 0
+        self._file = open(segment_path(self._dir, self._segment), 'ab')
+
+    def _sync(self):
+        f = self._file
+        f.flush()
+        os.fsync(f.fileno())
+
+    def commit(self):
+        with self._commit_lock:
+            with self._condition:
+                batch = self._batch
+                if not batch:
+                    return
+                f = self._file
+                f.flush()
+                # the segment can be rolled (and closed) by an append while
+                # it is synced. The previous segments were synced when they
+                # were rolled.
+                fd = os.dup(f.fileno())
+                self._batch = []
+                self._uncommitted = 0
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            on_commit = self._on_commit
+            if on_commit:
+                on_commit(batch)
+
+    def _run(self):
+        condition = self._condition
+        while True:
+            with condition:
+                if self._closed:
+                    return
+                if self._uncommitted < self._commit_size:
+                    condition.wait(self._commit_interval)
+            self.commit()
+
+    def close(self):
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+        self.commit()
+        self._file.close()
+
+
+def read(directory, segment=0, offset=0):
+    '''Reads the valid records from the position.
+
+    Parameters
+    ----------
+    directory: str
+    segment: int
+    offset: int
+
+    Yields
+    ------
+    tuple
+        (timestamp, tag, key, payload)
+    '''
+    for number in list_segments(directory):
+        if number < segment:
+            continue
+        with open(segment_path(directory, number), 'rb') as f:
+            data = f.read()
+        start = offset if number == segment else 0
+        for _, timestamp, tag, key, payload in scan(data, start):
+            yield timestamp, tag, key, payload
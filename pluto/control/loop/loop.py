@@ -13,6 +13,7 @@ import datetime
 
 from pluto.control.clock.clock import StopExecution
 from pluto.control.clock import clock
+from pluto.control.loop import scheduler
 from pluto.control.modes import simulation_mode
 
 
@@ -230,30 +231,39 @@ class SimulationMinuteLoop(object):
 
 class MinuteLiveLoop(object):
     # todo: should this be a singleton?
-    def __init__(self, ntp_server_address=None):
-        self._master_clock = self._create_clock('24/7')
+    def __init__(self,
+                 ntp_server_address=None,
+                 overrun_policy=scheduler.CATCH_UP,
+                 time_source=None):
         self._clocks = {}
         # todo: we need a proto_calendar database or directory => hub?
         self._start_dt = pd.Timestamp.combine(pd.Timestamp.utcnow(), datetime.time.min)
 
         self._ntp_client = ntplib.NTPClient()
-        self._offset = 0
         self._ntp_server_address = 'pool.ntp.org' if not ntp_server_address else ntp_server_address
 
-        self._thread = threading.Thread(self._run)
+        # the offset is estimated on a background thread, so that a slow
+        # ntp response doesn't delay the ticks
+        self._offset_estimator = scheduler.OffsetEstimator(self._get_offset)
+        self._scheduler = scheduler.Scheduler(
+            60,
+            overrun_policy,
+            time_source,
+            self._offset_estimator)
+
+        self._thread = threading.Thread(target=self._run)
         self._run_lock = threading.Lock()
         self._queue_lock = threading.Lock()
 
-        self._stop_event = threading.Event()
         self._stop = False
 
         self._to_execute = deque()
 
         self._control_modes = []
 
-
-    def _get_seconds(self, time_delta):
-        return time_delta.total_seconds()
+    @property
+    def jitter_stats(self):
+        return self._scheduler.stats
 
     def _get_offset(self):
         ntp_stats = self._ntp_client.request(self._ntp_server_address)
@@ -263,80 +273,27 @@ class MinuteLiveLoop(object):
         with self._queue_lock:
             self._to_execute.append(fn)
 
-    def _get_minutes(self, clock, session_length):
-        return pd.DatetimeIndex(
-            set(dt for dt, evt in clock.get_generator(
-                clock.get_sessions(session_length)))).sort_values()
-
-
     def _run(self):
-        # todo: should we use an "always open calendar"?
-        # todo: handle interrupt signals => interrupt sleep etc.
-        #  => change time.sleep to thread.Event wait with a time out. That way, we can instanly interrupt
-        #  the program.
-        # the loop is responsible of synchronizing the real time real time with the expected time
-        master_clock = self._master_clock
-
-        minutes = _get_minutes(master_clock, 10)
-        clocks = self._clocks.values()
-        event = self._stop_event
-
-        #todo: what if there are no clocks?
-
-
-        offset = self._get_offset()
-        # todo: check for zero index induced errors, especially for slices.
-
-        # # gets minutes within a range
-        # minutes = _get_minutes(clocks, 10)
-
-        tick_counter = 0
-
-        minute_idx = 0
-
-        cur_exp_dt = minutes[minute_idx]
+        # todo: handle interrupt signals
+        # the loop is responsible of synchronizing the real time with the expected time
+        sch = self._scheduler
+        estimator = self._offset_estimator
+        clocks = self._clocks
+        modes = self._control_modes
+        to_execute = self._to_execute
 
-        def utc_now():
-            return pd.Timestamp(pd.Timestamp.utcfromtimestamp(time.time() + offset), tz='UTC')
+        estimator.start()
+        # ticks are anchored on utc minutes
+        sch.start()
 
-        # synchronize with the next expected minute
         while not self._stop:
-            if self._get_seconds(cur_exp_dt - utc_now()) > 0:
-                # sleep until the next expected minute
-                event.wait(self._get_seconds(cur_exp_dt - utc_now()))
+            tick = sch.next_tick()
+            if tick is None:
                 break
 
-            elif self._get_seconds(cur_exp_dt - utc_now()) < 0:
-                minute_idx += 1
-                # process pending clocks
-                # add new clocks each new session.
+            cur_exp_dt = pd.Timestamp(tick, tz='UTC')
 
-                # # todo: what if sessions changed here? We lose track of the minute index...
-                # if self._update_minutes():
-                #     minute_idx = 0
-                #     # reload minutes
-                #     minutes = _get_minutes(master_clock, 10)
-                #     # search for the correct minute index since we probably haven't changed sessions
-                #     while minutes[minute_idx] < cur_exp_dt:
-                #         minute_idx += 1
-                #     cur_exp_dt = minutes[minute_idx]
-                # else:
-                try:
-                    cur_exp_dt = minutes[minute_idx]
-                except IndexError:
-                    # we've reached the last minute of the current last session.
-                    # reset minute_idx
-                    minutes = _get_minute(master_clock, 10)
-                    minute_idx = 0
-                    cur_exp_dt = minutes[minute_idx]
-            else:
-                break
-
-        # start the loop
-        while not self._stop:
-            to_execute = self._to_execute
-
-            #execute all pending requests
+            # execute all pending requests
             with self._queue_lock:
                 while True:
                     try:
@@ -344,54 +301,21 @@ class MinuteLiveLoop(object):
                     except IndexError:
                         break
 
-            # # check if new clocks have been added from the execution
-            # if self._update_minutes:
-            #     minute_idx = 0
-            #     # reload minutes
-            #     minutes = _get_minutes(clocks, 10)
-            #     # search for the correct minute index since we probably have changed sessions
-            #     while minutes[minute_idx] < cur_exp_dt:
-            #         minute_idx += 1
-            #     cur_exp_dt = minutes[minute_idx]
-            #     self._update_minutes = False
-            # else:
-            try:
-                cur_exp_dt = minutes[minute_idx]
-            except IndexError:
-                minutes = _get_minutes(clocks, 10)
-                minute_idx = 0
-                cur_exp_dt = minutes[minute_idx]
-
-            #update the modes
-
-            modes = self._control_modes
+            # update the modes
             for mode in modes:
                 mode.update(cur_exp_dt)
 
             # update the clocks
-            #todo: each clock should check for calendar each end of session...
-            for cl in clocks:
-                cl.update(utc_now(), cur_exp_dt)
-
-            tick_counter += 1
-
-            # update offset every 5 "tick"
-            if tick_counter == 5:
-                offset = self._get_offset()
-                tick_counter = 0
+            # todo: each clock should check for calendar each end of session...
+            for cl in list(clocks.values()):
+                cl.update(cur_exp_dt)
 
             # todo: update calendar if there is a calendar update.
 
-            minute_idx += 1
-
-            # todo: what if we "overshoot" the expected datetime ? we will get a negative number
-            # wait until the next expected datetime
-            event.wait(self._get_seconds(cur_exp_dt - utc_now()))
-
-            #if a stop signal was emitted, stop all the modes, so that everything is shutdown properly
-            if self._stop:
-                for mode in modes:
-                    mode.stop()
+        estimator.stop()
+        # close all the modes, so that everything is shutdown properly
+        for mode in modes:
+            mode.close()
 
     def start(self):
         #todo: should we protect against race conditions? two threads might call this function
@@ -405,7 +329,7 @@ class MinuteLiveLoop(object):
 
     def stop(self, liquidate=False):
         self._stop = True
-        self._stop_event.set()
+        self._scheduler.stop()
 
     def _get_clocks(self, exchanges):
         clocks = self._clocks
@@ -427,9 +351,6 @@ class MinuteLiveLoop(object):
             pd.Timestamp(pd.Timestamp.combine(pd.Timestamp.utcnow(), datetime.time.min), tz='UTC'),
             minute_emission=True)
 
-    def _get_seconds(self, time_delta):
-        return time_delta.total_seconds()
-
     def _pass(self, broker, clock_factory):
         pass
 
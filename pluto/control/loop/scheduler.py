@@ -0,0 +1,251 @@
+import math
+import threading
+import time
+
+import logbook
+
+log = logbook.Logger('Scheduler')
+
+# overrun policies: when a tick is emitted after the following deadline,
+# either emit the missed ticks back to back or drop them and resume on the
+# latest due tick.
+CATCH_UP = 'catch_up'
+SKIP = 'skip'
+
+_NANOS = 1000000000
+
+
+def _monotonic_ns():
+    return int(time.monotonic() * _NANOS)
+
+
+def _time_ns():
+    return int(time.time() * _NANOS)
+
+
+class TimeSource(object):
+    '''Source of time of the scheduler, injectable for testing.'''
+
+    def __init__(self):
+        # python < 3.7 has no nanosecond clocks
+        self._monotonic_ns = getattr(time, 'monotonic_ns', _monotonic_ns)
+        self._time_ns = getattr(time, 'time_ns', _time_ns)
+
+    def monotonic_ns(self):
+        return self._monotonic_ns()
+
+    def time_ns(self):
+        return self._time_ns()
+
+    def wait(self, event, timeout):
+        '''Waits until the event is set or until the timeout (in seconds)
+        has elapsed.
+
+        Returns
+        -------
+        bool
+            True if the event was set
+        '''
+        return event.wait(timeout)
+
+
+class JitterStats(object):
+    '''Running statistics of the lateness of the ticks (in nanoseconds).'''
+
+    __slots__ = ['count', 'max', 'skipped', '_mean', '_m2']
+
+    def __init__(self):
+        self.count = 0
+        self.max = 0
+        self.skipped = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, lateness):
+        # welford's online algorithm
+        self.count = count = self.count + 1
+        delta = lateness - self._mean
+        self._mean += delta / count
+        self._m2 += delta * (lateness - self._mean)
+        if lateness > self.max:
+            self.max = lateness
+
+    @property
+    def mean(self):
+        return self._mean
+
+    @property
+    def std(self):
+        count = self.count
+        if count < 2:
+            return 0.0
+        return math.sqrt(self._m2 / (count - 1))
+
+
+class OffsetEstimator(object):
+    '''Estimates the offset of the local clock from a reference clock on a
+    background thread. Offset samples are smoothed with an exponential moving
+    average, so that a single bad sample doesn't shift the schedule.'''
+
+    def __init__(self, request, interval=64, smoothing=0.125):
+        '''
+
+        Parameters
+        ----------
+        request: callable
+            returns the offset (in seconds) of the local clock from the
+            reference clock.
+        interval: float
+            seconds between two requests
+        smoothing: float
+            weight of a new sample
+        '''
+        self._request = request
+        self._interval = interval
+        self._smoothing = smoothing
+
+        self._offset_ns = 0
+        self._num_samples = 0
+
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def offset_ns(self):
+        return self._offset_ns
+
+    def update(self):
+        try:
+            sample = int(self._request() * _NANOS)
+        except Exception as e:
+            # keep the current estimate
+            log.warning('Offset request failed: {}'.format(e))
+            return
+        if self._num_samples == 0:
+            self._offset_ns = sample
+        else:
+            current = self._offset_ns
+            self._offset_ns = current + int(
+                self._smoothing * (sample - current))
+        self._num_samples += 1
+
+    def _run(self):
+        event = self._stop_event
+        while not event.is_set():
+            self.update()
+            event.wait(self._interval)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = thread = threading.Thread(target=self._run)
+            thread.daemon = True
+            thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class Scheduler(object):
+    '''Emits ticks at fixed utc deadlines (anchor + k * period). The waiting
+    is driven by a monotonic clock, so errors don't accumulate from a tick to
+    the other and wall clock adjustments only apply through the smoothed
+    offset.'''
+
+    def __init__(self,
+                 period=60,
+                 policy=CATCH_UP,
+                 time_source=None,
+                 offset_estimator=None):
+        '''
+
+        Parameters
+        ----------
+        period: float
+            seconds between two ticks
+        policy: str
+            overrun policy (CATCH_UP or SKIP)
+        time_source: TimeSource
+        offset_estimator: OffsetEstimator
+        '''
+        if policy not in (CATCH_UP, SKIP):
+            raise ValueError('Unknown overrun policy {}'.format(policy))
+        self._period = int(period * _NANOS)
+        self._policy = policy
+        self._time = time_source if time_source else TimeSource()
+        self._estimator = offset_estimator
+
+        self._stop_event = threading.Event()
+        self._stats = JitterStats()
+
+        # difference between the utc time and the monotonic time
+        self._base = 0
+        self._anchor = None
+        self._tick = 0
+
+    @property
+    def stats(self):
+        return self._stats
+
+    @property
+    def policy(self):
+        return self._policy
+
+    def utc_ns(self):
+        estimator = self._estimator
+        offset = estimator.offset_ns if estimator else 0
+        return self._time.monotonic_ns() + self._base + offset
+
+    def start(self, anchor=None):
+        '''
+
+        Parameters
+        ----------
+        anchor: int
+            utc nanoseconds of the first tick. Defaults to the next multiple
+            of the period.
+        '''
+        time_source = self._time
+        self._base = time_source.time_ns() - time_source.monotonic_ns()
+        if anchor is None:
+            period = self._period
+            anchor = (self.utc_ns() // period + 1) * period
+        self._anchor = anchor
+        self._tick = 0
+
+    def stop(self):
+        self._stop_event.set()
+
+    def next_tick(self):
+        '''Waits until the deadline of the next tick.
+
+        Returns
+        -------
+        int
+            utc nanoseconds of the tick or None if the scheduler was stopped
+        '''
+        event = self._stop_event
+        period = self._period
+        target = self._anchor + self._tick * period
+
+        while True:
+            if event.is_set():
+                return
+            remaining = target - self.utc_ns()
+            if remaining <= 0:
+                break
+            # the wait might return early, so we check the deadline again
+            if self._time.wait(event, remaining / _NANOS):
+                return
+
+        lateness = self.utc_ns() - target
+        if lateness >= period and self._policy == SKIP:
+            # resume on the latest due tick
+            missed = lateness // period
+            self._stats.skipped += missed
+            self._tick += missed
+            target += missed * period
+            lateness -= missed * period
+
+        self._stats.add(lateness)
+        self._tick += 1
+        return target
@@ -1,12 +1,10 @@
 import collections
 import threading
 
-from pluto.coms.utils import conversions
 from pluto.control.clock import clock
+from pluto.control.clock import timeline
 from pluto.trading_calendars import calendar_utils as cu
-from pluto.control.clock.utils import get_generator
-
-from protos import clock_pb2
+from pluto.control.clock.utils import get_events
 
 
 class SimulationLoop(object):
@@ -17,12 +15,10 @@ class SimulationLoop(object):
 
         self._frequency = frequency
 
-        self._clocks = clocks = {}
-        # create fake clock
-        clocks['fake'] = clock.FakeClock()
+        self._clocks = {}
+        self._timeline = None
 
         self._calendar = cu.get_calendar_in_range('24/7', start_dt, end_dt)
-        self._num_clocks = len(clocks)
 
         self._init_flag = False
         self._start_flag = False
@@ -46,10 +42,18 @@ class SimulationLoop(object):
     def start(self):
         calendar = self._calendar
 
-        for ts, evt in get_generator(
+        # compile the events of all the clocks before running, so that
+        # the loop doesn't need to query each clock on every tick.
+        self._timeline = tl = timeline.Timeline(
+            get_events(
                 calendar,
                 calendar.all_sessions,
-                frequency=self._frequency):
+                frequency=self._frequency))
+
+        for exchange, cl in self._clocks.items():
+            tl.add_exchange(exchange, cl.events())
+
+        for tick, ts, evt in tl:
             # acquire lock so that no further commands are executed here
             # while this block is being executed
             with self._execution_lock:
@@ -58,21 +62,10 @@ class SimulationLoop(object):
                 # call for any update that needs to be done before
                 # anything else
 
-                signals = []
-                # aggregate the signals into a single signal.
-                for cl in self._clocks.values():
-                    # todo: how do we know the clock has ended?
-                    # todo:
-                    signal = cl.update(ts)
-                    if signal:
-                        sts, s_evt, exchange = signal
-                        signal = clock_pb2.Signal(
-                            timestamp=conversions.to_proto_timestamp(sts),
-                            event=evt,
-                            exchange=exchange)
-                        signals.append(signal)
-
-                #
+                # the signals of all the clocks, aggregated into a single
+                # batch that is shared by all the control modes.
+                signals = tl.emit(tick, evt)
+
                 for control_mode in self._control_modes.values():
                     control_mode.update(ts, evt, signals)
                     # process cached commands
@@ -80,6 +73,10 @@ class SimulationLoop(object):
                     # continue execution
                     control_mode.clock_update(ts, evt, signals)
 
+        # the run is over
+        for control_mode in self._control_modes.values():
+            control_mode.close()
+
     def execute(self, command):
         with self._execution_lock:
             command(self._get_clocks)
@@ -108,10 +105,9 @@ class SimulationLoop(object):
                 # the clock will be activated on the next loop iteration
                 cl = self._create_clock(exchange)
                 clocks[exchange] = cl
-        try:
-            clocks.pop('fake')
-        except KeyError:
-            pass
+                tl = self._timeline
+                if tl is not None:
+                    tl.add_exchange(exchange, cl.events())
 
     def _process(self, ts):
         pass
@@ -0,0 +1,181 @@
+import json
+import math
+import threading
+
+import numpy as np
+import pandas as pd
+
+from pluto.finance.metrics import online
+from pluto.finance.metrics import summary as sm
+
+# aggregation of the sessions that share the capital of the broker.
+# at the end of each session, each controllable sends a compact summary
+# (see pluto.finance.metrics.summary) to the monitor, which passes it to the
+# control mode.
+# once all the running sessions have sent their summary of a period, the
+# aggregated packet is published to the watchers of the SESSION_ID. The
+# periods are the utc days of the period ends, so that sessions trading on
+# exchanges with different closes are aggregated together.
+
+SESSION_ID = 'portfolio'
+
+_DEFAULT_CAPACITY = 16
+
+_NANOS_PER_DAY = 24 * 60 * 60 * 10 ** 9
+
+
+def to_bytes(packet):
+    '''
+
+    Parameters
+    ----------
+    packet: dict
+        aggregated packet
+
+    Returns
+    -------
+    bytes
+        json form of the packet
+    '''
+    dct = dict(packet)
+    dct['period_end'] = packet['period_end'].isoformat()
+    for key, value in packet.items():
+        # json has no NaN or infinity, they are written as null
+        if isinstance(value, np.ndarray):
+            dct[key] = np.where(np.isfinite(value), value, None).tolist()
+        elif isinstance(value, float) and not math.isfinite(value):
+            dct[key] = None
+    return json.dumps(dct, allow_nan=False).encode('utf-8')
+
+
+def _period(period_end):
+    # utc day of a period end (in nanoseconds)
+    return period_end - period_end % _NANOS_PER_DAY
+
+
+class Aggregator(object):
+    '''Combines the returns and exposures of the sessions.
+
+    The returns of the last look_back sessions are kept in a matrix, with a
+    column per session, for the correlation and risk contribution metrics.'''
+
+    def __init__(self, look_back=online.APPROX_BDAYS_PER_YEAR):
+        self._look_back = look_back
+        self._history = np.full((look_back, _DEFAULT_CAPACITY), np.nan)
+        self._columns = {}
+        # index of the last row and number of rows
+        self._row = -1
+        self._rows = 0
+
+        # period -> session id -> summary
+        self._pending = {}
+        self._growth = 1.0
+        self._moments = online.Moments()
+
+        self._lock = threading.Lock()
+
+    def update(self, session_id, summary, expected):
+        '''
+
+        Parameters
+        ----------
+        session_id: str
+        summary: bytes
+            see pluto.finance.metrics.summary.pack_summary
+        expected: int
+            number of running sessions
+
+        Returns
+        -------
+        dict
+            the aggregated packet, once all the sessions have sent their
+            summary of the period, None otherwise.
+        '''
+        values = sm.SUMMARY.unpack(summary)
+        period = _period(values[0])
+        with self._lock:
+            pending = self._pending
+            summaries = pending.get(period, None)
+            if summaries is None:
+                pending[period] = summaries = {}
+            summaries[session_id] = values
+            if len(summaries) < expected:
+                return
+            del pending[period]
+            # the earlier periods can't be completed anymore (a session
+            # stopped before sending its summary)
+            for stale in [p for p in pending if p < period]:
+                del pending[stale]
+            return self._aggregate(summaries)
+
+    def _column(self, session_id):
+        columns = self._columns
+        column = columns.get(session_id, None)
+        if column is None:
+            column = len(columns)
+            history = self._history
+            if column == history.shape[1]:
+                grown = np.full((history.shape[0], column * 2), np.nan)
+                grown[:, :column] = history
+                self._history = grown
+            columns[session_id] = column
+        return column
+
+    def _append(self, session_ids, returns):
+        columns = np.array([self._column(session_id) for session_id in session_ids])
+        self._row = row = (self._row + 1) % self._look_back
+        self._rows = min(self._rows + 1, self._look_back)
+        history = self._history
+        history[row] = np.nan
+        history[row, columns] = returns
+        window = history[:self._rows, columns]
+        # only the sessions that were all running
+        return window[~np.isnan(window).any(axis=1)]
+
+    def _aggregate(self, pending):
+        session_ids = list(pending)
+        summaries = np.array([pending[session_id] for session_id in session_ids])
+        period_end = pd.Timestamp(int(summaries[:, 0].max()), tz='UTC')
+        returns, values, long_exposures, short_exposures = summaries[:, 1:].T
+
+        # weighted by the value at the start of the session
+        start_values = values / (1 + returns)
+        total = start_values.sum()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weights = start_values / total
+        contributions = weights * returns
+        combined = float(np.nansum(contributions))
+
+        self._growth *= 1 + combined
+        self._moments.update(combined)
+
+        n = len(session_ids)
+        window = self._append(session_ids, returns)
+        if len(window) > 1 and n > 1:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                correlation = np.corrcoef(window, rowvar=False)
+                covariance = np.cov(window, rowvar=False)
+                marginal = covariance.dot(weights)
+                # share of each session in the variance of the combined returns
+                risk_contributions = weights * marginal / weights.dot(marginal)
+        else:
+            correlation = np.full((n, n), np.nan)
+            risk_contributions = np.full(n, np.nan)
+
+        long_exposure = float(long_exposures.sum())
+        short_exposure = float(short_exposures.sum())
+        return {
+            'period_end': period_end,
+            'returns': combined,
+            'cumulative_returns': self._growth - 1,
+            'volatility': online.annual_volatility(self._moments),
+            'portfolio_value': float(values.sum()),
+            'long_exposure': long_exposure,
+            'short_exposure': short_exposure,
+            'gross_exposure': long_exposure - short_exposure,
+            'net_exposure': long_exposure + short_exposure,
+            'sessions': session_ids,
+            'weights': weights,
+            'contributions': contributions,
+            'risk_contributions': risk_contributions,
+            'correlation': correlation}
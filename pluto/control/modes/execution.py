@@ -0,0 +1,156 @@
+import abc
+
+from concurrent import futures
+
+import logbook
+
+log = logbook.Logger('ExecutionPolicy')
+
+
+class ExecutionPolicy(abc.ABC):
+    '''Dispatches calls to the processes of a control mode.'''
+
+    @property
+    def late_sessions(self):
+        '''
+
+        Returns
+        -------
+        typing.List[str]
+            sessions that missed the deadline of the last dispatch
+        '''
+        return []
+
+    @abc.abstractmethod
+    def dispatch(self, processes, fn, wait=True):
+        '''
+
+        Parameters
+        ----------
+        processes: dict
+            maps session ids to processes
+        fn: callable
+            called with each process
+        wait: bool
+            if True, waits until all the calls are done (or until the
+            deadline)
+
+        Returns
+        -------
+        typing.List[str]
+            sessions that missed the deadline
+        '''
+        raise NotImplementedError
+
+
+class Serial(ExecutionPolicy):
+    '''Calls the processes one after the other, on the calling thread.
+    This is the deterministic policy.'''
+
+    def dispatch(self, processes, fn, wait=True):
+        for process in processes.values():
+            fn(process)
+        return []
+
+
+def _copy_result(source, target):
+    exception = source.exception()
+    if exception is not None:
+        target.set_exception(exception)
+    else:
+        target.set_result(source.result())
+
+
+def _log_exception(future, session_id):
+    exception = future.exception()
+    if exception is not None:
+        log.error('Call to session {} failed: {}'.format(session_id, exception))
+
+
+class Concurrent(ExecutionPolicy):
+    '''Calls the processes concurrently on a thread pool and waits for all
+    the calls to be done (barrier) or until the deadline has elapsed.
+
+    Calls to a same process are executed in dispatch order: if a process is
+    still executing a previous call (for instance after missing a deadline),
+    the call is chained after it.
+
+    The exceptions of the calls that are dispatched without waiting are
+    raised by the next dispatch that waits for the session.'''
+
+    def __init__(self, thread_pool, deadline=None):
+        '''
+
+        Parameters
+        ----------
+        thread_pool: concurrent.futures.ThreadPoolExecutor
+        deadline: float
+            maximum number of seconds to wait for the calls. If None, waits
+            for all the calls.
+        '''
+        self._thread_pool = thread_pool
+        self._deadline = deadline
+
+        # last submitted call per session
+        self._pending = {}
+        # calls dispatched without waiting, per session
+        self._detached = {}
+        self._late = []
+
+    @property
+    def late_sessions(self):
+        return self._late
+
+    def _submit(self, session_id, fn, process):
+        pool = self._thread_pool
+        previous = self._pending.get(session_id, None)
+        if previous is None or previous.done():
+            future = pool.submit(fn, process)
+        else:
+            future = futures.Future()
+            future.set_running_or_notify_cancel()
+
+            def chain(f):
+                pool.submit(fn, process).add_done_callback(
+                    lambda result: _copy_result(result, future))
+
+            previous.add_done_callback(chain)
+        self._pending[session_id] = future
+        return future
+
+    def dispatch(self, processes, fn, wait=True):
+        pending = self._pending
+        detached = self._detached
+        # forget about the processes that were removed
+        for session_id in set(pending) - set(processes):
+            del pending[session_id]
+            for future in detached.pop(session_id, ()):
+                future.add_done_callback(
+                    lambda f, session_id=session_id: _log_exception(f, session_id))
+
+        submitted = {
+            self._submit(session_id, fn, process): session_id
+            for session_id, process in list(processes.items())}
+
+        if not wait:
+            for future, session_id in submitted.items():
+                detached.setdefault(session_id, []).append(future)
+            return []
+
+        done, not_done = futures.wait(
+            submitted,
+            timeout=self._deadline)
+
+        self._late = late = [submitted[f] for f in not_done]
+        if late:
+            log.warning(
+                'Sessions {} missed the deadline of {} seconds'.format(
+                    ', '.join(late), self._deadline))
+
+        for f in done:
+            # propagate exceptions, like the serial execution does. The calls
+            # that weren't waited for were executed before this one.
+            for future in detached.pop(submitted[f], ()):
+                future.result()
+            f.result()
+        return late
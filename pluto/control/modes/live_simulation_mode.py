@@ -9,7 +9,8 @@ class LiveSimulationMode(mode.ControlMode):
                  max_leverage,
                  process_factory,
                  market_factory,
-                 thread_pool):
+                 thread_pool,
+                 execution_policy=None):
         self._capital = capital
         self._max_leverage = max_leverage
         self._market_factory = market_factory
@@ -17,7 +18,8 @@ class LiveSimulationMode(mode.ControlMode):
         super(LiveSimulationMode, self).__init__(
             framework_url,
             process_factory,
-            thread_pool
+            thread_pool,
+            execution_policy
         )
 
     def _create_broker(self):
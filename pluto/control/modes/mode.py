@@ -1,6 +1,9 @@
 import abc
 
 from pluto.control.events_log import events_log
+from pluto.control.clock import events
+from pluto.control.modes import execution
+from pluto.control.modes import aggregate
 from pluto.coms.utils import conversions
 from pluto.broker import broker_service
 from pluto.utils import stream
@@ -9,7 +12,11 @@ from protos import controller_pb2
 from protos import clock_pb2
 
 class ControlMode(abc.ABC):
-    def __init__(self, framework_url, process_factory, thread_pool):
+    def __init__(self,
+                 framework_url,
+                 process_factory,
+                 thread_pool,
+                 execution_policy=None):
         '''
 
         Parameters
@@ -17,6 +24,9 @@ class ControlMode(abc.ABC):
         framework_url: str
         server: grpc.Server
         thread_pool: concurrent.futures.ThreadPoolExecutor
+        execution_policy: pluto.control.modes.execution.ExecutionPolicy
+            how clock and account updates are dispatched to the processes.
+            Defaults to serial execution.
         '''
 
         # maps session id to a session
@@ -37,11 +47,19 @@ class ControlMode(abc.ABC):
         process_factory.set_broker_service(brk)
 
         self._thread_pool = thread_pool
+        self._execution = execution_policy if execution_policy else execution.Serial()
+
+        self._aggregator = aggregate.Aggregator()
 
     @property
     def running_sessions(self):
         return self._processes.keys()
 
+    @property
+    def late_sessions(self):
+        # sessions that missed the deadline of the last clock update
+        return self._execution.late_sessions
+
     def process(self, dt):
         # todo: we need to make sure that all the positions have been liquidated before adding new
         # sessions and updating parameters, HOW?
@@ -60,8 +78,12 @@ class ControlMode(abc.ABC):
         pr = self._processes
         broker = self._broker
 
+        events_log = self._events_log
+
         def stop(processes, session_id):
             processes.pop(session_id).stop()
+            # the events of the session can be compacted
+            events_log.remove_checkpoint(session_id)
 
         thread_pool = self._thread_pool
 
@@ -108,10 +130,34 @@ class ControlMode(abc.ABC):
         '''
         return self._processes.get(session_id, None)
 
+    def session_end(self, session_id, summary):
+        '''
+
+        Parameters
+        ----------
+        session_id: str
+        summary: bytes
+            compact summary of the session (see pluto.finance.metrics.summary)
+
+        Returns
+        -------
+        dict
+            the aggregated packet of the running sessions, once all of them
+            have sent their summary.
+        '''
+        return self._aggregator.update(
+            session_id,
+            summary,
+            len(self._processes))
+
     def stop(self, params):
         # add to
         self._to_stop = {p.session_id for p in params} | self._to_stop
 
+    def close(self):
+        '''Closes the events log of the mode, once the loop has ended.'''
+        self._events_log.close()
+
     def clock_update(self, dt, evt, signals):
         '''
 
@@ -124,14 +170,12 @@ class ControlMode(abc.ABC):
         '''
         # self._broker.update(dt, evt, signals)
 
-        clock_event = clock_pb2.ClockEvent(
-            timestamp=conversions.to_proto_timestamp(dt),
-            event=evt,
-            signals=signals
-        )
+        # converted to a protobuf message only by the processes that need it
+        clock_event = events.ClockEvent(dt, evt, signals)
 
-        for process in self._processes.values():
-            process.clock_update(clock_event)
+        self._execution.dispatch(
+            self._processes,
+            lambda process: process.clock_update(clock_event))
 
         # todo: non-blocking!
         with self._events_log.writer() as writer:
@@ -153,9 +197,15 @@ class ControlMode(abc.ABC):
             # print('STATE', broker_state)
 
             if broker_state:
-                bytes_ = broker_state.SerializeToString()
-                for process in self._processes.values():
-                    process.account_update(stream.chunk_bytes(bytes_))
+                # serialized once, and only if a process or the log needs it
+                broker_state = stream.LazyMessage(broker_state)
+                # don't wait: the account update is ordered before the
+                # clock update of each process by the execution policy, which
+                # raises its exception, if any, with the clock update
+                self._execution.dispatch(
+                    self._processes,
+                    lambda process: process.account_update(broker_state),
+                    wait=False)
                 writer.write_event('broker', broker_state)
 
     def add_strategies(self, directory, params):
@@ -0,0 +1,198 @@
+import queue
+import threading
+
+from pluto.control.clock import events
+from pluto.control.modes.processes import process_factory
+
+from protos import clock_pb2
+
+# events that are accumulated in a batch. Any other event closes the batch
+# and is sent with it.
+_BATCHED_EVENTS = frozenset((
+    clock_pb2.BAR,
+    clock_pb2.MINUTE_END,
+    clock_pb2.TRADE_END))
+
+_DEFAULT_MAX_BATCH_SIZE = 1024
+# seconds to wait for the acknowledgement of the batch of a session end
+_DEFAULT_ACK_TIMEOUT = 60.0
+
+
+class BatchingProcess(object):
+    '''Wraps a process and sends its clock events in batches through a
+    single stream, instead of a call per event.
+
+    The pending batch is sent before any other call to the process, so that
+    the controllable receives the calls in order. A batch that ends with an
+    event other than a bar (a session end, ...) blocks until the controllable
+    acknowledges it, so the controller can't run ahead of the sessions.
+
+    Only simulations are batched: in live mode a batch would hold the bars
+    until it is full, so the events are sent one by one.'''
+
+    def __init__(self,
+                 process,
+                 max_batch_size=_DEFAULT_MAX_BATCH_SIZE,
+                 ack_timeout=_DEFAULT_ACK_TIMEOUT):
+        '''
+
+        Parameters
+        ----------
+        process: pluto.control.modes.processes.process_factory.Process
+        max_batch_size: int
+        ack_timeout: float
+            seconds to wait for the acknowledgement of a batch before raising
+            a TimeoutError.
+        '''
+        self._process = process
+        self._max_batch_size = max_batch_size
+        self._ack_timeout = ack_timeout
+
+        self._batch = []
+        self._batches = queue.Queue()
+        self._thread = None
+
+        self._watermark = None
+        self._acknowledged = threading.Condition()
+        self._closed = False
+        self._batching = False
+
+    @property
+    def session_id(self):
+        return self._process.session_id
+
+    @property
+    def watermark(self):
+        '''
+
+        Returns
+        -------
+        google.protobuf.timestamp_pb2.Timestamp
+            timestamp of the last event processed by the controllable
+        '''
+        return self._watermark
+
+    def _requests(self):
+        batches = self._batches
+        while True:
+            batch = batches.get()
+            if batch is None:
+                break
+            yield batch
+
+    def _stream(self):
+        acknowledged = self._acknowledged
+        try:
+            for watermark in self._process.stream_clock_updates(self._requests()):
+                with acknowledged:
+                    self._watermark = watermark
+                    acknowledged.notify_all()
+        finally:
+            with acknowledged:
+                self._closed = True
+                acknowledged.notify_all()
+
+    def _acknowledges(self, nanos):
+        watermark = self._watermark
+        return watermark is not None and watermark.ToNanoseconds() >= nanos
+
+    def _wait(self, clock_event):
+        # blocks until the controllable has processed the event
+        nanos = events.to_proto(clock_event).timestamp.ToNanoseconds()
+        acknowledged = self._acknowledged
+        with acknowledged:
+            if not acknowledged.wait_for(
+                    lambda: self._closed or self._acknowledges(nanos),
+                    self._ack_timeout):
+                raise TimeoutError(
+                    'Session {} did not acknowledge its events within {} '
+                    'seconds'.format(self.session_id, self._ack_timeout))
+            if not self._acknowledges(nanos):
+                raise RuntimeError(
+                    'The clock stream of session {} was closed'.format(
+                        self.session_id))
+
+    def flush(self):
+        batch = self._batch
+        if not batch:
+            return
+        if not self._thread:
+            # the stream is opened on the first batch
+            self._thread = thread = threading.Thread(target=self._stream)
+            thread.daemon = True
+            thread.start()
+        self._batches.put(clock_pb2.ClockEvents(
+            clock_events=[events.to_proto(clock_event) for clock_event in batch]))
+        self._batch = []
+
+    def clock_update(self, clock_event):
+        if not self._batching:
+            return self._process.clock_update(clock_event)
+        batch = self._batch
+        batch.append(clock_event)
+        if clock_event.event not in _BATCHED_EVENTS:
+            self.flush()
+            self._wait(clock_event)
+        elif len(batch) >= self._max_batch_size:
+            self.flush()
+
+    def initialize(self, start, end, capital, max_leverage, mode):
+        self.flush()
+        self._batching = mode == 'simulation'
+        return self._process.initialize(start, end, capital, max_leverage, mode)
+
+    def parameter_update(self, params):
+        self.flush()
+        return self._process.parameter_update(params)
+
+    def account_update(self, broker_state):
+        self.flush()
+        return self._process.account_update(broker_state)
+
+    def stop(self):
+        self.flush()
+        # close the stream
+        self._batches.put(None)
+        self._process.stop()
+
+    def watch(self):
+        self.flush()
+        return self._process.watch()
+
+    def stop_watching(self):
+        return self._process.stop_watching()
+
+
+class BatchingProcessFactory(process_factory.ProcessFactory):
+    '''Wraps the processes of another factory into batching processes.'''
+
+    def __init__(self,
+                 process_factory,
+                 max_batch_size=_DEFAULT_MAX_BATCH_SIZE,
+                 ack_timeout=_DEFAULT_ACK_TIMEOUT):
+        '''
+
+        Parameters
+        ----------
+        process_factory: pluto.control.modes.processes.process_factory.ProcessFactory
+        max_batch_size: int
+        ack_timeout: float
+        '''
+        self._process_factory = process_factory
+        self._max_batch_size = max_batch_size
+        self._ack_timeout = ack_timeout
+
+    def _create_process(self, framework_url, session_id, root_dir):
+        return BatchingProcess(
+            self._process_factory._create_process(
+                framework_url,
+                session_id,
+                root_dir),
+            self._max_batch_size,
+            self._ack_timeout)
+
+    def set_monitor_service(self, monitor_service):
+        self._process_factory.set_monitor_service(monitor_service)
+
+    def set_broker_service(self, broker_service):
+        self._process_factory.set_broker_service(broker_service)
@@ -95,6 +95,11 @@ class ControllableStub(stub.ControllableStub):
             request,
             FakeContext(metadata))
 
+    def _stream_clock_updates(self, request_iterator, metadata):
+        return self._servicer.StreamClockUpdates(
+            request_iterator,
+            FakeContext(metadata))
+
     def _stop(self, request, metadata):
         return self._servicer.Stop(
             request,
@@ -138,6 +143,12 @@ class MonitorStub(object):
             request_iterator,
             FakeContext(metadata))
 
+    @service_access.framework_method
+    def SessionEnd(self, request, metadata=None):
+        return self._monitor_server.SessionEnd(
+            request,
+            FakeContext(metadata))
+
 
 class InMemoryProcess(process_factory.Process):
     def __init__(self,
@@ -160,11 +171,25 @@ class InMemoryProcess(process_factory.Process):
                              framework_url,
                              session_id,
                              root_dir):
-        return ControllableStub(
-            server.ControllableService(
-                MonitorStub(self._monitor_service),
-                self._controllable_fty,
-                self._directory))
+        self._service = service = server.ControllableService(
+            MonitorStub(self._monitor_service),
+            self._controllable_fty,
+            self._directory)
+        return ControllableStub(service)
+
+    # clock and account updates are passed to the service without
+    # serialization, since there is no process boundary to cross.
+
+    def clock_update(self, clock_event):
+        self._service.clock_update(clock_event)
+
+    def account_update(self, broker_state):
+        # the message is shared by all the sessions (and the events log), so
+        # each session gets its own copy, that it is free to modify.
+        message = broker_state.message
+        copy = type(message)()
+        copy.CopyFrom(message)
+        self._service.account_update(copy)
 
     def _stop(self):
         pass
@@ -4,23 +4,32 @@ import grpc
 
 from protos import controllable_pb2_grpc as cbl
 
+from pluto.coms import clock_bus
 from pluto.control.modes.processes import process_factory
 
 
 class LocalProcess(process_factory.Process):
     def __init__(self, framework_url, session_id, root_dir):
-        super(LocalProcess, self).__init__(framework_url, session_id, root_dir)
         self._process = None
+        super(LocalProcess, self).__init__(framework_url, session_id, root_dir)
+
+    def _command(self, framework_id, framework_url, session_id, root_dir):
+        return [
+            'python',
+            'pluto/control/controllable/server.py',
+            'start',
+            framework_id,
+            framework_url,
+            session_id,
+            root_dir]
 
     def _create_controllable(self, framework_id, framework_url, session_id, root_dir):
         self._process = pr = subprocess.Popen(
-            ['python',
-             'pluto/control/controllable/server.py',
-             'start',
-             framework_id,
-             framework_url,
-             session_id,
-             root_dir],
+            self._command(
+                framework_id,
+                framework_url,
+                session_id,
+                root_dir),
             stdout=subprocess.PIPE)
         port = pr.stdout.readline().decode('utf-8')
         return cbl.ControllableStub(grpc.insecure_channel(
@@ -30,9 +39,43 @@ class LocalProcess(process_factory.Process):
         self._process.terminate()
 
 
+class SharedMemoryProcess(LocalProcess):
+    '''Local process that receives clock events through a shared memory bus
+    instead of gRPC calls.'''
+
+    def __init__(self, framework_url, session_id, root_dir):
+        self._clock_bus = clock_bus.ClockBusWriter.create(session_id)
+        super(SharedMemoryProcess, self).__init__(framework_url, session_id, root_dir)
+
+    def _command(self, framework_id, framework_url, session_id, root_dir):
+        return super(SharedMemoryProcess, self)._command(
+            framework_id,
+            framework_url,
+            session_id,
+            root_dir) + ['--clock-bus', self._clock_bus.path]
+
+    def clock_update(self, clock_event):
+        self._clock_bus.put(clock_event)
+
+    def _stop(self):
+        super(SharedMemoryProcess, self)._stop()
+        self._clock_bus.unlink()
+
+
 class LocalProcessFactory(process_factory.ProcessFactory):
     __slots__ = ['_process', '_broker']
 
+    def __init__(self, shared_memory=False):
+        '''
+
+        Parameters
+        ----------
+        shared_memory: bool
+            if True, clock events are sent through shared memory.
+        '''
+        self._shared_memory = shared_memory
+
     def _create_process(self, framework_url, session_id, root_dir):
+        if self._shared_memory:
+            return SharedMemoryProcess(framework_url, session_id, root_dir)
         return LocalProcess(framework_url, session_id, root_dir)
-
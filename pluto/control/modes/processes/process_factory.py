@@ -3,6 +3,8 @@ import abc
 from google.protobuf import empty_pb2 as emp
 
 from pluto.coms.utils import conversions
+from pluto.control.clock import events
+from pluto.utils import stream
 from pluto.interface.utils import paths
 from pluto.interface.utils.service_access import _framework_id
 
@@ -103,11 +105,32 @@ class Process(abc.ABC):
 
     def clock_update(self, clock_event):
         return self._controllable.ClockUpdate(
-            clock_event, ())
+            events.to_proto(clock_event), ())
+
+    def stream_clock_updates(self, clock_events_iterator):
+        '''
+
+        Parameters
+        ----------
+        clock_events_iterator: typing.Iterator[protos.clock_pb2.ClockEvents]
+
+        Returns
+        -------
+        typing.Iterator[google.protobuf.timestamp_pb2.Timestamp]
+            watermarks of the processed batches
+        '''
+        return self._controllable.StreamClockUpdates(
+            clock_events_iterator, ())
 
     def account_update(self, broker_state):
+        '''
+
+        Parameters
+        ----------
+        broker_state: pluto.utils.stream.LazyMessage
+        '''
         return self._controllable.UpdateAccount(
-            broker_state, ())
+            stream.chunk_bytes(broker_state.SerializeToString()), ())
 
     def stop(self):
         #upon receiving the stop message, the controllable will
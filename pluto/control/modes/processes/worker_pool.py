@@ -0,0 +1,209 @@
+import os
+import subprocess
+import threading
+
+import grpc
+
+from pluto.interface.utils import service_access
+from pluto.control.modes.processes import process_factory
+
+from protos import controllable_pb2_grpc as cbl
+
+
+class _SessionStub(object):
+    '''Controllable stub that adds the session id to the metadata of each
+    call, so that the worker can route it to the session.'''
+
+    def __init__(self, stub, session_id):
+        self._stub = stub
+        self._metadata = (('session_id', session_id),) + service_access._metadata
+
+    def __getattr__(self, name):
+        method = getattr(self._stub, name)
+        metadata = self._metadata
+
+        def call(request, *args):
+            return method(request, metadata=metadata)
+
+        return call
+
+
+class _Worker(object):
+    '''A long-lived process hosting the controllables of many sessions.
+    The process is started when the first session is placed on it.
+
+    The sessions are reserved under the lock of the pool, and the process is
+    started under the lock of the worker, so that starting a worker doesn't
+    block the placement of sessions on the other workers.'''
+
+    def __init__(self, options=()):
+        '''
+
+        Parameters
+        ----------
+        options: typing.Sequence[str]
+            command line options of the sessions of the worker
+        '''
+        self._process = None
+        self._stub = None
+        self._sessions = set()
+        self._lock = threading.Lock()
+        self._options = list(options)
+        # sessions restored when the worker starts
+        self._recovery = []
+
+    @property
+    def load(self):
+        return len(self._sessions)
+
+    def _start(self, framework_id, framework_url, root_dir):
+        self._process = pr = subprocess.Popen(
+            ['python',
+             'pluto/control/controllable/worker.py',
+             'start',
+             framework_id,
+             framework_url,
+             root_dir] + self._options + [
+                arg for session_id in self._recovery
+                for arg in ('--recovery', session_id)],
+            stdout=subprocess.PIPE)
+        port = pr.stdout.readline().decode('utf-8')
+        self._stub = cbl.ControllableStub(grpc.insecure_channel(
+            'localhost:{}'.format(int(port))))
+
+    @property
+    def sessions(self):
+        return self._sessions
+
+    def reserve(self, session_id):
+        # called under the lock of the pool
+        self._sessions.add(session_id)
+
+    def recover(self, session_id):
+        '''Restores the session from its last checkpoint when the worker
+        starts.'''
+        self._recovery.append(session_id)
+        self._sessions.add(session_id)
+
+    def add_session(self, framework_id, framework_url, session_id, root_dir):
+        with self._lock:
+            if not self._process:
+                self._start(framework_id, framework_url, root_dir)
+            return _SessionStub(self._stub, session_id)
+
+    def remove_session(self, session_id):
+        self._sessions.discard(session_id)
+
+    def terminate(self):
+        with self._lock:
+            process = self._process
+            if process:
+                process.terminate()
+                self._process = None
+                self._stub = None
+        self._sessions.clear()
+        del self._recovery[:]
+
+
+class WorkerPoolProcess(process_factory.Process):
+    __slots__ = ['_worker', '_pool_lock']
+
+    def __init__(self, framework_url, session_id, root_dir, worker, lock):
+        self._worker = worker
+        self._pool_lock = lock
+        super(WorkerPoolProcess, self).__init__(framework_url, session_id, root_dir)
+
+    def _create_controllable(self, framework_id, framework_url, session_id, root_dir):
+        worker = self._worker
+        try:
+            return worker.add_session(
+                framework_id,
+                framework_url,
+                session_id,
+                root_dir)
+        except Exception:
+            # the worker failed to start, free the place of the session
+            with self._pool_lock:
+                worker.remove_session(session_id)
+            raise
+
+    def _stop(self):
+        # the worker keeps running for the other sessions
+        with self._pool_lock:
+            self._worker.remove_session(self._session_id)
+
+
+class WorkerPoolProcessFactory(process_factory.ProcessFactory):
+    '''Places sessions on a fixed number of worker processes, instead of
+    starting a process per session. New sessions go to the least loaded
+    worker, recovered sessions to the worker that restores them.'''
+
+    def __init__(self,
+                 num_workers=None,
+                 max_sessions=16,
+                 recovery=(),
+                 queue_size=0,
+                 queue_policy='block',
+                 emission_policy='minute',
+                 columnar=False,
+                 durability='batched',
+                 persistence_queue_size=256):
+        '''
+
+        Parameters
+        ----------
+        num_workers: int
+            number of worker processes. Defaults to the number of cpus.
+        max_sessions: int
+            maximum number of sessions per worker. The rpc server of a
+            worker has a thread per open stream, so it is sized from it.
+        recovery: typing.Iterable[str]
+            ids of the sessions to restore from their last checkpoint.
+
+        The other parameters are the options of the sessions, see the
+        controllable server.
+        '''
+        if num_workers is None:
+            num_workers = os.cpu_count() or 1
+        self._max_sessions = max_sessions
+        options = [
+            '--max-sessions', str(max_sessions),
+            '--queue-size', str(queue_size),
+            '--queue-policy', queue_policy,
+            '--emission', emission_policy,
+            '--durability', durability,
+            '--persistence-queue-size', str(persistence_queue_size)]
+        if columnar:
+            options.append('--columnar')
+        self._workers = workers = [_Worker(options) for _ in range(num_workers)]
+        self._lock = threading.Lock()
+        for session_id in recovery:
+            self._least_loaded().recover(session_id)
+
+    def _least_loaded(self):
+        worker = min(self._workers, key=lambda w: w.load)
+        if worker.load >= self._max_sessions:
+            raise RuntimeError(
+                'All the workers host {} sessions'.format(self._max_sessions))
+        return worker
+
+    def _create_process(self, framework_url, session_id, root_dir):
+        with self._lock:
+            worker = next(
+                (w for w in self._workers if session_id in w.sessions),
+                None)
+            if worker is None:
+                worker = self._least_loaded()
+                worker.reserve(session_id)
+        # the worker is started outside the lock of the pool
+        return WorkerPoolProcess(
+            framework_url,
+            session_id,
+            root_dir,
+            worker,
+            self._lock)
+
+    def shutdown(self):
+        with self._lock:
+            for worker in self._workers:
+                worker.terminate()
@@ -8,14 +8,16 @@ class SimulationControlMode(mode.ControlMode):
                  capital,
                  max_leverage,
                  process_factory,
-                 thread_pool):
+                 thread_pool,
+                 execution_policy=None):
         self._capital = capital
         self._max_leverage = max_leverage
 
         super(SimulationControlMode, self).__init__(
             framework_url,
             process_factory,
-            thread_pool)
+            thread_pool,
+            execution_policy)
 
     def _create_broker(self):
         return broker.SimulationBroker(
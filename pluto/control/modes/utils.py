@@ -3,9 +3,22 @@ import abc
 from pluto.control.modes import simulation_mode, live_simulation_mode
 
 class ModeFactory(abc.ABC):
-    def __init__(self, thread_pool, framework_url):
+    def __init__(self, thread_pool, framework_url, execution_policy_factory=None):
+        '''
+
+        Parameters
+        ----------
+        thread_pool: concurrent.futures.ThreadPoolExecutor
+        framework_url: str
+        execution_policy_factory: typing.Callable
+            called with the thread pool to create the execution policy of
+            each mode (see pluto.control.modes.execution). The policies keep
+            per session state, so they are never shared by modes. Defaults
+            to serial execution.
+        '''
         self._framework_url = framework_url
         self._thread_pool = thread_pool
+        self._execution_policy_factory = execution_policy_factory
 
     @property
     @abc.abstractmethod
@@ -20,6 +33,10 @@ class ModeFactory(abc.ABC):
             max_leverage,
             process_factory)
 
+    def _create_execution_policy(self, thread_pool):
+        factory = self._execution_policy_factory
+        return factory(thread_pool) if factory else None
+
     @abc.abstractmethod
     def _get_mode(self, thread_pool, framework_url, capital, max_leverage, process_factory):
         raise NotImplementedError
@@ -35,12 +52,16 @@ class SimulationModeFactory(ModeFactory):
             capital,
             max_leverage,
             process_factory,
-            thread_pool
+            thread_pool,
+            self._create_execution_policy(thread_pool)
         )
 
 class LiveSimulationModeFactory(ModeFactory):
-    def __init__(self, framework_url, market_factory, thread_pool):
-        super(LiveSimulationModeFactory, self).__init__(thread_pool, framework_url)
+    def __init__(self, framework_url, market_factory, thread_pool, execution_policy_factory=None):
+        super(LiveSimulationModeFactory, self).__init__(
+            thread_pool,
+            framework_url,
+            execution_policy_factory)
         self._market_factory = market_factory
 
     @property
@@ -54,5 +75,6 @@ class LiveSimulationModeFactory(ModeFactory):
             max_leverage,
             process_factory,
             self._market_factory,
-            thread_pool
+            thread_pool,
+            self._create_execution_policy(thread_pool)
         )
\ No newline at end of file
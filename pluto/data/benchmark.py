@@ -1,14 +1,163 @@
+import fcntl
+import io as pyio
+import json
+import os
+
+import numpy as np
 import pandas as pd
 
 from zipline.data.loader import ensure_benchmark_data
 
 from pluto.interface.utils import paths
 
+def _empty_meta():
+    return {'count': 0, 'offset': 0, 'last_close': None, 'header': None}
+
+
+class _ReturnsCache(object):
+    '''Append-only cache of the returns of a benchmark, for a frequency.
+
+    The timestamps and returns are stored as raw int64 and float64 values, that
+    are memory mapped when read. The cache keeps the position up to which the
+    csv file was read, so that only the new closes are parsed.
+
+    The files can be shared by many caches (in different processes), they are
+    updated under a file lock.'''
+
+    def __init__(self, directory, frequency):
+        self._timestamps_path = os.path.join(directory, frequency + '_timestamps.i8')
+        self._returns_path = os.path.join(directory, frequency + '_returns.f8')
+        self._meta_path = os.path.join(directory, frequency + '_cache.json')
+        self._lock_path = os.path.join(directory, frequency + '_cache.lock')
+
+        self._meta = self._read_meta() or _empty_meta()
+
+        self._timestamps = None
+        self._returns = None
+
+    def _read_meta(self):
+        try:
+            with open(self._meta_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+
+    def _clear(self):
+        self._meta = _empty_meta()
+        for path in (self._timestamps_path, self._returns_path):
+            with open(path, 'wb'):
+                pass
+
+    def _write_meta(self):
+        tmp = self._meta_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self._meta, f)
+        os.replace(tmp, self._meta_path)
+
+    def update(self, csv_path):
+        meta = self._meta
+        with open(self._lock_path, 'a') as lock:
+            # released when the file is closed
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            self._update(csv_path)
+        if self._meta != meta:
+            # the maps are re-created on the next read
+            self._timestamps = None
+            self._returns = None
+
+    def _update(self, csv_path):
+        # another cache might have updated the files since the last update
+        self._meta = meta = self._read_meta()
+        if not meta:
+            self._clear()
+            meta = self._meta
+        size = os.path.getsize(csv_path)
+        if size < meta['offset']:
+            # the file was re-written
+            self._clear()
+            meta = self._meta
+        if size == meta['offset']:
+            return
+
+        with open(csv_path, 'rb') as f:
+            f.seek(meta['offset'])
+            data = f.read()
+        # only parse complete lines
+        data = data[:data.rfind(b'\n') + 1]
+        if not data:
+            return
+        offset = meta['offset'] + len(data)
+        header = meta['header']
+        if header is None:
+            line, _, data = data.partition(b'\n')
+            meta['header'] = header = line.decode('utf-8').strip().split(',')
+
+        df = pd.read_csv(pyio.BytesIO(data), names=header, header=None)
+        timestamps = df['Date'].astype('datetime64[ns]').values.view('int64')
+        closes = df['Close'].values.astype('float64')
+
+        if len(closes):
+            last_close = meta['last_close']
+            if last_close is None:
+                # there is no return for the first close
+                previous = closes[:-1]
+                timestamps = timestamps[1:]
+                closes_ = closes[1:]
+            else:
+                previous = np.concatenate(([last_close], closes[:-1]))
+                closes_ = closes
+            returns = closes_ / previous - 1
+
+            # drop the values of an update that crashed before its meta
+            # was written
+            count = meta['count']
+            for path, values in ((self._timestamps_path, timestamps.astype('<i8')),
+                                 (self._returns_path, returns.astype('<f8'))):
+                with open(path, 'r+b') as f:
+                    f.truncate(count * values.itemsize)
+                    f.seek(0, os.SEEK_END)
+                    f.write(values.tobytes())
+            meta['count'] = count + len(returns)
+            meta['last_close'] = float(closes[-1])
+        meta['offset'] = offset
+        self._write_meta()
+
+    def _maps(self):
+        count = self._meta['count']
+        if self._timestamps is None:
+            if count:
+                self._timestamps = np.memmap(
+                    self._timestamps_path, dtype='<i8', mode='r', shape=(count,))
+                self._returns = np.memmap(
+                    self._returns_path, dtype='<f8', mode='r', shape=(count,))
+            else:
+                self._timestamps = np.empty(0, dtype='<i8')
+                self._returns = np.empty(0, dtype='<f8')
+        return self._timestamps, self._returns
+
+    def window(self, start_dt, end_dt):
+        '''
+
+        Returns
+        -------
+        pandas.Series
+            returns between the start and end datetime (inclusive)
+        '''
+        timestamps, returns = self._maps()
+        i = np.searchsorted(timestamps, pd.Timestamp(start_dt).value, 'left')
+        j = np.searchsorted(timestamps, pd.Timestamp(end_dt).value, 'right')
+        return pd.Series(
+            np.array(returns[i:j]),
+            index=pd.DatetimeIndex(timestamps[i:j].astype('datetime64[ns]'), name='Date'),
+            name='Close')
+
+
 class Benchmark(object):
     def __init__(self, ticker):
         self._dir = paths.get_dir(
             ticker,
             root=paths.get_dir('benchmark', paths.get_dir('data')))
+        self._caches = {}
 
     def get_history_window(self, start_dt, end_dt, frequency, ffill=True):
         #todo: use open to calculate return on the first day if we don't have enough data
@@ -29,11 +178,13 @@ class Benchmark(object):
         #
         # first_day_return = (first_close - first_open) / first_open
 
-        path = paths.get_file_path(frequency, self._dir)
-        df = pd.read_csv(path)
-        df['Date'] = df['Date'].astype('datetime64[ns]')
-        df = df.set_index('Date')
-        return df['Close'].pct_change().iloc[1:][df.index.slice_indexer(start_dt, end_dt)]
+        cache = self._caches.get(frequency, None)
+        if not cache:
+            self._caches[frequency] = cache = _ReturnsCache(self._dir, frequency)
+        # only the closes that were added to the file since the last call are
+        # parsed.
+        cache.update(paths.get_file_path(frequency, self._dir))
+        return cache.window(start_dt, end_dt)
 
 class ZiplineBenchmark(object):
     def __init__(self, ticker='SPY', environ=None):
@@ -3,21 +3,24 @@ import collections
 import numpy as np
 
 from zipline.assets import Future
-from zipline.finance import ledger
 from zipline import protocol
 
 from pluto.coms.utils import conversions as cv
+from pluto.finance import returns_buffer
+from pluto.finance import position_book
+from pluto.finance import records
 
 from protos import ledger_state_pb2 as acc
 
+# upper bound of the number of minutes in a session, so that the minute
+# returns window covers at least look_back sessions on any calendar.
+_SESSION_MINUTES = 1440
+
 
 class Ledger(object):
     def __init__(self, capital, data_frequency, start_date, look_back):
         self._look_back = look_back
 
-        # metric only uses array
-        self.daily_returns_array = collections.deque()
-
         self._positions = None
 
         self._immutable_account = account = protocol.Account()
@@ -30,7 +33,7 @@ class Ledger(object):
 
         self._portfolio = protocol.MutableView(ip)
 
-        self._position_tracker = ledger.PositionTracker(data_frequency)
+        self._position_tracker = position_book.PositionBook(data_frequency)
 
         self._processed_transactions = {}
 
@@ -40,6 +43,12 @@ class Ledger(object):
         self._payout_last_sale_prices = {}
 
         self._data_frequency = data_frequency
+
+        # metric only uses array. In daily mode, the window is limited to
+        # look_back returns. In minute mode, a value is appended each bar and
+        # the window is limited to look_back sessions of minutes.
+        self._returns = self._create_returns_buffer()
+
         self._start_dt = start_date
         self._session_count = -1
         self._sessions = []
@@ -75,9 +84,36 @@ class Ledger(object):
         self._update_portfolio()
         return self._immutable_portfolio
 
+    def _create_returns_buffer(self, data=None, count=None):
+        maxlen = self._look_back
+        if maxlen and self._data_frequency == 'minute':
+            maxlen *= _SESSION_MINUTES
+        if data is None:
+            return returns_buffer.ReturnsBuffer(maxlen)
+        return returns_buffer.ReturnsBuffer.from_bytes(data, count, maxlen)
+
     @property
     def daily_returns(self):
-        return np.array(self.daily_returns_array)
+        # read-only view, valid until the next append
+        return self._returns.values
+
+    @property
+    def returns_count(self):
+        return self._returns.count
+
+    def latest_returns(self, n):
+        '''
+
+        Parameters
+        ----------
+        n: int
+
+        Returns
+        -------
+        numpy.ndarray
+            view of the last n returns, in order
+        '''
+        return self._returns.latest(n)
 
     @property
     def account(self):
@@ -196,14 +232,15 @@ class Ledger(object):
         portfolio = self._portfolio
         pt = self._position_tracker
 
-        portfolio.positions = pt.get_positions()
+        # the positions are views on the arrays of the position book
+        portfolio.positions = positions = pt.get_positions()
         position_stats = pt.stats
 
         portfolio.positions_value = position_value = (
             position_stats.net_value
         )
         portfolio.positions_exposure = position_stats.net_exposure
-        self._cash_flow(self._get_payout_total(pt.positions))
+        self._cash_flow(self._get_payout_total(positions))
 
         start_value = portfolio.portfolio_value
 
@@ -293,14 +330,12 @@ class Ledger(object):
 
         self._position_tracker.execute_transaction(transaction)
 
-        # we only ever want the dict form from now on
-        transaction_dict = transaction.to_dict()
+        # the dict form is only created when it is requested
+        record = records.TransactionRecord.from_transaction(transaction)
         try:
-            self._processed_transactions[transaction.dt].append(
-                transaction_dict,
-            )
+            self._processed_transactions[transaction.dt].append(record)
         except KeyError:
-            self._processed_transactions[transaction.dt] = [transaction_dict]
+            self._processed_transactions[transaction.dt] = [record]
 
     def calculate_period_stats(self):
         position_stats = self._position_tracker.stats
@@ -328,15 +363,17 @@ class Ledger(object):
         order : zp.Order
             The order to record.
         """
+        # snapshot of the current state of the order
+        record = records.OrderRecord.from_order(order)
         try:
             dt_orders = self._orders_by_modified[order.dt]
         except KeyError:
             self._orders_by_modified[order.dt] = collections.OrderedDict([
-                (order.id, order),
+                (order.id, record),
             ])
-            self._orders_by_id[order.id] = order
+            self._orders_by_id[order.id] = record
         else:
-            self._orders_by_id[order.id] = dt_orders[order.id] = order
+            self._orders_by_id[order.id] = dt_orders[order.id] = record
             # to preserve the order of the orders by modified date
             dt_orders.move_to_end(order.id, last=True)
 
@@ -421,14 +458,20 @@ class Ledger(object):
                 orders : list[dict]
                     The order information.
                 """
+        return [o.to_dict() for o in self.order_records(dt)]
+
+    def order_records(self, dt=None):
+        """Same as orders, but returns the records of the orders.
+
+        Returns
+        -------
+        orders : list[pluto.finance.records.OrderRecord]
+        """
         if dt is None:
             # orders by id is already flattened
-            return [o.to_dict() for o in self._orders_by_id.values()]
+            return list(self._orders_by_id.values())
 
-        return [
-            o.to_dict()
-            for o in self._orders_by_modified.get(dt, {}).values()
-        ]
+        return list(self._orders_by_modified.get(dt, {}).values())
 
     @property
     def positions(self):
@@ -473,17 +516,11 @@ class Ledger(object):
 
     def end_of_bar(self):
         if self._data_frequency == 'minute':
-            self.daily_returns_array.append(self.todays_returns(self.portfolio.returns))
+            self._returns.append(self.todays_returns(self.portfolio.returns))
 
     def end_of_session(self, sessions):
-        returns = self.daily_returns_array
-        portfolio_returns = self.portfolio.returns
-        # if self._data_frequency == 'daily':
-        # todo: only pop when in live ?
-        if self._session_count == self._look_back:
-            returns.popleft()
-            self._session_count = 0
-        returns.append(self.todays_returns(portfolio_returns))
+        # the buffer drops the oldest value once the look back window is full
+        self._returns.append(self.todays_returns(self.portfolio.returns))
 
         # self._previous_total_returns = portfolio_returns
         self._sessions = sessions
@@ -512,6 +549,15 @@ class Ledger(object):
         transactions : list[dict]
             The transaction information.
         """
+        return [txn.to_dict() for txn in self.transaction_records(dt)]
+
+    def transaction_records(self, dt=None):
+        """Same as transactions, but returns the records of the transactions.
+
+        Returns
+        -------
+        transactions : list[pluto.finance.records.TransactionRecord]
+        """
         if dt is None:
             # flatten the by-day transactions
             return [
@@ -520,7 +566,7 @@ class Ledger(object):
                 for txn in by_day
             ]
 
-        return self._processed_transactions.get(dt, [])
+        return list(self._processed_transactions.get(dt, []))
 
     def get_state(self, dt):
         state = acc.LedgerState(
@@ -528,13 +574,11 @@ class Ledger(object):
             portfolio=cv.to_proto_portfolio(self._immutable_portfolio),
             account=cv.to_proto_account(self._immutable_account),
             last_checkpoint=cv.to_proto_timestamp(dt),
-            orders=[cv.to_proto_order(order.to_dict())
+            orders=[cv.to_proto_order(order)
                     for order in self._orders_by_id.values()],
             first_session=cv.to_proto_timestamp(self._start_dt.to_pydatetime()),
-            daily_returns=[
-                acc.Return(timestamp=cv.to_proto_timestamp(ts), value=val)
-                for ts, val in zip(self._sessions, self.daily_returns_array)
-            ])
+            returns=self._returns.to_bytes(),
+            returns_count=self._returns.count)
         self._last_checkpoint = dt
         return state.SerializeToString()
 
@@ -548,8 +592,13 @@ class Ledger(object):
         self._session_count = l.session_count
         for order in [cv.to_zp_order(order) for order in l.orders]:
             self.process_order(order)
-        dra = self.daily_returns_array
-        for ret in l.daily_returns:
-            dra.append(ret.value)
+        if l.returns_count:
+            self._returns = self._create_returns_buffer(l.returns, l.returns_count)
+        else:
+            # states saved before the returns were serialized as bytes
+            returns = self._create_returns_buffer()
+            for ret in l.daily_returns:
+                returns.append(ret.value)
+            self._returns = returns
         self._start_dt = l.first_session
         self._last_checkpoint = l.last_checkpoint
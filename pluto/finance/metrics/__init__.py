@@ -2,6 +2,8 @@ from .metric import (
     AlphaBeta,
     BenchmarkReturnsAndVolatility,
     CashFlow,
+    Context,
+    Metric,
     DailyLedgerField,
     MaxLeverage,
     NumTradingDays,
@@ -16,12 +18,18 @@ from .metric import (
     _ConstantCumulativeRiskMetric
 )
 
-import empyrical
+from .online import (
+    AnnualVolatility,
+    MaxDrawdown,
+    OnlineAlphaBeta,
+    SharpeRatio,
+    SortinoRatio
+)
 
 def pluto_metrics():
     return {
         Returns(),
-        ReturnsStatistic(empyrical.annual_volatility, 'algo_volatility'),
+        AnnualVolatility('algo_volatility'),
         BenchmarkReturnsAndVolatility(),
         PNL(),
         CashFlow(),
@@ -60,11 +68,11 @@ def pluto_metrics():
         DailyLedgerField('account.gross_leverage'),
         DailyLedgerField('account.net_leverage'),
 
-        AlphaBeta(),
-        ReturnsStatistic(empyrical.sharpe_ratio, 'sharpe'),
-        ReturnsStatistic(empyrical.sortino_ratio, 'sortino'),
+        OnlineAlphaBeta(),
+        SharpeRatio('sharpe'),
+        SortinoRatio('sortino'),
 
-        ReturnsStatistic(empyrical.max_drawdown),
+        MaxDrawdown('max_drawdown'),
         MaxLeverage(),
 
         # Please kill these!
@@ -72,4 +80,28 @@ def pluto_metrics():
         _ConstantCumulativeRiskMetric('treasury_period_return', 0.0),
         NumTradingDays(),
         PeriodLabel(),
-    }
\ No newline at end of file
+    }
+
+
+def select_metrics(fields, metrics=None):
+    '''Selects the metrics that write at least one of the given packet
+    fields.
+
+    Parameters
+    ----------
+    fields: typing.Iterable[str]
+    metrics: set
+        the metrics to select from. Defaults to pluto_metrics()
+
+    Returns
+    -------
+    set
+    '''
+    if metrics is None:
+        metrics = pluto_metrics()
+    fields = set(fields)
+    selected = {metric for metric in metrics if fields.intersection(metric.fields)}
+    unknown = fields.difference(*(metric.fields for metric in selected))
+    if unknown:
+        raise ValueError('Unknown metric fields: {}'.format(', '.join(sorted(unknown))))
+    return selected
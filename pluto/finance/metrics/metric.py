@@ -6,90 +6,167 @@ import empyrical as ep
 import numpy as np
 
 
+class Context(object):
+    """Values shared by the metrics at the end of a bar or a session.
+
+    The portfolio, account and returns are computed on first access and
+    reused by the other metrics until the next bar."""
+
+    __slots__ = [
+        'ledger',
+        'benchmark_source',
+        'emission_rate',
+        'dt',
+        'data_portal',
+        '_portfolio',
+        '_account',
+        '_returns']
+
+    def __init__(self, ledger, benchmark_source, emission_rate):
+        self.ledger = ledger
+        self.benchmark_source = benchmark_source
+        self.emission_rate = emission_rate
+        self.dt = None
+        self.data_portal = None
+        self._portfolio = None
+        self._account = None
+        self._returns = None
+
+    def reset(self, dt, data_portal):
+        self.dt = dt
+        self.data_portal = data_portal
+        self._portfolio = None
+        self._account = None
+        self._returns = None
+
+    @property
+    def portfolio(self):
+        portfolio = self._portfolio
+        if portfolio is None:
+            self._portfolio = portfolio = self.ledger.portfolio
+        return portfolio
+
+    @property
+    def account(self):
+        account = self._account
+        if account is None:
+            self._account = account = self.ledger.account
+        return account
+
+    @property
+    def daily_returns(self):
+        returns = self._returns
+        if returns is None:
+            self._returns = returns = self.ledger.daily_returns
+        return returns
+
+
+def _ledger_field_getter(ledger_field):
+    # portfolio and account fields are read from the context, so that they
+    # are only computed once per bar.
+    root, _, rest = ledger_field.partition('.')
+    if rest and root in ('portfolio', 'account'):
+        get_root = op.attrgetter(root)
+        get_field = op.attrgetter(rest)
+        return lambda context: get_field(get_root(context))
+    get_field = op.attrgetter(ledger_field)
+    return lambda context: get_field(context.ledger)
+
+
 class Metric(abc.ABC):
-    def initialization(self, **kwargs):
+    # the packet fields written by the metric
+    fields = ()
+
+    def initialization(self, first_session, ledger):
         """
 
-        Keyword Arguments
-        -----------------
-        first_open_session: Timestamp
+        Parameters
+        ----------
+        first_session: pandas.Timestamp
+        ledger: pluto.finance.ledger.Ledger
         """
         pass
 
-    def end_of_bar(self, **kwargs):
+    def end_of_bar(self, packet, context):
         """
-        Keyword Arguments
-        -----------------
+
+        Parameters
+        ----------
         packet: dict
-        ledger: contrib.Account
-        dt: pandas.Timestamp
-        emission_rate: str
-        trading_calendar: TradingCalendar
-        data_portal: DataPortal
-        benchmark_source: contrib.BenchmarkSource
+        context: Context
         """
         pass
 
-    def end_of_session(self, **kwargs):
+    def end_of_session(self, packet, context):
         """
 
-        Keyword Arguments
-        -----------------
-        packet : dict
-        ledger : Account
-        dt : Timestamp
-        trading_calendar : TradingCalendar
-        data_portal : DataPortal
-        benchmark_source : BenchmarkSource
+        Parameters
+        ----------
+        packet: dict
+        context: Context
         """
         pass
 
-    def start_of_session(self, **kwargs):
+    def start_of_session(self, ledger, session, data_portal):
         """
 
-        Keyword Arguments
-        -----------------
-        ledger : Account
-        session : Timestamp
-        data_portal : DataPortal
+        Parameters
+        ----------
+        ledger: pluto.finance.ledger.Ledger
+        session: pandas.Timestamp
+        data_portal: zipline.data.data_portal.DataPortal
         """
         pass
 
+    def get_state(self):
+        """State of the metric that can't be recomputed from the ledger.
 
-class SimpleLedgerField(Metric):
-    def __init__(self, ledger_field, packet_field=None):
-        self._get_ledger_field = op.attrgetter(ledger_field)
-        if packet_field is None:
-            self._packet_field = ledger_field.rsplit('.', 1)[-1]
-        else:
-            self._packet_field = packet_field
+        Returns
+        -------
+        list[float]
+            or None if the metric has no state.
+        """
+        return None
 
-    def end_of_bar(self, **kwargs):
-        kwargs.pop('packet')['minute_perf'][self._packet_field] = self._get_ledger_field(kwargs.pop('ledger'))
+    def restore_state(self, values):
+        """
 
-    def end_of_session(self, **kwargs):
-        kwargs.pop('packet')['daily_perf'][self._packet_field] = self._get_ledger_field(kwargs.pop('ledger'))
+        Parameters
+        ----------
+        values: typing.Sequence[float]
+            values returned by get_state
+        """
+        pass
 
 
-class DailyLedgerField(Metric):
+class _LedgerField(Metric):
     def __init__(self, ledger_field, packet_field=None):
-        self._get_ledger_field = op.attrgetter(ledger_field)
+        self._get_ledger_field = _ledger_field_getter(ledger_field)
         if packet_field is None:
             self._packet_field = ledger_field.rsplit('.', 1)[-1]
         else:
             self._packet_field = packet_field
+        self.fields = (self._packet_field,)
+
 
-    def end_of_bar(self, **kwargs):
+class SimpleLedgerField(_LedgerField):
+    def end_of_bar(self, packet, context):
+        packet['minute_perf'][self._packet_field] = self._get_ledger_field(context)
+
+    def end_of_session(self, packet, context):
+        packet['daily_perf'][self._packet_field] = self._get_ledger_field(context)
+
+
+class DailyLedgerField(_LedgerField):
+    def end_of_bar(self, packet, context):
         field = self._packet_field
-        packet = kwargs.pop('packet')
         packet['cumulative_perf'][field] = packet['minute_perf'][field] = \
-            (self._get_ledger_field(kwargs.pop('ledger')))
+            (self._get_ledger_field(context))
 
-    def end_of_session(self, **kwargs):
+    def end_of_session(self, packet, context):
         field = self._packet_field
-        packet = kwargs['packet']
         packet['cumulative_perf'][field] = packet['daily_perf'][field] = \
-            (self._get_ledger_field(kwargs.pop('ledger')))
+            (self._get_ledger_field(context))
 
 
 class StartOfPeriodLedgerField(Metric):
@@ -99,50 +176,54 @@ class StartOfPeriodLedgerField(Metric):
             self._packet_field = ledger_field.rsplit('.', 1)[-1]
         else:
             self._packet_field = packet_field
+        self.fields = (self._packet_field,)
 
-    def initialization(self, **kwargs):
-        self._start_of_simulation = self._get_ledger_field(kwargs.pop('ledger'))
+    def initialization(self, first_session, ledger):
+        self._start_of_simulation = self._get_ledger_field(ledger)
 
-    def start_of_session(self, **kwargs):
-        self._previous_day = self._get_ledger_field(kwargs.pop('ledger'))
+    def start_of_session(self, ledger, session, data_portal):
+        self._previous_day = self._get_ledger_field(ledger)
 
     def _end_of_period(self, sub_field, packet):
         packet_field = self._packet_field
         packet['cumulative_perf'][packet_field] = self._start_of_simulation
         packet[sub_field][packet_field] = self._previous_day
 
-    def end_of_bar(self, **kwargs):
-        self._end_of_period('minute_perf', kwargs.pop('packet'))
+    def end_of_bar(self, packet, context):
+        self._end_of_period('minute_perf', packet)
 
-    def end_of_session(self, **kwargs):
-        self._end_of_period('daily_perf', kwargs.pop('packet'))
+    def end_of_session(self, packet, context):
+        self._end_of_period('daily_perf', packet)
 
 
 class Returns(Metric):
-    def _end_of_period(self, field, packet, ledger):
-        portfolio_returns = ledger.portfolio.returns
-        packet[field]['returns'] = ledger.todays_returns(portfolio_returns)
+    fields = ('returns', 'algorithm_period_return')
+
+    def _end_of_period(self, field, packet, context):
+        portfolio_returns = context.portfolio.returns
+        packet[field]['returns'] = context.ledger.todays_returns(portfolio_returns)
         packet['cumulative_perf']['returns'] = portfolio_returns
         packet['cumulative_risk_metrics']['algorithm_period_return'] = portfolio_returns
 
-    def end_of_bar(self, **kwargs):
-        return self._end_of_period('minute_perf', kwargs.pop('packet'), kwargs.pop('ledger'))
+    def end_of_bar(self, packet, context):
+        return self._end_of_period('minute_perf', packet, context)
 
-    def end_of_session(self, **kwargs):
-        self._end_of_period('daily_perf', kwargs.pop('packet'), kwargs.pop('ledger'))
+    def end_of_session(self, packet, context):
+        self._end_of_period('daily_perf', packet, context)
 
 
 class BenchmarkReturnsAndVolatility(Metric):
-    def initialization(self, **kwargs):
-        self._first_session = kwargs.pop('first_session')
+    fields = ('benchmark_period_return', 'benchmark_volatility')
+
+    def initialization(self, first_session, ledger):
+        self._first_session = first_session
 
-    def start_of_session(self, **kwargs):
-        self._current_session = kwargs.pop('dt')
+    def start_of_session(self, ledger, session, data_portal):
+        self._current_session = session
 
-    def end_of_bar(self, **kwargs):
-        if kwargs.pop('emission_rate') == 'minute':
-            benchmark_source = kwargs.pop('benchmark_source')
-            packet = kwargs.pop('packet')
+    def end_of_bar(self, packet, context):
+        if context.emission_rate == 'minute':
+            benchmark_source = context.benchmark_source
 
             r = benchmark_source.minute_cumulative_returns
 
@@ -156,10 +237,8 @@ class BenchmarkReturnsAndVolatility(Metric):
                 v = None
             packet['cumulative_risk_metrics']['benchmark_volatility'] = v
 
-    def end_of_session(self, **kwargs):
-        packet = kwargs.pop('packet')
-
-        benchmark_source = kwargs.pop('benchmark_source')
+    def end_of_session(self, packet, context):
+        benchmark_source = context.benchmark_source
         r = benchmark_source.cumulative_returns
         if np.isnan(r):
             r = None
@@ -173,37 +252,39 @@ class BenchmarkReturnsAndVolatility(Metric):
 
 
 class PNL(Metric):
-    def initialization(self, **kwargs):
+    fields = ('pnl',)
+
+    def initialization(self, first_session, ledger):
         self._previous_pnl = 0.0
 
-    def start_of_session(self, **kwargs):
-        self._previous_pnl = kwargs.pop('ledger').portfolio.pnl
+    def start_of_session(self, ledger, session, data_portal):
+        self._previous_pnl = ledger.portfolio.pnl
 
-    def _end_of_period(self, field, packet, ledger):
-        pnl = ledger.portfolio.pnl
+    def _end_of_period(self, field, packet, context):
+        pnl = context.portfolio.pnl
         packet[field]['pnl'] = pnl - self._previous_pnl
-        packet['cumulative_perf']['pnl'] = ledger.portfolio.pnl
+        packet['cumulative_perf']['pnl'] = pnl
 
-    def end_of_bar(self, **kwargs):
-        self._end_of_period('minute_perf', kwargs.pop('packet'), kwargs.pop('ledger'))
+    def end_of_bar(self, packet, context):
+        self._end_of_period('minute_perf', packet, context)
 
-    def end_of_session(self, **kwargs):
-        self._end_of_period('daily_perf', kwargs.pop('packet'), kwargs.pop('ledger'))
+    def end_of_session(self, packet, context):
+        self._end_of_period('daily_perf', packet, context)
 
 
 class CashFlow(Metric):
-    def initialization(self, **kwargs):
+    fields = ('capital_used',)
+
+    def initialization(self, first_session, ledger):
         self._previous_cash_flow = 0.0
 
-    def end_of_bar(self, **kwargs):
-        cash_flow = kwargs.pop('ledger').portfolio.cash_flow
-        packet = kwargs.pop('packet')
+    def end_of_bar(self, packet, context):
+        cash_flow = context.portfolio.cash_flow
         packet['minute_perf']['capital_used'] = (cash_flow - self._previous_cash_flow)
         packet['cumulative_perf']['capital_used'] = cash_flow
 
-    def end_of_session(self, **kwargs):
-        cash_flow = kwargs.pop('ledger').portfolio.cash_flow
-        packet = kwargs.pop('packet')
+    def end_of_session(self, packet, context):
+        cash_flow = context.portfolio.cash_flow
         packet['daily_perf']['capital_used'] = (
                 cash_flow - self._previous_cash_flow
         )
@@ -212,27 +293,33 @@ class CashFlow(Metric):
 
 
 class Orders(Metric):
-    def end_of_bar(self, **kwargs):
-        kwargs.pop('packet')['minute_perf']['orders'] = kwargs.pop('ledger').orders(kwargs.pop('dt'))
+    fields = ('orders',)
 
-    def end_of_session(self, **kwargs):
-        kwargs.pop('packet')['daily_perf']['orders'] = kwargs.pop('ledger').orders()
+    def end_of_bar(self, packet, context):
+        packet['minute_perf']['orders'] = context.ledger.order_records(context.dt)
+
+    def end_of_session(self, packet, context):
+        packet['daily_perf']['orders'] = context.ledger.order_records()
 
 
 class Transactions(Metric):
-    def end_of_bar(self, **kwargs):
-        kwargs.pop('packet')['minute_perf']['transactions'] = kwargs.pop('ledger').transactions(kwargs.pop('dt'))
+    fields = ('transactions',)
+
+    def end_of_bar(self, packet, context):
+        packet['minute_perf']['transactions'] = context.ledger.transaction_records(context.dt)
 
-    def end_of_session(self, **kwargs):
-        kwargs.pop('packet')['daily_perf']['transactions'] = kwargs.pop('ledger').transactions()
+    def end_of_session(self, packet, context):
+        packet['daily_perf']['transactions'] = context.ledger.transaction_records()
 
 
 class Positions(Metric):
-    def end_of_bar(self, **kwargs):
-        kwargs.pop('packet')['minute_perf']['positions'] = kwargs.pop('ledger').positions(kwargs.pop('dt'))
+    fields = ('positions',)
 
-    def end_of_session(self, **kwargs):
-        kwargs.pop('packet')['daily_perf']['positions'] = kwargs.pop('ledger').positions()
+    def end_of_bar(self, packet, context):
+        packet['minute_perf']['positions'] = context.ledger.positions(context.dt)
+
+    def end_of_session(self, packet, context):
+        packet['daily_perf']['positions'] = context.ledger.positions()
 
 
 class ReturnsStatistic(Metric):
@@ -254,26 +341,30 @@ class ReturnsStatistic(Metric):
 
         self._function = function
         self._field_name = field_name
+        self.fields = (field_name,)
 
-    def end_of_bar(self, **kwargs):
-        res = self._function(kwargs.pop('ledger').daily_returns)
+    def end_of_bar(self, packet, context):
+        res = self._function(context.daily_returns)
         if not np.isfinite(res):
             res = None
-        kwargs.pop('packet')['cumulative_risk_metrics'][self._field_name] = res
+        packet['cumulative_risk_metrics'][self._field_name] = res
 
-    def end_of_session(self, **kwargs):
-        self.end_of_bar(**kwargs)
+    def end_of_session(self, packet, context):
+        self.end_of_bar(packet, context)
 
 
 class AlphaBeta(Metric):
-    def initialization(self, **kwargs):
-        pass
+    fields = ('alpha', 'beta')
 
-    def end_of_bar(self, **kwargs):
-        risk = kwargs.pop('packet')['cumulative_risk_metrics']
+    def end_of_bar(self, packet, context):
+        risk = packet['cumulative_risk_metrics']
 
-        ledger_returns = kwargs.pop('ledger').daily_returns
-        benchmark_returns = kwargs.pop('benchmark_source').daily_returns()
+        ledger = context.ledger
+        benchmark_source = context.benchmark_source
+        # align the latest returns, using views of both buffers
+        n = min(len(context.daily_returns), len(benchmark_source.daily_returns()))
+        ledger_returns = ledger.latest_returns(n)
+        benchmark_returns = benchmark_source.latest_returns(n)
 
         alpha, beta = ep.alpha_beta_aligned(
             ledger_returns,
@@ -287,34 +378,38 @@ class AlphaBeta(Metric):
         risk['alpha'] = alpha
         risk['beta'] = beta
 
-    def end_of_session(self, **kwargs):
-        return self.end_of_bar(**kwargs)
+    def end_of_session(self, packet, context):
+        return self.end_of_bar(packet, context)
 
 
 class MaxLeverage(Metric):
-    def initialization(self, **kwargs):
+    fields = ('max_leverage',)
+
+    def initialization(self, first_session, ledger):
         self._max_leverage = 0.0
 
-    def end_of_bar(self, **kwargs):
-        self._max_leverage = max(self._max_leverage, kwargs.pop('ledger').account.leverage)
-        kwargs.pop('packet')['cumulative_risk_metrics']['max_leverage'] = self._max_leverage
+    def end_of_bar(self, packet, context):
+        self._max_leverage = max(self._max_leverage, context.account.leverage)
+        packet['cumulative_risk_metrics']['max_leverage'] = self._max_leverage
 
-    def end_of_session(self, **kwargs):
-        self.end_of_bar(**kwargs)
+    def end_of_session(self, packet, context):
+        self.end_of_bar(packet, context)
 
 
 class NumTradingDays(Metric):
-    def initialization(self, **kwargs):
+    fields = ('trading_days',)
+
+    def initialization(self, first_session, ledger):
         self._num_trading_days = 0
 
-    def start_of_session(self, **kwargs):
+    def start_of_session(self, ledger, session, data_portal):
         self._num_trading_days += 1
 
-    def end_of_bar(self, **kwargs):
-        kwargs.pop('packet')['cumulative_risk_metrics']['trading_days'] = (self._num_trading_days)
+    def end_of_bar(self, packet, context):
+        packet['cumulative_risk_metrics']['trading_days'] = (self._num_trading_days)
 
-    def end_of_session(self, **kwargs):
-        self.end_of_bar(**kwargs)
+    def end_of_session(self, packet, context):
+        self.end_of_bar(packet, context)
 
 
 class _ConstantCumulativeRiskMetric(Metric):
@@ -329,23 +424,26 @@ class _ConstantCumulativeRiskMetric(Metric):
     def __init__(self, field, value):
         self._field = field
         self._value = value
+        self.fields = (field,)
 
-    def end_of_bar(self, **kwargs):
-        kwargs.pop('packet')['cumulative_risk_metrics'][self._field] = self._value
+    def end_of_bar(self, packet, context):
+        packet['cumulative_risk_metrics'][self._field] = self._value
 
-    def end_of_session(self, **kwargs):
-        kwargs.pop('packet')['cumulative_risk_metrics'][self._field] = self._value
+    def end_of_session(self, packet, context):
+        packet['cumulative_risk_metrics'][self._field] = self._value
 
 
 class PeriodLabel(Metric):
     """Backwards compat, please kill me.
         """
 
-    def start_of_session(self, **kwargs):
-        self._label = kwargs.pop('session').strftime('%Y-%m')
+    fields = ('period_label',)
+
+    def start_of_session(self, ledger, session, data_portal):
+        self._label = session.strftime('%Y-%m')
 
-    def end_of_bar(self, **kwargs):
-        kwargs.pop('packet')['cumulative_risk_metrics']['period_label'] = self._label
+    def end_of_bar(self, packet, context):
+        packet['cumulative_risk_metrics']['period_label'] = self._label
 
-    def end_of_session(self, **kwargs):
-        self.end_of_bar(**kwargs)
+    def end_of_session(self, packet, context):
+        self.end_of_bar(packet, context)
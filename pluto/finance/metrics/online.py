@@ -0,0 +1,432 @@
+import math
+
+import numpy as np
+
+from pluto.finance.metrics import metric
+
+# streaming versions of the empyrical risk metrics. Each accumulator is
+# updated in O(1) per observation, instead of recomputing the statistic over
+# the whole returns array at each bar.
+# non finite observations are skipped, like the nan-aware numpy functions
+# used by empyrical.
+
+APPROX_BDAYS_PER_YEAR = 252
+
+_SQRT_BDAYS = math.sqrt(APPROX_BDAYS_PER_YEAR)
+
+# beta is nan below this benchmark variance (same as empyrical)
+_MIN_VARIANCE = 1.0e-30
+
+
+def _isfinite(value):
+    return not (math.isnan(value) or math.isinf(value))
+
+
+class Moments(object):
+    '''Running mean and variance (Welford).'''
+
+    __slots__ = ['length', 'count', 'mean', '_m2']
+
+    def __init__(self):
+        # number of observations, including the non finite ones
+        self.length = 0
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def update(self, value):
+        self.length += 1
+        if not _isfinite(value):
+            return
+        self.count = count = self.count + 1
+        delta = value - self.mean
+        self.mean += delta / count
+        self._m2 += delta * (value - self.mean)
+
+    def variance(self, ddof=1):
+        n = self.count - ddof
+        if n <= 0:
+            return math.nan
+        return self._m2 / n
+
+    def std(self, ddof=1):
+        return math.sqrt(self.variance(ddof))
+
+    def variance_with(self, value, ddof=1):
+        '''variance including an extra observation, without updating the
+        moments.'''
+        if not _isfinite(value):
+            return self.variance(ddof)
+        count = self.count + 1
+        n = count - ddof
+        if n <= 0:
+            return math.nan
+        delta = value - self.mean
+        return (self._m2 + delta * (value - (self.mean + delta / count))) / n
+
+
+def expanding_moments(values):
+    '''Vectorized Moments.update over an array of observations.
+
+    Parameters
+    ----------
+    values: numpy.ndarray
+
+    Returns
+    -------
+    tuple[Moments, numpy.ndarray, numpy.ndarray, numpy.ndarray]
+        the moments of all the values, and the count, mean and sum of squared
+        deviations of each expanding window of the values.
+    '''
+    values = np.asarray(values, dtype='float64')
+    finite = np.isfinite(values)
+    counts = np.cumsum(finite)
+    # the values are shifted by the first finite value, to limit the
+    # cancellation in the sums of squares
+    shift = values[finite][0] if finite.any() else 0.0
+    deviations = np.where(finite, values - shift, 0.0)
+    sums = np.cumsum(deviations)
+    squares = np.cumsum(deviations * deviations)
+    means = np.zeros(len(values))
+    m2 = np.zeros(len(values))
+    observed = counts > 0
+    means[observed] = shift + sums[observed] / counts[observed]
+    m2[observed] = np.maximum(
+        squares[observed] - sums[observed] * sums[observed] / counts[observed], 0.0)
+
+    moments = Moments()
+    if len(values):
+        moments.length = len(values)
+        moments.count = int(counts[-1])
+        moments.mean = float(means[-1])
+        moments._m2 = float(m2[-1])
+    return moments, counts, means, m2
+
+
+def expanding_variance(counts, m2, ddof=1):
+    '''Variances of the windows returned by expanding_moments.'''
+    n = counts - ddof
+    variances = np.full(len(counts), np.nan)
+    defined = n > 0
+    variances[defined] = m2[defined] / n[defined]
+    return variances
+
+
+class DownsideRisk(object):
+    '''Running root mean square of the returns below a required return.'''
+
+    __slots__ = ['count', '_sum_sq', '_required']
+
+    def __init__(self, required_return=0.0):
+        self.count = 0
+        self._sum_sq = 0.0
+        self._required = required_return
+
+    def update(self, value):
+        if not _isfinite(value):
+            return
+        self.count += 1
+        diff = value - self._required
+        if diff < 0:
+            self._sum_sq += diff * diff
+
+    @property
+    def value(self):
+        if not self.count:
+            return math.nan
+        return math.sqrt(self._sum_sq / self.count)
+
+
+class Drawdown(object):
+    '''Running peak of the cumulative returns and maximum drawdown.'''
+
+    __slots__ = ['count', '_wealth', '_peak', '_max_drawdown']
+
+    def __init__(self):
+        self.count = 0
+        # the starting value is part of the peak computation (empyrical)
+        self._wealth = self._peak = 100.0
+        self._max_drawdown = 0.0
+
+    def update(self, value):
+        self.count += 1
+        if not _isfinite(value):
+            return
+        self._wealth = wealth = self._wealth * (1 + value)
+        if wealth > self._peak:
+            self._peak = wealth
+        else:
+            drawdown = (wealth - self._peak) / self._peak
+            if drawdown < self._max_drawdown:
+                self._max_drawdown = drawdown
+
+    @property
+    def value(self):
+        if not self.count:
+            return math.nan
+        return self._max_drawdown
+
+
+class Covariance(object):
+    '''Running co-moments of the returns against the benchmark returns.
+    Only pairs where both values are finite are accumulated.'''
+
+    __slots__ = ['length', 'count', 'mean_x', 'mean_y', '_cxy', '_m2x']
+
+    def __init__(self):
+        self.length = 0
+        self.count = 0
+        self.mean_x = 0.0
+        self.mean_y = 0.0
+        self._cxy = 0.0
+        self._m2x = 0.0
+
+    def update(self, y, x):
+        '''
+
+        Parameters
+        ----------
+        y: float
+            returns
+        x: float
+            benchmark returns
+        '''
+        self.length += 1
+        if not (_isfinite(x) and _isfinite(y)):
+            return
+        self.count = count = self.count + 1
+        dx = x - self.mean_x
+        self.mean_x += dx / count
+        self.mean_y += (y - self.mean_y) / count
+        self._cxy += dx * (y - self.mean_y)
+        self._m2x += dx * (x - self.mean_x)
+
+    @property
+    def beta(self):
+        count = self.count
+        if self.length < 2 or not count or self._m2x / count < _MIN_VARIANCE:
+            return math.nan
+        return self._cxy / self._m2x
+
+    @property
+    def alpha(self):
+        beta = self.beta
+        if math.isnan(beta):
+            return math.nan
+        # annualized like empyrical.alpha_aligned (not compounded)
+        return (self.mean_y - beta * self.mean_x) * APPROX_BDAYS_PER_YEAR
+
+
+def annual_volatility(moments):
+    return moments.std() * _SQRT_BDAYS
+
+
+def sharpe_ratio(moments):
+    if moments.length < 2:
+        return math.nan
+    std = moments.std()
+    if std == 0:
+        return math.nan if moments.mean == 0 else math.copysign(math.inf, moments.mean)
+    return moments.mean / std * _SQRT_BDAYS
+
+
+def sortino_ratio(moments, downside_risk):
+    if moments.length < 2:
+        return math.nan
+    risk = downside_risk.value * _SQRT_BDAYS
+    mean = moments.mean * APPROX_BDAYS_PER_YEAR
+    if risk == 0:
+        return math.nan if mean == 0 else math.copysign(math.inf, mean)
+    return mean / risk
+
+
+def _finite_or_none(value):
+    if _isfinite(value):
+        return value
+
+
+def _get_state(accumulator):
+    return [getattr(accumulator, name) for name in accumulator.__slots__]
+
+
+def _restore_state(accumulator, values):
+    for name, value in zip(accumulator.__slots__, values):
+        # the values are stored as floats, the counts are restored as ints.
+        setattr(accumulator, name, type(getattr(accumulator, name))(value))
+
+
+def _accumulators_state(seen, accumulators):
+    values = list(seen)
+    for accumulator in accumulators:
+        values.extend(_get_state(accumulator))
+    return values
+
+
+def _restore_accumulators(values, seen, accumulators):
+    # restores the accumulators and returns the seen counts that precede them
+    expected = seen + sum(len(accumulator.__slots__) for accumulator in accumulators)
+    if len(values) != expected:
+        raise ValueError('Expected {} values, got {}'.format(expected, len(values)))
+    start = seen
+    for accumulator in accumulators:
+        end = start + len(accumulator.__slots__)
+        _restore_state(accumulator, values[start:end])
+        start = end
+    return [int(value) for value in values[:seen]]
+
+
+class OnlineReturnsStatistic(metric.Metric):
+    '''Base class of the metrics computed from the returns of the ledger,
+    consuming only the returns that were appended since the last update.'''
+
+    def __init__(self):
+        self._seen = 0
+
+    def _consume(self, ledger):
+        count = ledger.returns_count
+        new = count - self._seen
+        if new > 0:
+            update = self._update
+            for value in ledger.latest_returns(new):
+                update(value)
+        self._seen = count
+
+    def end_of_bar(self, packet, context):
+        self._consume(context.ledger)
+        self._write(packet['cumulative_risk_metrics'])
+
+    def end_of_session(self, packet, context):
+        self.end_of_bar(packet, context)
+
+    def get_state(self):
+        return _accumulators_state((self._seen,), self._accumulators())
+
+    def restore_state(self, values):
+        self._seen, = _restore_accumulators(values, 1, self._accumulators())
+
+    def _accumulators(self):
+        raise NotImplementedError
+
+    def _update(self, value):
+        raise NotImplementedError
+
+    def _write(self, risk):
+        raise NotImplementedError
+
+
+class AnnualVolatility(OnlineReturnsStatistic):
+    def __init__(self, field_name='algo_volatility'):
+        super(AnnualVolatility, self).__init__()
+        self._field_name = field_name
+        self.fields = (field_name,)
+        self._moments = Moments()
+
+    def _accumulators(self):
+        return (self._moments,)
+
+    def _update(self, value):
+        self._moments.update(value)
+
+    def _write(self, risk):
+        risk[self._field_name] = _finite_or_none(annual_volatility(self._moments))
+
+
+class SharpeRatio(OnlineReturnsStatistic):
+    def __init__(self, field_name='sharpe'):
+        super(SharpeRatio, self).__init__()
+        self._field_name = field_name
+        self.fields = (field_name,)
+        self._moments = Moments()
+
+    def _accumulators(self):
+        return (self._moments,)
+
+    def _update(self, value):
+        self._moments.update(value)
+
+    def _write(self, risk):
+        risk[self._field_name] = _finite_or_none(sharpe_ratio(self._moments))
+
+
+class SortinoRatio(OnlineReturnsStatistic):
+    def __init__(self, field_name='sortino'):
+        super(SortinoRatio, self).__init__()
+        self._field_name = field_name
+        self.fields = (field_name,)
+        self._moments = Moments()
+        self._downside_risk = DownsideRisk()
+
+    def _accumulators(self):
+        return (self._moments, self._downside_risk)
+
+    def _update(self, value):
+        self._moments.update(value)
+        self._downside_risk.update(value)
+
+    def _write(self, risk):
+        risk[self._field_name] = _finite_or_none(
+            sortino_ratio(self._moments, self._downside_risk))
+
+
+class MaxDrawdown(OnlineReturnsStatistic):
+    def __init__(self, field_name='max_drawdown'):
+        super(MaxDrawdown, self).__init__()
+        self._field_name = field_name
+        self.fields = (field_name,)
+        self._drawdown = Drawdown()
+
+    def _accumulators(self):
+        return (self._drawdown,)
+
+    def _update(self, value):
+        self._drawdown.update(value)
+
+    def _write(self, risk):
+        risk[self._field_name] = _finite_or_none(self._drawdown.value)
+
+
+class OnlineAlphaBeta(metric.Metric):
+    '''Alpha and beta from the running covariance of the returns and the
+    benchmark returns. The latest returns of the ledger are paired with the
+    latest benchmark returns.'''
+
+    fields = ('alpha', 'beta')
+
+    def initialization(self, first_session, ledger):
+        self._covariance = Covariance()
+        self._seen = 0
+        self._benchmark_seen = 0
+
+    def _consume(self, ledger, benchmark_source):
+        count = ledger.returns_count
+        benchmark_count = benchmark_source.returns_count
+        new = min(count - self._seen, benchmark_count - self._benchmark_seen)
+        if new > 0:
+            update = self._covariance.update
+            for y, x in zip(
+                    ledger.latest_returns(new),
+                    benchmark_source.latest_returns(new)):
+                update(y, x)
+        self._seen = count
+        self._benchmark_seen = benchmark_count
+
+    def end_of_bar(self, packet, context):
+        self._consume(context.ledger, context.benchmark_source)
+        risk = packet['cumulative_risk_metrics']
+        covariance = self._covariance
+        risk['alpha'] = _finite_or_none(covariance.alpha)
+        risk['beta'] = _finite_or_none(covariance.beta)
+
+    def end_of_session(self, packet, context):
+        self.end_of_bar(packet, context)
+
+    def get_state(self):
+        return _accumulators_state(
+            (self._seen, self._benchmark_seen),
+            (self._covariance,))
+
+    def restore_state(self, values):
+        self._seen, self._benchmark_seen = _restore_accumulators(
+            values,
+            2,
+            (self._covariance,))
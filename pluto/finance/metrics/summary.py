@@ -0,0 +1,38 @@
+import struct
+
+import numpy as np
+import pandas as pd
+
+# compact summary of a session, sent by the controllables at the end of
+# each session and aggregated by the control mode.
+
+# period end (utc nanoseconds), returns, portfolio value, long exposure,
+# short exposure
+SUMMARY = struct.Struct('<qdddd')
+
+
+def pack_summary(performance):
+    '''
+
+    Parameters
+    ----------
+    performance: dict
+        daily performance packet
+
+    Returns
+    -------
+    bytes
+    '''
+    daily = performance['daily_perf']
+    cumulative = performance['cumulative_perf']
+
+    def get(perf, field):
+        value = perf.get(field)
+        return np.nan if value is None else value
+
+    return SUMMARY.pack(
+        pd.Timestamp(performance['period_end']).value,
+        get(daily, 'returns'),
+        get(cumulative, 'portfolio_value'),
+        get(cumulative, 'long_exposure'),
+        get(cumulative, 'short_exposure'))
@@ -1,12 +1,21 @@
 import pandas as pd
 
 from pluto.finance import metrics as mtr
+from pluto.finance.metrics import metric as mt
 from pluto.coms.utils import conversions
 from pluto.finance import ledger
 
 from protos import tracker_state_pb2 as trs
 
 
+def _compile(metrics, hook):
+    # bound hooks of the metrics that override the given hook.
+    default = getattr(mt.Metric, hook)
+    return [getattr(metric, hook)
+            for metric in metrics
+            if getattr(type(metric), hook) is not default]
+
+
 class MetricsTracker(object):
     def __init__(self,
                  benchmark_source,
@@ -14,7 +23,8 @@ class MetricsTracker(object):
                  data_frequency,
                  start_dt,
                  look_back,
-                 metrics=None):
+                 metrics=None,
+                 fields=None):
         """
 
         Parameters
@@ -24,6 +34,8 @@ class MetricsTracker(object):
         data_frequency: str
         start_dt: pandas.Timestamp
         look_back: int
+        fields: typing.Iterable[str]
+            packet fields to compute. If None, all the metrics are computed.
         """
         self._benchmark_source = benchmark_source
         self._ledger = ledger.Ledger(
@@ -38,12 +50,28 @@ class MetricsTracker(object):
         self._data_frequency = data_frequency
 
         if metrics is None:
-            self._metrics = mtr.pluto_metrics()
+            metrics = mtr.pluto_metrics()
+        if fields:
+            metrics = mtr.select_metrics(fields, metrics)
+        self._metrics = metrics
 
         self._first_session = start_dt
 
-        for metric in self._metrics:
-            metric.initialization(first_session=start_dt, ledger=self._ledger)
+        for metric in metrics:
+            metric.initialization(start_dt, self._ledger)
+
+        # metrics with accumulators, saved with the tracker state
+        self._stateful = {
+            metric.fields[0]: metric
+            for metric in metrics
+            if type(metric).get_state is not mt.Metric.get_state}
+
+        # values shared by the metrics at each bar
+        self._context = mt.Context(self._ledger, benchmark_source, data_frequency)
+
+        self._start_of_session = _compile(metrics, 'start_of_session')
+        self._end_of_bar = _compile(metrics, 'end_of_bar')
+        self._end_of_session = _compile(metrics, 'end_of_session')
 
     @property
     def portfolio(self):
@@ -86,7 +114,10 @@ class MetricsTracker(object):
             first_open_session=conversions.to_proto_timestamp(
                 self._first_open_session),
             ledger_state=self._ledger.get_state(dt),
-            last_checkpoint=conversions.to_proto_timestamp(dt)
+            last_checkpoint=conversions.to_proto_timestamp(dt),
+            metrics=[
+                trs.MetricState(field=field, values=metric.get_state())
+                for field, metric in self._stateful.items()]
         ).SerializeToString()
 
     def restore_state(self, state):
@@ -99,8 +130,14 @@ class MetricsTracker(object):
             conversions.to_datetime(tr_state.first_open_session),
             tz='UTC')
 
-        self._last_checkpoint = ledger.restore_state(tr_state.account_state)
+        self._last_checkpoint = ledger.restore_state(tr_state.ledger_state)
 
+        stateful = self._stateful
+        for metric_state in tr_state.metrics:
+            metric = stateful.get(metric_state.field)
+            # skip the metrics that aren't selected anymore
+            if metric is not None:
+                metric.restore_state(metric_state.values)
 
     def handle_minute_close(self, dt, data_portal, trading_calendar, sessions):
         """
@@ -143,14 +180,10 @@ class MetricsTracker(object):
         ledger.end_of_bar()
         benchmark_source.on_minute_end(dt, data_portal, trading_calendar, sessions)
 
-        for metric in self._metrics:
-            metric.end_of_bar(
-                packet=packet,
-                ledger=ledger,
-                benchmark_source=benchmark_source,
-                dt=dt,
-                data_portal=data_portal,
-                emission_rate=self._data_frequency)
+        context = self._context
+        context.reset(dt, data_portal)
+        for end_of_bar in self._end_of_bar:
+            end_of_bar(packet, context)
         return packet
 
     def handle_market_open(self, session_label, data_portal, trading_calendar, sessions):
@@ -181,12 +214,8 @@ class MetricsTracker(object):
             session_label,
         )
 
-        for metric in self._metrics:
-            metric.start_of_session(
-                dt=session_label,
-                session=session_label,
-                ledger=ledger,
-                data_portal=data_portal)
+        for start_of_session in self._start_of_session:
+            start_of_session(ledger, session_label, data_portal)
 
     def handle_market_close(self, dt, data_portal, trading_calendar, sessions):
         first_session = self._ledger.first_session
@@ -212,13 +241,10 @@ class MetricsTracker(object):
         ledger.end_of_session(sessions)
         benchmark_source.on_session_end(data_portal, trading_calendar, sessions)
 
-        for metric in self._metrics:
-            metric.end_of_session(
-                dt=dt,
-                packet=packet,
-                ledger=ledger,
-                benchmark_source=benchmark_source,
-                data_portal=data_portal)
+        context = self._context
+        context.reset(dt, data_portal)
+        for end_of_session in self._end_of_session:
+            end_of_session(packet, context)
 
         return packet
 
@@ -0,0 +1,355 @@
+import collections
+
+import numpy as np
+import pandas as pd
+
+from zipline.assets import Future
+from zipline.finance import ledger
+
+# array backed position tracker. The zipline Position objects are still used
+# for the transactions, splits and dividends, but the last sale prices are
+# synced in one batch into arrays and the stats are computed with vectorized
+# reductions. The prices are only written back to the Position objects when
+# they are accessed.
+
+_DEFAULT_CAPACITY = 64
+
+_NAT = pd.NaT.value
+
+# (name, dtype)
+_COLUMNS = (
+    ('_sids', 'int64'),
+    ('_amounts', 'int64'),
+    ('_cost_basis', 'float64'),
+    ('_prices', 'float64'),
+    ('_dates', 'int64'),
+    ('_multipliers', 'float64'),
+    # 0 for futures, which have no position value
+    ('_value_factors', 'float64'),
+    # the price was synced but not written to the Position object
+    ('_pending', 'bool'),
+)
+
+
+def _timestamp_value(dt):
+    return _NAT if dt is None else pd.Timestamp(dt).value
+
+
+class PositionStats(object):
+    '''Same values as zipline.finance._finance_ext.PositionStats'''
+
+    __slots__ = [
+        'gross_exposure',
+        'gross_value',
+        'long_exposure',
+        'long_value',
+        'net_exposure',
+        'net_value',
+        'short_exposure',
+        'short_value',
+        'longs_count',
+        'shorts_count',
+        'position_exposure_array',
+        '_sids']
+
+    def __init__(self):
+        self.gross_exposure = self.gross_value = 0.0
+        self.long_exposure = self.long_value = 0.0
+        self.net_exposure = self.net_value = 0.0
+        self.short_exposure = self.short_value = 0.0
+        self.longs_count = self.shorts_count = 0
+        self.position_exposure_array = np.empty(0, dtype='float64')
+        self._sids = np.empty(0, dtype='int64')
+
+    @property
+    def position_exposure_series(self):
+        return pd.Series(self.position_exposure_array, index=self._sids)
+
+
+class PositionView(object):
+    '''Read-only view of a position, that reads the values from the book.'''
+
+    __slots__ = ['_book', '_asset']
+
+    _fields = ('sid', 'amount', 'cost_basis', 'last_sale_price', 'last_sale_date')
+
+    def __init__(self, book, asset):
+        self._book = book
+        self._asset = asset
+
+    def _get(self, column):
+        book = self._book
+        row = book._rows.get(self._asset, None)
+        if row is None:
+            return
+        return getattr(book, column)[row]
+
+    @property
+    def asset(self):
+        return self._asset
+
+    @property
+    def sid(self):
+        return self._asset
+
+    @property
+    def amount(self):
+        value = self._get('_amounts')
+        return 0 if value is None else int(value)
+
+    @property
+    def cost_basis(self):
+        value = self._get('_cost_basis')
+        return 0.0 if value is None else float(value)
+
+    @property
+    def last_sale_price(self):
+        value = self._get('_prices')
+        return 0.0 if value is None else float(value)
+
+    @property
+    def last_sale_date(self):
+        value = self._get('_dates')
+        if value is None or value == _NAT:
+            return
+        return pd.Timestamp(value, tz='UTC')
+
+    def __getitem__(self, key):
+        if key not in self._fields:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __repr__(self):
+        return 'Position(%r)' % {
+            k: getattr(self, k)
+            for k in (
+                'asset',
+                'amount',
+                'cost_basis',
+                'last_sale_price',
+                'last_sale_date')}
+
+
+class PositionBook(ledger.PositionTracker):
+    '''Position tracker that keeps the sids, amounts, cost basis and last
+    sale prices of the positions in arrays, in the order of the positions.'''
+
+    def __init__(self, data_frequency):
+        self._size = 0
+        self._capacity = _DEFAULT_CAPACITY
+        for name, dtype in _COLUMNS:
+            setattr(self, name, np.zeros(_DEFAULT_CAPACITY, dtype=dtype))
+        self._assets = []
+        self._rows = {}
+        self._positions = collections.OrderedDict()
+        # true if the prices of the Position objects are behind the arrays
+        self._stale = False
+        # true if positions were added or removed since the last get_positions
+        self._layout_changed = True
+
+        super(PositionBook, self).__init__(data_frequency)
+
+        self._stats = PositionStats()
+
+    @property
+    def positions(self):
+        if self._stale:
+            self._write_prices()
+        return self._positions
+
+    @positions.setter
+    def positions(self, positions):
+        self._positions = positions
+        self._rebuild()
+
+    def _write_prices(self):
+        n = self._size
+        rows = np.flatnonzero(self._pending[:n])
+        positions = self._positions
+        assets = self._assets
+        prices = self._prices
+        dates = self._dates
+        for row in rows.tolist():
+            inner = positions[assets[row]].inner_position
+            inner.last_sale_price = float(prices[row])
+            inner.last_sale_date = pd.Timestamp(int(dates[row]), tz='UTC')
+        self._pending[:n] = False
+        self._stale = False
+
+    def _grow(self):
+        self._capacity = capacity = self._capacity * 2
+        for name, _ in _COLUMNS:
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _write_row(self, row, position):
+        asset = position.asset
+        self._sids[row] = asset.sid
+        self._amounts[row] = position.amount
+        self._cost_basis[row] = position.cost_basis
+        self._prices[row] = position.last_sale_price
+        self._dates[row] = _timestamp_value(position.last_sale_date)
+        if type(asset) is Future:
+            self._multipliers[row] = asset.price_multiplier
+            self._value_factors[row] = 0.0
+        else:
+            self._multipliers[row] = 1.0
+            self._value_factors[row] = 1.0
+        self._pending[row] = False
+
+    def _add(self, asset, position):
+        row = self._size
+        if row == self._capacity:
+            self._grow()
+        self._write_row(row, position)
+        self._assets.append(asset)
+        self._rows[asset] = row
+        self._size = row + 1
+        self._layout_changed = True
+
+    def _remove(self, row):
+        # shift the following rows to keep the order of the positions
+        n = self._size
+        for name, _ in _COLUMNS:
+            column = getattr(self, name)
+            column[row:n - 1] = column[row + 1:n]
+        assets = self._assets
+        del self._rows[assets.pop(row)]
+        rows = self._rows
+        for i in range(row, n - 1):
+            rows[assets[i]] = i
+        self._size = n - 1
+        self._layout_changed = True
+
+    def _sync(self, asset):
+        # reads the values of the Position object of the asset
+        position = self._positions.get(asset, None)
+        row = self._rows.get(asset, None)
+        if position is None:
+            if row is not None:
+                self._remove(row)
+        elif row is None:
+            self._add(asset, position)
+        else:
+            self._write_row(row, position)
+
+    def _rebuild(self):
+        self._size = 0
+        self._assets = []
+        self._rows = {}
+        self._stale = False
+        for asset, position in self._positions.items():
+            self._add(asset, position)
+        self._layout_changed = True
+        self._dirty_stats = True
+
+    def update_position(self,
+                        asset,
+                        amount=None,
+                        last_sale_price=None,
+                        last_sale_date=None,
+                        cost_basis=None):
+        super(PositionBook, self).update_position(
+            asset,
+            amount,
+            last_sale_price,
+            last_sale_date,
+            cost_basis)
+        self._sync(asset)
+
+    def execute_transaction(self, txn):
+        super(PositionBook, self).execute_transaction(txn)
+        self._sync(txn.asset)
+
+    def handle_commission(self, asset, cost):
+        super(PositionBook, self).handle_commission(asset, cost)
+        self._sync(asset)
+
+    def handle_splits(self, splits):
+        leftover_cash = super(PositionBook, self).handle_splits(splits)
+        for asset, _ in splits:
+            self._sync(asset)
+        return leftover_cash
+
+    def pay_dividends(self, next_trading_day):
+        # stock dividends can add positions
+        net_cash_payment = super(PositionBook, self).pay_dividends(next_trading_day)
+        self._rebuild()
+        return net_cash_payment
+
+    def get_positions(self):
+        positions = self._positions_store
+        if self._layout_changed:
+            positions.clear()
+            for asset in self._assets:
+                positions[asset] = PositionView(self, asset)
+            self._layout_changed = False
+        return positions
+
+    def sync_last_sale_prices(self,
+                              dt,
+                              data_portal,
+                              handle_non_market_minutes=False):
+        self._dirty_stats = True
+        n = self._size
+        if not n:
+            return
+
+        assets = self._assets
+        if handle_non_market_minutes:
+            previous_minute = data_portal.trading_calendar.previous_minute(dt)
+            get_adjusted_value = data_portal.get_adjusted_value
+            prices = [
+                get_adjusted_value(
+                    asset,
+                    'price',
+                    previous_minute,
+                    dt,
+                    self.data_frequency)
+                for asset in assets]
+        else:
+            prices = data_portal.get_spot_value(
+                assets,
+                'price',
+                dt,
+                self.data_frequency)
+
+        prices = np.asarray(prices, dtype='float64')
+        mask = ~np.isnan(prices)
+        np.copyto(self._prices[:n], prices, where=mask)
+        self._dates[:n][mask] = pd.Timestamp(dt).value
+        self._pending[:n] |= mask
+        self._stale = True
+
+    @property
+    def stats(self):
+        if self._dirty_stats:
+            self._calculate_stats()
+            self._dirty_stats = False
+        return self._stats
+
+    def _calculate_stats(self):
+        n = self._size
+        stats = self._stats
+
+        exposure = self._amounts[:n] * self._prices[:n] * self._multipliers[:n]
+        value = exposure * self._value_factors[:n]
+        longs = exposure > 0
+        shorts = exposure < 0
+
+        stats.longs_count = int(np.count_nonzero(longs))
+        stats.shorts_count = int(np.count_nonzero(shorts))
+        stats.long_value = long_value = float(value[longs].sum())
+        stats.short_value = short_value = float(value[shorts].sum())
+        stats.long_exposure = long_exposure = float(exposure[longs].sum())
+        stats.short_exposure = short_exposure = float(exposure[shorts].sum())
+
+        stats.net_value = long_value + short_value
+        stats.gross_value = long_value - short_value
+        stats.net_exposure = long_exposure + short_exposure
+        stats.gross_exposure = long_exposure - short_exposure
+
+        stats.position_exposure_array = exposure
+        stats._sids = self._sids[:n].copy()
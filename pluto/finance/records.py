@@ -0,0 +1,125 @@
+# compact snapshots of the orders and transactions processed by the ledger.
+# The records are immutable: a new record is created each time an order is
+# processed, so that records can be compared by identity.
+# The dict form is only created when requested. The records support item
+# access with the keys of the dict form, so they can be converted to protos
+# directly.
+
+
+class _Record(object):
+    __slots__ = []
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __setattr__(self, key, value):
+        raise AttributeError('cannot mutate records')
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, self.to_dict())
+
+    def to_dict(self):
+        raise NotImplementedError
+
+
+class TransactionRecord(_Record):
+    __slots__ = ['asset', 'amount', 'dt', 'price', 'order_id']
+
+    def __init__(self, asset, amount, dt, price, order_id):
+        set_ = object.__setattr__
+        set_(self, 'asset', asset)
+        set_(self, 'amount', amount)
+        set_(self, 'dt', dt)
+        set_(self, 'price', price)
+        set_(self, 'order_id', order_id)
+
+    @classmethod
+    def from_transaction(cls, transaction):
+        '''
+
+        Parameters
+        ----------
+        transaction: zipline.finance.transaction.Transaction
+
+        Returns
+        -------
+        TransactionRecord
+        '''
+        return cls(
+            transaction.asset,
+            transaction.amount,
+            transaction.dt,
+            transaction.price,
+            transaction.order_id)
+
+    @property
+    def sid(self):
+        return self.asset
+
+    @property
+    def commission(self):
+        # always None in the zipline dict form
+        return
+
+    def to_dict(self):
+        return {
+            'amount': self.amount,
+            'dt': self.dt,
+            'price': self.price,
+            'order_id': self.order_id,
+            'sid': self.asset,
+            'commission': None}
+
+
+_ORDER_FIELDS = (
+    'id',
+    'dt',
+    'reason',
+    'created',
+    'amount',
+    'filled',
+    'commission',
+    'stop',
+    'limit',
+    'stop_reached',
+    'limit_reached',
+    'broker_order_id')
+
+
+class OrderRecord(_Record):
+    __slots__ = list(_ORDER_FIELDS) + ['asset', 'status']
+
+    @classmethod
+    def from_order(cls, order):
+        '''
+
+        Parameters
+        ----------
+        order: zipline.finance.order.Order
+
+        Returns
+        -------
+        OrderRecord
+        '''
+        record = cls.__new__(cls)
+        set_ = object.__setattr__
+        for name in _ORDER_FIELDS:
+            set_(record, name, getattr(order, name, None))
+        set_(record, 'asset', order.asset)
+        set_(record, 'status', order.status)
+        return record
+
+    @property
+    def sid(self):
+        return self.asset
+
+    def to_dict(self):
+        dct = {name: getattr(self, name) for name in _ORDER_FIELDS}
+        if self.broker_order_id is None:
+            del dct['broker_order_id']
+        dct['sid'] = self.asset
+        dct['status'] = self.status
+        return dct
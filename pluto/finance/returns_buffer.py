@@ -0,0 +1,169 @@
+import numpy as np
+
+_DEFAULT_CAPACITY = 256
+
+# values are stored as little-endian float64, both in memory and serialized.
+_DTYPE = np.dtype('<f8')
+
+
+class ReturnsBuffer(object):
+    '''Preallocated ring buffer of returns.
+
+    Each value is written twice, at its index and at its index plus the
+    capacity, so that the window of values is always a contiguous slice of
+    the buffer and can be returned as a view, without copying.
+
+    If maxlen is set, appending to a full buffer drops the oldest value.
+    Otherwise the buffer grows.
+
+    Note that the views are only valid until the next append.'''
+
+    __slots__ = ['_buffer', '_capacity', '_maxlen', '_start', '_length', '_count']
+
+    def __init__(self, maxlen=None, capacity=None):
+        '''
+
+        Parameters
+        ----------
+        maxlen: int
+            maximum number of values in the window.
+        capacity: int
+            initial capacity of a buffer without maxlen.
+        '''
+        if maxlen:
+            capacity = maxlen
+        elif not capacity:
+            capacity = _DEFAULT_CAPACITY
+        self._maxlen = maxlen
+        self._capacity = capacity
+        self._buffer = np.empty(capacity * 2, dtype=_DTYPE)
+        self._start = 0
+        self._length = 0
+        # total number of appended values
+        self._count = 0
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def count(self):
+        return self._count
+
+    @property
+    def maxlen(self):
+        return self._maxlen
+
+    @property
+    def values(self):
+        '''
+
+        Returns
+        -------
+        numpy.ndarray
+            read-only view of the values, oldest first.
+        '''
+        start = self._start
+        view = self._buffer[start:start + self._length]
+        view.flags.writeable = False
+        return view
+
+    def latest(self, n):
+        '''
+
+        Returns
+        -------
+        numpy.ndarray
+            read-only view of the last n values.
+        '''
+        n = min(n, self._length)
+        end = self._start + self._length
+        view = self._buffer[end - n:end]
+        view.flags.writeable = False
+        return view
+
+    def _grow(self):
+        capacity = self._capacity * 2
+        buffer = np.empty(capacity * 2, dtype=_DTYPE)
+        length = self._length
+        buffer[:length] = self.values
+        buffer[capacity:capacity + length] = buffer[:length]
+        self._buffer = buffer
+        self._capacity = capacity
+        self._start = 0
+
+    def append(self, value):
+        capacity = self._capacity
+        length = self._length
+        if length == capacity:
+            if self._maxlen:
+                # the new value overwrites the oldest one.
+                self._start = (self._start + 1) % capacity
+                length -= 1
+            else:
+                self._grow()
+                capacity = self._capacity
+        idx = (self._start + length) % capacity
+        buffer = self._buffer
+        buffer[idx] = buffer[idx + capacity] = value
+        self._length = length + 1
+        self._count += 1
+
+    def extend(self, values):
+        '''Appends an array of values at once.'''
+        values = np.asarray(values, dtype=_DTYPE)
+        if not len(values):
+            return
+        window = np.concatenate((self.values, values))
+        if self._maxlen:
+            window = window[-self._maxlen:]
+        length = len(window)
+        capacity = self._capacity
+        if length > capacity:
+            while capacity < length:
+                capacity *= 2
+            self._buffer = np.empty(capacity * 2, dtype=_DTYPE)
+            self._capacity = capacity
+        buffer = self._buffer
+        buffer[:length] = window
+        buffer[capacity:capacity + length] = window
+        self._start = 0
+        self._length = length
+        self._count += len(values)
+
+    def popleft(self):
+        if not self._length:
+            raise IndexError('pop from an empty buffer')
+        start = self._start
+        value = self._buffer[start]
+        self._start = (start + 1) % self._capacity
+        self._length -= 1
+        return value
+
+    def to_bytes(self):
+        return self.values.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data, count=None, maxlen=None, capacity=None):
+        '''
+
+        Parameters
+        ----------
+        data: bytes
+            values serialized with to_bytes
+        count: int
+            total number of values appended before serialization. Defaults
+            to the number of values in data.
+        '''
+        values = np.frombuffer(data, dtype=_DTYPE)
+        if maxlen:
+            values = values[-maxlen:]
+        length = len(values)
+        if not maxlen and (not capacity or capacity < length):
+            capacity = max(length, capacity or _DEFAULT_CAPACITY)
+        buffer = cls(maxlen, capacity)
+        capacity = buffer._capacity
+        buffer._buffer[:length] = values
+        buffer._buffer[capacity:capacity + length] = values
+        buffer._length = length
+        buffer._count = length if count is None else count
+        return buffer
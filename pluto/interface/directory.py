@@ -11,11 +11,14 @@ from sqlalchemy import orm
 
 from zipline.testing import core
 
+from pluto.finance import metrics as mtr
 from pluto.interface.utils import paths
 from pluto.interface.utils import db_utils
 from pluto.setup import setup
 
 _STREAM_CHUNK_SIZE = 64 * 1024
+# bumped whenever a column is added to the models
+_SCHEMA_VERSION = 1
 
 Base = declarative_base()
 
@@ -61,6 +64,33 @@ class SessionMetadata(Base):
     universe = sa.Column(sa.String, nullable=False)
     look_back = sa.Column(sa.Integer)
     cancel_policy = sa.Column(sa.String, nullable=False)
+    # comma separated metric fields. All the metrics are computed if null
+    metrics = sa.Column(sa.String)
+
+
+def _add_missing_columns(engine):
+    # create_all doesn't alter existing tables: the columns that were added
+    # to the models after the tables were created are added here. Those
+    # columns must be nullable.
+    inspector = sa.inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        existing = set(column['name'] for column in inspector.get_columns(table.name))
+        for column in table.columns:
+            if column.name not in existing:
+                engine.execute('ALTER TABLE {} ADD COLUMN {} {}'.format(
+                    table.name,
+                    column.name,
+                    column.type.compile(engine.dialect)))
+
+
+def _upgrade_schema(engine):
+    # the schema version is stored in the sqlite header, so the tables are
+    # only created or altered when the file was written by an older version
+    version = engine.execute('PRAGMA user_version').scalar()
+    if version < _SCHEMA_VERSION:
+        Base.metadata.create_all(engine)
+        _add_missing_columns(engine)
+        engine.execute('PRAGMA user_version = {}'.format(_SCHEMA_VERSION))
 
 
 class Scoped(object):
@@ -123,6 +153,20 @@ class _Session(Scoped):
     def cancel_policy(self):
         return self._metadata.cancel_policy
 
+    @property
+    def metrics(self):
+        '''
+
+        Returns
+        -------
+        tuple
+            the metric fields of the session or None if all the metrics
+            must be computed.
+        '''
+        metrics = self._metadata.metrics
+        if metrics:
+            return tuple(metrics.split(','))
+
     def get_strategy(self, strategy):
         '''
 
@@ -249,18 +293,35 @@ class _Mode(ABC):
                 SessionMetadata)
                 .get(session_id), self)
 
-    def add_session(self, strategy_id, universe, data_frequency, look_back, cancel_policy):
+    def add_session(self,
+                    strategy_id,
+                    universe,
+                    data_frequency,
+                    look_back,
+                    cancel_policy,
+                    metrics=None):
         '''
 
         Parameters
         ----------
         strategy_id: str
         universe: str
+        metrics: typing.Iterable[str]
+            metric fields computed by the session. Defaults to all.
 
         Returns
         -------
         _Session
+
+        Raises
+        ------
+        ValueError
+            if a metric field isn't written by any metric
         '''
+        if metrics:
+            metrics = list(metrics)
+            # fail before the session is persisted
+            mtr.select_metrics(metrics)
 
         # we use the args pair as key
         id_ = strategy_id + universe
@@ -277,7 +338,8 @@ class _Mode(ABC):
                 data_frequency=data_frequency,
                 universe=universe,
                 look_back=look_back,
-                cancel_policy=cancel_policy
+                cancel_policy=cancel_policy,
+                metrics=','.join(metrics) if metrics else None
             )
             session.add(sess_meta)
 
@@ -500,7 +562,7 @@ class AbstractDirectory(ABC):
         self._session = sess = fct()
         self._reader = _Read(sess, strategies_dir)
 
-        Base.metadata.create_all(engine)
+        _upgrade_schema(engine)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
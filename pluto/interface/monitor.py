@@ -2,6 +2,7 @@ import queue
 
 from google.protobuf import empty_pb2 as emp
 
+from pluto.control.modes import aggregate
 from pluto.interface.utils import service_access
 
 from protos import interface_pb2_grpc as itf
@@ -20,7 +21,9 @@ class _Watcher(object):
                 break
 
     def stop_watching(self):
-        self._process.stop_watching()
+        # there is no process for the aggregated packets
+        if self._process:
+            self._process.stop_watching()
 
     def performance_update(self, packet):
         self._queue.put(packet)
@@ -47,10 +50,26 @@ class Monitor(itf.MonitorServicer):
             watcher.performance_update(request)
         return emp.Empty()
 
+    @service_access.framework_only
+    def SessionEnd(self, request, context):
+        mode = self._control_mode
+        if mode:
+            packet = mode.session_end(request.session_id, request.packet)
+            watcher = self._watch_list.get(aggregate.SESSION_ID, None)
+            if packet and watcher:
+                watcher.performance_update(
+                    msg.Packet(
+                        packet=aggregate.to_bytes(packet),
+                        session_id=aggregate.SESSION_ID))
+        return emp.Empty()
+
     def Watch(self, request, context):
         session_id = request.session_id
-        pr = self._control_mode.get_process(session_id)
-        pr.watch()
+        if session_id == aggregate.SESSION_ID:
+            pr = None
+        else:
+            pr = self._control_mode.get_process(session_id)
+            pr.watch()
         self._watch_list[session_id] = watcher = _Watcher(pr)
         return watcher.watch()
 
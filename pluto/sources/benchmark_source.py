@@ -1,4 +1,5 @@
 import abc
+import math
 from collections import deque
 
 import pandas as pd
@@ -10,7 +11,8 @@ from zipline.errors import (
     BenchmarkAssetNotAvailableTooLate
 )
 
-from zipline.finance._finance_ext import minute_annual_volatility
+from pluto.finance import returns_buffer
+from pluto.finance.metrics import online
 
 
 class BenchmarkSource(abc.ABC):
@@ -35,6 +37,7 @@ class BenchmarkSource(abc.ABC):
         self._end_dt = end = sessions[-1]
         self._open_dt = controllable.trading_calendar.session_open(start)
         self._minute_end_dt = controllable.trading_calendar.session_close(end)
+        self._trading_calendar = controllable.trading_calendar
 
         self._look_back = look_back
 
@@ -51,11 +54,32 @@ class BenchmarkSource(abc.ABC):
         self._minute_recomputed = False
         self._day_recomputed = False
 
-        self._daily_returns_array = deque()
+        # the window is limited to look_back returns
+        self._returns = returns_buffer.ReturnsBuffer(look_back)
         self._minute_returns_array = deque()
 
         self._benchmark = benchmark
 
+        # the series are extended with the returns that are loaded after the
+        # last loaded datetime, and the cumulative returns and volatilities
+        # are updated incrementally.
+        self._last_dt = None
+        self._new_series = []
+
+        self._daily_buffer = returns_buffer.ReturnsBuffer()
+        self._cumulative_buffer = returns_buffer.ReturnsBuffer()
+        self._volatility_buffer = returns_buffer.ReturnsBuffer()
+        self._growth = 1.0
+        self._moments = online.Moments()
+
+        self._minute_cumulative_buffer = returns_buffer.ReturnsBuffer()
+        self._minute_volatility_buffer = returns_buffer.ReturnsBuffer()
+        self._minute_growth = 1.0
+        # returns of the completed sessions, for the minute volatility
+        self._session_moments = online.Moments()
+        self._session_growth = 1.0
+        self._session_label = None
+
         if len(sessions) == 0:
             self._precalculated_series = pd.Series()
         else:
@@ -68,15 +92,12 @@ class BenchmarkSource(abc.ABC):
                     controllable.trading_calendar,
                     emission_rate,
                     end)
-            returns = self._daily_returns
-            self._cumulative_returns = np.cumprod(1 + returns.values) - 1
-            self._annual_volatility = (
-                    returns.expanding(2).std(ddof=1) * np.sqrt(252)).values
+            series = self._precalculated_series
+            if len(series):
+                self._last_dt = series.index[-1]
+            self._extend_daily(self._daily_returns.values)
             if self._emission_rate == 'minute':
-                p_returns = self._precalculated_series
-                self._minute_cumulative_returns = np.cumprod(1 + p_returns.values) - 1
-                self._minute_annual_volatility = (
-                        returns.expanding(2).std(ddof=1) * np.sqrt(252)).values
+                self._extend_minutes(series)
 
     def on_session_start(self, sessions):
         self._start_dt = sessions[0]
@@ -86,28 +107,20 @@ class BenchmarkSource(abc.ABC):
         end = sessions[-1]
         if self._emission_rate == 'daily':
             if self._recompute_hook():
-                # only compute if the emission_rate is daily
-                self._precalculated_series, self._daily_returns = \
-                    self._calculate_benchmark_series(
-                        sessions,
-                        self._benchmark,
-                        trading_calendar,
-                        'daily',
-                        end)
-                returns = self._precalculated_series
-                self._cumulative_returns = np.cumprod(1 + returns.values) - 1
-                self._annual_volatility = (returns.expanding(2).std(ddof=1) * np.sqrt(252)).values
+                self._extend_daily(self._load_new('1d', end).values)
                 self._daily_index = -1
                 self._day_recomputed = True
+        elif self._recompute_hook():
+            # the return of the session is the compounded return of its
+            # minutes.
+            self._extend_daily((self._session_growth - 1,))
+            self._daily_index = -1
+            self._day_recomputed = True
 
         if not self._day_recomputed:
             self._daily_index += 1
 
-        returns = self._daily_returns_array
-        if self._session_idx == self._look_back:
-            returns.popleft()
-            self._session_idx = 0
-        returns.append(self._daily_returns[self._daily_index])
+        self._returns.append(self._daily_returns[self._daily_index])
 
         start = sessions[0]
         self._open_dt = trading_calendar.session_open(start)
@@ -117,19 +130,7 @@ class BenchmarkSource(abc.ABC):
     def on_minute_end(self, dt, data_portal, trading_calendar, sessions):
         if self._emission_rate == 'minute':
             if self._recompute_hook():
-                self._precalculated_series, self._daily_returns = \
-                    self._calculate_benchmark_series(
-                        sessions,
-                        self._benchmark,
-                        trading_calendar,
-                        'minute',
-                        dt)
-                period_returns = self._precalculated_series.values
-                self._minute_cumulative_returns = np.cumprod(1 + period_returns) - 1
-                self._minute_annual_volatility = minute_annual_volatility(
-                    period_returns.index.normalize().view('int64'),
-                    period_returns.values,
-                    self._daily_returns.values)
+                self._extend_minutes(self._load_new('1m', dt))
                 self._minute_index = -1
                 self._minute_recomputed = True
 
@@ -142,8 +143,127 @@ class BenchmarkSource(abc.ABC):
         # check whether we should recompute the series.
         raise NotImplementedError
 
+    def _load_new(self, frequency, end_dt):
+        # loads the returns after the last loaded datetime
+        last_dt = self._last_dt
+        start = pd.Timestamp(0) if last_dt is None else last_dt + pd.Timedelta(1, 'ns')
+        returns = self._benchmark.get_history_window(start, end_dt, frequency=frequency)
+        if len(returns):
+            self._last_dt = returns.index[-1]
+            self._new_series.append(returns)
+        return returns
+
+    def _extend_daily(self, returns):
+        if not len(returns):
+            return
+        values = np.asarray(returns, dtype='float64')
+        growths = self._growth * np.cumprod(1 + values)
+        self._growth = growths[-1]
+
+        daily = self._daily_buffer
+        daily.extend(values)
+        self._cumulative_buffer.extend(growths - 1)
+        volatility = self._volatility_buffer
+        if not self._moments.length:
+            # initial series
+            self._moments, counts, _, m2 = online.expanding_moments(values)
+            volatility.extend(np.sqrt(
+                online.expanding_variance(counts, m2) * online.APPROX_BDAYS_PER_YEAR))
+        else:
+            moments = self._moments
+            for value in values:
+                moments.update(value)
+                volatility.append(online.annual_volatility(moments))
+
+        # views are replaced after each append
+        self._daily_returns = daily.values
+        self._cumulative_returns = self._cumulative_buffer.values
+        self._annual_volatility = volatility.values
+
+    def _extend_minutes(self, returns):
+        if not len(returns):
+            return
+        values = returns.values.astype('float64')
+        growths = self._minute_growth * np.cumprod(1 + values)
+        self._minute_growth = growths[-1]
+        labels = self._trading_calendar.minute_index_to_session_labels(
+            returns.index).values.view('int64')
+
+        cumulative = self._minute_cumulative_buffer
+        cumulative.extend(growths - 1)
+        # the volatility at each minute is the volatility of the returns of the
+        # previous sessions and the return of the current session up to the
+        # minute.
+        if self._session_label is None:
+            volatility = self._initial_minute_volatility(values, labels)
+            self._minute_volatility_buffer.extend(volatility)
+        else:
+            self._update_minute_volatility(values, labels)
+
+        self._minute_cumulative_returns = cumulative.values
+        self._minute_annual_volatility = self._minute_volatility_buffer.values
+
+    def _initial_minute_volatility(self, values, labels):
+        starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+        ends = np.r_[starts[1:], len(values)]
+        session_growths = np.empty(len(values))
+        for start, end in zip(starts, ends):
+            session_growths[start:end] = np.cumprod(1 + values[start:end])
+
+        # moments of the sessions completed before each session
+        completed = session_growths[ends[:-1] - 1] - 1
+        moments, counts, means, m2 = online.expanding_moments(completed)
+        sizes = ends - starts
+        counts = np.repeat(np.r_[0, counts], sizes)
+        means = np.repeat(np.r_[0.0, means], sizes)
+        m2 = np.repeat(np.r_[0.0, m2], sizes)
+
+        # Moments.variance_with the return of the session up to each minute
+        partial = session_growths - 1
+        finite = np.isfinite(partial)
+        counts = counts + finite
+        with np.errstate(divide='ignore', invalid='ignore'):
+            delta = partial - means
+            m2 = np.where(finite, m2 + delta * (partial - (means + delta / counts)), m2)
+
+        self._session_moments = moments
+        self._session_growth = session_growths[-1]
+        self._session_label = labels[-1]
+        return np.sqrt(online.expanding_variance(counts, m2) * online.APPROX_BDAYS_PER_YEAR)
+
+    def _update_minute_volatility(self, values, labels):
+        moments = self._session_moments
+        session_growth = self._session_growth
+        session_label = self._session_label
+        volatility = self._minute_volatility_buffer
+        for value, label in zip(values, labels):
+            if label != session_label:
+                moments.update(session_growth - 1)
+                session_label = label
+                session_growth = 1.0
+            session_growth *= 1 + value
+            volatility.append(math.sqrt(
+                moments.variance_with(session_growth - 1) * online.APPROX_BDAYS_PER_YEAR))
+        self._session_growth = session_growth
+        self._session_label = session_label
+
+    def _series(self):
+        new = self._new_series
+        if new:
+            self._precalculated_series = pd.concat([self._precalculated_series] + new)
+            new.clear()
+        return self._precalculated_series
+
     def daily_returns(self):
-        return np.array(self._daily_returns_array)
+        # read-only view, valid until the next session end
+        return self._returns.values
+
+    @property
+    def returns_count(self):
+        return self._returns.count
+
+    def latest_returns(self, n):
+        return self._returns.latest(n)
 
     @property
     def cumulative_returns(self):
@@ -162,18 +282,14 @@ class BenchmarkSource(abc.ABC):
         return self._minute_annual_volatility[self._minute_index]
 
     def get_range(self):
-        series = self._precalculated_series
+        series = self._series()
         if series:
             return series.loc[self._open_dt:self._minute_end_dt]
         return
 
     def _calculate_benchmark_series(self, sessions, benchmark, trading_calendar, emission_rate, end_dt):
-        # FIXME: we are reloading all series at each call. We only need the previous and most recent price
-        # => load a window of length 2, calculate percentage change, append it to returns array
-        # when we pre-calculate, we load a data window ending at the most recent close datetime, then
-        # append newly computed data to it...
-        # formula: (v2 - v1)/v1
-
+        # only used for the initial series, the live updates load the returns
+        # after the last loaded datetime (see _load_new)
         if emission_rate == "minute":
             # calculate returns until most recent minute end
             # FIXME: the last minute will be either below or equal to end_dt...
@@ -245,7 +361,7 @@ class BenchmarkSource(abc.ABC):
         return daily_returns.iloc[1:]
 
     def get_value(self, dt):
-        return self._precalculated_series.loc[dt]
+        return self._series().loc[dt]
 
 
 class SimulationBenchmarkSource(BenchmarkSource):
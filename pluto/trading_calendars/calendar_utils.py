@@ -2,6 +2,9 @@ import itertools as it
 
 import datetime as dt
 
+import collections
+import threading
+
 from dateutil import relativedelta as rd
 
 from trading_calendars import trading_calendar as tc
@@ -67,6 +70,7 @@ from pandas.tseries import holiday, offsets
 
 from pluto.coms.utils import conversions as cvr
 from pluto.trading_calendars import wrappers as wr
+from pluto.trading_calendars import schedules
 
 from protos import calendar_pb2 as cpb
 
@@ -364,9 +368,62 @@ global_calendar_dispatcher = TradingCalendarDispatcher(
 
 _cache = {}
 
+# maximum number of calendars kept in memory by get_calendar_in_range
+_CALENDARS_CACHE_SIZE = 32
+
+
+class _CalendarsCache(object):
+    """
+    A thread-safe least recently used cache of calendars.
+
+    Parameters
+    ----------
+    maxsize : int
+        Maximum number of calendars kept in the cache.
+    """
+    def __init__(self, maxsize):
+        self._maxsize = maxsize
+        self._calendars = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                calendar = self._calendars.pop(key)
+            except KeyError:
+                return
+            # re-insert the calendar as the most recently used
+            self._calendars[key] = calendar
+            return calendar
+
+    def put(self, key, calendar):
+        with self._lock:
+            calendars = self._calendars
+            calendars.pop(key, None)
+            calendars[key] = calendar
+            while len(calendars) > self._maxsize:
+                calendars.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._calendars.clear()
+
+_calendars_cache = _CalendarsCache(_CALENDARS_CACHE_SIZE)
+
 def resolve_alias(name):
     return global_calendar_dispatcher.resolve_alias(name)
 
+def _load_calendar(name, factory, start_dt, end_dt):
+    # restore the calendar from its stored schedule if it exists, else
+    # build it and store its schedule.
+    version = schedules.definition_version(factory)
+    schedule = schedules.load(name, start_dt, end_dt, version)
+    if schedule is not None:
+        return wr.OpenOffsetFix(start_dt, end_dt, factory, schedule)
+    cal = wr.OpenOffsetFix(start_dt, end_dt, factory)
+    schedules.store(name, start_dt, end_dt, version, cal.to_schedule())
+    return cal
+
 def get_calendar_in_range(name, start_dt, end_dt=None, cache=False):
     """
 
@@ -390,7 +447,14 @@ def get_calendar_in_range(name, start_dt, end_dt=None, cache=False):
         raise InvalidCalendarName(calendar_name=name)
     if end_dt is None:
         end_dt = start_dt + pd.Timedelta(days=10)
-    cal = wr.OpenOffsetFix(start_dt, end_dt, factory)
+    start_dt = pd.Timestamp(start_dt)
+    end_dt = pd.Timestamp(end_dt)
+
+    key = (name, start_dt, end_dt)
+    cal = _calendars_cache.get(key)
+    if cal is None:
+        cal = _load_calendar(name, factory, start_dt, end_dt)
+        _calendars_cache.put(key, cal)
     if cache:
         #cache the latest instance
         _cache[name] = cal
@@ -0,0 +1,144 @@
+import functools
+import hashlib
+import inspect
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+
+from pluto.interface.utils import paths
+
+# arrays that are needed to build a calendar without computing holidays.
+# (see wrappers.OpenOffsetFix)
+SCHEDULE_FIELDS = (
+    'sessions',
+    'market_open',
+    'market_close',
+    'late_opens',
+    'early_closes')
+
+
+def _directory_name(name, start, end, version):
+    # calendar names like '24/7' are not valid directory names
+    return '{}_{}_{}_{}'.format(
+        name.replace('/', '_'),
+        start.value,
+        end.value,
+        version)
+
+
+def _source_files(module):
+    # the holiday rules are usually defined in other modules of the package
+    # than the calendar class, so the whole package is included.
+    if module.__package__:
+        directory = os.path.dirname(module.__file__)
+        return tuple(
+            os.path.join(directory, name)
+            for name in sorted(os.listdir(directory))
+            if name.endswith('.py'))
+    module_file = getattr(module, '__file__', None)
+    return (module_file,) if module_file else ()
+
+
+@functools.lru_cache(maxsize=None)
+def _hash_files(files):
+    digest = hashlib.sha1()
+    for file_path in files:
+        with open(file_path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def definition_version(factory):
+    '''Hash of the source of the calendar definition, so that the stored
+    schedules are rebuilt when the holiday rules change.
+
+    Parameters
+    ----------
+    factory: type
+        the calendar class or factory function
+
+    Returns
+    -------
+    str
+    '''
+    if not inspect.isclass(factory):
+        factory = type(factory)
+    files = set()
+    for cls in inspect.getmro(factory):
+        if cls is not object:
+            files.update(_source_files(sys.modules[cls.__module__]))
+    return _hash_files(tuple(sorted(files)))
+
+
+def _schedules_directory():
+    return paths.get_dir('schedules', paths.get_dir('calendars'))
+
+
+def load(name, start, end, version):
+    '''Loads the schedule of a calendar from the disk.
+
+    Parameters
+    ----------
+    name: str
+    start: pandas.Timestamp
+    end: pandas.Timestamp
+    version: str
+        version of the calendar definition (see definition_version)
+
+    Returns
+    -------
+    dict
+        the schedule arrays or None if the schedule wasn't stored.
+    '''
+    if not paths.root_is_set():
+        return
+    directory = os.path.join(
+        _schedules_directory(),
+        _directory_name(name, start, end, version))
+    if not os.path.isdir(directory):
+        return
+    try:
+        # the arrays are small (a few values per session) and pandas can't
+        # index read-only memory maps, so they are read in memory.
+        return {
+            field: np.load(os.path.join(directory, field + '.npy'))
+            for field in SCHEDULE_FIELDS}
+    except (IOError, ValueError):
+        # incomplete or corrupted schedule, it will be rebuilt
+        return
+
+
+def store(name, start, end, version, schedule):
+    '''Writes the schedule of a calendar to the disk. This does nothing if
+    the root directory is not set.
+
+    Parameters
+    ----------
+    name: str
+    start: pandas.Timestamp
+    end: pandas.Timestamp
+    version: str
+        version of the calendar definition (see definition_version)
+    schedule: dict
+    '''
+    if not paths.root_is_set():
+        return
+    parent = _schedules_directory()
+    directory = os.path.join(parent, _directory_name(name, start, end, version))
+    if os.path.isdir(directory):
+        return
+    # write the arrays to a temporary directory then rename it, so that
+    # other processes never read a partially written schedule.
+    tmp = tempfile.mkdtemp(dir=parent)
+    try:
+        for field in SCHEDULE_FIELDS:
+            np.save(
+                os.path.join(tmp, field + '.npy'),
+                np.asarray(schedule[field], dtype=np.int64))
+        os.rename(tmp, directory)
+    except OSError:
+        # another process stored the same schedule first
+        shutil.rmtree(tmp, ignore_errors=True)
@@ -1,12 +1,66 @@
+import collections
+
+import numpy as np
+import pandas as pd
+
+from pandas.tseries.offsets import CustomBusinessDay
+
 from trading_calendars import TradingCalendar
 
+def _adhoc_holidays(start, end, weekmask, sessions):
+    # the week days of the range that are not sessions
+    days = pd.date_range(
+        pd.Timestamp(pd.Timestamp(start).value),
+        pd.Timestamp(pd.Timestamp(end).value),
+        freq=CustomBusinessDay(weekmask=weekmask))
+    return days.difference(pd.DatetimeIndex(sessions)).tolist()
+
+
+def _special_times(sessions, times, special_sessions, tz):
+    # (local time, sessions) pairs of the special opens or closes
+    times = pd.Series(
+        pd.DatetimeIndex(times, tz='UTC').tz_convert(tz),
+        index=pd.DatetimeIndex(sessions))
+    special = collections.defaultdict(list)
+    for session, dt in times.loc[pd.DatetimeIndex(special_sessions)].items():
+        special[dt.time()].append(session)
+    return list(special.items())
+
+
 class OpenOffsetFix(TradingCalendar):
-    def __init__(self, start, end, calendar_type):
+    def __init__(self, start, end, calendar_type, schedule=None):
         '''
         Parameters
         ----------
         calendar_type
+        schedule: dict
+            a stored schedule of the calendar (see to_schedule). If set, the
+            sessions and the special opens and closes are read from the
+            schedule instead of being computed from the holidays.
         '''
+        self._set_calendar_type(calendar_type)
+        self._holidays = None
+        self._specials = None
+        if schedule is not None:
+            self._set_schedule(start, end, schedule)
+        super(OpenOffsetFix, self).__init__(start, end)
+
+    def to_schedule(self):
+        '''
+
+        Returns
+        -------
+        dict
+            int64 arrays of utc nanoseconds
+        '''
+        return {
+            'sessions': self.all_sessions.values.astype(np.int64),
+            'market_open': self.market_opens_nanos,
+            'market_close': self.market_closes_nanos,
+            'late_opens': self.late_opens.values.astype(np.int64),
+            'early_closes': self.early_closes.values.astype(np.int64)}
+
+    def _set_calendar_type(self, calendar_type):
         self._calendar_type = calendar_type
         self._open_offset = calendar_type.open_offset.fget(self)
 
@@ -15,7 +69,23 @@ class OpenOffsetFix(TradingCalendar):
         except AttributeError:
             pass
 
-        super(OpenOffsetFix, self).__init__(start, end)
+    def _set_schedule(self, start, end, schedule):
+        # the holidays and special times are the inputs of the constructor
+        # that are expensive to compute.
+        sessions = schedule['sessions']
+        tz = self.tz
+        self._holidays = _adhoc_holidays(start, end, self.weekmask, sessions)
+        self._specials = (
+            _special_times(
+                sessions,
+                schedule['market_open'],
+                schedule['late_opens'],
+                tz),
+            _special_times(
+                sessions,
+                schedule['market_close'],
+                schedule['early_closes'],
+                tz))
 
     @property
     def close_offset(self):
@@ -54,26 +124,41 @@ class OpenOffsetFix(TradingCalendar):
 
     @property
     def special_closes_adhoc(self):
+        specials = self._specials
+        if specials is not None:
+            return specials[1]
         return self._calendar_type.special_closes_adhoc.fget(self)
 
     @property
     def special_closes(self):
+        if self._specials is not None:
+            return []
         return self._calendar_type.special_closes.fget(self)
 
     @property
     def special_opens_adhoc(self):
+        specials = self._specials
+        if specials is not None:
+            return specials[0]
         return self._calendar_type.special_opens_adhoc.fget(self)
 
     @property
     def special_opens(self):
+        if self._specials is not None:
+            return []
         return self._calendar_type.special_opens.fget(self)
 
     @property
     def adhoc_holidays(self):
+        holidays = self._holidays
+        if holidays is not None:
+            return holidays
         return self._calendar_type.adhoc_holidays.fget(self)
 
     @property
     def regular_holidays(self):
+        if self._holidays is not None:
+            return None
         return self._calendar_type.regular_holidays.fget(self)
 
     def execution_time_from_open(self, open_dates):
@@ -4,6 +4,21 @@ from protos import data_pb2
 
 _DEFAULT_SIZE = 1024 * 64 #64kb
 
+class LazyMessage(object):
+    '''Wraps a protobuf message that is serialized once, on first use.'''
+
+    __slots__ = ['message', '_bytes']
+
+    def __init__(self, message):
+        self.message = message
+        self._bytes = None
+
+    def SerializeToString(self):
+        bytes_ = self._bytes
+        if bytes_ is None:
+            self._bytes = bytes_ = self.message.SerializeToString()
+        return bytes_
+
 def chunk_bytes(bytes_, chunk_size=_DEFAULT_SIZE):
     with io.BytesIO(bytes_) as f:
         while True:
@@ -2,6 +2,7 @@
 import grpc
 
 from google.protobuf import empty_pb2 as google_dot_protobuf_dot_empty__pb2
+from google.protobuf import timestamp_pb2 as google_dot_protobuf_dot_timestamp__pb2
 from protos import clock_pb2 as protos_dot_clock__pb2
 from protos import controller_pb2 as protos_dot_controller__pb2
 from protos import data_pb2 as protos_dot_data__pb2
@@ -32,6 +33,11 @@ class ControllableStub(object):
         request_serializer=protos_dot_clock__pb2.ClockEvent.SerializeToString,
         response_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
         )
+    self.StreamClockUpdates = channel.stream_stream(
+        '/Controllable/StreamClockUpdates',
+        request_serializer=protos_dot_clock__pb2.ClockEvents.SerializeToString,
+        response_deserializer=google_dot_protobuf_dot_timestamp__pb2.Timestamp.FromString,
+        )
     self.UpdateAccount = channel.stream_unary(
         '/Controllable/UpdateAccount',
         request_serializer=protos_dot_data__pb2.Chunk.SerializeToString,
@@ -79,6 +85,14 @@ class ControllableServicer(object):
     context.set_details('Method not implemented!')
     raise NotImplementedError('Method not implemented!')
 
+  def StreamClockUpdates(self, request_iterator, context):
+    """sends batches of clock events, acknowledged by the timestamp of the
+    last processed event of each batch (watermark)
+    """
+    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+    context.set_details('Method not implemented!')
+    raise NotImplementedError('Method not implemented!')
+
   def UpdateAccount(self, request_iterator, context):
     """for updating positions, transactions etc.
     """
@@ -125,6 +139,11 @@ def add_ControllableServicer_to_server(servicer, server):
           request_deserializer=protos_dot_clock__pb2.ClockEvent.FromString,
           response_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
       ),
+      'StreamClockUpdates': grpc.stream_stream_rpc_method_handler(
+          servicer.StreamClockUpdates,
+          request_deserializer=protos_dot_clock__pb2.ClockEvents.FromString,
+          response_serializer=google_dot_protobuf_dot_timestamp__pb2.Timestamp.SerializeToString,
+      ),
       'UpdateAccount': grpc.stream_unary_rpc_method_handler(
           servicer.UpdateAccount,
           request_deserializer=protos_dot_data__pb2.Chunk.FromString,
@@ -21,7 +21,7 @@ DESCRIPTOR = _descriptor.FileDescriptor(
   package='',
   syntax='proto3',
   serialized_options=None,
-  serialized_pb=_b('\n\x16protos/interface.proto\x1a\x1bgoogle/protobuf/empty.proto\x1a\x11protos/data.proto\"9\n\x06Packet\x12\x0e\n\x06packet\x18\x01 \x01(\x0c\x12\x12\n\nsession_id\x18\x02 \x01(\t\x12\x0b\n\x03\x65nd\x18\x03 \x01(\x08\"\"\n\x0cWatchRequest\x12\x12\n\nsession_id\x18\x01 \x01(\t\"\x1f\n\rWatchResponse\x12\x0e\n\x06packet\x18\x01 \x01(\x0c\")\n\x13StopWatchingRequest\x12\x12\n\nsession_id\x18\x01 \x01(\t\"\x16\n\x14StopWatchingResponse\"\x14\n\x12SessionListRequest\"\x15\n\x13SessionListResponse\"\x15\n\x13UniverseListRequest\"$\n\x14UniverseListResponse\x12\x0c\n\x04name\x18\x01 \x01(\t\"\x12\n\x10\x44irectoryRequest\"\x0f\n\rLogoutRequest\"\x10\n\x0eLogoutResponse\",\n\x15\x43odeInspectionRequest\x12\x13\n\x0bstrategy_id\x18\x01 \x01(\t\"*\n\x16\x43odeInspectionResponse\x12\x10\n\x08strategy\x18\x01 \x01(\x0c\"\x10\n\x0eStrategyFilter\"V\n\x10StrategyResponse\x12\x13\n\x0bstrategy_id\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x1f\n\x06status\x18\x03 \x03(\x0b\x32\x0f.StrategyStatus\"!\n\x0eStrategyStatus\x12\x0f\n\x07running\x18\x01 \x01(\x08\"C\n\x08Strategy\x12\x13\n\x0bstrategy_id\x18\x01 \x01(\t\x12\x10\n\x08universe\x18\x02 \x01(\t\x12\x10\n\x08strategy\x18\x03 \x01(\x0c\"#\n\rDeployRequest\x12\x12\n\nsession_id\x18\x01 \x01(\t\"3\n\x0cLoginRequest\x12\x11\n\tuser_name\x18\x01 \x01(\t\x12\x10\n\x08password\x18\x02 \x01(\x0c\"\x1e\n\rLoginResponse\x12\r\n\x05token\x18\x01 \x01(\x0c\"r\n\x12\x44\x65ploymentResponse\x12*\n\x06status\x18\x01 \x01(\x0e\x32\x1a.DeploymentResponse.Status\x12\x0f\n\x07\x64\x65tails\x18\x02 \x01(\x0c\"\x1f\n\x06Status\x12\x08\n\x04\x46\x41IL\x10\x00\x12\x0b\n\x07SUCCESS\x10\x01\x32\\\n\x07Gateway\x12&\n\x05Login\x12\r.LoginRequest\x1a\x0e.LoginResponse\x12)\n\x06Logout\x12\x0e.LogoutRequest\x1a\x0f.LogoutResponse2x\n\x07Manager\x12>\n\x0bInspectCode\x12\x16.CodeInspectionRequest\x1a\x17.CodeInspectionResponse\x12-\n\x06\x44\x65ploy\x12\x0e.DeployRequest\x1a\x13.DeploymentResponse2\xbb\x01\n\x08\x45xplorer\x12\x34\n\x0cStrategyList\x12\x0f.StrategyFilter\x1a\x11.StrategyResponse0\x01\x12=\n\x0cUniverseList\x12\x14.UniverseListRequest\x1a\x15.UniverseListResponse0\x01\x12:\n\x0bSessionList\x12\x13.SessionListRequest\x1a\x14.SessionListResponse0\x01\x32\x66\n\x03Hub\x12+\n\x0cGetDirectory\x12\x11.DirectoryRequest\x1a\x06.Chunk0\x01\x12\x32\n\x0eStoreDirectory\x12\x06.Chunk\x1a\x16.google.protobuf.Empty(\x01\x32\xa6\x01\n\x07Monitor\x12(\n\x05Watch\x12\r.WatchRequest\x1a\x0e.WatchResponse0\x01\x12;\n\x0cStopWatching\x12\x14.StopWatchingRequest\x1a\x15.StopWatchingResponse\x12\x34\n\x11PerformanceUpdate\x12\x07.Packet\x1a\x16.google.protobuf.Emptyb\x06proto3')
+  serialized_pb=_b('\n\x16protos/interface.proto\x1a\x1bgoogle/protobuf/empty.proto\x1a\x11protos/data.proto\"9\n\x06Packet\x12\x0e\n\x06packet\x18\x01 \x01(\x0c\x12\x12\n\nsession_id\x18\x02 \x01(\t\x12\x0b\n\x03\x65nd\x18\x03 \x01(\x08\"\"\n\x0cWatchRequest\x12\x12\n\nsession_id\x18\x01 \x01(\t\"\x1f\n\rWatchResponse\x12\x0e\n\x06packet\x18\x01 \x01(\x0c\")\n\x13StopWatchingRequest\x12\x12\n\nsession_id\x18\x01 \x01(\t\"\x16\n\x14StopWatchingResponse\"\x14\n\x12SessionListRequest\"\x15\n\x13SessionListResponse\"\x15\n\x13UniverseListRequest\"$\n\x14UniverseListResponse\x12\x0c\n\x04name\x18\x01 \x01(\t\"\x12\n\x10\x44irectoryRequest\"\x0f\n\rLogoutRequest\"\x10\n\x0eLogoutResponse\",\n\x15\x43odeInspectionRequest\x12\x13\n\x0bstrategy_id\x18\x01 \x01(\t\"*\n\x16\x43odeInspectionResponse\x12\x10\n\x08strategy\x18\x01 \x01(\x0c\"\x10\n\x0eStrategyFilter\"V\n\x10StrategyResponse\x12\x13\n\x0bstrategy_id\x18\x01 \x01(\t\x12\x0c\n\x04name\x18\x02 \x01(\t\x12\x1f\n\x06status\x18\x03 \x03(\x0b\x32\x0f.StrategyStatus\"!\n\x0eStrategyStatus\x12\x0f\n\x07running\x18\x01 \x01(\x08\"C\n\x08Strategy\x12\x13\n\x0bstrategy_id\x18\x01 \x01(\t\x12\x10\n\x08universe\x18\x02 \x01(\t\x12\x10\n\x08strategy\x18\x03 \x01(\x0c\"#\n\rDeployRequest\x12\x12\n\nsession_id\x18\x01 \x01(\t\"3\n\x0cLoginRequest\x12\x11\n\tuser_name\x18\x01 \x01(\t\x12\x10\n\x08password\x18\x02 \x01(\x0c\"\x1e\n\rLoginResponse\x12\r\n\x05token\x18\x01 \x01(\x0c\"r\n\x12\x44\x65ploymentResponse\x12*\n\x06status\x18\x01 \x01(\x0e\x32\x1a.DeploymentResponse.Status\x12\x0f\n\x07\x64\x65tails\x18\x02 \x01(\x0c\"\x1f\n\x06Status\x12\x08\n\x04\x46\x41IL\x10\x00\x12\x0b\n\x07SUCCESS\x10\x01\x32\\\n\x07Gateway\x12&\n\x05Login\x12\r.LoginRequest\x1a\x0e.LoginResponse\x12)\n\x06Logout\x12\x0e.LogoutRequest\x1a\x0f.LogoutResponse2x\n\x07Manager\x12>\n\x0bInspectCode\x12\x16.CodeInspectionRequest\x1a\x17.CodeInspectionResponse\x12-\n\x06\x44\x65ploy\x12\x0e.DeployRequest\x1a\x13.DeploymentResponse2\xbb\x01\n\x08\x45xplorer\x12\x34\n\x0cStrategyList\x12\x0f.StrategyFilter\x1a\x11.StrategyResponse0\x01\x12=\n\x0cUniverseList\x12\x14.UniverseListRequest\x1a\x15.UniverseListResponse0\x01\x12:\n\x0bSessionList\x12\x13.SessionListRequest\x1a\x14.SessionListResponse0\x01\x32\x66\n\x03Hub\x12+\n\x0cGetDirectory\x12\x11.DirectoryRequest\x1a\x06.Chunk0\x01\x12\x32\n\x0eStoreDirectory\x12\x06.Chunk\x1a\x16.google.protobuf.Empty(\x01\x32\xd5\x01\n\x07Monitor\x12(\n\x05Watch\x12\r.WatchRequest\x1a\x0e.WatchResponse0\x01\x12;\n\x0cStopWatching\x12\x14.StopWatchingRequest\x1a\x15.StopWatchingResponse\x12\x34\n\x11PerformanceUpdate\x12\x07.Packet\x1a\x16.google.protobuf.Empty\x12-\n\nSessionEnd\x12\x07.Packet\x1a\x16.google.protobuf.Emptyb\x06proto3')
   ,
   dependencies=[google_dot_protobuf_dot_empty__pb2.DESCRIPTOR,protos_dot_data__pb2.DESCRIPTOR,])
 
@@ -1063,7 +1063,7 @@ _MONITOR = _descriptor.ServiceDescriptor(
   index=4,
   serialized_options=None,
   serialized_start=1479,
-  serialized_end=1645,
+  serialized_end=1692,
   methods=[
   _descriptor.MethodDescriptor(
     name='Watch',
@@ -1092,6 +1092,15 @@ _MONITOR = _descriptor.ServiceDescriptor(
     output_type=google_dot_protobuf_dot_empty__pb2._EMPTY,
     serialized_options=None,
   ),
+  _descriptor.MethodDescriptor(
+    name='SessionEnd',
+    full_name='Monitor.SessionEnd',
+    index=3,
+    containing_service=None,
+    input_type=_PACKET,
+    output_type=google_dot_protobuf_dot_empty__pb2._EMPTY,
+    serialized_options=None,
+  ),
 ])
 _sym_db.RegisterServiceDescriptor(_MONITOR)
 
@@ -284,6 +284,11 @@ class MonitorStub(object):
         request_serializer=protos_dot_interface__pb2.Packet.SerializeToString,
         response_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
         )
+    self.SessionEnd = channel.unary_unary(
+        '/Monitor/SessionEnd',
+        request_serializer=protos_dot_interface__pb2.Packet.SerializeToString,
+        response_deserializer=google_dot_protobuf_dot_empty__pb2.Empty.FromString,
+        )
 
 
 class MonitorServicer(object):
@@ -311,6 +316,13 @@ class MonitorServicer(object):
     context.set_details('Method not implemented!')
     raise NotImplementedError('Method not implemented!')
 
+  def SessionEnd(self, request, context):
+    """compact summary of a session, sent at the end of each session
+    """
+    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+    context.set_details('Method not implemented!')
+    raise NotImplementedError('Method not implemented!')
+
 
 def add_MonitorServicer_to_server(servicer, server):
   rpc_method_handlers = {
@@ -329,6 +341,11 @@ def add_MonitorServicer_to_server(servicer, server):
           request_deserializer=protos_dot_interface__pb2.Packet.FromString,
           response_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
       ),
+      'SessionEnd': grpc.unary_unary_rpc_method_handler(
+          servicer.SessionEnd,
+          request_deserializer=protos_dot_interface__pb2.Packet.FromString,
+          response_serializer=google_dot_protobuf_dot_empty__pb2.Empty.SerializeToString,
+      ),
   }
   generic_handler = grpc.method_handlers_generic_handler(
       'Monitor', rpc_method_handlers)
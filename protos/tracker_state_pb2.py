@@ -20,7 +20,7 @@ DESCRIPTOR = _descriptor.FileDescriptor(
   package='',
   syntax='proto3',
   serialized_options=None,
-  serialized_pb=_b('\n\x1aprotos/tracker_state.proto\x1a\x1fgoogle/protobuf/timestamp.proto\"\x91\x01\n\x0cTrackerState\x12\x36\n\x12\x66irst_open_session\x18\x01 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\x12\x14\n\x0cledger_state\x18\x02 \x01(\x0c\x12\x33\n\x0flast_checkpoint\x18\x03 \x01(\x0b\x32\x1a.google.protobuf.Timestampb\x06proto3')
+  serialized_pb=_b('\n\x1aprotos/tracker_state.proto\x1a\x1fgoogle/protobuf/timestamp.proto\"\xb0\x01\n\x0cTrackerState\x12\x36\n\x12\x66irst_open_session\x18\x01 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\x12\x14\n\x0cledger_state\x18\x02 \x01(\x0c\x12\x33\n\x0flast_checkpoint\x18\x03 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\x12\x1d\n\x07metrics\x18\x04 \x03(\x0b\x32\x0c.MetricState\",\n\x0bMetricState\x12\r\n\x05\x66ield\x18\x01 \x01(\t\x12\x0e\n\x06values\x18\x02 \x03(\x01\x62\x06proto3')
   ,
   dependencies=[google_dot_protobuf_dot_timestamp__pb2.DESCRIPTOR,])
 
@@ -55,6 +55,13 @@ _TRACKERSTATE = _descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='metrics', full_name='TrackerState.metrics', index=3,
+      number=4, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
   ],
   extensions=[
   ],
@@ -68,12 +75,52 @@ _TRACKERSTATE = _descriptor.Descriptor(
   oneofs=[
   ],
   serialized_start=64,
-  serialized_end=209,
+  serialized_end=240,
+)
+
+
+_METRICSTATE = _descriptor.Descriptor(
+  name='MetricState',
+  full_name='MetricState',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='field', full_name='MetricState.field', index=0,
+      number=1, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b("").decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='values', full_name='MetricState.values', index=1,
+      number=2, type=1, cpp_type=5, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=242,
+  serialized_end=286,
 )
 
 _TRACKERSTATE.fields_by_name['first_open_session'].message_type = google_dot_protobuf_dot_timestamp__pb2._TIMESTAMP
 _TRACKERSTATE.fields_by_name['last_checkpoint'].message_type = google_dot_protobuf_dot_timestamp__pb2._TIMESTAMP
+_TRACKERSTATE.fields_by_name['metrics'].message_type = _METRICSTATE
 DESCRIPTOR.message_types_by_name['TrackerState'] = _TRACKERSTATE
+DESCRIPTOR.message_types_by_name['MetricState'] = _METRICSTATE
 _sym_db.RegisterFileDescriptor(DESCRIPTOR)
 
 TrackerState = _reflection.GeneratedProtocolMessageType('TrackerState', (_message.Message,), dict(
@@ -83,5 +130,12 @@ TrackerState = _reflection.GeneratedProtocolMessageType('TrackerState', (_messag
   ))
 _sym_db.RegisterMessage(TrackerState)
 
+MetricState = _reflection.GeneratedProtocolMessageType('MetricState', (_message.Message,), dict(
+  DESCRIPTOR = _METRICSTATE,
+  __module__ = 'protos.tracker_state_pb2'
+  # @@protoc_insertion_point(class_scope:MetricState)
+  ))
+_sym_db.RegisterMessage(MetricState)
+
 
 # @@protoc_insertion_point(module_scope)
@@ -0,0 +1,123 @@
+import json
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from pluto.control.modes import aggregate
+from pluto.finance.metrics import summary
+
+
+def _summary(dt, returns, value, long_exposure=0.0, short_exposure=0.0):
+    return summary.SUMMARY.pack(
+        dt.value,
+        returns,
+        value,
+        long_exposure,
+        short_exposure)
+
+
+class TestAggregator(unittest.TestCase):
+    def test_combined_returns(self):
+        random = np.random.RandomState(0)
+        aggregator = aggregate.Aggregator()
+        sessions = ['a', 'b', 'c']
+        values = np.array([100.0, 50.0, 25.0])
+        history = []
+        growth = 1.0
+
+        for i, dt in enumerate(pd.date_range('2020-01-02', periods=20, tz='UTC')):
+            returns = random.normal(0, 0.01, len(sessions))
+            start_values = values
+            values = values * (1 + returns)
+            history.append(returns)
+
+            for session_id, r, v in zip(sessions[:-1], returns, values):
+                self.assertIsNone(aggregator.update(
+                    session_id, _summary(dt, r, v, v, -1.0), len(sessions)))
+            packet = aggregator.update(
+                sessions[-1],
+                _summary(dt, returns[-1], values[-1], values[-1], -1.0),
+                len(sessions))
+
+            weights = start_values / start_values.sum()
+            expected = weights.dot(returns)
+            growth *= 1 + expected
+            self.assertEqual(packet['period_end'], dt)
+            self.assertEqual(packet['sessions'], sessions)
+            np.testing.assert_allclose(packet['weights'], weights)
+            np.testing.assert_allclose(packet['contributions'], weights * returns)
+            self.assertAlmostEqual(packet['returns'], expected)
+            self.assertAlmostEqual(packet['cumulative_returns'], growth - 1)
+            self.assertAlmostEqual(packet['portfolio_value'], values.sum())
+            self.assertAlmostEqual(packet['gross_exposure'], values.sum() + 3)
+            self.assertAlmostEqual(packet['net_exposure'], values.sum() - 3)
+
+            if i:
+                window = np.array(history)
+                np.testing.assert_allclose(
+                    packet['correlation'],
+                    np.corrcoef(window, rowvar=False))
+                self.assertAlmostEqual(packet['risk_contributions'].sum(), 1)
+
+        # the packet can be sent to the watchers
+        dct = json.loads(aggregate.to_bytes(packet).decode('utf-8'))
+        self.assertEqual(pd.Timestamp(dct['period_end']), packet['period_end'])
+        self.assertEqual(len(dct['correlation']), len(sessions))
+
+    def test_look_back(self):
+        aggregator = aggregate.Aggregator(look_back=3)
+        dates = pd.date_range('2020-01-02', periods=5, tz='UTC')
+        returns = [0.01, -0.02, 0.03, 0.01, -0.01]
+        for dt, r in zip(dates, returns):
+            aggregator.update('a', _summary(dt, r, 1.0), 2)
+            packet = aggregator.update('b', _summary(dt, -r * 2, 1.0), 2)
+        # only the last rows are kept, and the sessions are fully correlated
+        self.assertEqual(aggregator._rows, 3)
+        np.testing.assert_allclose(packet['correlation'], [[1, -1], [-1, 1]])
+
+    def test_periods(self):
+        aggregator = aggregate.Aggregator()
+        day1 = pd.Timestamp('2020-01-02 21:00', tz='UTC')
+        day2 = pd.Timestamp('2020-01-03 21:00', tz='UTC')
+        # 'a' sends its summary of the next period before 'b' sent its summary
+        # of the first one.
+        self.assertIsNone(aggregator.update('a', _summary(day1, 0.01, 101.0), 2))
+        self.assertIsNone(aggregator.update('a', _summary(day2, 0.02, 103.02), 2))
+        packet = aggregator.update('b', _summary(day1, -0.01, 99.0), 2)
+        self.assertEqual(packet['period_end'], day1)
+        self.assertEqual(packet['sessions'], ['a', 'b'])
+        self.assertAlmostEqual(packet['returns'], 0.0)
+
+        # an exchange that closes earlier is in the same period
+        packet = aggregator.update(
+            'b',
+            _summary(pd.Timestamp('2020-01-03 16:30', tz='UTC'), 0.0, 99.0),
+            2)
+        self.assertEqual(packet['period_end'], day2)
+        self.assertAlmostEqual(packet['returns'], 0.0101)
+        self.assertEqual(aggregator._pending, {})
+
+    def test_stale_period(self):
+        aggregator = aggregate.Aggregator()
+        day1 = pd.Timestamp('2020-01-02 21:00', tz='UTC')
+        day2 = pd.Timestamp('2020-01-03 21:00', tz='UTC')
+        # 'b' stopped before sending its summary of the first period
+        aggregator.update('a', _summary(day1, 0.01, 101.0), 2)
+        self.assertIsNotNone(aggregator.update('a', _summary(day2, 0.01, 102.0), 1))
+        self.assertEqual(aggregator._pending, {})
+
+    def test_non_finite_json(self):
+        aggregator = aggregate.Aggregator()
+        dt = pd.Timestamp('2020-01-02 21:00', tz='UTC')
+        packet = aggregator.update('a', _summary(dt, np.nan, 100.0), 1)
+        packet['volatility'] = np.inf
+        dct = json.loads(aggregate.to_bytes(packet).decode('utf-8'))
+        self.assertIsNone(dct['volatility'])
+        self.assertEqual(dct['correlation'], [[None]])
+        self.assertEqual(dct['risk_contributions'], [None])
+        self.assertEqual(dct['portfolio_value'], 100.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
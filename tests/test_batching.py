@@ -0,0 +1,235 @@
+import queue
+import threading
+import unittest
+
+import pandas as pd
+
+from pluto.interface.utils import service_access
+from pluto.control.clock import events
+from pluto.control.controllable import server
+from pluto.control.controllable import commands
+from pluto.control.controllable import command_queue as cq
+from pluto.control.modes.processes import batching
+
+from protos import clock_pb2
+
+
+def _event(i, event=clock_pb2.BAR):
+    ts = pd.Timestamp('2016-11-21 14:31', tz='UTC') + pd.Timedelta(minutes=i)
+    return events.ClockEvent(
+        ts,
+        event,
+        [events.Signal(ts.value, event, 'XNYS')])
+
+
+class _Context(object):
+    def invocation_metadata(self):
+        return service_access._metadata
+
+
+class _Executed(commands.Command):
+    def _execute(self, controllable, request):
+        controllable.append(request)
+
+
+class _Stopped(commands.Command):
+    def _execute(self, controllable, request):
+        controllable.append(request)
+        # the last session has ended
+        raise commands.StopExecution
+
+
+class _Service(object):
+    _acknowledge = server.ControllableService._acknowledge
+    _close_queue = server.ControllableService._close_queue
+
+    def __init__(self, last=None):
+        self._queue = cq.CommandQueue()
+        self._ack_lock = threading.Lock()
+        self.executed = []
+        self._last = last
+
+    def _clock_update(self, clock_event):
+        seconds = clock_event.timestamp.seconds
+        if seconds == self._last:
+            self._queue.put(_Stopped(self.executed, seconds))
+        else:
+            self._queue.put(_Executed(self.executed, seconds))
+
+    def run(self):
+        # like ControllableService._run
+        commands_ = self._queue
+        while True:
+            try:
+                commands_.get()()
+            except commands.StopExecution:
+                break
+        self._close_queue()
+
+
+class TestStreamClockUpdates(unittest.TestCase):
+    def test_end_after_acknowledgements(self):
+        service = _Service()
+        batches = [
+            clock_pb2.ClockEvents(
+                clock_events=[events.to_proto(_event(i)) for i in range(j, j + 2)])
+            for j in (0, 2)]
+        watermarks = []
+
+        def stream():
+            for watermark in server.ControllableService.StreamClockUpdates(
+                    service, iter(batches), _Context()):
+                watermarks.append(watermark)
+
+        thread = threading.Thread(target=stream)
+        thread.daemon = True
+        thread.start()
+
+        # two clock updates and an acknowledgement per batch, then the end
+        # of the stream
+        queue = service._queue
+        for _ in range(7):
+            queue.get()()
+        thread.join(1)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(len(service.executed), 4)
+        self.assertEqual(
+            watermarks,
+            [batch.clock_events[-1].timestamp for batch in batches])
+
+
+    def test_end_after_stop(self):
+        # the service stops on the last session end, before the
+        # acknowledgement of its batch and the end of the stream
+        batches = [
+            clock_pb2.ClockEvents(clock_events=[
+                events.to_proto(_event(0)),
+                events.to_proto(_event(1, clock_pb2.SESSION_END))])]
+        last = batches[0].clock_events[-1].timestamp
+        service = _Service(last.seconds)
+        requests = queue.Queue()
+
+        def request_iterator():
+            while True:
+                batch = requests.get()
+                if batch is None:
+                    break
+                yield batch
+
+        watermarks = []
+
+        def stream():
+            for watermark in server.ControllableService.StreamClockUpdates(
+                    service, request_iterator(), _Context()):
+                watermarks.append(watermark)
+
+        thread = threading.Thread(target=stream)
+        thread.daemon = True
+        thread.start()
+        requests.put(batches[0])
+        service.run()
+        self.assertEqual(len(service.executed), 2)
+        # the client closes the stream after the stop
+        requests.put(None)
+        thread.join(1)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(watermarks, [last])
+
+
+class _Process(object):
+    session_id = 'a'
+
+    def __init__(self):
+        self.calls = []
+        self.batches = []
+
+    def initialize(self, start, end, capital, max_leverage, mode):
+        self.calls.append('initialize')
+
+    def clock_update(self, clock_event):
+        self.calls.append(clock_event)
+
+    def stream_clock_updates(self, requests):
+        for batch in requests:
+            self.batches.append(batch)
+            yield batch.clock_events[-1].timestamp
+
+    def stop(self):
+        self.calls.append('stop')
+
+
+class TestBatchingProcess(unittest.TestCase):
+    def test_simulation(self):
+        process = _Process()
+        bp = batching.BatchingProcess(process, max_batch_size=3)
+        bp.initialize(None, None, 1000, 1.0, 'simulation')
+        for i in range(4):
+            bp.clock_update(_event(i))
+        bp.clock_update(_event(4, clock_pb2.SESSION_END))
+        bp.stop()
+        bp._thread.join(1)
+
+        self.assertEqual(process.calls, ['initialize', 'stop'])
+        # the batch is sent when it is full and on session end
+        self.assertEqual(
+            [[e.event for e in b.clock_events] for b in process.batches],
+            [[clock_pb2.BAR] * 3, [clock_pb2.BAR, clock_pb2.SESSION_END]])
+        self.assertEqual(
+            bp.watermark,
+            process.batches[-1].clock_events[-1].timestamp)
+
+    def test_live(self):
+        process = _Process()
+        bp = batching.BatchingProcess(process, max_batch_size=3)
+        bp.initialize(None, None, 1000, 1.0, 'live')
+        clock_event = _event(0)
+        # bars are not held in a batch
+        bp.clock_update(clock_event)
+        self.assertEqual(process.calls, ['initialize', clock_event])
+        self.assertIsNone(bp._thread)
+
+    def test_session_end_waits_for_acknowledgement(self):
+        acknowledge = threading.Event()
+
+        class _SlowProcess(_Process):
+            def stream_clock_updates(self, requests):
+                for batch in requests:
+                    self.batches.append(batch)
+                    acknowledge.wait()
+                    yield batch.clock_events[-1].timestamp
+
+        process = _SlowProcess()
+        bp = batching.BatchingProcess(process)
+        bp.initialize(None, None, 1000, 1.0, 'simulation')
+        bp.clock_update(_event(0))
+        ended = threading.Event()
+
+        def session_end():
+            bp.clock_update(_event(1, clock_pb2.SESSION_END))
+            ended.set()
+
+        thread = threading.Thread(target=session_end)
+        thread.daemon = True
+        thread.start()
+        # the controller doesn't get past the session end until it is
+        # acknowledged
+        self.assertFalse(ended.wait(0.2))
+        self.assertEqual(len(process.batches), 1)
+        acknowledge.set()
+        self.assertTrue(ended.wait(1))
+        bp.stop()
+
+    def test_acknowledgement_timeout(self):
+        class _SilentProcess(_Process):
+            def stream_clock_updates(self, requests):
+                for batch in requests:
+                    self.batches.append(batch)
+                return
+                yield
+
+        bp = batching.BatchingProcess(_SilentProcess(), ack_timeout=0.1)
+        bp.initialize(None, None, 1000, 1.0, 'simulation')
+        bp.clock_update(_event(0))
+        with self.assertRaises(TimeoutError):
+            bp.clock_update(_event(1, clock_pb2.SESSION_END))
+        bp.stop()
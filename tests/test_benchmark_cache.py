@@ -0,0 +1,98 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from pluto.data import benchmark
+
+
+class TestReturnsCache(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.csv = os.path.join(self.dir, '1d.csv')
+        dates = pd.date_range('2019-01-01', periods=30)
+        closes = 100 + np.cumsum(np.random.RandomState(1).normal(0, 1, 30))
+        self.frame = pd.DataFrame({'Date': dates.strftime('%Y-%m-%d'), 'Close': closes})
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def expected(self, rows, start, end):
+        df = self.frame.iloc[:rows].copy()
+        df['Date'] = df['Date'].astype('datetime64[ns]')
+        df = df.set_index('Date')
+        return df['Close'].pct_change().iloc[1:].loc[start:end]
+
+    def write(self, rows):
+        self.frame.iloc[:rows].to_csv(self.csv, index=False, columns=['Date', 'Close'])
+
+    def test_append_only_new_closes(self):
+        start = pd.Timestamp('2019-01-05')
+        end = pd.Timestamp('2019-02-15')
+        cache = benchmark._ReturnsCache(self.dir, '1d')
+        for rows in (1, 10, 11, 30):
+            self.write(rows)
+            cache.update(self.csv)
+            actual = cache.window(start, end)
+            expected = self.expected(rows, start, end)
+            np.testing.assert_allclose(actual.values, expected.values)
+            np.testing.assert_array_equal(actual.index.values, expected.index.values)
+
+        # the cache is reloaded from its files
+        cache = benchmark._ReturnsCache(self.dir, '1d')
+        cache.update(self.csv)
+        np.testing.assert_allclose(
+            cache.window(start, end).values,
+            self.expected(30, start, end).values)
+
+    def test_rewritten_file(self):
+        cache = benchmark._ReturnsCache(self.dir, '1d')
+        self.write(30)
+        cache.update(self.csv)
+        self.write(5)
+        cache.update(self.csv)
+        self.assertEqual(len(cache.window(pd.Timestamp(0), pd.Timestamp('2020-01-01'))), 4)
+
+    def test_shared_files(self):
+        start = pd.Timestamp(0)
+        end = pd.Timestamp('2020-01-01')
+        first = benchmark._ReturnsCache(self.dir, '1d')
+        second = benchmark._ReturnsCache(self.dir, '1d')
+        self.write(10)
+        first.update(self.csv)
+        self.assertEqual(len(first.window(start, end)), 9)
+        # the second cache doesn't append the rows of the first one again
+        second.update(self.csv)
+        self.write(20)
+        second.update(self.csv)
+        first.update(self.csv)
+        for cache in (first, second):
+            np.testing.assert_allclose(
+                cache.window(start, end).values,
+                self.expected(20, start, end).values)
+        self.assertEqual(
+            os.path.getsize(os.path.join(self.dir, '1d_returns.f8')),
+            19 * 8)
+
+    def test_crash_before_meta(self):
+        start = pd.Timestamp(0)
+        end = pd.Timestamp('2020-01-01')
+        cache = benchmark._ReturnsCache(self.dir, '1d')
+        self.write(10)
+        cache.update(self.csv)
+        # values appended by an update that didn't write its meta
+        with open(os.path.join(self.dir, '1d_timestamps.i8'), 'ab') as f:
+            f.write(np.zeros(3, dtype='<i8').tobytes())
+        with open(os.path.join(self.dir, '1d_returns.f8'), 'ab') as f:
+            f.write(np.zeros(2, dtype='<f8').tobytes())
+
+        cache = benchmark._ReturnsCache(self.dir, '1d')
+        self.write(20)
+        cache.update(self.csv)
+        actual = cache.window(start, end)
+        expected = self.expected(20, start, end)
+        np.testing.assert_allclose(actual.values, expected.values)
+        np.testing.assert_array_equal(actual.index.values, expected.index.values)
@@ -0,0 +1,74 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from trading_calendars import get_calendar
+
+from pluto.sources import benchmark_source
+
+
+class FakeControllable(object):
+    def __init__(self, trading_calendar):
+        self.trading_calendar = trading_calendar
+
+
+class FakeBenchmark(object):
+    def __init__(self, returns):
+        self.returns = returns
+
+    def get_history_window(self, start, end, frequency, ffill=False):
+        return self.returns[frequency]
+
+
+class TestBenchmarkSource(unittest.TestCase):
+    def setUp(self):
+        # the futures sessions start on the previous utc date
+        self.calendar = calendar = get_calendar('CMES')
+        self.sessions = sessions = calendar.sessions_in_range(
+            pd.Timestamp('2020-01-06', tz='UTC'),
+            pd.Timestamp('2020-01-09', tz='UTC'))
+        random = np.random.RandomState(7)
+        minutes = calendar.minutes_for_sessions_in_range(sessions[0], sessions[-1])
+        self.minutes = pd.Series(random.normal(0.0, 0.001, len(minutes)), index=minutes)
+        self.days = pd.Series(random.normal(0.0, 0.01, len(sessions)), index=sessions)
+
+    def source(self, minutes, days, emission_rate):
+        return benchmark_source.SimulationBenchmarkSource(
+            FakeControllable(self.calendar),
+            self.sessions,
+            FakeBenchmark({'1m': minutes, '1d': days}),
+            10,
+            emission_rate)
+
+    def test_minutes_appended(self):
+        calendar = self.calendar
+        minutes = self.minutes
+        full = self.source(minutes, self.days, 'minute')
+        # the last session isn't completed
+        self.assertEqual(full._session_moments.count, len(self.sessions) - 1)
+
+        close = calendar.session_close(self.sessions[1])
+        partial = self.source(minutes.loc[:close], self.days, 'minute')
+        partial._extend_minutes(minutes.loc[close + pd.Timedelta(1, 'm'):])
+
+        np.testing.assert_allclose(
+            partial._minute_cumulative_returns,
+            full._minute_cumulative_returns)
+        np.testing.assert_allclose(
+            partial._minute_annual_volatility,
+            full._minute_annual_volatility)
+
+    def test_days_appended(self):
+        days = self.days
+        full = self.source(self.minutes, days, 'daily')
+        partial = self.source(self.minutes, days.iloc[:2], 'daily')
+        partial._extend_daily(days.iloc[2:].values)
+
+        np.testing.assert_allclose(partial._daily_returns, full._daily_returns)
+        np.testing.assert_allclose(
+            partial._cumulative_returns,
+            full._cumulative_returns)
+        np.testing.assert_allclose(
+            partial._annual_volatility,
+            full._annual_volatility)
@@ -0,0 +1,98 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from pluto.interface.utils import paths
+from pluto.trading_calendars import calendar_utils as cu
+from pluto.trading_calendars import schedules
+from pluto.trading_calendars import wrappers as wr
+
+
+class TestCalendarsCache(unittest.TestCase):
+    def test_least_recently_used(self):
+        cache = cu._CalendarsCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        # 'a' becomes the most recently used
+        self.assertEqual(cache.get('a'), 1)
+        cache.put('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.get('c'), 3)
+        cache.clear()
+        self.assertIsNone(cache.get('a'))
+
+    def test_get_calendar_in_range(self):
+        start = pd.Timestamp('2016-11-21', tz='UTC')
+        end = pd.Timestamp('2016-12-30', tz='UTC')
+        calendar = cu.get_calendar_in_range('NYSE', start, end)
+        self.assertIs(cu.get_calendar_in_range('XNYS', start, end), calendar)
+        self.assertIsNot(
+            cu.get_calendar_in_range('XNYS', start, end + pd.Timedelta(days=1)),
+            calendar)
+
+
+class TestSchedules(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        paths.setup_root(self.root)
+        self.start = pd.Timestamp('2016-11-21', tz='UTC')
+        self.end = pd.Timestamp('2017-01-31', tz='UTC')
+        self.factory = cu.global_calendar_dispatcher._calendar_factories['XNYS']
+        self.version = schedules.definition_version(self.factory)
+
+    def tearDown(self):
+        paths.setup_root('')
+        shutil.rmtree(self.root)
+
+    def _assert_equal(self, calendar, expected):
+        pd.testing.assert_frame_equal(calendar.schedule, expected.schedule)
+        pd.testing.assert_index_equal(calendar.early_closes, expected.early_closes)
+        pd.testing.assert_index_equal(calendar.late_opens, expected.late_opens)
+        np.testing.assert_array_equal(calendar.all_minutes, expected.all_minutes)
+
+    def test_store_and_load(self):
+        self.assertIsNone(schedules.load('XNYS', self.start, self.end, self.version))
+        factory = cu.global_calendar_dispatcher._calendar_factories['XNYS']
+        expected = wr.OpenOffsetFix(self.start, self.end, factory)
+        schedules.store('XNYS', self.start, self.end, self.version, expected.to_schedule())
+
+        # the arrays are written in a temporary directory that is renamed
+        parent = schedules._schedules_directory()
+        self.assertEqual(len(os.listdir(parent)), 1)
+        # the schedule is only stored once
+        schedules.store('XNYS', self.start, self.end, self.version, expected.to_schedule())
+        self.assertEqual(len(os.listdir(parent)), 1)
+
+        schedule = schedules.load('XNYS', self.start, self.end, self.version)
+        self.assertEqual(set(schedule), set(schedules.SCHEDULE_FIELDS))
+        calendar = wr.OpenOffsetFix(self.start, self.end, factory, schedule)
+        self._assert_equal(calendar, expected)
+        # the day after thanksgiving
+        self.assertEqual(
+            list(calendar.early_closes),
+            [pd.Timestamp('2016-11-25', tz='UTC')])
+        self.assertNotIn(pd.Timestamp('2016-11-24', tz='UTC'), calendar.all_sessions)
+
+    def test_corrupted(self):
+        factory = cu.global_calendar_dispatcher._calendar_factories['XNYS']
+        calendar = wr.OpenOffsetFix(self.start, self.end, factory)
+        schedules.store('XNYS', self.start, self.end, self.version, calendar.to_schedule())
+        directory = os.path.join(
+            schedules._schedules_directory(),
+            schedules._directory_name('XNYS', self.start, self.end, self.version))
+        with open(os.path.join(directory, 'sessions.npy'), 'wb') as f:
+            f.write(b'corrupted')
+        # the schedule is rebuilt
+        self.assertIsNone(schedules.load('XNYS', self.start, self.end, self.version))
+
+    def test_definition_changed(self):
+        calendar = wr.OpenOffsetFix(self.start, self.end, self.factory)
+        schedules.store('XNYS', self.start, self.end, self.version, calendar.to_schedule())
+        self.assertEqual(schedules.definition_version(self.factory), self.version)
+        # a schedule stored by another version of the calendar isn't loaded
+        self.assertIsNone(schedules.load('XNYS', self.start, self.end, 'other'))
@@ -0,0 +1,144 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from pluto.control.controllable.utils import checkpoints
+
+from protos import assets_pb2
+from protos import controllable_pb2
+from protos import ledger_state_pb2
+from protos import protocol_pb2
+from protos import tracker_state_pb2
+
+
+def _state(cash, positions, orders, returns):
+    ledger = ledger_state_pb2.LedgerState(
+        portfolio=protocol_pb2.Portfolio(
+            cash=cash,
+            positions=[
+                protocol_pb2.AssetPositionPair(
+                    key=assets_pb2.Asset(sid=sid, symbol=str(sid)),
+                    position=protocol_pb2.Position(
+                        asset=assets_pb2.Asset(sid=sid, symbol=str(sid)),
+                        amount=amount))
+                for sid, amount in positions.items()]),
+        orders=[
+            protocol_pb2.Order(id=id_, filled=filled)
+            for id_, filled in orders.items()],
+        returns=np.array(returns, dtype='<f8').tobytes(),
+        returns_count=len(returns))
+    tracker = tracker_state_pb2.TrackerState(
+        ledger_state=ledger.SerializeToString())
+    return controllable_pb2.ControllableState(
+        session_id='session',
+        capital=cash,
+        metrics_tracker_state=tracker.SerializeToString()).SerializeToString()
+
+
+def _with_returns_count(state, count):
+    # sets the total number of returns of a state with a rolling window
+    controllable = controllable_pb2.ControllableState()
+    controllable.ParseFromString(state)
+    tracker = tracker_state_pb2.TrackerState()
+    tracker.ParseFromString(controllable.metrics_tracker_state)
+    ledger = ledger_state_pb2.LedgerState()
+    ledger.ParseFromString(tracker.ledger_state)
+    ledger.returns_count = count
+    tracker.ledger_state = ledger.SerializeToString()
+    controllable.metrics_tracker_state = tracker.SerializeToString()
+    return controllable.SerializeToString()
+
+
+def _parse(state):
+    controllable = controllable_pb2.ControllableState()
+    controllable.ParseFromString(state)
+    tracker = tracker_state_pb2.TrackerState()
+    tracker.ParseFromString(controllable.metrics_tracker_state)
+    ledger = ledger_state_pb2.LedgerState()
+    ledger.ParseFromString(tracker.ledger_state)
+    return controllable.capital, ledger
+
+
+class TestCheckpoints(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'live')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_deltas(self):
+        random = np.random.RandomState(0)
+        writer = checkpoints.CheckpointWriter(self.path, snapshot_interval=50)
+        positions = {sid: 100 for sid in range(500)}
+        orders = {}
+        returns = []
+        for i in range(120):
+            # a few changes per bar
+            for sid in random.randint(0, 600, 3).tolist():
+                positions[sid] = int(random.randint(0, 10))
+                if not positions[sid]:
+                    del positions[sid]
+            orders[str(i)] = 0
+            orders.pop(str(i - 5), None)
+            if i % 30 == 0:
+                returns.append(random.normal())
+            state = _state(float(i), positions, orders, returns)
+            size = os.path.getsize(self.path) if i else 0
+            writer.write(state)
+            if i % 50:
+                # only the changes are appended
+                self.assertLess(os.path.getsize(self.path) - size, len(state) / 10)
+            if i % 10 == 9:
+                self.assertEqual(_parse(checkpoints.load(self.path)), _parse(state))
+        writer.close()
+
+    def test_partial_delta(self):
+        writer = checkpoints.CheckpointWriter(self.path)
+        first = _state(1.0, {1: 10, 2: 20, 3: 30}, {'a': 0}, [0.1])
+        writer.write(first)
+        writer.write(_state(2.0, {1: 10, 2: 25, 3: 30}, {'a': 5}, [0.1]))
+        writer.close()
+        with open(self.path, 'r+b') as f:
+            f.truncate(os.path.getsize(self.path) - 1)
+        self.assertEqual(_parse(checkpoints.load(self.path)), _parse(first))
+
+    def test_durable(self):
+        writer = checkpoints.CheckpointWriter(self.path)
+        # the snapshots are always durable, the deltas only if synced
+        self.assertTrue(writer.write(_state(1.0, {1: 10}, {}, [0.1]), False))
+        self.assertFalse(writer.write(_state(2.0, {1: 10}, {}, [0.1]), False))
+        self.assertTrue(writer.write(_state(3.0, {1: 10}, {}, [0.1]), True))
+        writer.close()
+        self.assertFalse(os.path.exists(self.path + checkpoints._TMP_SUFFIX))
+
+    def test_minute_returns(self):
+        # in minute mode, a return is appended to a large window each bar
+        writer = checkpoints.CheckpointWriter(self.path, snapshot_interval=1000)
+        positions = {sid: 100 for sid in range(50)}
+        window = 5000
+        returns = list(np.arange(window) / 1e4)
+        state = _state(0.0, positions, {}, returns)
+        writer.write(state)
+        snapshot_size = os.path.getsize(self.path)
+        count = window
+        for i in range(1, 200):
+            returns = returns[1:] + [i / 1e3]
+            count += 1
+            state = _state(float(i), positions, {}, returns)
+            state = _with_returns_count(state, count)
+            size = os.path.getsize(self.path)
+            writer.write(state)
+            # the deltas only have the appended return, no snapshot is written
+            self.assertLess(os.path.getsize(self.path) - size, 200)
+        writer.close()
+        self.assertGreater(os.path.getsize(self.path), snapshot_size)
+
+        _, ledger = _parse(checkpoints.load(self.path))
+        self.assertEqual(ledger.returns_count, count)
+        # the window is trimmed by the ledger
+        restored = np.frombuffer(ledger.returns, dtype='<f8')[-window:]
+        np.testing.assert_array_equal(restored, returns)
@@ -0,0 +1,118 @@
+import threading
+import time
+import unittest
+import uuid
+
+import pandas as pd
+
+from pluto.coms import clock_bus
+from pluto.control.clock import events
+from pluto.control.controllable import server
+
+from protos import clock_pb2
+
+
+def _event(i):
+    ts = pd.Timestamp('2016-11-21 14:31', tz='UTC') + pd.Timedelta(minutes=i)
+    return events.ClockEvent(
+        ts,
+        clock_pb2.BAR,
+        [events.Signal(ts.value, clock_pb2.BAR, 'XNYS'),
+         events.Signal(ts.value, clock_pb2.BAR, 'XLON')])
+
+
+class TestClockBus(unittest.TestCase):
+    def setUp(self):
+        self.writer = clock_bus.ClockBusWriter.create(uuid.uuid4().hex, 4)
+        self.reader = clock_bus.ClockBusReader(self.writer.path)
+
+    def tearDown(self):
+        self.reader.close()
+        self.writer.unlink()
+
+    def _assert_event(self, clock_event, i):
+        expected = _event(i)
+        self.assertEqual(clock_event.timestamp, expected.timestamp)
+        self.assertEqual(clock_event.event, expected.event)
+        self.assertEqual(
+            [(s.nanos, s.event, s.exchange) for s in clock_event.signals],
+            [(s.nanos, s.event, s.exchange) for s in expected.signals])
+
+    def test_wraparound(self):
+        # the records are reused several times
+        i = 0
+        for batch in (3, 4, 2, 4, 1):
+            for j in range(i, i + batch):
+                self.writer.put(_event(j))
+            for j in range(i, i + batch):
+                self._assert_event(self.reader.get(1), j)
+            i += batch
+        self.assertIsNone(self.reader.get(0.01))
+
+    def test_full(self):
+        for i in range(4):
+            self.writer.put(_event(i))
+
+        put = threading.Event()
+
+        def produce():
+            for i in range(4, 8):
+                self.writer.put(_event(i))
+            put.set()
+
+        thread = threading.Thread(target=produce)
+        thread.daemon = True
+        thread.start()
+        # the writer waits for the reader
+        self.assertFalse(put.wait(0.1))
+        for i in range(8):
+            self._assert_event(self.reader.get(1), i)
+        self.assertTrue(put.wait(1))
+        thread.join(1)
+
+    def test_too_many_signals(self):
+        clock_event = _event(0)
+        clock_event.signals = clock_event.signals * clock_bus.MAX_SIGNALS
+        with self.assertRaises(ValueError):
+            self.writer.put(clock_event)
+
+    def test_long_exchange_name(self):
+        clock_event = _event(0)
+        ts = clock_event.timestamp.value
+        clock_event.signals = [
+            events.Signal(ts, clock_pb2.BAR, 'X' * (clock_bus.EXCHANGE_SIZE + 1))]
+        with self.assertRaises(ValueError):
+            self.writer.put(clock_event)
+        # nothing was written
+        self.assertIsNone(self.reader.get(0.01))
+
+
+class _Service(object):
+    def __init__(self):
+        self._stop = False
+        self.events = []
+
+    def _clock_update(self, clock_event):
+        self.events.append(clock_event)
+
+
+class TestListen(unittest.TestCase):
+    def test_stop(self):
+        writer = clock_bus.ClockBusWriter.create(uuid.uuid4().hex, 4)
+        reader = clock_bus.ClockBusReader(writer.path)
+        service = _Service()
+        threads = set(threading.enumerate())
+        server.ControllableService.listen(service, reader)
+        thread, = set(threading.enumerate()) - threads
+
+        writer.put(_event(0))
+        deadline = time.monotonic() + 1
+        while not service.events and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(service.events), 1)
+
+        # the thread exits without receiving any other event
+        service._stop = True
+        thread.join(server._LISTEN_TIMEOUT * 4)
+        self.assertFalse(thread.is_alive())
+        writer.unlink()
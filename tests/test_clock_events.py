@@ -0,0 +1,68 @@
+import itertools
+import unittest
+
+import pandas as pd
+
+from pluto.control.clock import clock
+from pluto.control.clock.utils import get_generator, get_events
+from pluto.trading_calendars import calendar_utils as cu
+
+from protos import clock_pb2
+
+
+class TestClockEvents(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # XNYS closes early on the 25th of november
+        cls.start = pd.Timestamp('2016-11-21', tz='UTC')
+        cls.end = pd.Timestamp('2016-12-30', tz='UTC')
+        cls.calendar = cu.get_calendar_in_range('XNYS', cls.start, cls.end)
+
+    def test_parity(self):
+        calendar = self.calendar
+        sessions = calendar.all_sessions
+        for minute_emission, frequency in itertools.product(
+                (False, True),
+                ('day', 'minute')):
+            # the events yielded by the iterator
+            expected = [
+                (dt.value, evt) for dt, evt in get_generator(
+                    calendar,
+                    sessions,
+                    minute_emission,
+                    frequency)]
+            events = get_events(calendar, sessions, minute_emission, frequency)
+            self.assertEqual(
+                list(zip(events['timestamp'].tolist(), events['event'].tolist())),
+                expected,
+                (minute_emission, frequency))
+
+        # the early closes are emitted
+        closes = [
+            ts for ts, evt in expected if evt == clock_pb2.SESSION_END]
+        self.assertEqual(len(closes), len(sessions))
+        self.assertIn(pd.Timestamp('2016-11-25 18:00', tz='UTC').value, closes)
+        self.assertIn(pd.Timestamp('2016-11-28 21:00', tz='UTC').value, closes)
+
+    def test_clock(self):
+        cl = clock.Clock('XNYS', self.start, self.end)
+        expected = [
+            (dt, evt) for dt, evt in get_generator(
+                self.calendar,
+                self.calendar.all_sessions)]
+
+        # the clock emits at most one event per update
+        emitted = []
+        minutes = pd.date_range(
+            self.start,
+            self.end + pd.Timedelta(days=1),
+            freq='T',
+            tz='UTC')
+        for dt in minutes:
+            signal = cl.update(dt)
+            if signal:
+                emitted.append(signal)
+        self.assertEqual(
+            [(dt, evt) for dt, evt, _ in emitted[:len(expected)]],
+            expected)
+        self.assertTrue(all(exchange == 'XNYS' for _, _, exchange in emitted))
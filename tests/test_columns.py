@@ -0,0 +1,85 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from pluto.control.controllable.utils import columns
+
+
+def _packet(packet_type, dt, returns):
+    return {
+        'period_end': dt,
+        packet_type: {'returns': returns, 'pnl': returns * 1000},
+        'cumulative_perf': {'portfolio_value': 1000 + returns * 1000},
+        'cumulative_risk_metrics': {'sharpe': None}}
+
+
+class TestColumns(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.start = pd.Timestamp('2016-11-21 14:31', tz='UTC')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _minutes(self, writer, start, count):
+        for i in range(start, start + count):
+            writer.append(_packet(
+                'minute_perf',
+                self.start + pd.Timedelta(minutes=i),
+                i / 100.0))
+
+    def test_round_trip(self):
+        writer = columns.ColumnWriter(self.directory, chunk_size=4)
+        self._minutes(writer, 0, 6)
+        writer.append(_packet('daily_perf', self.start.normalize(), 0.05))
+        # a full chunk is written, the rest is buffered
+        self.assertEqual(len(columns.load(self.directory)), 4)
+        writer.flush()
+
+        minutes = columns.load(self.directory)
+        self.assertEqual(len(minutes), 6)
+        self.assertEqual(minutes.index[0], self.start)
+        np.testing.assert_allclose(minutes['returns'], np.arange(6) / 100.0)
+        np.testing.assert_allclose(minutes['portfolio_value'], 1000 + np.arange(6) * 10.0)
+        # missing fields are NaN
+        self.assertTrue(minutes['sharpe'].isnull().all())
+        self.assertTrue(minutes['beta'].isnull().all())
+
+        daily = columns.load(self.directory, 'daily_perf', ['returns', 'pnl'])
+        self.assertEqual(list(daily.columns), ['returns', 'pnl'])
+        self.assertEqual(list(daily['returns']), [0.05])
+        writer.close()
+
+    def test_recover(self):
+        writer = columns.ColumnWriter(self.directory, chunk_size=4)
+        self._minutes(writer, 0, 3)
+        writer.flush()
+        # crash while a chunk was written: the columns are longer than the
+        # rows in the metadata.
+        table = os.path.join(self.directory, 'minute_perf')
+        with open(os.path.join(table, 'returns.f8'), 'ab') as f:
+            f.write(np.ones(2).tobytes())
+        self._minutes(writer, 3, 2)
+
+        writer = columns.ColumnWriter(self.directory, chunk_size=4)
+        self.assertEqual(len(columns.load(self.directory)), 3)
+        self._minutes(writer, 3, 2)
+        writer.close()
+
+        minutes = columns.load(self.directory)
+        self.assertEqual(len(minutes), 5)
+        np.testing.assert_allclose(minutes['returns'], np.arange(5) / 100.0)
+        self.assertEqual(
+            list(minutes.index),
+            [self.start + pd.Timedelta(minutes=i) for i in range(5)])
+
+    def test_truncate(self):
+        writer = columns.ColumnWriter(self.directory)
+        self._minutes(writer, 0, 3)
+        writer.close()
+        columns.ColumnWriter(self.directory, truncate=True).close()
+        self.assertEqual(len(columns.load(self.directory)), 0)
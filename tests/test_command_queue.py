@@ -0,0 +1,112 @@
+import threading
+import unittest
+
+from pluto.control.controllable import commands
+from pluto.control.controllable import command_queue as cq
+
+from protos import clock_pb2
+
+
+def _clock_update(event, minute=0):
+    request = clock_pb2.ClockEvent(event=event)
+    request.timestamp.seconds = minute * 60
+    return commands.ClockUpdate(None, None, None, request, None)
+
+
+def _drain(queue):
+    return [queue.get() for _ in range(queue.depth)]
+
+
+class TestCommandQueue(unittest.TestCase):
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            cq.CommandQueue(policy='drop')
+
+    def test_coalesce(self):
+        queue = cq.CommandQueue(policy=cq.COALESCE)
+        stale = _clock_update(clock_pb2.BAR, 0)
+        latest = _clock_update(clock_pb2.BAR, 1)
+        queue.put(stale)
+        queue.put(latest)
+        # the pending bar is replaced by the latest one
+        self.assertEqual(_drain(queue), [latest])
+
+        stale_end = _clock_update(clock_pb2.MINUTE_END, 0)
+        latest_end = _clock_update(clock_pb2.MINUTE_END, 1)
+        queue.put(stale_end)
+        queue.put(latest_end)
+        self.assertEqual(_drain(queue), [latest_end])
+        self.assertEqual(queue.coalesced, 2)
+        self.assertEqual(queue.metrics()['coalesced'], 2)
+
+    def test_never_coalesced(self):
+        queue = cq.CommandQueue(policy=cq.COALESCE)
+        cmds = [
+            _clock_update(clock_pb2.SESSION_START),
+            _clock_update(clock_pb2.SESSION_START),
+            _clock_update(clock_pb2.TRADE_END),
+            _clock_update(clock_pb2.TRADE_END),
+            commands.AccountUpdate(None, None),
+            commands.AccountUpdate(None, None),
+            commands.Acknowledge(None, None)]
+        for command in cmds:
+            queue.put(command)
+        self.assertEqual(_drain(queue), cmds)
+        self.assertEqual(queue.coalesced, 0)
+
+    def test_not_coalesced_across_commands(self):
+        queue = cq.CommandQueue(policy=cq.COALESCE)
+        bar = _clock_update(clock_pb2.BAR, 0)
+        account = commands.AccountUpdate(None, None)
+        next_bar = _clock_update(clock_pb2.BAR, 1)
+        for command in (bar, account, next_bar):
+            queue.put(command)
+        # the bars are on both sides of another command
+        self.assertEqual(_drain(queue), [bar, account, next_bar])
+
+    def test_block_policy(self):
+        queue = cq.CommandQueue(policy=cq.BLOCK)
+        bars = [_clock_update(clock_pb2.BAR, i) for i in range(3)]
+        for bar in bars:
+            queue.put(bar)
+        self.assertEqual(_drain(queue), bars)
+        self.assertEqual(queue.metrics()['max_depth'], 3)
+
+    def test_bounded(self):
+        queue = cq.CommandQueue(maxsize=1)
+        first = _clock_update(clock_pb2.BAR, 0)
+        second = _clock_update(clock_pb2.BAR, 1)
+        queue.put(first)
+
+        put = threading.Event()
+
+        def produce():
+            queue.put(second)
+            put.set()
+
+        thread = threading.Thread(target=produce)
+        thread.daemon = True
+        thread.start()
+        # the producer waits while the queue is full
+        self.assertFalse(put.wait(0.1))
+        self.assertIs(queue.get(), first)
+        self.assertTrue(put.wait(1))
+        self.assertIs(queue.get(), second)
+        thread.join(1)
+
+    def test_close(self):
+        queue = cq.CommandQueue(maxsize=1)
+        first = _clock_update(clock_pb2.BAR, 0)
+        self.assertTrue(queue.put(first))
+        results = []
+
+        thread = threading.Thread(
+            target=lambda: results.append(queue.put(_clock_update(clock_pb2.BAR, 1))))
+        thread.daemon = True
+        thread.start()
+        # the blocked producer is released, and the command isn't queued
+        self.assertEqual(queue.close(), [first])
+        thread.join(1)
+        self.assertEqual(results, [False])
+        self.assertFalse(queue.put(first))
+        self.assertEqual(queue.depth, 0)
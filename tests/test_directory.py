@@ -0,0 +1,66 @@
+import unittest
+from unittest import mock
+
+import sqlalchemy as sa
+
+from pluto.interface import directory
+
+
+class TestMigration(unittest.TestCase):
+    def test_add_missing_columns(self):
+        engine = sa.create_engine('sqlite://')
+        # sessions table created before the metrics column was added
+        engine.execute(
+            'CREATE TABLE sessions_metadata ('
+            'id VARCHAR NOT NULL PRIMARY KEY, '
+            'strategy_id VARCHAR, '
+            'data_frequency VARCHAR NOT NULL, '
+            'directory VARCHAR NOT NULL, '
+            'universe VARCHAR NOT NULL, '
+            'look_back INTEGER, '
+            'cancel_policy VARCHAR NOT NULL)')
+        engine.execute(
+            "INSERT INTO sessions_metadata VALUES "
+            "('a', 's', 'minute', 'dir', 'universe', 10, 'never')")
+
+        directory.Base.metadata.create_all(engine)
+        directory._add_missing_columns(engine)
+
+        columns = [c['name'] for c in sa.inspect(engine).get_columns('sessions_metadata')]
+        self.assertIn('metrics', columns)
+        session = directory.db_utils.get_session_maker(engine)()
+        metadata = session.query(directory.SessionMetadata).get('a')
+        self.assertIsNone(metadata.metrics)
+        # running it again does nothing
+        directory._add_missing_columns(engine)
+        session.close()
+
+
+class TestAddSession(unittest.TestCase):
+    def test_unknown_metrics(self):
+        engine = sa.create_engine('sqlite://')
+        directory.Base.metadata.create_all(engine)
+        session = directory.db_utils.get_session_maker(engine)()
+        mode = directory._Write(session, 'strategies')
+
+        with self.assertRaises(ValueError):
+            mode.add_session('s', 'universe', 'minute', 10, 'never', metrics=['unknown'])
+        # nothing was persisted
+        self.assertEqual(session.query(directory.SessionMetadata).count(), 0)
+        session.close()
+
+
+class TestUpgradeSchema(unittest.TestCase):
+    def test_upgrade_once(self):
+        engine = sa.create_engine('sqlite://')
+        directory._upgrade_schema(engine)
+
+        self.assertEqual(
+            engine.execute('PRAGMA user_version').scalar(),
+            directory._SCHEMA_VERSION)
+        self.assertIn('sessions_metadata', sa.inspect(engine).get_table_names())
+
+        # an up to date schema isn't inspected again
+        with mock.patch.object(directory, '_add_missing_columns') as add:
+            directory._upgrade_schema(engine)
+        add.assert_not_called()
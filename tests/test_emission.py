@@ -0,0 +1,133 @@
+import unittest
+
+from pluto.control.controllable import emission
+
+
+def _minute(pnl=0.0, orders=(), transactions=()):
+    return {
+        'minute_perf': {
+            'orders': list(orders),
+            'transactions': list(transactions),
+            'pnl': pnl},
+        'cumulative_perf': {
+            'pnl': pnl,
+            'capital_used': 0.0,
+            'portfolio_value': 1000.0 + pnl}}
+
+
+def _daily(orders=(), transactions=()):
+    return {
+        'daily_perf': {
+            'orders': list(orders),
+            'transactions': list(transactions)},
+        'cumulative_perf': {}}
+
+
+class TestPolicies(unittest.TestCase):
+    def test_every(self):
+        policy = emission.Every(3)
+        self.assertEqual(
+            [policy.emit(_minute()) for _ in range(7)],
+            [False, False, True, False, False, True, False])
+        # the count restarts on each session
+        policy.start_of_session()
+        self.assertEqual(
+            [policy.emit(_minute()) for _ in range(3)],
+            [False, False, True])
+        with self.assertRaises(ValueError):
+            emission.Every(0)
+
+    def test_on_change(self):
+        policy = emission.OnChange()
+        self.assertEqual(
+            [policy.emit(_minute(pnl)) for pnl in (0.0, 0.0, 1.0, 1.0, 0.0)],
+            [True, False, True, False, True])
+        policy.start_of_session()
+        self.assertTrue(policy.emit(_minute(0.0)))
+
+        policy = emission.OnChange(('portfolio_value',))
+        self.assertTrue(policy.emit(_minute(1.0)))
+        self.assertFalse(policy.emit(_minute(1.0)))
+
+    def test_session_end(self):
+        policy = emission.SessionEnd()
+        self.assertFalse(policy.emit(_minute()))
+
+    def test_from_string(self):
+        self.assertIsNone(emission.from_string('minute'))
+        self.assertEqual(emission.from_string('every:5')._n, 5)
+        self.assertEqual(
+            emission.from_string('change:pnl,returns')._fields,
+            ('pnl', 'returns'))
+        self.assertIsInstance(emission.from_string('change'), emission.OnChange)
+        self.assertIsInstance(emission.from_string('session'), emission.SessionEnd)
+        with self.assertRaises(ValueError):
+            emission.from_string('hourly')
+
+
+class TestEmitter(unittest.TestCase):
+    def test_no_policy(self):
+        emitter = emission.Emitter()
+        packets = [_minute(), _minute(), _daily()]
+        self.assertEqual(
+            [emitter.update(packet, False) for packet in packets],
+            packets)
+
+    def test_fold(self):
+        emitter = emission.Emitter(emission.Every(3))
+        first = {'id': 'a', 'status': 'open'}
+        filled = {'id': 'a', 'status': 'filled'}
+        other = {'id': 'b', 'status': 'open'}
+        txn1 = {'amount': 1}
+        txn2 = {'amount': 2}
+
+        self.assertIsNone(emitter.update(_minute(1.0, [first], [txn1]), False))
+        self.assertIsNone(emitter.update(_minute(2.0, [other]), False))
+        packet = emitter.update(_minute(3.0, [filled], [txn2]), False)
+
+        perf = packet['minute_perf']
+        # the last state of each order of the skipped minutes
+        self.assertEqual(perf['orders'], [filled, other])
+        self.assertEqual(perf['transactions'], [txn1, txn2])
+        # level fields are the ones of the last minute
+        self.assertEqual(perf['pnl'], 3.0)
+
+    def test_end(self):
+        emitter = emission.Emitter(emission.SessionEnd())
+        order = {'id': 'a'}
+        self.assertIsNone(emitter.update(_minute(orders=[order]), False))
+        # the last packet is always emitted
+        packet = emitter.update(_minute(), True)
+        self.assertEqual(packet['minute_perf']['orders'], [order])
+
+    def test_session_end(self):
+        emitter = emission.Emitter(emission.Every(2))
+        emitted = {'id': 'a'}
+        skipped = {'id': 'b'}
+        txn1 = {'amount': 1}
+        txn2 = {'amount': 2}
+        self.assertIsNone(emitter.update(_minute(orders=[emitted]), False))
+        self.assertIsNotNone(emitter.update(_minute(transactions=[txn1]), False))
+        self.assertIsNone(
+            emitter.update(_minute(orders=[skipped], transactions=[txn2]), False))
+
+        # the daily packet is always emitted, with what wasn't emitted yet
+        packet = emitter.update(
+            _daily([emitted, skipped], [txn1, txn2]), False)
+        self.assertEqual(packet['daily_perf']['orders'], [skipped])
+        self.assertEqual(packet['daily_perf']['transactions'], [txn2])
+
+        # the next session starts from scratch
+        self.assertIsNone(emitter.update(_minute(orders=[emitted]), False))
+        self.assertIsNotNone(emitter.update(_minute(), False))
+        packet = emitter.update(_daily([emitted]), False)
+        self.assertEqual(packet['daily_perf']['orders'], [])
+
+    def test_changed_order(self):
+        emitter = emission.Emitter()
+        order = {'id': 'a', 'status': 'open'}
+        emitter.update(_minute(orders=[order]), False)
+        # the order changed after it was emitted
+        filled = {'id': 'a', 'status': 'filled'}
+        packet = emitter.update(_daily([filled]), False)
+        self.assertEqual(packet['daily_perf']['orders'], [filled])
@@ -0,0 +1,136 @@
+import unittest
+
+import pandas as pd
+
+from pluto.coms.utils import conversions
+from pluto.control.clock import events
+from pluto.control.controllable import server
+from pluto.control.controllable import commands
+from pluto.control.controllable import command_queue as cq
+from pluto.control.modes.processes import in_memory
+from pluto.utils import stream
+
+from protos import broker_pb2
+from protos import clock_pb2
+
+
+def _clock_event():
+    dt = pd.Timestamp('2016-11-21 14:31', tz='UTC')
+    signals = [
+        events.Signal(dt.value, clock_pb2.BAR, 'XNYS'),
+        events.Signal(
+            (dt + pd.Timedelta(microseconds=1)).value,
+            clock_pb2.MINUTE_END,
+            'XLON')]
+    return events.ClockEvent(dt, clock_pb2.BAR, signals)
+
+
+def _eager_proto(clock_event):
+    # the messages used to be built when the events were emitted
+    return clock_pb2.ClockEvent(
+        timestamp=conversions.to_proto_timestamp(clock_event.timestamp),
+        event=clock_event.event,
+        signals=[
+            clock_pb2.Signal(
+                timestamp=conversions.nanos_to_proto_timestamp(signal.nanos),
+                event=signal.event,
+                exchange=signal.exchange)
+            for signal in clock_event.signals])
+
+
+class TestClockEvent(unittest.TestCase):
+    def test_serialization(self):
+        clock_event = _clock_event()
+        self.assertEqual(
+            clock_event.SerializeToString(),
+            _eager_proto(clock_event).SerializeToString())
+        self.assertEqual(
+            clock_pb2.ClockEvents(
+                clock_events=[events.to_proto(clock_event)]).SerializeToString(),
+            clock_pb2.ClockEvents(
+                clock_events=[_eager_proto(clock_event)]).SerializeToString())
+
+    def test_cached(self):
+        clock_event = _clock_event()
+        proto = clock_event.to_proto()
+        self.assertIs(clock_event.to_proto(), proto)
+        self.assertIs(events.to_proto(clock_event), proto)
+        # protobuf messages are passed through
+        self.assertIs(events.to_proto(proto), proto)
+
+    def test_signal_timestamp(self):
+        signal = _clock_event().signals[1]
+        self.assertEqual(
+            conversions.to_datetime(signal.to_proto().timestamp),
+            signal.timestamp)
+
+
+class _Service(object):
+    def __init__(self):
+        self.clock_events = []
+        self.broker_states = []
+
+    def clock_update(self, clock_event):
+        self.clock_events.append(clock_event)
+
+    def account_update(self, broker_state):
+        self.broker_states.append(broker_state)
+
+
+class _InMemoryProcess(in_memory.InMemoryProcess):
+    def _create_controllable(self, framework_id, framework_url, session_id, root_dir):
+        self._service = _Service()
+
+
+class TestInMemoryProcess(unittest.TestCase):
+    def test_bypass(self):
+        process = _InMemoryProcess(None, None, None, 'url', 'a', 'root')
+        service = process._service
+
+        clock_event = _clock_event()
+        process.clock_update(clock_event)
+        self.assertIs(service.clock_events[0], clock_event)
+        # no protobuf message is built
+        self.assertIsNone(clock_event._proto)
+
+        message = broker_pb2.BrokerState()
+        message.timestamp.seconds = 10
+        broker_state = stream.LazyMessage(message)
+        process.account_update(broker_state)
+        self.assertIsNone(broker_state._bytes)
+
+        # each session gets its own copy of the message
+        received = service.broker_states[0]
+        self.assertIsNot(received, message)
+        self.assertEqual(received, message)
+        received.timestamp.seconds = 20
+        self.assertEqual(message.timestamp.seconds, 10)
+
+
+class _ControllableService(object):
+    def __init__(self):
+        self._queue = cq.CommandQueue()
+        self._controllable = None
+        self._perf_writer = None
+        self._frequency_filter = None
+        self._state_storage = None
+
+    def _clock_update(self, clock_event):
+        server.ControllableService._clock_update(self, clock_event)
+
+
+class TestControllableService(unittest.TestCase):
+    def test_queued_as_is(self):
+        service = _ControllableService()
+        clock_event = _clock_event()
+        server.ControllableService.clock_update(service, clock_event)
+        broker_state = broker_pb2.BrokerState()
+        server.ControllableService.account_update(service, broker_state)
+
+        command = service._queue.get()
+        self.assertIsInstance(command, commands.ClockUpdate)
+        self.assertIs(command._request, clock_event)
+        self.assertEqual(command.event, clock_pb2.BAR)
+        command = service._queue.get()
+        self.assertIsInstance(command, commands.AccountUpdate)
+        self.assertIs(command._request, broker_state)
@@ -0,0 +1,305 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import pandas as pd
+
+from pluto.coms.utils import conversions
+from pluto.control.controllable import persistence, server
+from pluto.control.events_log import compaction, events_log, reader, schema, wal
+from pluto.control.loop import simulation_loop
+from pluto.interface.utils import db_utils, paths
+
+from protos import clock_pb2, controllable_pb2, controller_pb2
+
+
+class TestWriteAheadLog(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_segments(self):
+        commits = []
+        log = wal.WriteAheadLog(
+            self.dir,
+            segment_size=130,
+            commit_interval=60,
+            on_commit=commits.extend)
+        positions = [log.append(i, b'x' * 20) for i in range(10)]
+        log.commit()
+        # three records per segment
+        self.assertEqual([segment for segment, _ in positions], [i // 3 for i in range(10)])
+        self.assertEqual(wal.list_segments(self.dir), [0, 1, 2, 3])
+        # the first record of each segment
+        self.assertEqual(commits, [(i, i // 3, 0) for i in (0, 3, 6, 9)])
+
+        log.append(10, b'y')
+        log.close()
+        records = list(wal.read(self.dir, *positions[4]))
+        self.assertEqual([record[0] for record in records], list(range(4, 11)))
+        self.assertEqual(records[-1][3], b'y')
+
+    def test_append_during_commit(self):
+        committing = threading.Event()
+        release = threading.Event()
+
+        def on_commit(batch):
+            committing.set()
+            release.wait()
+
+        log = wal.WriteAheadLog(self.dir, commit_interval=60, on_commit=on_commit)
+        log.append(1, b'first')
+        thread = threading.Thread(target=log.commit)
+        thread.start()
+        self.assertTrue(committing.wait(1))
+        # appends don't wait for the commit
+        appended = threading.Thread(target=log.append, args=(2, b'second'))
+        appended.start()
+        appended.join(1)
+        self.assertFalse(appended.is_alive())
+        release.set()
+        thread.join(1)
+        log.close()
+        self.assertEqual([record[0] for record in wal.read(self.dir)], [1, 2])
+
+    def test_recovery(self):
+        log = wal.WriteAheadLog(self.dir)
+        log.append(1, b'first')
+        segment, offset = log.append(2, b'second')
+        log.close()
+
+        path = wal.segment_path(self.dir, segment)
+        size = os.path.getsize(path)
+        with open(path, 'r+b') as f:
+            # corrupt the last record
+            f.seek(size - 1)
+            f.write(b'?')
+        self.assertEqual([record[0] for record in wal.read(self.dir)], [1])
+
+        log = wal.WriteAheadLog(self.dir)
+        self.assertEqual(log.end, (segment, offset))
+        log.append(3, b'third', tag=1, key=2)
+        log.close()
+        self.assertEqual(
+            list(wal.read(self.dir)),
+            [(1, 0, 0, b'first'), (3, 1, 2, b'third')])
+
+
+class TestLogReader(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.log = log = wal.WriteAheadLog(self.dir, segment_size=200)
+        for ts in range(20):
+            log.append(ts * 10, str(ts).encode(), tag=ts % 3, key=ts % 2 + 1)
+        log.commit()
+
+    def tearDown(self):
+        self.log.close()
+        shutil.rmtree(self.dir)
+
+    def test_records(self):
+        log_reader = reader.LogReader(self.dir)
+        self.assertEqual(len(log_reader), 20)
+        self.assertGreater(len(wal.list_segments(self.dir)), 1)
+        self.assertEqual(log_reader.seek(55), 6)
+        self.assertEqual(
+            [payload for _, _, payload in log_reader.records(55, 100)],
+            [str(ts).encode() for ts in range(6, 10)])
+        self.assertEqual(
+            [(ts, tag) for ts, tag, _ in log_reader.records(tags=[2], key=2)],
+            [(50, 2), (110, 2), (170, 2)])
+
+        # the appended records are indexed on refresh. The records with the
+        # key 0 are read with any key
+        self.log.append(200, b'20', tag=2)
+        self.log.commit()
+        self.assertEqual(len(list(log_reader.records(start=200))), 0)
+        log_reader.refresh()
+        self.assertEqual(list(log_reader.records(start=200, key=1)), [(200, 2, b'20')])
+        log_reader.close()
+
+
+class TestCompaction(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.engine = engine = db_utils.create_engine(os.path.join(self.dir, 'metadata'))
+        schema.metadata.create_all(engine)
+        # three records per segment
+        self.log = log = wal.WriteAheadLog(self.dir, segment_size=130, commit_interval=60)
+        for ts in range(20):
+            log.append(ts, b'x' * 20)
+        log.commit()
+
+    def tearDown(self):
+        self.log.close()
+        shutil.rmtree(self.dir)
+
+    def compactor(self, retention=None):
+        return compaction.Compactor(
+            self.dir,
+            self.engine,
+            lambda: self.log.end[0],
+            retention,
+            merge_size=300)
+
+    def test_compact(self):
+        with self.engine.begin() as connection:
+            connection.execute(schema.checkpoints.insert(), [
+                {'session_id': 'a', 'timestamp': 4},
+                {'session_id': 'b', 'timestamp': 7}])
+        log_reader = reader.LogReader(self.dir)
+        self.assertEqual(wal.list_segments(self.dir), list(range(7)))
+
+        self.compactor().compact()
+        # the first segment is covered by the checkpoints, the others are
+        # merged up to the merge size, and the current segment is unchanged
+        self.assertEqual(wal.list_segments(self.dir), [3, 5, 6])
+        self.assertEqual([record[0] for record in wal.read(self.dir)], list(range(5, 20)))
+        with self.engine.begin() as connection:
+            rows = connection.execute(
+                schema.offsets.select().order_by(schema.offsets.c.segment)).fetchall()
+        self.assertEqual(
+            [(row['timestamp'], row['segment'], row['offset']) for row in rows],
+            [(5, 3, 0), (12, 5, 0)])
+
+        log_reader.refresh()
+        self.assertEqual([ts for ts, _, _ in log_reader.records()], list(range(5, 20)))
+        log_reader.close()
+
+        # the oldest segments are removed to fit the size
+        self.compactor(compaction.RetentionPolicy(max_size=400)).compact()
+        self.assertEqual(wal.list_segments(self.dir), [5, 6])
+        self.assertEqual([record[0] for record in wal.read(self.dir)], list(range(12, 20)))
+
+
+class TestEventsLog(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        paths.setup_root(self.root)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_read_after(self):
+        log = events_log.EventsLog()
+        session = pd.Timestamp('2020-01-02', tz='UTC')
+        dates = pd.date_range('2020-01-02 14:31', periods=5, freq='T', tz='UTC')
+
+        writer = log.writer()
+        writer.initialize(session)
+        for dt in dates:
+            writer.write_datetime(dt)
+            writer.write_event('clock', clock_pb2.ClockEvent(
+                timestamp=conversions.to_proto_timestamp(dt),
+                event=clock_pb2.BAR))
+            writer._wal.commit()
+        writer.write_event('parameter', controller_pb2.RunParamsList(
+            run_params=[
+                controller_pb2.RunParams(session_id='a', capital_ratio=0.5),
+                controller_pb2.RunParams(session_id='b', capital_ratio=0.25)],
+            timestamp=conversions.to_proto_timestamp(dates[-1])))
+        log.close()
+
+        events = list(log.read('a', dates[1]))
+        self.assertEqual([evt_type for evt_type, _ in events], ['clock'] * 3 + ['parameter'])
+        self.assertEqual(
+            [conversions.to_datetime(evt.timestamp) for _, evt in events[:3]],
+            list(dates[2:]))
+        self.assertEqual(events[-1][1].run_params[0].session_id, 'a')
+        self.assertEqual(len(events[-1][1].run_params), 1)
+        self.assertEqual(len(list(log.read('c', dates[1]))), 3)
+        self.assertEqual(
+            [evt_type for evt_type, _ in log.read('b', dates[1], ['parameter'])],
+            ['parameter'])
+
+
+class _Log(object):
+    def __init__(self):
+        self.closed = False
+        self.checkpoints = []
+
+    def checkpoint(self, session_id, datetime):
+        self.checkpoints.append(datetime)
+
+    def close(self):
+        self.closed = True
+
+
+class _Mode(object):
+    mode_type = 'simulation'
+
+    def __init__(self):
+        self.clock_updates = 0
+        self.closed = False
+
+    def accept_loop(self, loop):
+        pass
+
+    def update(self, dt, evt, signals):
+        pass
+
+    def process(self, dt):
+        pass
+
+    def clock_update(self, dt, evt, signals):
+        self.clock_updates += 1
+
+    def close(self):
+        self.closed = True
+
+
+class _Controllable(object):
+    def get_state(self, dt):
+        return controllable_pb2.ControllableState(
+            session_id='a',
+            capital=float(dt.day)).SerializeToString()
+
+
+class TestClose(unittest.TestCase):
+    def test_loop_closes_modes(self):
+        loop = simulation_loop.SimulationLoop(
+            pd.Timestamp('2020-01-02', tz='UTC'),
+            pd.Timestamp('2020-01-03', tz='UTC'))
+        mode = _Mode()
+        loop.add_control_mode(mode)
+        loop.start()
+        self.assertGreater(mode.clock_updates, 0)
+        self.assertTrue(mode.closed)
+
+    def test_state_storage_closes_log(self):
+        directory = tempfile.mkdtemp()
+        pipeline = persistence.Pipeline()
+        log = _Log()
+        storage = server._StateStorage(
+            os.path.join(directory, 'state'),
+            pipeline,
+            'a',
+            log)
+        storage.close()
+        pipeline.close()
+        self.assertTrue(log.closed)
+        shutil.rmtree(directory)
+
+    def test_checkpoints_once_durable(self):
+        directory = tempfile.mkdtemp()
+        pipeline = persistence.Pipeline(
+            durability=persistence.Durability(persistence.NONE))
+        log = _Log()
+        storage = server._StateStorage(
+            os.path.join(directory, 'state'),
+            pipeline,
+            'a',
+            log)
+        dates = pd.date_range('2020-01-02', periods=3, tz='UTC')
+        for dt in dates:
+            storage.store(dt, _Controllable())
+        storage.close()
+        pipeline.close()
+        # the delta of the second state isn't fsynced, only the snapshots are
+        # recorded
+        self.assertEqual(log.checkpoints, [dates[0], dates[2]])
+        shutil.rmtree(directory)
@@ -0,0 +1,123 @@
+import threading
+import time
+import unittest
+
+from concurrent import futures
+
+from pluto.control.modes import execution, utils
+
+
+class TestSerial(unittest.TestCase):
+    def test_order(self):
+        calls = []
+        processes = {'a': 1, 'b': 2, 'c': 3}
+        late = execution.Serial().dispatch(processes, calls.append)
+        self.assertEqual(late, [])
+        self.assertEqual(calls, [1, 2, 3])
+
+
+class TestConcurrent(unittest.TestCase):
+    def setUp(self):
+        self.pool = futures.ThreadPoolExecutor(4)
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def test_barrier(self):
+        policy = execution.Concurrent(self.pool)
+        done = []
+
+        def call(process):
+            time.sleep(0.05)
+            done.append(process)
+
+        late = policy.dispatch({'a': 1, 'b': 2, 'c': 3}, call)
+        # all the calls are done when dispatch returns
+        self.assertEqual(late, [])
+        self.assertEqual(sorted(done), [1, 2, 3])
+
+    def test_deadline(self):
+        policy = execution.Concurrent(self.pool, deadline=0.1)
+        release = threading.Event()
+
+        def call(process):
+            if process == 'slow':
+                release.wait()
+
+        started = time.monotonic()
+        late = policy.dispatch({'a': 'fast', 'b': 'slow'}, call)
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(late, ['b'])
+        self.assertEqual(policy.late_sessions, ['b'])
+        release.set()
+
+    def test_session_order(self):
+        # the calls to a late session are executed after its previous calls
+        policy = execution.Concurrent(self.pool, deadline=0.05)
+        release = threading.Event()
+        calls = []
+
+        def first(process):
+            if process == 'slow':
+                release.wait()
+            calls.append((process, 1))
+
+        def second(process):
+            calls.append((process, 2))
+
+        processes = {'a': 'fast', 'b': 'slow'}
+        self.assertEqual(policy.dispatch(processes, first), ['b'])
+        # the second call of the slow session waits for the first one
+        self.assertEqual(policy.dispatch(processes, second), ['b'])
+        self.assertEqual(calls, [('fast', 1), ('fast', 2)])
+
+        release.set()
+        self.assertEqual(policy.dispatch(processes, second), [])
+        self.assertEqual(
+            [call for call in calls if call[0] == 'slow'],
+            [('slow', 1), ('slow', 2), ('slow', 2)])
+
+    def test_exception(self):
+        policy = execution.Concurrent(self.pool)
+
+        def call(process):
+            raise ValueError(process)
+
+        with self.assertRaises(ValueError):
+            policy.dispatch({'a': 1}, call)
+
+    def test_detached_exception(self):
+        policy = execution.Concurrent(self.pool)
+        calls = []
+
+        def fail(process):
+            raise ValueError(process)
+
+        # the exception of a call that isn't waited for is raised by the next
+        # call to the session
+        self.assertEqual(policy.dispatch({'a': 1}, fail, wait=False), [])
+        with self.assertRaises(ValueError):
+            policy.dispatch({'a': 1}, calls.append)
+        self.assertEqual(calls, [1])
+        # and only once
+        policy.dispatch({'a': 1}, calls.append)
+        self.assertEqual(calls, [1, 1])
+
+
+class TestModeFactory(unittest.TestCase):
+    def test_policy_per_mode(self):
+        class ModeFactory(utils.ModeFactory):
+            mode_type = 'test'
+
+            def _get_mode(self, thread_pool, framework_url, capital, max_leverage, process_factory):
+                return self._create_execution_policy(thread_pool)
+
+        pool = futures.ThreadPoolExecutor(1)
+        factory = ModeFactory(pool, 'url', execution.Concurrent)
+        first = factory.get_mode(1000, 1.0, None)
+        second = factory.get_mode(1000, 1.0, None)
+        self.assertIsInstance(first, execution.Concurrent)
+        self.assertIsNot(first, second)
+        # defaults to the serial execution of the mode
+        self.assertIsNone(ModeFactory(pool, 'url').get_mode(1000, 1.0, None))
+        pool.shutdown()
@@ -0,0 +1,193 @@
+import unittest
+
+import empyrical
+import numpy as np
+
+from pluto.finance import metrics
+from pluto.finance.metrics import metric, online
+
+
+class FakeLedger(object):
+    def __init__(self):
+        self.returns = []
+
+    @property
+    def returns_count(self):
+        return len(self.returns)
+
+    def latest_returns(self, n):
+        return self.returns[len(self.returns) - n:]
+
+
+def _none_to_nan(value):
+    return np.nan if value is None else value
+
+
+class TestOnlineMetrics(unittest.TestCase):
+    def setUp(self):
+        random = np.random.RandomState(42)
+        self.returns = random.normal(0.0005, 0.01, 300)
+        self.benchmark = 0.6 * self.returns + random.normal(0.0002, 0.008, 300)
+
+    def assert_parity(self, expected, actual):
+        if np.isnan(expected):
+            self.assertTrue(np.isnan(actual), actual)
+        else:
+            self.assertAlmostEqual(expected, actual, delta=1e-9 * max(1.0, abs(expected)))
+
+    def stream(self, returns, benchmark=None):
+        # yields the online values after each observation, with the prefix
+        # of the returns that was consumed.
+        moments = online.Moments()
+        downside_risk = online.DownsideRisk()
+        drawdown = online.Drawdown()
+        covariance = online.Covariance()
+        for i, r in enumerate(returns):
+            moments.update(r)
+            downside_risk.update(r)
+            drawdown.update(r)
+            if benchmark is not None:
+                covariance.update(r, benchmark[i])
+            yield i + 1, moments, downside_risk, drawdown, covariance
+
+    def test_returns_statistics(self):
+        for n, moments, downside_risk, drawdown, _ in self.stream(self.returns):
+            prefix = self.returns[:n]
+            self.assert_parity(
+                empyrical.annual_volatility(prefix),
+                online.annual_volatility(moments))
+            self.assert_parity(
+                empyrical.sharpe_ratio(prefix),
+                online.sharpe_ratio(moments))
+            self.assert_parity(
+                empyrical.sortino_ratio(prefix),
+                online.sortino_ratio(moments, downside_risk))
+            self.assert_parity(
+                empyrical.max_drawdown(prefix),
+                drawdown.value)
+
+    def test_alpha_beta(self):
+        returns = self.returns
+        benchmark = self.benchmark
+        for n, _, _, _, covariance in self.stream(returns, benchmark):
+            alpha, beta = empyrical.alpha_beta_aligned(
+                returns[:n],
+                benchmark[:n])
+            self.assert_parity(beta, covariance.beta)
+            self.assert_parity(alpha, covariance.alpha)
+
+    def test_non_finite_values(self):
+        returns = self.returns[:50].copy()
+        returns[[3, 17, 18]] = np.nan
+        benchmark = self.benchmark[:50].copy()
+        benchmark[[5, 18]] = np.nan
+        *_, (n, moments, downside_risk, drawdown, covariance) = \
+            self.stream(returns, benchmark)
+        self.assert_parity(
+            empyrical.annual_volatility(returns),
+            online.annual_volatility(moments))
+        self.assert_parity(
+            empyrical.sharpe_ratio(returns),
+            online.sharpe_ratio(moments))
+        self.assert_parity(
+            empyrical.sortino_ratio(returns),
+            online.sortino_ratio(moments, downside_risk))
+        self.assert_parity(empyrical.max_drawdown(returns), drawdown.value)
+        alpha, beta = empyrical.alpha_beta_aligned(returns, benchmark)
+        self.assert_parity(beta, covariance.beta)
+        self.assert_parity(alpha, covariance.alpha)
+
+    def test_expanding_moments(self):
+        returns = self.returns[:50].copy()
+        returns[[0, 17]] = np.nan
+        moments, counts, _, m2 = online.expanding_moments(returns)
+        variances = online.expanding_variance(counts, m2)
+        for n, streamed, _, _, _ in self.stream(returns):
+            self.assert_parity(streamed.variance(), variances[n - 1])
+        self.assertEqual(moments.length, streamed.length)
+        self.assertEqual(moments.count, streamed.count)
+        self.assert_parity(streamed.mean, moments.mean)
+        self.assert_parity(streamed.variance(), moments.variance())
+        # the moments are updated from where the array stopped
+        moments.update(0.01)
+        streamed.update(0.01)
+        self.assert_parity(streamed.variance(), moments.variance())
+
+    def test_empty(self):
+        self.assertTrue(np.isnan(online.annual_volatility(online.Moments())))
+        self.assertTrue(np.isnan(online.sharpe_ratio(online.Moments())))
+        self.assertTrue(np.isnan(online.Drawdown().value))
+        self.assertTrue(np.isnan(online.Covariance().beta))
+        self.assertTrue(np.isnan(online.Covariance().alpha))
+
+    def test_metric_consumes_new_returns(self):
+        ledger = FakeLedger()
+        context = metric.Context(ledger, None, 'daily')
+        sharpe = online.SharpeRatio()
+        sharpe.initialization(None, ledger)
+        for n, r in enumerate(self.returns[:20], 1):
+            ledger.returns.append(r)
+            packet = {'cumulative_risk_metrics': {}}
+            sharpe.end_of_bar(packet, context)
+            self.assert_parity(
+                empyrical.sharpe_ratio(self.returns[:n]),
+                _none_to_nan(packet['cumulative_risk_metrics']['sharpe']))
+
+
+    def test_restore_state(self):
+        ledger = FakeLedger()
+        benchmark = FakeLedger()
+        context = metric.Context(ledger, benchmark, 'daily')
+
+        def create():
+            created = [
+                online.AnnualVolatility(),
+                online.SharpeRatio(),
+                online.SortinoRatio(),
+                online.MaxDrawdown(),
+                online.OnlineAlphaBeta()]
+            for m in created:
+                m.initialization(None, ledger)
+            return created
+
+        def run(metrics_, start, end):
+            packet = {'cumulative_risk_metrics': {}}
+            for r, b in zip(self.returns[start:end], self.benchmark[start:end]):
+                ledger.returns.append(r)
+                benchmark.returns.append(b)
+                packet = {'cumulative_risk_metrics': {}}
+                for m in metrics_:
+                    m.end_of_bar(packet, context)
+            return packet['cumulative_risk_metrics']
+
+        original = create()
+        run(original, 0, 100)
+        restored = create()
+        for saved, m in zip(original, restored):
+            # the values are stored as doubles
+            m.restore_state([float(value) for value in saved.get_state()])
+            self.assertEqual(m._seen, 100)
+
+        expected = run(original, 100, 150)
+        # the new returns are consumed once by the restored metrics
+        del ledger.returns[100:], benchmark.returns[100:]
+        actual = run(restored, 100, 150)
+        self.assertEqual(set(expected), set(actual))
+        for field, value in expected.items():
+            self.assert_parity(_none_to_nan(value), _none_to_nan(actual[field]))
+
+    def test_restore_invalid_state(self):
+        with self.assertRaises(ValueError):
+            online.SharpeRatio().restore_state([1.0, 2.0])
+
+
+class TestSelectMetrics(unittest.TestCase):
+    def test_select(self):
+        selected = metrics.select_metrics(['pnl', 'returns', 'max_leverage'])
+        self.assertEqual(
+            {type(m) for m in selected},
+            {metrics.PNL, metrics.Returns, metrics.MaxLeverage})
+
+    def test_unknown_field(self):
+        with self.assertRaises(ValueError):
+            metrics.select_metrics(['pnl', 'foo'])
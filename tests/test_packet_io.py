@@ -0,0 +1,130 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pluto.control.controllable.utils import io
+
+
+class TestPacketIO(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'perf')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _write(self, packets, truncate=False):
+        writer = io.PacketWriter(self.path, truncate, fsync_interval=None)
+        offsets = [writer.write(packet, ts) for ts, packet in packets]
+        writer.close()
+        return offsets
+
+    def _read(self, offset=0):
+        return [packet for _, packet in io.PacketReader(self.path).read(offset)]
+
+    def _index_size(self):
+        return os.path.getsize(io.index_path(self.path)) // io._INDEX.size
+
+    def test_round_trip(self):
+        packets = [(10, b'a'), (20, b'bb'), (30, b'ccc')]
+        offsets = self._write(packets)
+        self.assertEqual(offsets[0], 0)
+        self.assertEqual(self._read(), [b'a', b'bb', b'ccc'])
+        # read from the offset of a record
+        self.assertEqual(self._read(offsets[1]), [b'bb', b'ccc'])
+        # the file is appended to
+        self._write([(40, b'dddd')])
+        self.assertEqual(self._read(), [b'a', b'bb', b'ccc', b'dddd'])
+        self._write([(50, b'e')], truncate=True)
+        self.assertEqual(self._read(), [b'e'])
+
+    def test_seek(self):
+        offsets = self._write([(10, b'a'), (20, b'bb'), (30, b'ccc')])
+        reader = io.PacketReader(self.path)
+        self.assertEqual(reader.seek(5), offsets[0])
+        self.assertEqual(reader.seek(20), offsets[1])
+        self.assertEqual(reader.seek(25), offsets[2])
+        # past the last packet
+        end = os.path.getsize(self.path)
+        self.assertEqual(reader.seek(35), end)
+        self.assertEqual(list(reader.read(reader.seek(35))), [])
+        self.assertEqual(io.PacketReader(self.path + 'x').seek(10), 0)
+
+    def test_torn_tail(self):
+        self._write([(10, b'a'), (20, b'bb')])
+        size = os.path.getsize(self.path)
+        # crash in the middle of a record and of an index entry
+        with open(self.path, 'ab') as f:
+            f.write(io._LENGTH.pack(10) + b'abc')
+        with open(io.index_path(self.path), 'ab') as f:
+            f.write(io._INDEX.pack(30, size)[:5])
+        self.assertEqual(self._read(), [b'a', b'bb'])
+
+        offsets = self._write([(30, b'ccc')])
+        self.assertEqual(offsets, [size])
+        self.assertEqual(self._read(), [b'a', b'bb', b'ccc'])
+        self.assertEqual(self._index_size(), 3)
+        self.assertEqual(io.PacketReader(self.path).seek(30), size)
+
+    def test_index_past_data(self):
+        offsets = self._write([(10, b'a'), (20, b'bb'), (30, b'ccc')])
+        # the last record was lost but not its index entry
+        with open(self.path, 'r+b') as f:
+            f.truncate(offsets[2])
+        self._write([(40, b'dddd')])
+        self.assertEqual(self._read(), [b'a', b'bb', b'dddd'])
+        self.assertEqual(self._index_size(), 3)
+        reader = io.PacketReader(self.path)
+        self.assertEqual(list(reader.read(reader.seek(30)))[0][1], b'dddd')
+
+    def test_index_lag(self):
+        offsets = self._write([(10, b'a'), (20, b'bb')])
+        # the last record was written but not its index entry
+        with open(io.index_path(self.path), 'r+b') as f:
+            f.truncate(io._INDEX.size)
+        reader = io.PacketReader(self.path)
+        # the records after the index are still read
+        self.assertEqual(reader.seek(20), offsets[1])
+        self.assertEqual([p for _, p in reader.read(reader.seek(20))], [b'bb'])
+
+        # recovery keeps the complete records
+        self._write([(30, b'ccc')])
+        self.assertEqual(self._read(), [b'a', b'bb', b'ccc'])
+        self.assertEqual(self._read(io.PacketReader(self.path).seek(30)), [b'ccc'])
+
+    def test_legacy(self):
+        # a file of the previous format, without index
+        packets = [b'\x0a\x05first', b'\x0a\x06second', b'\x0a\x05third']
+        with open(self.path, 'wb') as f:
+            for packet in packets:
+                f.write(packet + io._LEGACY_DELIMITER)
+        legacy = open(self.path, 'rb').read()
+        timestamps = {p: ts for ts, p in zip((10, 20, 30), packets)}
+
+        writer = io.PacketWriter(
+            self.path,
+            fsync_interval=None,
+            legacy_timestamp=timestamps.get)
+        writer.write(b'fourth', 40)
+        writer.close()
+        # the packets are converted and the legacy file is kept aside
+        self.assertEqual(self._read(), packets + [b'fourth'])
+        with open(self.path + io._LEGACY_SUFFIX, 'rb') as f:
+            self.assertEqual(f.read(), legacy)
+        self.assertEqual(self._index_size(), 4)
+        reader = io.PacketReader(self.path)
+        self.assertEqual(
+            [p for _, p in reader.read(reader.seek(20))],
+            packets[1:] + [b'fourth'])
+
+        # the converted file is not converted again
+        io.PacketWriter(self.path, fsync_interval=None).close()
+        self.assertEqual(self._read(), packets + [b'fourth'])
+
+    def test_legacy_without_timestamps(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'\x0a\x05firstEND\x0a\x06secondEND')
+        io.PacketWriter(self.path, fsync_interval=None).close()
+        self.assertEqual(self._read(), [b'\x0a\x05first', b'\x0a\x06second'])
+        self.assertEqual(self._index_size(), 0)
@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+from pluto.control.controllable import server
+from pluto.control.controllable import persistence
+from pluto.control.controllable.utils import io
+from pluto.control.controllable.utils import columns
+
+from protos import controller_pb2 as ctl
+
+
+class _MonitorStub(object):
+    def __init__(self):
+        self.summaries = []
+
+    def SessionEnd(self, request, metadata=None):
+        self.summaries.append(request)
+
+
+def _packet(packet_type, dt, returns):
+    # packet of a session that only computes the returns
+    return {
+        'period_start': dt.normalize(),
+        'period_end': dt,
+        'capital_base': 1000.0,
+        packet_type: {
+            'period_open': dt.normalize(),
+            'period_close': dt,
+            'returns': returns},
+        'cumulative_perf': {
+            'period_open': dt.normalize(),
+            'period_close': dt,
+            'returns': returns},
+        'cumulative_risk_metrics': {}}
+
+
+class TestPerformanceWriter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'perf')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_selected_metrics(self):
+        monitor = _MonitorStub()
+        pipeline = persistence.Pipeline()
+        writer = server._PerformanceWriter(
+            'a',
+            monitor,
+            self.path,
+            None,
+            pipeline)
+
+        dt = pd.Timestamp('2016-11-21 21:00', tz='UTC')
+        writer.performance_update(
+            _packet('minute_perf', dt - pd.Timedelta(minutes=1), 0.01), False)
+        writer.performance_update(_packet('daily_perf', dt, 0.02), True)
+        writer.close()
+        pipeline.close()
+        self.assertIsNone(pipeline._error)
+
+        packets = []
+        for _, data in io.PacketReader(self.path).read():
+            packet = ctl.PerformancePacket()
+            packet.ParseFromString(data)
+            packets.append(packet)
+        self.assertEqual(
+            [p.packet_type for p in packets],
+            ['minute_perf', 'daily_perf'])
+        self.assertAlmostEqual(packets[1].period_perf.returns, 0.02)
+        self.assertAlmostEqual(packets[1].cumulative_perf.returns, 0.02)
+        # the metrics that aren't computed keep their default values
+        self.assertEqual(len(packets[1].period_perf.orders), 0)
+        self.assertEqual(packets[1].cumulative_risk_metrics.sharpe, 0)
+        self.assertEqual(len(monitor.summaries), 1)
+
+    def test_columns_flushed_at_session_end(self):
+        pipeline = persistence.Pipeline()
+        column_directory = os.path.join(self.directory, 'columns')
+        writer = server._PerformanceWriter(
+            'a',
+            _MonitorStub(),
+            self.path,
+            None,
+            pipeline,
+            column_writer=columns.ColumnWriter(column_directory))
+
+        dt = pd.Timestamp('2016-11-21 21:00', tz='UTC')
+        writer.performance_update(
+            _packet('minute_perf', dt - pd.Timedelta(minutes=1), 0.01), False)
+        writer.performance_update(_packet('daily_perf', dt, 0.02), False)
+        pipeline.join()
+        # the session is readable before the end of the run
+        self.assertEqual(len(columns.load(column_directory)), 1)
+        self.assertEqual(len(columns.load(column_directory, 'daily_perf')), 1)
+        writer.close()
+        pipeline.close()
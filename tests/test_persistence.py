@@ -0,0 +1,93 @@
+import threading
+import time
+import unittest
+
+from pluto.control.controllable import persistence
+
+
+class TestPipeline(unittest.TestCase):
+    def test_order_and_backpressure(self):
+        pipeline = persistence.Pipeline(capacity=2)
+        started = threading.Event()
+        release = threading.Event()
+        written = []
+
+        def block():
+            started.set()
+            release.wait()
+
+        pipeline.submit(block)
+        started.wait()
+        submitted = []
+
+        def produce():
+            for i in range(5):
+                pipeline.submit(written.append, i)
+                submitted.append(i)
+
+        producer = threading.Thread(target=produce)
+        producer.start()
+        time.sleep(0.1)
+        # blocked by the writer
+        self.assertEqual(len(submitted), 2)
+        self.assertEqual(written, [])
+
+        release.set()
+        producer.join()
+        pipeline.join()
+        self.assertEqual(written, list(range(5)))
+        pipeline.close()
+
+    def test_error(self):
+        pipeline = persistence.Pipeline()
+
+        def fail():
+            raise IOError('disk full')
+
+        pipeline.submit(fail)
+        with self.assertRaises(RuntimeError):
+            pipeline.join()
+        with self.assertRaises(RuntimeError):
+            pipeline.submit(fail)
+        with self.assertRaises(RuntimeError):
+            pipeline.close()
+
+    def test_channels(self):
+        pipeline = persistence.Pipeline()
+        first = pipeline.channel()
+        second = pipeline.channel()
+        written = []
+
+        def fail():
+            raise IOError('disk full')
+
+        first.submit(fail)
+        second.submit(written.append, 1)
+        # the failure of a channel doesn't stop the other ones
+        with self.assertRaises(RuntimeError):
+            first.join()
+        with self.assertRaises(RuntimeError):
+            first.submit(written.append, 2)
+        second.join()
+        second.submit(written.append, 3)
+        second.join()
+        self.assertEqual(written, [1, 3])
+        self.assertIs(first.durability, pipeline.durability)
+        pipeline.close()
+
+    def test_durability(self):
+        now = time.monotonic()
+        none = persistence.Durability(persistence.NONE)
+        self.assertFalse(none.sync_due(now - 10, True))
+
+        batched = persistence.Durability(persistence.BATCHED, interval=1.0)
+        self.assertFalse(batched.sync_due(now, False))
+        self.assertTrue(batched.sync_due(now - 2, False))
+        self.assertTrue(batched.sync_due(now, True))
+
+        session_end = persistence.Durability(persistence.SESSION_END)
+        self.assertFalse(session_end.sync_due(now - 10, False))
+        self.assertTrue(session_end.sync_due(now, True))
+
+        with self.assertRaises(ValueError):
+            persistence.Durability('always')
@@ -0,0 +1,93 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from zipline.assets import Equity, Future, ExchangeInfo
+from zipline.finance import ledger
+from zipline.finance.transaction import Transaction
+
+from pluto.finance import position_book
+
+_STATS = (
+    'longs_count',
+    'shorts_count',
+    'long_value',
+    'short_value',
+    'long_exposure',
+    'short_exposure',
+    'net_value',
+    'gross_value',
+    'net_exposure',
+    'gross_exposure')
+
+
+class FakeDataPortal(object):
+    def __init__(self):
+        self.prices = {}
+        self.batches = 0
+
+    def get_spot_value(self, assets, field, dt, data_frequency):
+        if isinstance(assets, list):
+            self.batches += 1
+            return [self.prices.get(asset, np.nan) for asset in assets]
+        return self.prices.get(assets, np.nan)
+
+    def get_scalar_asset_spot_value(self, asset, field, dt, data_frequency):
+        return self.prices.get(asset, np.nan)
+
+
+class TestPositionBook(unittest.TestCase):
+    def setUp(self):
+        exchange = ExchangeInfo('TEST', 'TEST', 'US')
+        self.assets = [Equity(sid, exchange) for sid in range(20)] + [
+            Future(100 + sid, exchange, multiplier=50.0) for sid in range(3)]
+
+    def test_parity_with_position_tracker(self):
+        random = np.random.RandomState(0)
+        reference = ledger.PositionTracker('minute')
+        book = position_book.PositionBook('minute')
+        data_portal = FakeDataPortal()
+        start = pd.Timestamp('2020-01-02 15:00', tz='UTC')
+        batches = 0
+
+        for i in range(100):
+            dt = start + pd.Timedelta(minutes=i)
+            for _ in range(random.randint(0, 4)):
+                asset = self.assets[random.randint(len(self.assets))]
+                amount = int(random.randint(-50, 50)) or 1
+                if random.rand() < 0.2 and asset in reference.positions:
+                    # close the position
+                    amount = -reference.positions[asset].amount
+                txn = Transaction(asset, amount, dt, random.uniform(10, 20), None)
+                reference.execute_transaction(txn)
+                book.execute_transaction(txn)
+
+            data_portal.prices = {
+                asset: np.nan if random.rand() < 0.1 else random.uniform(10, 20)
+                for asset in self.assets}
+            if book.get_positions():
+                # one call for all the positions
+                batches += 1
+            reference.sync_last_sale_prices(dt, data_portal)
+            book.sync_last_sale_prices(dt, data_portal)
+
+            expected = reference.stats
+            actual = book.stats
+            for name in _STATS:
+                self.assertAlmostEqual(getattr(expected, name), getattr(actual, name))
+
+            views = book.get_positions()
+            self.assertEqual(list(views), list(reference.positions))
+            for asset, position in reference.positions.items():
+                view = views[asset]
+                self.assertEqual(view.amount, position.amount)
+                self.assertAlmostEqual(view.cost_basis, position.cost_basis)
+                self.assertEqual(view.last_sale_price, position.last_sale_price)
+                self.assertEqual(view.last_sale_date, position.last_sale_date)
+
+        # the prices are written back to the positions when they are accessed
+        self.assertEqual(
+            book.get_position_list(),
+            reference.get_position_list())
+        self.assertEqual(data_portal.batches, batches)
@@ -0,0 +1,70 @@
+import unittest
+
+import pandas as pd
+
+from zipline.assets import Equity, ExchangeInfo
+from zipline.finance.order import Order
+from zipline.finance.transaction import Transaction
+
+from pluto.control.controllable import emission
+from pluto.finance import records
+
+
+def _minute_packet(orders, transactions):
+    return {
+        'minute_perf': {'orders': orders, 'transactions': transactions},
+        'cumulative_perf': {}}
+
+
+def _daily_packet(orders, transactions):
+    return {
+        'daily_perf': {'orders': orders, 'transactions': transactions},
+        'cumulative_perf': {}}
+
+
+class TestRecords(unittest.TestCase):
+    def setUp(self):
+        self.asset = Equity(1, ExchangeInfo('TEST', 'TEST', 'US'))
+        self.dt = pd.Timestamp('2020-01-02 15:00', tz='UTC')
+
+    def test_dict_form(self):
+        order = Order(self.dt, self.asset, 10, limit=5.0)
+        record = records.OrderRecord.from_order(order)
+        self.assertEqual(record.to_dict(), order.to_dict())
+        self.assertEqual(record['sid'], self.asset)
+        self.assertEqual(record['limit'], 5.0)
+
+        txn = Transaction(self.asset, 10, self.dt, 4.5, order.id)
+        record = records.TransactionRecord.from_transaction(txn)
+        self.assertEqual(record.to_dict(), txn.to_dict())
+        self.assertEqual(record['order_id'], order.id)
+
+    def test_snapshot(self):
+        order = Order(self.dt, self.asset, 10)
+        record = records.OrderRecord.from_order(order)
+        order.filled = 10
+        self.assertEqual(record.filled, 0)
+        with self.assertRaises(AttributeError):
+            record.filled = 10
+
+    def test_daily_packet_delta(self):
+        order = Order(self.dt, self.asset, 10)
+        first = records.OrderRecord.from_order(order)
+        other = records.OrderRecord.from_order(Order(self.dt, self.asset, 5))
+        txn = records.TransactionRecord.from_transaction(
+            Transaction(self.asset, 10, self.dt, 4.5, order.id))
+
+        emitter = emission.Emitter()
+        emitter.update(_minute_packet([first, other], [txn]), False)
+
+        order.filled = 10
+        last = records.OrderRecord.from_order(order)
+        packet = emitter.update(_daily_packet([last, other], [txn]), True)
+        # only the order that changed since it was emitted is kept
+        self.assertEqual(packet['daily_perf']['orders'], [last])
+        self.assertEqual(packet['daily_perf']['transactions'], [])
+
+        # nothing was emitted during the next session
+        packet = emitter.update(_daily_packet([last, other], [txn]), True)
+        self.assertEqual(packet['daily_perf']['orders'], [last, other])
+        self.assertEqual(packet['daily_perf']['transactions'], [txn])
@@ -0,0 +1,62 @@
+import unittest
+
+import numpy as np
+
+from pluto.finance import returns_buffer
+
+
+class TestReturnsBuffer(unittest.TestCase):
+    def test_growing_buffer(self):
+        buffer = returns_buffer.ReturnsBuffer(capacity=2)
+        for i in range(10):
+            buffer.append(i)
+        np.testing.assert_array_equal(buffer.values, np.arange(10))
+        np.testing.assert_array_equal(buffer.latest(3), [7, 8, 9])
+        self.assertEqual(buffer.count, 10)
+
+    def test_rolling_window(self):
+        buffer = returns_buffer.ReturnsBuffer(maxlen=4)
+        for i in range(11):
+            buffer.append(i)
+        np.testing.assert_array_equal(buffer.values, [7, 8, 9, 10])
+        self.assertEqual(len(buffer), 4)
+        self.assertEqual(buffer.count, 11)
+        self.assertEqual(buffer.popleft(), 7)
+        buffer.append(11)
+        np.testing.assert_array_equal(buffer.values, [8, 9, 10, 11])
+
+    def test_views_are_read_only(self):
+        buffer = returns_buffer.ReturnsBuffer(maxlen=4)
+        buffer.append(1.0)
+        with self.assertRaises(ValueError):
+            buffer.values[0] = 2.0
+
+    def test_serialization(self):
+        buffer = returns_buffer.ReturnsBuffer(maxlen=4)
+        for i in range(6):
+            buffer.append(i / 8.0)
+        restored = returns_buffer.ReturnsBuffer.from_bytes(
+            buffer.to_bytes(),
+            buffer.count,
+            maxlen=4)
+        np.testing.assert_array_equal(restored.values, buffer.values)
+        self.assertEqual(restored.count, 6)
+        restored.append(1.0)
+        np.testing.assert_array_equal(restored.values, [0.375, 0.5, 0.625, 1.0])
+
+    def test_extend(self):
+        buffer = returns_buffer.ReturnsBuffer(capacity=2)
+        buffer.append(0)
+        buffer.extend(np.arange(1, 10))
+        np.testing.assert_array_equal(buffer.values, np.arange(10))
+        self.assertEqual(buffer.count, 10)
+        buffer.append(10)
+        np.testing.assert_array_equal(buffer.latest(2), [9, 10])
+
+        window = returns_buffer.ReturnsBuffer(maxlen=4)
+        window.extend(np.arange(3))
+        window.extend(np.arange(3, 9))
+        np.testing.assert_array_equal(window.values, [5, 6, 7, 8])
+        self.assertEqual(window.count, 9)
+        window.append(9)
+        np.testing.assert_array_equal(window.values, [6, 7, 8, 9])
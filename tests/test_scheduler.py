@@ -0,0 +1,108 @@
+import unittest
+
+from pluto.control.loop import scheduler
+
+_MINUTE = 60 * 1000000000
+
+
+class FakeTimeSource(object):
+    '''Time source that only moves forward when waiting or when advanced
+    explicitly.'''
+
+    def __init__(self, utc=0, monotonic=0):
+        self.monotonic = monotonic
+        self.base = utc - monotonic
+
+    def monotonic_ns(self):
+        return self.monotonic
+
+    def time_ns(self):
+        return self.monotonic + self.base
+
+    def wait(self, event, timeout):
+        if event.is_set():
+            return True
+        self.monotonic += int(timeout * 1000000000)
+        return False
+
+    def advance(self, nanos):
+        self.monotonic += nanos
+
+
+class TestScheduler(unittest.TestCase):
+    def test_ticks_are_anchored(self):
+        time_source = FakeTimeSource(utc=_MINUTE * 10 + 123, monotonic=7)
+        sch = scheduler.Scheduler(60, time_source=time_source)
+        sch.start()
+
+        ticks = []
+        for _ in range(5):
+            ticks.append(sch.next_tick())
+            # some work during the tick
+            time_source.advance(_MINUTE // 3)
+
+        self.assertEqual(ticks, [_MINUTE * k for k in range(11, 16)])
+        self.assertEqual(sch.stats.count, 5)
+        self.assertEqual(sch.stats.max, 0)
+
+    def test_catch_up(self):
+        time_source = FakeTimeSource()
+        sch = scheduler.Scheduler(60, scheduler.CATCH_UP, time_source)
+        sch.start(anchor=_MINUTE)
+
+        self.assertEqual(sch.next_tick(), _MINUTE)
+        # the tick overruns by two and a half periods
+        time_source.advance(_MINUTE * 5 // 2)
+
+        self.assertEqual(sch.next_tick(), _MINUTE * 2)
+        self.assertEqual(sch.next_tick(), _MINUTE * 3)
+        self.assertEqual(sch.next_tick(), _MINUTE * 4)
+        self.assertEqual(sch.stats.max, _MINUTE * 3 // 2)
+        self.assertEqual(sch.stats.skipped, 0)
+
+    def test_skip(self):
+        time_source = FakeTimeSource()
+        sch = scheduler.Scheduler(60, scheduler.SKIP, time_source)
+        sch.start(anchor=_MINUTE)
+
+        self.assertEqual(sch.next_tick(), _MINUTE)
+        time_source.advance(_MINUTE * 5 // 2)
+
+        self.assertEqual(sch.next_tick(), _MINUTE * 3)
+        self.assertEqual(sch.next_tick(), _MINUTE * 4)
+        self.assertEqual(sch.stats.skipped, 1)
+        self.assertEqual(sch.stats.max, _MINUTE // 2)
+
+    def test_offset(self):
+        time_source = FakeTimeSource()
+        offsets = [2.0, 4.0]
+        estimator = scheduler.OffsetEstimator(
+            lambda: offsets.pop(0),
+            smoothing=0.5)
+        estimator.update()
+        self.assertEqual(estimator.offset_ns, 2 * 1000000000)
+
+        sch = scheduler.Scheduler(
+            60,
+            time_source=time_source,
+            offset_estimator=estimator)
+        sch.start(anchor=_MINUTE)
+        self.assertEqual(sch.next_tick(), _MINUTE)
+        self.assertEqual(time_source.time_ns(), _MINUTE - 2 * 1000000000)
+
+        # the reference clock moved ahead, so the next tick is emitted
+        # earlier on the local clock.
+        estimator.update()
+        self.assertEqual(estimator.offset_ns, 3 * 1000000000)
+        self.assertEqual(sch.next_tick(), _MINUTE * 2)
+        self.assertEqual(time_source.time_ns(), _MINUTE * 2 - 3 * 1000000000)
+
+        # failed requests keep the current estimate
+        estimator.update()
+        self.assertEqual(estimator.offset_ns, 3 * 1000000000)
+
+    def test_stop(self):
+        sch = scheduler.Scheduler(60, time_source=FakeTimeSource())
+        sch.start()
+        sch.stop()
+        self.assertIsNone(sch.next_tick())
@@ -0,0 +1,81 @@
+import unittest
+
+import pandas as pd
+
+from pluto.control.clock import clock, timeline
+from pluto.control.clock.utils import get_events
+from pluto.trading_calendars import calendar_utils as cu
+
+
+class TestTimeline(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # thanksgiving: XNYS is closed on the 24th and closes early on the
+        # 25th, XLON trades as usual
+        cls.start = pd.Timestamp('2016-11-22', tz='UTC')
+        cls.end = pd.Timestamp('2016-11-29', tz='UTC')
+        cls.exchanges = ['XNYS', 'XLON']
+        calendar = cu.get_calendar_in_range('24/7', cls.start, cls.end)
+        cls.events = get_events(
+            calendar,
+            calendar.all_sessions,
+            minute_emission=True,
+            frequency='minute')
+
+    def _clock_signals(self):
+        # signals of the clocks updated on every tick
+        clocks = [clock.Clock(exchange, self.start, self.end)
+                  for exchange in self.exchanges]
+        remaining = {cl.exchange: len(cl.events()) for cl in clocks}
+        result = []
+        for ts, evt in zip(self.events['timestamp'].tolist(),
+                           self.events['event'].tolist()):
+            signals = []
+            for cl in clocks:
+                signal = cl.update(pd.Timestamp(ts, tz='UTC'))
+                if signal:
+                    sts, _, exchange = signal
+                    # a clock keeps returning its last event once it is
+                    # exhausted
+                    if remaining[exchange]:
+                        remaining[exchange] -= 1
+                        signals.append((sts.value, evt, exchange))
+            result.append(signals)
+        return result
+
+    def test_parity(self):
+        tl = timeline.Timeline(self.events)
+        for exchange in self.exchanges:
+            tl.add_exchange(
+                exchange,
+                clock.Clock(exchange, self.start, self.end).events())
+
+        expected = self._clock_signals()
+        compiled = [
+            [(s.nanos, s.event, s.exchange) for s in tl.emit(tick, evt)]
+            for tick, _, evt in tl]
+
+        self.assertEqual(len(compiled), len(expected))
+        self.assertEqual(compiled, expected)
+        # both exchanges emitted all their events
+        self.assertEqual(
+            sum(len(signals) for signals in compiled),
+            sum(len(clock.Clock(exchange, self.start, self.end).events())
+                for exchange in self.exchanges))
+
+    def test_add_exchange_while_running(self):
+        tl = timeline.Timeline(self.events)
+        tl.add_exchange('XNYS', clock.Clock('XNYS', self.start, self.end).events())
+        ticks = iter(tl)
+        for tick, _, evt in ticks:
+            tl.emit(tick, evt)
+            if tick == 1000:
+                break
+        # the new exchange starts emitting on the next tick
+        tl.add_exchange('XLON', clock.Clock('XLON', self.start, self.end).events())
+        signals = [(tick, s) for tick, _, evt in ticks for s in tl.emit(tick, evt)]
+        xlon = [tick for tick, s in signals if s.exchange == 'XLON']
+        self.assertEqual(xlon[0], 1001)
+        self.assertEqual(
+            len(xlon),
+            len(clock.Clock('XLON', self.start, self.end).events()))
@@ -0,0 +1,216 @@
+import io
+import threading
+import unittest
+from unittest import mock
+
+from pluto.control.controllable import worker
+from pluto.control.modes.processes import worker_pool
+
+
+class _Aborted(Exception):
+    pass
+
+
+class _Context(object):
+    def __init__(self, metadata):
+        self._metadata = metadata
+        self.code = None
+
+    def invocation_metadata(self):
+        return self._metadata
+
+    def abort(self, code, details):
+        self.code = code
+        raise _Aborted(details)
+
+
+class _Service(object):
+    def __init__(self):
+        self.calls = []
+        self.restored = []
+
+    def Initialize(self, request, context):
+        self.calls.append(('Initialize', request))
+
+    def ClockUpdate(self, request, context):
+        self.calls.append(('ClockUpdate', request))
+
+    def Stop(self, request, context):
+        self.calls.append(('Stop', request))
+
+    def restore_state(self, session_id):
+        self.restored.append(session_id)
+
+
+class _WorkerService(worker.WorkerService):
+    def __init__(self):
+        super(_WorkerService, self).__init__(None, None, None, None)
+
+    def _create_service(self):
+        return _Service()
+
+
+class TestWorkerService(unittest.TestCase):
+    def test_routing(self):
+        service = _WorkerService()
+        a = _Context((('session_id', 'a'),))
+        b = _Context((('session_id', 'b'),))
+        service.Initialize('init-a', a)
+        service.Initialize('init-b', b)
+        service.ClockUpdate('event', b)
+
+        services = service._services
+        self.assertEqual(set(service.session_ids), {'a', 'b'})
+        self.assertEqual(services['a'].calls, [('Initialize', 'init-a')])
+        self.assertEqual(
+            services['b'].calls,
+            [('Initialize', 'init-b'), ('ClockUpdate', 'event')])
+
+        stopped = services['a']
+        service.Stop('stop', a)
+        self.assertEqual(stopped.calls[-1], ('Stop', 'stop'))
+        self.assertEqual(set(service.session_ids), {'b'})
+
+    def test_abort(self):
+        service = _WorkerService()
+        context = _Context(())
+        with self.assertRaises(_Aborted):
+            service.Initialize('init', context)
+        self.assertEqual(context.code, worker.grpc.StatusCode.INVALID_ARGUMENT)
+
+        context = _Context((('session_id', 'a'),))
+        with self.assertRaises(_Aborted):
+            service.ClockUpdate('event', context)
+        self.assertEqual(context.code, worker.grpc.StatusCode.NOT_FOUND)
+
+    def test_restore_state(self):
+        service = _WorkerService()
+        service.restore_state('a')
+        restored = service._services['a']
+        self.assertEqual(restored.restored, ['a'])
+        # calls are routed to the restored session
+        service.ClockUpdate('event', _Context((('session_id', 'a'),)))
+        self.assertEqual(restored.calls, [('ClockUpdate', 'event')])
+
+
+class _Stub(object):
+    def __init__(self):
+        self.metadata = None
+
+    def ClockUpdate(self, request, metadata=None):
+        self.metadata = metadata
+        return request
+
+
+class _Process(object):
+    def terminate(self):
+        pass
+
+
+class _Worker(worker_pool._Worker):
+    def _start(self, framework_id, framework_url, root_dir):
+        self._process = _Process()
+        self._stub = _Stub()
+
+
+class TestWorkerPool(unittest.TestCase):
+    def test_session_metadata(self):
+        stub = _Stub()
+        session_stub = worker_pool._SessionStub(stub, 'a')
+        self.assertEqual(session_stub.ClockUpdate('event', ()), 'event')
+        self.assertIn(('session_id', 'a'), stub.metadata)
+
+    def test_least_loaded(self):
+        factory = worker_pool.WorkerPoolProcessFactory(2)
+        factory._workers = workers = [_Worker(), _Worker()]
+
+        processes = [
+            factory._create_process('url', session_id, 'root')
+            for session_id in ('a', 'b', 'c')]
+        self.assertEqual([w.load for w in workers], [2, 1])
+        self.assertIs(processes[0]._worker, workers[0])
+        self.assertIs(processes[1]._worker, workers[1])
+
+        # a stopped session frees its place
+        processes[0]._stop()
+        processes[2]._stop()
+        self.assertEqual([w.load for w in workers], [0, 1])
+        self.assertIs(
+            factory._create_process('url', 'd', 'root')._worker,
+            workers[0])
+
+        factory.shutdown()
+        self.assertEqual([w.load for w in workers], [0, 0])
+
+    def test_start_outside_pool_lock(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        class _SlowWorker(_Worker):
+            def _start(self, framework_id, framework_url, root_dir):
+                started.set()
+                release.wait()
+                super(_SlowWorker, self)._start(framework_id, framework_url, root_dir)
+
+        factory = worker_pool.WorkerPoolProcessFactory(2)
+        factory._workers = workers = [_SlowWorker(), _Worker()]
+        thread = threading.Thread(
+            target=factory._create_process,
+            args=('url', 'a', 'root'))
+        thread.daemon = True
+        thread.start()
+        self.assertTrue(started.wait(1))
+        # the other worker takes sessions while the first one is starting
+        process = factory._create_process('url', 'b', 'root')
+        self.assertIs(process._worker, workers[1])
+        process._stop()
+        release.set()
+        thread.join(1)
+        self.assertEqual([w.load for w in workers], [1, 0])
+
+    def test_options_and_recovery(self):
+        factory = worker_pool.WorkerPoolProcessFactory(
+            2,
+            recovery=('a',),
+            queue_policy='coalesce',
+            columnar=True)
+        workers = factory._workers
+        self.assertEqual([w.load for w in workers], [1, 0])
+
+        commands = []
+
+        class _Popen(object):
+            def __init__(self, command, stdout=None):
+                commands.append(command)
+                self.stdout = io.BytesIO(b'5000\n')
+
+            def terminate(self):
+                pass
+
+        with mock.patch.object(worker_pool.subprocess, 'Popen', _Popen):
+            # the recovered session goes to the worker that restores it
+            self.assertIs(
+                factory._create_process('url', 'a', 'root')._worker,
+                workers[0])
+            self.assertIs(
+                factory._create_process('url', 'b', 'root')._worker,
+                workers[1])
+        recovered, started = commands
+        self.assertEqual(recovered[-2:], ['--recovery', 'a'])
+        self.assertNotIn('--recovery', started)
+        for command in commands:
+            self.assertIn('--columnar', command)
+            i = command.index('--queue-policy')
+            self.assertEqual(command[i + 1], 'coalesce')
+        factory.shutdown()
+
+    def test_max_sessions(self):
+        factory = worker_pool.WorkerPoolProcessFactory(2, max_sessions=1)
+        factory._workers = workers = [_Worker(), _Worker()]
+        factory._create_process('url', 'a', 'root')
+        factory._create_process('url', 'b', 'root')
+        with self.assertRaises(RuntimeError):
+            factory._create_process('url', 'c', 'root')
+        self.assertEqual([w.load for w in workers], [1, 1])
+        # the rpc server of a worker has a thread per stream
+        self.assertGreaterEqual(worker.server_threads(16), 2 * 16)